@@ -0,0 +1,9 @@
+"""
+Benchmarks de performance de Gestion Budget.
+
+    python -m benchmarks --scale medium --repeat 3
+
+génère une base synthétique (benchmarks.generator), chronomètre les moteurs
+de calcul (benchmarks.runner) et ajoute les résultats à l'historique
+benchmarks/results/history.jsonl et history.csv.
+"""
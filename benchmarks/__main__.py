@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+
+# Les modules de l'application sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generator import SCALES, generate_database  # noqa: E402
+from benchmarks.runner import SCENARIOS, append_history, format_results, run_benchmarks  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Chronomètre les moteurs de calcul sur une base synthétique.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small",
+                        help="échelle prédéfinie de la base générée (défaut : small)")
+    for option, valeur in SCALES["small"].items():
+        parser.add_argument(f"--{option.replace('_', '-')}", type=int, dest=option, default=None,
+                            help=f"remplace la valeur de l'échelle (small : {valeur})")
+    parser.add_argument("--seed", type=int, default=42, help="graine du générateur")
+    parser.add_argument("--db", help="base existante à utiliser au lieu d'en générer une")
+    parser.add_argument("--keep-db", help="chemin où conserver la base générée")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scénario à exécuter (répétable, tous par défaut)")
+    parser.add_argument("--repeat", type=int, default=3, help="nombre d'exécutions par scénario")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="dossier de l'historique JSON/CSV")
+    parser.add_argument("--check", action="store_true",
+                        help="vérifie la cohérence des calculs avec le compte de résultat au lieu de chronométrer")
+    args = parser.parse_args(argv)
+
+    scale_name = args.scale
+    if args.db:
+        db_path = args.db
+        scale_name = "custom"
+    else:
+        params = dict(SCALES[args.scale])
+        for option in params:
+            if getattr(args, option) is not None:
+                params[option] = getattr(args, option)
+                scale_name = "custom"
+        db_path = args.keep_db or os.path.join(args.output, f"bench_{args.scale}.db")
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        print(f"Génération de la base synthétique ({scale_name}) : {db_path}")
+        generate_database(db_path, seed=args.seed, **params)
+
+    if args.check:
+        from benchmarks.consistency import run_checks
+        ecarts = run_checks(db_path)
+        print("\n".join(ecarts) if ecarts else "Aucun écart avec le compte de résultat")
+        return 1 if ecarts else 0
+
+    results = run_benchmarks(db_path, args.scenario, args.repeat, scale_name)
+    print(format_results(results))
+    append_history(results, args.output)
+    return 1 if any(r.get("error") for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Vérification de cohérence des calculs en mémoire avec le compte de résultat.
+
+Le CIR de cir_calculation (fiche projet, tableau de bord, simulations) doit
+être celui que CompteResultatDisplay affiche pour le même projet et la même
+année, et chaque ligne du pack de rapports (report_pack) celle de l'écran
+pour la même sélection. Les écarts sont listés, un par ligne et par période.
+
+    python -m benchmarks --check [--db base.db]
+"""
+
+import os
+import shutil
+import tempfile
+from typing import List
+
+import database
+
+# Écart toléré (arrondis), en euros
+TOLERANCE = 0.01
+
+# Lignes de collect_period_data calculées par le pack de rapports
+_PACK_KEYS = (
+    "recettes", "subventions", "achats_sous_traitance", "autres_achats", "cout_direct",
+    "nb_jours_total", "dotation_amortissements", "credit_impot",
+)
+
+
+def _display(project_ids, years, granularity='yearly', cost_type='montant_charge'):
+    """CompteResultatDisplay sans fenêtre, configuré comme par show_compte_resultat."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from benchmarks.runner import _qt_application
+    from compte_resultat_display import CompteResultatDisplay
+
+    _qt_application()
+    display = CompteResultatDisplay.__new__(CompteResultatDisplay)
+    display.parent = None
+    display.config_data = {}
+    display.project_ids = list(project_ids)
+    display.years = list(years)
+    display.period_type = 'multiple_years'
+    display.granularity = granularity
+    display.cost_type = cost_type
+    display.has_cir_projects = display.check_cir_projects()
+    return display
+
+
+def check_cir() -> List[str]:
+    """Compare, par projet CIR et par année, calculate_cir_breakdown au CIR du compte de résultat."""
+    from cir_calculation import calculate_cir_breakdown
+
+    ecarts = []
+    conn = database.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, code FROM projets WHERE cir = 1 ORDER BY id")
+        for projet_id, code in cursor.fetchall():
+            breakdown = calculate_cir_breakdown(cursor, projet_id)
+            if breakdown is None:
+                continue
+            display = _display([projet_id], breakdown['annees'])
+            for annee, cir in zip(breakdown['annees'], breakdown['cir_annuel']):
+                reference = display.calculate_distributed_cir(cursor, annee)
+                if abs(reference - cir) > TOLERANCE:
+                    ecarts.append(f"CIR {code} {annee} : compte de résultat {reference:.2f}, "
+                                  f"cir_calculation {cir:.2f}")
+    finally:
+        conn.close()
+    return ecarts
+
+
+def check_report_pack(cost_type: str = 'cout_production') -> List[str]:
+    """
+    Compare, en annuel et en mensuel, les données du pack de rapports à
+    collect_financial_data : compte consolidé de tous les projets, puis
+    compte de chaque projet.
+    """
+    from report_pack import ReportPackData
+
+    conn = database.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM projets ORDER BY id")
+        project_ids = [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+    pack = ReportPackData(project_ids, cost_type)
+    years = sorted({annee for projet in pack.projects for annee in projet.mois_actifs})
+    if not years:
+        return []
+
+    ecarts = []
+    selections = [("Consolidé", pack.projects)] + [(projet.code, [projet]) for projet in pack.projects]
+    for granularity in ('yearly', 'monthly'):
+        for label, projects in selections:
+            display = _display([projet.projet_id for projet in projects], years, granularity, cost_type)
+            reference = display.collect_financial_data()
+            calcul = pack.period_data(projects, years, granularity)
+            for periode in sorted(set(reference) | set(calcul)):
+                for key in _PACK_KEYS:
+                    attendu = reference.get(periode, {}).get(key, 0) or 0
+                    obtenu = calcul.get(periode, {}).get(key, 0) or 0
+                    if abs(attendu - obtenu) > TOLERANCE:
+                        ecarts.append(f"Pack {label} {periode} {key} : compte de résultat {attendu:.2f}, "
+                                      f"pack {obtenu:.2f}")
+    return ecarts
+
+
+def run_checks(db_path: str) -> List[str]:
+    """
+    Toutes les vérifications sur une copie de la base `db_path`, mise à jour
+    par database.init_db() comme au démarrage de l'application.
+    """
+    from benchmarks.runner import _using_database
+
+    with tempfile.TemporaryDirectory(prefix="gestion_budget_check_") as workdir:
+        work_db = os.path.join(workdir, "check.db")
+        shutil.copyfile(db_path, work_db)
+        with _using_database(work_db):
+            database.init_db()
+            return check_cir() + check_report_pack()
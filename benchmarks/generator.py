@@ -0,0 +1,169 @@
+"""
+Génération de bases `gestion_budget.db` synthétiques pour les benchmarks.
+
+Le schéma est celui de database.init_db() ; seules les données sont
+fabriquées, de façon déterministe (graine fixe) pour que deux exécutions
+à la même échelle soient comparables.
+"""
+
+import os
+import random
+from typing import Dict
+
+import database
+from category_utils import DEFAULT_CATEGORIES
+from month_utils import MOIS_FR
+
+# Échelles prédéfinies : nombre de projets, années couvertes, membres par
+# projet, lignes de dépenses par mois, investissements et subventions par
+# projet, nombre de projets CIR
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": dict(projects=20, years=3, members=4, expenses_per_month=1,
+                  investments=1, subventions=1, cir_projects=5),
+    "medium": dict(projects=150, years=5, members=6, expenses_per_month=2,
+                   investments=2, subventions=1, cir_projects=40),
+    "large": dict(projects=1000, years=8, members=8, expenses_per_month=3,
+                  investments=3, subventions=2, cir_projects=300),
+}
+
+DIRECTIONS = ["SIM", "ING", "EXP", "GPI", "DCI", "DGE"]
+THEMES = ["Transition agricole", "Numérique", "Qualité des eaux", "Énergie",
+          "Biodiversité", "Hydraulique", "Sols", "Climat"]
+FIRST_YEAR = 2020
+
+
+def _mm_yyyy(annee: int, mois: int) -> str:
+    return f"{mois:02d}/{annee}"
+
+
+def generate_database(path: str, projects: int = 20, years: int = 3, members: int = 4,
+                      expenses_per_month: int = 1, investments: int = 1, subventions: int = 1,
+                      cir_projects: int = 5, seed: int = 42, code_prefix: str = "B") -> str:
+    """
+    Crée une base synthétique à `path` (écrasée si elle existe) et retourne
+    son chemin. Les projets ont des durées de 1 à `years` ans réparties sur
+    la fenêtre FIRST_YEAR .. FIRST_YEAR + years - 1 ; leurs codes commencent
+    par `code_prefix`.
+    """
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+
+    previous_path = database.DB_PATH
+    database.DB_PATH = path
+    try:
+        database.init_db()
+        conn = database.get_connection()
+        try:
+            cursor = conn.cursor()
+            _populate(cursor, rng, projects, years, members, expenses_per_month,
+                      investments, subventions, cir_projects, code_prefix)
+            database.refresh_amortissements(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+    finally:
+        database.DB_PATH = previous_path
+    return path
+
+
+def _populate(cursor, rng, projects, years, members, expenses_per_month,
+              investments, subventions, cir_projects, code_prefix):
+    last_year = FIRST_YEAR + years - 1
+
+    cursor.executemany("INSERT INTO directions (nom) VALUES (?)", [(d,) for d in DIRECTIONS])
+    cursor.executemany("INSERT INTO themes (nom) VALUES (?)", [(t,) for t in THEMES])
+    cursor.executemany(
+        "INSERT INTO chefs_projet (nom, prenom, direction) VALUES (?, ?, ?)",
+        [(f"CHEF{i}", f"Prénom{i}", DIRECTIONS[i % len(DIRECTIONS)]) for i in range(10)],
+    )
+
+    for annee in range(FIRST_YEAR, last_year + 1):
+        cursor.execute("INSERT INTO cir_coeffs (annee, k1, k2, k3) VALUES (?, 1.43, 1.75, 0.3)", (annee,))
+        for i, (code, libelle) in enumerate(DEFAULT_CATEGORIES):
+            charge = 200 + 50 * i
+            cursor.execute(
+                "INSERT INTO categorie_cout (annee, categorie, libelle, montant_charge, cout_production, cout_complet) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (annee, code, libelle, charge, charge * 1.3, charge * 1.6),
+            )
+
+    labels = [libelle for _, libelle in DEFAULT_CATEGORIES]
+    for p in range(projects):
+        debut_annee = rng.randint(FIRST_YEAR, last_year)
+        debut_mois = rng.randint(1, 12)
+        duree_mois = rng.randint(6, 12 * years)
+        fin_index = min(debut_annee * 12 + debut_mois - 1 + duree_mois - 1, last_year * 12 + 11)
+        fin_annee, fin_mois = divmod(fin_index, 12)
+        fin_mois += 1
+        is_cir = 1 if p < cir_projects else 0
+
+        cursor.execute(
+            "INSERT INTO projets (code, nom, details, date_debut, date_fin, livrables, chef, etat, cir, "
+            "subvention, theme_principal) VALUES (?, ?, ?, ?, ?, ?, ?, 'En cours', ?, ?, ?)",
+            (f"{code_prefix}{p:05d}", f"Projet synthétique {code_prefix}{p}", f"Étude de performance numéro {p}",
+             _mm_yyyy(debut_annee, debut_mois), _mm_yyyy(fin_annee, fin_mois),
+             "Rapport final", rng.randint(1, 10), is_cir, 1 if subventions else 0,
+             THEMES[p % len(THEMES)]),
+        )
+        pid = cursor.lastrowid
+        cursor.execute("INSERT INTO projet_themes (projet_id, theme_id) VALUES (?, ?)",
+                       (pid, p % len(THEMES) + 1))
+
+        equipe = [(labels[rng.randrange(len(labels))], DIRECTIONS[rng.randrange(len(DIRECTIONS))])
+                  for _ in range(members)]
+        for categorie, direction in equipe:
+            cursor.execute("INSERT INTO equipe (projet_id, type, nombre, direction) VALUES (?, ?, 1, ?)",
+                           (pid, categorie, direction))
+
+        temps, depenses, autres, recettes = [], [], [], []
+        for index in range(debut_annee * 12 + debut_mois - 1, fin_index + 1):
+            annee, mois = divmod(index, 12)
+            nom_mois = MOIS_FR[mois]
+            for m, (categorie, direction) in enumerate(equipe):
+                temps.append((pid, annee, direction, categorie, f"{direction}_{categorie}_{m}",
+                              nom_mois, round(rng.uniform(1, 15), 1)))
+            for ligne in range(expenses_per_month):
+                depenses.append((pid, annee, f"Ligne {ligne + 1}", nom_mois,
+                                 round(rng.uniform(100, 5000), 2), "Prestation"))
+                autres.append((pid, annee, ligne, nom_mois, round(rng.uniform(50, 1500), 2), "Fournitures"))
+            if mois % 6 == 5:
+                recettes.append((pid, annee, 0, nom_mois, round(rng.uniform(1000, 20000), 2), "Facture"))
+        cursor.executemany(
+            "INSERT INTO temps_travail (projet_id, annee, direction, categorie, membre_id, mois, jours) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", temps)
+        cursor.executemany(
+            "INSERT INTO depenses (projet_id, annee, categorie, mois, montant, detail) VALUES (?, ?, ?, ?, ?, ?)",
+            depenses)
+        cursor.executemany(
+            "INSERT INTO autres_depenses (projet_id, annee, ligne_index, mois, montant, detail) "
+            "VALUES (?, ?, ?, ?, ?, ?)", autres)
+        cursor.executemany(
+            "INSERT INTO recettes (projet_id, annee, ligne_index, mois, montant, detail) VALUES (?, ?, ?, ?, ?, ?)",
+            recettes)
+
+        for i in range(investments):
+            cursor.execute(
+                "INSERT INTO investissements (projet_id, nom, montant, date_achat, duree) VALUES (?, ?, ?, ?, ?)",
+                (pid, f"Équipement {i + 1}", round(rng.uniform(2000, 80000), 2),
+                 _mm_yyyy(debut_annee, debut_mois), rng.randint(3, 5)),
+            )
+
+        for i in range(subventions):
+            cursor.execute(
+                "INSERT INTO subventions (projet_id, nom, depenses_temps_travail, coef_temps_travail, "
+                "depenses_externes, coef_externes, depenses_autres_achats, coef_autres_achats, "
+                "depenses_dotation_amortissements, coef_dotation_amortissements, cd, taux, "
+                "depenses_eligibles_max, montant_subvention_max, mode_simplifie, montant_forfaitaire, "
+                "date_debut_subvention, date_fin_subvention) "
+                "VALUES (?, ?, 1, 1.0, 1, 1.0, 1, 1.0, 1, 1.0, 1.2, ?, 0, 0, 0, 0, ?, ?)",
+                (pid, f"Financeur {i + 1}", rng.choice([25.0, 40.0, 50.0]),
+                 _mm_yyyy(debut_annee, debut_mois), _mm_yyyy(fin_annee, fin_mois)),
+            )
+
+        cursor.execute("INSERT INTO actualites (projet_id, message, date) VALUES (?, ?, ?)",
+                       (pid, f"Point d'avancement du projet {p}", f"{debut_annee}-{debut_mois:02d}-01 09:00"))
+        cursor.execute(
+            "INSERT INTO taches (projet_id, nom, date_debut, date_fin, details) VALUES (?, ?, ?, ?, ?)",
+            (pid, "Lot 1", _mm_yyyy(debut_annee, debut_mois), _mm_yyyy(fin_annee, fin_mois), "Analyse"),
+        )
@@ -0,0 +1,275 @@
+"""
+Exécution chronométrée des moteurs de calcul sur une base synthétique.
+
+Chaque scénario est exécuté `repeat` fois sur une copie fraîche de la base
+(la copie n'est pas chronométrée). Les dialogues Qt sont instanciés sans
+affichage (plateforme « offscreen ») et leurs boîtes de message sont
+neutralisées le temps de la mesure.
+"""
+
+import csv
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import database
+
+# Champs écrits dans l'historique CSV
+CSV_FIELDS = ["timestamp", "scale", "scenario", "runs", "min_s", "median_s", "max_s", "python", "platform"]
+
+
+@contextmanager
+def _using_database(path: str):
+    """Redirige database.get_connection vers `path` le temps du bloc."""
+    from category_utils import invalidate_category_cache
+
+    previous_path = database.DB_PATH
+    database.DB_PATH = path
+    # Les caches de catégories et de taux sont propres à chaque base
+    invalidate_category_cache()
+    try:
+        yield
+    finally:
+        database.DB_PATH = previous_path
+        invalidate_category_cache()
+
+
+@contextmanager
+def _silent_message_boxes():
+    """Remplace les boîtes de message modales par des réponses immédiates."""
+    from PyQt6.QtWidgets import QMessageBox
+
+    names = ("information", "warning", "critical", "question")
+    originals = {name: getattr(QMessageBox, name) for name in names}
+    for name in names:
+        setattr(QMessageBox, name, staticmethod(lambda *args, **kwargs: QMessageBox.StandardButton.Yes))
+    try:
+        yield
+    finally:
+        for name, original in originals.items():
+            setattr(QMessageBox, name, original)
+
+
+# QApplication des scénarios Qt, gardée jusqu'à la fin du processus : sans
+# référence, elle serait détruite avant la création des dialogues
+_app = None
+
+
+def _qt_application():
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    if _app is None:
+        _app = QApplication.instance() or QApplication([])
+    return _app
+
+
+def _project_scope(cursor):
+    cursor.execute("SELECT id FROM projets ORDER BY id")
+    project_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT MIN(annee), MAX(annee) FROM temps_travail")
+    first, last = cursor.fetchone()
+    years = list(range(first, last + 1)) if first else []
+    return project_ids, years
+
+
+# ----------------------------------------------------------------------
+# Scénarios : chacun reçoit le chemin de la copie de travail et retourne
+# une fonction sans argument, seule partie chronométrée.
+# ----------------------------------------------------------------------
+def _collect_financial_data(db_path):
+    from compte_resultat_display import CompteResultatDisplay
+
+    conn = database.get_connection()
+    project_ids, years = _project_scope(conn.cursor())
+    conn.close()
+    display = CompteResultatDisplay.__new__(CompteResultatDisplay)
+    display.config_data = {}
+    display.project_ids = project_ids
+    display.years = years
+    display.period_type = 'multiple_years'
+    display.granularity = 'yearly'
+    display.cost_type = 'cout_production'
+    display.has_cir_projects = display.check_cir_projects()
+    return display.collect_financial_data
+
+
+def _collect_jours_data(db_path):
+    from bilan_jours_display import BilanJoursDisplay
+
+    conn = database.get_connection()
+    project_ids, years = _project_scope(conn.cursor())
+    conn.close()
+    display = BilanJoursDisplay.__new__(BilanJoursDisplay)
+    display.config_data = {}
+    display.project_ids = project_ids
+    display.years = years
+    display.period_type = 'multiple_years'
+    display.granularity = 'monthly'
+    return display.collect_jours_data
+
+
+def _recalculate_all_subventions(db_path):
+    return database.recalculate_all_subventions
+
+
+def _merge_databases(db_path):
+    from benchmarks.generator import generate_database
+    from import_export_dialog import ImportExportDialog
+
+    _qt_application()
+    conn = database.get_connection()
+    project_ids, years = _project_scope(conn.cursor())
+    conn.close()
+    # Base source distincte (autres codes, autre graine) de même taille : la
+    # fusion insère réellement des projets au lieu de heurter des doublons
+    source = generate_database(db_path + ".source", projects=len(project_ids),
+                               years=max(len(years), 1), seed=7, code_prefix="F")
+    dialog = ImportExportDialog()
+    return lambda: dialog.merge_databases(source, db_path)
+
+
+def _import_excel_modele(db_path):
+    import pandas as pd
+    from import_modele_excel_dialog import ImportExcelModeleDialog
+    from month_utils import MOIS_FR
+
+    _qt_application()
+    conn = database.get_connection()
+    projet_id = conn.execute("SELECT MIN(id) FROM projets").fetchone()[0]
+    conn.close()
+
+    dialog = ImportExcelModeleDialog(None, projet_id)
+    dialog.data_temps = pd.DataFrame(
+        [[2030, "SIM", "Expert", f"SIM_Expert_{m}", mois, 10.5]
+         for m in range(20) for mois in MOIS_FR],
+        columns=["Année", "Direction", "Catégorie", "Membre ID", "Mois", "Jours"])
+    montants = pd.DataFrame(
+        [[2030, mois, f"Ligne {i}", 1000.0] for i in range(10) for mois in MOIS_FR],
+        columns=["Année", "Mois", "Libellé", "Montant"])
+    dialog.data_depenses = montants.copy()
+    dialog.data_autres = montants.copy()
+    dialog.data_recettes = montants.copy()
+    return dialog.import_data
+
+
+def _budget_edit_save(db_path):
+    from PyQt6.QtWidgets import QPushButton
+    from budget_edit_dialog import BudgetEditDialog
+
+    _qt_application()
+    conn = database.get_connection()
+    projet_id = conn.execute(
+        "SELECT projet_id FROM temps_travail GROUP BY projet_id ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()[0]
+    conn.close()
+
+    dialog = BudgetEditDialog(projet_id)
+    # Parcourir toutes les années pour les charger en mémoire, puis les marquer modifiées
+    for index in range(dialog.annee_combo.count()):
+        dialog.annee_combo.setCurrentIndex(index)
+    annees = [dialog.annee_combo.itemText(i) for i in range(dialog.annee_combo.count())]
+    for modified in (dialog.modified_years, dialog.recettes_modified_years,
+                     dialog.depenses_modified_years, dialog.autres_depenses_modified_years):
+        modified.update(annees)
+    save_button = next(b for b in dialog.findChildren(QPushButton) if b.text() == "Enregistrer tout")
+    return save_button.click
+
+
+SCENARIOS: Dict[str, Callable[[str], Callable[[], object]]] = {
+    "collect_financial_data": _collect_financial_data,
+    "collect_jours_data": _collect_jours_data,
+    "recalculate_all_subventions": _recalculate_all_subventions,
+    "merge_databases": _merge_databases,
+    "import_excel_modele": _import_excel_modele,
+    "budget_edit_save": _budget_edit_save,
+}
+
+
+def run_benchmarks(source_db: str, scenarios: Optional[List[str]] = None, repeat: int = 3,
+                   scale: str = "custom") -> List[dict]:
+    """
+    Chronomètre les scénarios demandés (tous par défaut) sur des copies de
+    `source_db` et retourne un enregistrement par scénario. Un scénario qui
+    échoue est consigné avec son erreur sans interrompre les autres.
+    """
+    results = []
+    timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    with tempfile.TemporaryDirectory(prefix="gestion_budget_bench_") as workdir:
+        for name in scenarios or list(SCENARIOS):
+            durations = []
+            error = None
+            for run in range(repeat):
+                work_db = os.path.join(workdir, f"{name}_{run}.db")
+                shutil.copyfile(source_db, work_db)
+                try:
+                    with _using_database(work_db), _silent_message_boxes_if_qt():
+                        target = SCENARIOS[name](work_db)
+                        debut = time.perf_counter()
+                        target()
+                        durations.append(time.perf_counter() - debut)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    break
+
+            record = {
+                "timestamp": timestamp,
+                "scale": scale,
+                "scenario": name,
+                "runs": len(durations),
+                "min_s": round(min(durations), 6) if durations else None,
+                "median_s": round(statistics.median(durations), 6) if durations else None,
+                "max_s": round(max(durations), 6) if durations else None,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            }
+            if error:
+                record["error"] = error
+            results.append(record)
+    return results
+
+
+@contextmanager
+def _silent_message_boxes_if_qt():
+    """Neutralise les boîtes de message si PyQt6 est disponible."""
+    try:
+        import PyQt6.QtWidgets  # noqa: F401
+    except ImportError:
+        yield
+        return
+    with _silent_message_boxes():
+        yield
+
+
+def append_history(results: List[dict], output_dir: str) -> None:
+    """Ajoute les résultats à history.jsonl et history.csv dans `output_dir`."""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "history.jsonl"), "a", encoding="utf-8") as f:
+        for record in results:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    csv_path = os.path.join(output_dir, "history.csv")
+    new_file = not os.path.exists(csv_path)
+    with open(csv_path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerows(results)
+
+
+def format_results(results: List[dict]) -> str:
+    lignes = [f"{'Scénario':<30} {'min (s)':>10} {'médiane (s)':>12} {'max (s)':>10}"]
+    for record in results:
+        if record.get("error"):
+            lignes.append(f"{record['scenario']:<30} ERREUR {record['error']}")
+        else:
+            lignes.append(f"{record['scenario']:<30} {record['min_s']:>10.3f} "
+                          f"{record['median_s']:>12.3f} {record['max_s']:>10.3f}")
+    return "\n".join(lignes)
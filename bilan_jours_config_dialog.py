@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushBut
 from PyQt6.QtCore import Qt
 
 from database import get_connection
+from project_period_index import ProjectPeriodIndex
 
 class BilanJoursConfigDialog(QDialog):
     def __init__(self, parent, projet_id=None):
@@ -136,6 +137,9 @@ class BilanJoursConfigDialog(QDialog):
 
     def load_projects(self):
         """Charge les projets depuis la base de données"""
+        # Index des périodes des projets : les années proposées sont calculées sans requête SQL
+        self.period_index = ProjectPeriodIndex()
+
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, code, nom FROM projets ORDER BY code")
@@ -202,509 +206,131 @@ class BilanJoursConfigDialog(QDialog):
             elif self.period_type.currentIndex() == 1:  # Plusieurs années
                 self.update_years_for_single_project_multiple_years()
 
-    def update_years_for_single_project_multiple_years(self):
-        """Met à jour la liste des années cochables pour un projet spécifique en mode 'plusieurs années'."""
-        project_id = self.project_combo.currentData()
-        if not project_id:
-            QMessageBox.warning(self, "Erreur", "Aucun projet sélectionné.")
-            self.years_list_widget.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id = ?", (project_id,))
-            result = cursor.fetchone()
-            if not result:
-                QMessageBox.warning(self, "Erreur", "Impossible de récupérer les dates pour le projet sélectionné.")
-                self.years_list_widget.clear()
-                return
-
-            date_debut, date_fin = result
-            if not date_debut or not date_fin:
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont manquantes pour ce projet.")
-                self.years_list_widget.clear()
-                return
-
-            # Extraire les années à partir des dates au format MM/AAAA
-            try:
-                debut_annee = int(date_debut.split("/")[1])
-                fin_annee = int(date_fin.split("/")[1])
-            except (IndexError, ValueError):
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont mal formatées (attendu: MM/AAAA).")
-                self.years_list_widget.clear()
-                return
-
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in range(debut_annee, fin_annee + 1):
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-
-        finally:
-            conn.close()
-
-    def update_years_for_all_projects(self):
-        """Met à jour la liste déroulante des années avec toutes les années où il y a au moins un projet."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE date_debut IS NOT NULL AND date_fin IS NOT NULL")
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
+    def _checked_data(self, list_widget):
+        """Retourne les données (UserRole) des éléments cochés d'une liste"""
+        checked = []
+        for i in range(list_widget.count()):
+            item = list_widget.item(i)
+            if item.checkState() == Qt.CheckState.Checked:
+                checked.append(item.data(Qt.ItemDataRole.UserRole))
+        return checked
 
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    # Extraire les années à partir des dates au format MM/AAAA
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    # Ajouter toutes les années entre début et fin (incluses)
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    # Si la conversion échoue, on ignore cette entrée
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets.")
-                self.year_combo.clear()
-                return
+    def _show_years(self, years, multiple, warning=None):
+        """Remplit la liste déroulante (année spécifique) ou la liste cochable (plusieurs années).
 
-            # Remplir la liste déroulante des années
+        Si aucune année n'est disponible, la liste est vidée et l'avertissement
+        éventuel (titre, message) est affiché.
+        """
+        if multiple:
+            self.years_list_widget.clear()
+        else:
             self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
 
-        finally:
-            conn.close()
-
-    def update_years_for_all_projects_multiple(self):
-        """Met à jour la liste des années cochables avec toutes les années où il y a au moins un projet."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE date_debut IS NOT NULL AND date_fin IS NOT NULL")
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec des dates valides n'a été trouvé.")
-                self.years_list_widget.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    # Extraire les années à partir des dates au format MM/AAAA
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    # Ajouter toutes les années entre début et fin (incluses)
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    # Si la conversion échoue, on ignore cette entrée
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets.")
-                self.years_list_widget.clear()
-                return
+        if not years:
+            if warning:
+                QMessageBox.warning(self, *warning)
+            return
 
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
+        for year in years:
+            if multiple:
                 item = QListWidgetItem(str(year))
                 item.setCheckState(Qt.CheckState.Unchecked)
                 self.years_list_widget.addItem(item)
+            else:
+                self.year_combo.addItem(str(year))
 
-        finally:
-            conn.close()
-
-    def update_years_for_selected_projects(self):
-        """Met à jour la liste déroulante des années avec les années des projets sélectionnés."""
-        # Récupérer les IDs des projets cochés
-        selected_project_ids = []
-        for i in range(self.project_list_widget.count()):
-            item = self.project_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_project_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_project_ids:
-            # Aucun projet sélectionné, vider la liste
-            self.year_combo.clear()
+    def _update_years_for_single_project(self, multiple):
+        project_id = self.project_combo.currentData()
+        if not project_id:
+            self._show_years([], multiple, ("Erreur", "Aucun projet sélectionné."))
             return
+        self._show_years(
+            self.period_index.years_for_project(project_id), multiple,
+            ("Erreur", "Les dates de début ou de fin sont manquantes ou mal formatées pour ce projet (attendu: MM/AAAA)."))
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les dates des projets sélectionnés
-            placeholders = ','.join('?' * len(selected_project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders}) 
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_project_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet sélectionné avec des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets sélectionnés.")
-                self.year_combo.clear()
-                return
-
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
-
-        finally:
-            conn.close()
+    def _update_years_for_all_projects(self, multiple):
+        if not self.period_index.has_dates(self.period_index.project_ids):
+            warning = ("Aucun projet trouvé", "Aucun projet avec des dates valides n'a été trouvé.")
+        else:
+            warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets.")
+        self._show_years(self.period_index.years_for_all_projects(), multiple, warning)
 
-    def update_years_for_selected_projects_multiple(self):
-        """Met à jour la liste des années cochables avec les années des projets sélectionnés."""
-        # Récupérer les IDs des projets cochés
-        selected_project_ids = []
-        for i in range(self.project_list_widget.count()):
-            item = self.project_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_project_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
+    def _update_years_for_selected_projects(self, multiple):
+        selected_project_ids = self._checked_data(self.project_list_widget)
         if not selected_project_ids:
             # Aucun projet sélectionné, vider la liste
-            self.years_list_widget.clear()
+            self._show_years([], multiple)
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les dates des projets sélectionnés
-            placeholders = ','.join('?' * len(selected_project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders}) 
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_project_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                # Ne pas afficher de message d'erreur si aucun projet n'est sélectionné
-                self.years_list_widget.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                self.years_list_widget.clear()
-                return
-
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-
-        finally:
-            conn.close()
+        warning = None
+        if not multiple:
+            if not self.period_index.has_dates(selected_project_ids):
+                warning = ("Aucun projet trouvé", "Aucun projet sélectionné avec des dates valides n'a été trouvé.")
+            else:
+                warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets sélectionnés.")
+        self._show_years(self.period_index.years_for_projects(selected_project_ids), multiple, warning)
 
-    def update_years_for_selected_themes(self):
-        """Met à jour la liste déroulante des années avec les années des projets liés aux thèmes sélectionnés."""
-        # Récupérer les IDs des thèmes cochés
-        selected_theme_ids = []
-        for i in range(self.theme_list_widget.count()):
-            item = self.theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_theme_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
+    def _update_years_for_selected_themes(self, multiple):
+        selected_theme_ids = self._checked_data(self.theme_list_widget)
         if not selected_theme_ids:
             # Aucun thème sélectionné, vider la liste
-            self.year_combo.clear()
+            self._show_years([], multiple)
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets liés aux thèmes sélectionnés
-            placeholders = ','.join('?' * len(selected_theme_ids))
-            cursor.execute(f"""
-                SELECT DISTINCT p.date_debut, p.date_fin 
-                FROM projets p
-                JOIN projet_themes pt ON p.id = pt.projet_id
-                WHERE pt.theme_id IN ({placeholders})
-                AND p.date_debut IS NOT NULL AND p.date_fin IS NOT NULL
-            """, selected_theme_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet lié aux thèmes sélectionnés avec des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
+        if not self.period_index.has_dates(self.period_index.projects_for_themes(selected_theme_ids)):
+            warning = ("Aucun projet trouvé", "Aucun projet lié aux thèmes sélectionnés avec des dates valides n'a été trouvé.")
+        else:
+            warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets liés aux thèmes sélectionnés.")
+        self._show_years(self.period_index.years_for_themes(selected_theme_ids), multiple, warning)
 
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets liés aux thèmes sélectionnés.")
-                self.year_combo.clear()
-                return
+    def _update_years_for_selected_main_themes(self, multiple):
+        selected_main_themes = self._checked_data(self.main_theme_list_widget)
+        if not selected_main_themes:
+            # Aucun thème principal sélectionné, vider la liste
+            self._show_years([], multiple)
+            return
 
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
+        if not self.period_index.has_dates(self.period_index.projects_for_main_themes(selected_main_themes)):
+            warning = ("Aucun projet trouvé", "Aucun projet avec les thèmes principaux sélectionnés et des dates valides n'a été trouvé.")
+        else:
+            warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets avec les thèmes principaux sélectionnés.")
+        self._show_years(self.period_index.years_for_main_themes(selected_main_themes), multiple, warning)
 
-        finally:
-            conn.close()
+    def update_years_for_single_project_multiple_years(self):
+        """Met à jour la liste des années cochables pour un projet spécifique en mode 'plusieurs années'."""
+        self._update_years_for_single_project(multiple=True)
 
-    def update_years_for_selected_themes_multiple(self):
-        """Met à jour la liste des années cochables avec les années des projets liés aux thèmes sélectionnés."""
-        # Récupérer les IDs des thèmes cochés
-        selected_theme_ids = []
-        for i in range(self.theme_list_widget.count()):
-            item = self.theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_theme_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_theme_ids:
-            # Aucun thème sélectionné, vider la liste
-            self.years_list_widget.clear()
-            return
+    def update_years_for_all_projects(self):
+        """Met à jour la liste déroulante des années avec toutes les années où il y a au moins un projet."""
+        self._update_years_for_all_projects(multiple=False)
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets liés aux thèmes sélectionnés
-            placeholders = ','.join('?' * len(selected_theme_ids))
-            cursor.execute(f"""
-                SELECT DISTINCT p.date_debut, p.date_fin 
-                FROM projets p
-                JOIN projet_themes pt ON p.id = pt.projet_id
-                WHERE pt.theme_id IN ({placeholders})
-                AND p.date_debut IS NOT NULL AND p.date_fin IS NOT NULL
-            """, selected_theme_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet lié aux thèmes sélectionnés avec des dates valides n'a été trouvé.")
-                self.years_list_widget.clear()
-                return
+    def update_years_for_all_projects_multiple(self):
+        """Met à jour la liste des années cochables avec toutes les années où il y a au moins un projet."""
+        self._update_years_for_all_projects(multiple=True)
 
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
+    def update_years_for_selected_projects(self):
+        """Met à jour la liste déroulante des années avec les années des projets sélectionnés."""
+        self._update_years_for_selected_projects(multiple=False)
 
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets liés aux thèmes sélectionnés.")
-                self.years_list_widget.clear()
-                return
+    def update_years_for_selected_projects_multiple(self):
+        """Met à jour la liste des années cochables avec les années des projets sélectionnés."""
+        self._update_years_for_selected_projects(multiple=True)
 
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
+    def update_years_for_selected_themes(self):
+        """Met à jour la liste déroulante des années avec les années des projets liés aux thèmes sélectionnés."""
+        self._update_years_for_selected_themes(multiple=False)
 
-        finally:
-            conn.close()
+    def update_years_for_selected_themes_multiple(self):
+        """Met à jour la liste des années cochables avec les années des projets liés aux thèmes sélectionnés."""
+        self._update_years_for_selected_themes(multiple=True)
 
     def update_years_for_selected_main_themes(self):
         """Met à jour la liste déroulante des années avec les années des projets liés aux thèmes principaux sélectionnés."""
-        # Récupérer les thèmes principaux cochés
-        selected_main_themes = []
-        for i in range(self.main_theme_list_widget.count()):
-            item = self.main_theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_main_themes.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_main_themes:
-            # Aucun thème principal sélectionné, vider la liste
-            self.year_combo.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets avec les thèmes principaux sélectionnés
-            placeholders = ','.join('?' * len(selected_main_themes))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin 
-                FROM projets 
-                WHERE theme_principal IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_main_themes)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec les thèmes principaux sélectionnés et des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets avec les thèmes principaux sélectionnés.")
-                self.year_combo.clear()
-                return
-
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
-
-        finally:
-            conn.close()
+        self._update_years_for_selected_main_themes(multiple=False)
 
     def update_years_for_selected_main_themes_multiple(self):
         """Met à jour la liste des années cochables avec les années des projets liés aux thèmes principaux sélectionnés."""
-        # Récupérer les thèmes principaux cochés
-        selected_main_themes = []
-        for i in range(self.main_theme_list_widget.count()):
-            item = self.main_theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_main_themes.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_main_themes:
-            # Aucun thème principal sélectionné, vider la liste
-            self.years_list_widget.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets avec les thèmes principaux sélectionnés
-            placeholders = ','.join('?' * len(selected_main_themes))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin 
-                FROM projets 
-                WHERE theme_principal IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_main_themes)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec les thèmes principaux sélectionnés et des dates valides n'a été trouvé.")
-                self.years_list_widget.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets avec les thèmes principaux sélectionnés.")
-                self.years_list_widget.clear()
-                return
-
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-
-        finally:
-            conn.close()
+        self._update_years_for_selected_main_themes(multiple=True)
 
     def on_project_selection_changed(self):
         """Appelée quand la sélection de projets ou thèmes change"""
@@ -743,60 +369,24 @@ class BilanJoursConfigDialog(QDialog):
                 
         elif self.radio_all_projects.isChecked():
             # Tous les projets
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM projets")
-            project_ids = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            project_ids = list(self.period_index.project_ids)
             
         elif self.radio_multiple_projects.isChecked():
             # Projets sélectionnés dans la liste
-            for i in range(self.project_list_widget.count()):
-                item = self.project_list_widget.item(i)
-                if item.checkState() == Qt.CheckState.Checked:
-                    project_ids.append(item.data(Qt.ItemDataRole.UserRole))
+            project_ids = self._checked_data(self.project_list_widget)
                     
         elif self.radio_by_theme.isChecked():
             # Projets par thèmes sélectionnés
-            selected_theme_ids = []
-            for i in range(self.theme_list_widget.count()):
-                item = self.theme_list_widget.item(i)
-                if item.checkState() == Qt.CheckState.Checked:
-                    selected_theme_ids.append(item.data(Qt.ItemDataRole.UserRole))
+            project_ids = self.period_index.projects_for_themes(self._checked_data(self.theme_list_widget))
             
-            if selected_theme_ids:
-                conn = get_connection()
-                cursor = conn.cursor()
-                placeholders = ','.join('?' * len(selected_theme_ids))
-                cursor.execute(f"""
-                    SELECT DISTINCT projet_id FROM projet_themes 
-                    WHERE theme_id IN ({placeholders})
-                """, selected_theme_ids)
-                project_ids = [row[0] for row in cursor.fetchall()]
-                conn.close()
         elif self.radio_by_main_theme.isChecked():
             # Projets par thème principal sélectionné
-            selected_main_themes = []
-            for i in range(self.main_theme_list_widget.count()):
-                item = self.main_theme_list_widget.item(i)
-                if item.checkState() == Qt.CheckState.Checked:
-                    selected_main_themes.append(item.data(Qt.ItemDataRole.UserRole))
-            
-            if selected_main_themes:
-                conn = get_connection()
-                cursor = conn.cursor()
-                placeholders = ','.join('?' * len(selected_main_themes))
-                cursor.execute(f"""
-                    SELECT id FROM projets 
-                    WHERE theme_principal IN ({placeholders})
-                """, selected_main_themes)
-                project_ids = [row[0] for row in cursor.fetchall()]
-                conn.close()
+            project_ids = self.period_index.projects_for_main_themes(self._checked_data(self.main_theme_list_widget))
         
         return project_ids
 
     def load_years_with_projects(self):
-        """Charge les années où des projets sélectionnés existent depuis la base de données"""
+        """Charge les années de début des projets sélectionnés"""
         # Pour "Tous les projets", récupérer toutes les années de tous les projets
         if self.radio_all_projects.isChecked():
             self.update_years_for_all_projects_multiple()
@@ -808,82 +398,14 @@ class BilanJoursConfigDialog(QDialog):
             # Ne pas afficher de message d'erreur, juste vider la liste
             self.years_list_widget.clear()
             return
-            
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets sélectionnés avec leurs dates
-            placeholders = ','.join('?' * len(project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_debut LIKE '__/____'
-            """, project_ids)
-            
-            years_set = set()
-            
-            for date_debut, date_fin in cursor.fetchall():
-                # Extraire l'année de début
-                if date_debut and len(date_debut) >= 7:
-                    year = int(date_debut[-4:])
-                    years_set.add(year)
 
-            years = sorted(list(years_set))
-
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année avec des projets sélectionnés n'a été trouvée.")
-
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des années : {str(e)}")
-        finally:
-            conn.close()
+        self._show_years(
+            self.period_index.start_years_for_projects(project_ids), True,
+            ("Aucune année trouvée", "Aucune année avec des projets sélectionnés n'a été trouvée."))
 
     def update_years_for_project(self):
         """Met à jour la liste des années disponibles pour le projet sélectionné."""
-        project_id = self.project_combo.currentData()
-        if not project_id:
-            QMessageBox.warning(self, "Erreur", "Aucun projet sélectionné.")
-            self.year_combo.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id = ?", (project_id,))
-            result = cursor.fetchone()
-            if not result:
-                QMessageBox.warning(self, "Erreur", "Impossible de récupérer les dates pour le projet sélectionné.")
-                self.year_combo.clear()
-                return
-
-            date_debut, date_fin = result
-            if not date_debut or not date_fin:
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont manquantes pour ce projet.")
-                self.year_combo.clear()
-                return
-
-            # Extraire les années à partir des dates au format MM/AAAA
-            try:
-                debut_annee = int(date_debut.split("/")[1])
-                fin_annee = int(date_fin.split("/")[1])
-            except (IndexError, ValueError):
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont mal formatées (attendu: MM/AAAA).")
-                self.year_combo.clear()
-                return
-
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in range(debut_annee, fin_annee + 1):
-                self.year_combo.addItem(str(year))
-
-        finally:
-            conn.close()
+        self._update_years_for_single_project(multiple=False)
 
     def update_period_widgets(self):
         """Met à jour l'affichage selon le type de période sélectionné"""
@@ -1079,33 +601,7 @@ class BilanJoursConfigDialog(QDialog):
         project_ids = self.get_selected_project_ids()
         if not project_ids:
             return []
-        
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            placeholders = ','.join('?' * len(project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, project_ids)
-            
-            years_set = set()
-            for date_debut, date_fin in cursor.fetchall():
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-            
-            return sorted(list(years_set))
-            
-        finally:
-            conn.close()
+        return self.period_index.years_for_projects(project_ids)
     
     def get_period_type(self):
         """Retourne le type de période sélectionné"""
@@ -1,16 +1,84 @@
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
-                             QTableWidgetItem, QPushButton, QMessageBox,
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableView,
+                             QPushButton, QMessageBox,
                              QFileDialog, QHeaderView, QGroupBox, QGridLayout,
                              QColorDialog, QLineEdit, QComboBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor, QFont, QPageLayout
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import tempfile
 import os
 
+from bilan_jours_report import BilanJoursReport
 from database import get_connection
+from month_utils import month_key
+from pdf_renderer import paged_document, pdf_document
+import profiling
+
+
+class BilanJoursTableModel(QAbstractTableModel):
+    """
+    Bilan des jours (BilanJoursReport) : colonne des catégories puis les
+    colonnes de jours. Le texte et le style de chaque cellule sont calculés
+    à l'affichage, aucune cellule n'est créée à l'avance.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._report = None
+        self._category_font = QFont("Arial", 9, QFont.Weight.Bold)
+        self._total_font = QFont("Arial", 10, QFont.Weight.Bold)
+        self._total_row_color = QColor("#ecf0f1")
+        self._total_column_color = QColor("#d5dbdb")
+        self._grand_total_color = QColor("#bdc3c7")
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self._report is None else self._report.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self._report is None else len(self._report.columns) + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        report = self._report
+        row = index.row()
+        column = index.column() - 1
+        total_row = report.is_total_row(row)
+        total_column = column >= 0 and report.is_total_column(column)
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return report.row_label(row) if column < 0 else report.cell_text(row, column)
+        if role == Qt.ItemDataRole.FontRole:
+            if total_row and (column < 0 or total_column):
+                return self._total_font
+            if column < 0 or total_row or total_column:
+                return self._category_font
+            return None
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if total_row and total_column:
+                return self._grand_total_color
+            if total_row:
+                return self._total_row_color
+            if total_column:
+                return self._total_column_color
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole and column >= 0:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            if section == 0:
+                return "Catégorie"
+            if self._report is not None:
+                return self._report.columns[section - 1]
+        return super().headerData(section, orientation, role)
+
+    def set_report(self, report):
+        self.beginResetModel()
+        self._report = report
+        self.endResetModel()
+
 
 class BilanJoursDisplay(QDialog):
     def __init__(self, parent, config_data):
@@ -23,6 +91,7 @@ class BilanJoursDisplay(QDialog):
         self.years = config_data.get('years', [])
         self.period_type = config_data.get('period_type', 'yearly')  # 'yearly' ou 'monthly'
         self.granularity = config_data.get('granularity', 'yearly')  # 'yearly' ou 'monthly'
+        self.report = None  # BilanJoursReport calculé par load_data
         
         self.setWindowTitle("Bilan des Jours")
         self.setMinimumSize(1000, 700)
@@ -39,7 +108,9 @@ class BilanJoursDisplay(QDialog):
         layout.addLayout(header_layout)
         
         # Tableau principal du bilan des jours
-        self.table = QTableWidget()
+        self.model = BilanJoursTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.setup_table()
         layout.addWidget(self.table)
         
@@ -106,40 +177,12 @@ class BilanJoursDisplay(QDialog):
         return "Projet inconnu"
     
     def setup_table(self):
-        """Configure le tableau du bilan des jours"""
-        # Le nombre de colonnes dépend de la granularité et des directions
-        if self.granularity == 'monthly':
-            # Mode mensuel : une colonne par direction et par mois
-            directions = self.get_active_directions()
-            columns = ["Catégorie"]
-            for year in sorted(self.years):
-                for month in range(1, 13):
-                    month_name = ["Jan", "Fév", "Mar", "Avr", "Mai", "Jun",
-                                "Jul", "Aoû", "Sep", "Oct", "Nov", "Déc"][month-1]
-                    for direction in directions:
-                        columns.append(f"{direction}\n{month_name} {year}")
-            columns.append("TOTAL")
-        else:
-            # Mode annuel : une colonne par direction
-            directions = self.get_active_directions()
-            columns = ["Catégorie"] + directions + ["TOTAL"]
-        
-        self.table.setColumnCount(len(columns))
-        self.table.setHorizontalHeaderLabels(columns)
-        
-        # Configuration de l'apparence
-        # Définir une largeur minimum pour la première colonne (catégories)
-        self.table.setColumnWidth(0, 150)  # Largeur fixe de 150 pixels pour les catégories
-        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
-        # Les autres colonnes s'adaptent automatiquement
-        for col in range(1, len(columns)):
-            self.table.horizontalHeader().setSectionResizeMode(col, QHeaderView.ResizeMode.Stretch)
-        
+        """Configure le tableau du bilan des jours (colonnes définies par populate_table)"""
         self.table.setAlternatingRowColors(True)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         
         # Rendre le tableau en lecture seule
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
     
     def get_active_directions(self):
         """Récupère les directions qui ont des données pour les projets/années sélectionnés"""
@@ -207,7 +250,9 @@ class BilanJoursDisplay(QDialog):
         """Charge et affiche les données du bilan des jours"""
         try:
             data = self.collect_jours_data()
-            self.populate_table(data)
+            self.report = BilanJoursReport.from_period_data(
+                data, self.categories, self.directions, self.granularity)
+            self.populate_table(self.report)
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des données : {str(e)}")
             self.reject()  # Fermer le dialogue avec un code d'échec
@@ -221,6 +266,7 @@ class BilanJoursDisplay(QDialog):
                         return True
         return False
 
+    @profiling.profiled("Bilan des jours")
     def collect_jours_data(self):
         """Collecte toutes les données de jours travaillés"""
         conn = get_connection()
@@ -230,6 +276,9 @@ class BilanJoursDisplay(QDialog):
             data = {}
             directions = self.get_active_directions()
             categories = self.get_categories()
+            # Conservées pour la construction du bilan (load_data)
+            self.directions = directions
+            self.categories = categories
             
             if self.granularity == 'monthly':
                 # Mode mensuel
@@ -294,20 +343,17 @@ class BilanJoursDisplay(QDialog):
         placeholders_projects = ','.join('?' * len(self.project_ids))
         
         if month is not None:
-            # Requête mensuelle
-            month_names = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-                          "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
+            # Requête mensuelle (clé de période entière indexée)
             query = f"""
                 SELECT tt.direction, tt.categorie, SUM(tt.jours) as total_jours
                 FROM temps_travail tt
                 WHERE tt.projet_id IN ({placeholders_projects})
-                AND tt.annee = ?
-                AND tt.mois = ?
+                AND tt.periode = ?
                 AND tt.direction IS NOT NULL
                 AND tt.categorie IS NOT NULL
                 GROUP BY tt.direction, tt.categorie
             """
-            cursor.execute(query, self.project_ids + [year, month_names[month-1]])
+            cursor.execute(query, list(self.project_ids) + [month_key(year, month)])
         else:
             # Requête annuelle
             query = f"""
@@ -328,152 +374,20 @@ class BilanJoursDisplay(QDialog):
         
         return period_data
     
-    def populate_table(self, data):
-        """Remplit le tableau avec les données"""
-        categories = self.get_categories()
-        directions = self.get_active_directions()
-        
-        # Définir le nombre de lignes (catégories + ligne total)
-        self.table.setRowCount(len(categories) + 1)
-        
-        # Remplir les catégories (première colonne)
-        for row, categorie in enumerate(categories):
-            item = QTableWidgetItem(categorie)
-            item.setFont(QFont("Arial", 9, QFont.Weight.Bold))
-            self.table.setItem(row, 0, item)
-        
-        # Ligne total
-        total_item = QTableWidgetItem("TOTAL")
-        total_item.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        total_item.setBackground(QColor("#ecf0f1"))
-        self.table.setItem(len(categories), 0, total_item)
-        
-        # Remplir les données selon la granularité
+    def populate_table(self, report):
+        """Affiche le bilan des jours calculé"""
+        self.model.set_report(report)
+        
+        # Largeur fixe de 150 pixels pour les catégories. En mode annuel les
+        # autres colonnes s'adaptent ; en mode mensuel (une colonne par mois et
+        # par direction) elles gardent leur largeur et le tableau défile.
+        header = self.table.horizontalHeader()
         if self.granularity == 'monthly':
-            self.populate_monthly_data(data, categories, directions)
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         else:
-            self.populate_yearly_data(data, categories, directions)
-    
-    def populate_yearly_data(self, data, categories, directions):
-        """Remplit le tableau en mode annuel"""
-        col_index = 1
-        totals_by_direction = {}
-        totals_by_category = {cat: 0.0 for cat in categories}
-        grand_total = 0.0
-        
-        # Pour chaque direction
-        for direction in directions:
-            totals_by_direction[direction] = 0.0
-            
-            # Pour chaque catégorie
-            for row, categorie in enumerate(categories):
-                total_jours = 0.0
-                
-                # Sommer sur toutes les années
-                for year_key in data.keys():
-                    year_data = data[year_key]
-                    if direction in year_data and categorie in year_data[direction]:
-                        total_jours += year_data[direction][categorie]
-                
-                # Afficher la valeur
-                if total_jours > 0:
-                    item = QTableWidgetItem(f"{total_jours:.1f}")
-                else:
-                    item = QTableWidgetItem("")
-                
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table.setItem(row, col_index, item)
-                
-                # Mise à jour des totaux
-                totals_by_direction[direction] += total_jours
-                totals_by_category[categorie] += total_jours
-            
-            # Total par direction (dernière ligne)
-            total_item = QTableWidgetItem(f"{totals_by_direction[direction]:.1f}" if totals_by_direction[direction] > 0 else "")
-            total_item.setFont(QFont("Arial", 9, QFont.Weight.Bold))
-            total_item.setBackground(QColor("#ecf0f1"))
-            total_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setItem(len(categories), col_index, total_item)
-            
-            grand_total += totals_by_direction[direction]
-            col_index += 1
-        
-        # Colonne TOTAL (dernière colonne)
-        for row, categorie in enumerate(categories):
-            total_item = QTableWidgetItem(f"{totals_by_category[categorie]:.1f}" if totals_by_category[categorie] > 0 else "")
-            total_item.setFont(QFont("Arial", 9, QFont.Weight.Bold))
-            total_item.setBackground(QColor("#d5dbdb"))
-            total_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setItem(row, col_index, total_item)
-        
-        # Grand total (coin inférieur droit)
-        grand_total_item = QTableWidgetItem(f"{grand_total:.1f}" if grand_total > 0 else "")
-        grand_total_item.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        grand_total_item.setBackground(QColor("#bdc3c7"))
-        grand_total_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table.setItem(len(categories), col_index, grand_total_item)
-    
-    def populate_monthly_data(self, data, categories, directions):
-        """Remplit le tableau en mode mensuel"""
-        col_index = 1
-        totals_by_category = {cat: 0.0 for cat in categories}
-        grand_total = 0.0
-        
-        # Pour chaque année et chaque mois
-        for year in sorted(self.years):
-            for month in range(1, 13):
-                period_key = f"{year}_{month:02d}"
-                
-                # Pour chaque direction
-                for direction in directions:
-                    totals_by_direction_month = 0.0
-                    
-                    # Pour chaque catégorie
-                    for row, categorie in enumerate(categories):
-                        jours = 0.0
-                        
-                        if period_key in data:
-                            year_data = data[period_key]
-                            if direction in year_data and categorie in year_data[direction]:
-                                jours = year_data[direction][categorie]
-                        
-                        # Afficher la valeur
-                        if jours > 0:
-                            item = QTableWidgetItem(f"{jours:.1f}")
-                        else:
-                            item = QTableWidgetItem("")
-                        
-                        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                        self.table.setItem(row, col_index, item)
-                        
-                        # Mise à jour des totaux
-                        totals_by_direction_month += jours
-                        totals_by_category[categorie] += jours
-                    
-                    # Total par direction/mois (dernière ligne)
-                    total_item = QTableWidgetItem(f"{totals_by_direction_month:.1f}" if totals_by_direction_month > 0 else "")
-                    total_item.setFont(QFont("Arial", 9, QFont.Weight.Bold))
-                    total_item.setBackground(QColor("#ecf0f1"))
-                    total_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    self.table.setItem(len(categories), col_index, total_item)
-                    
-                    grand_total += totals_by_direction_month
-                    col_index += 1
-        
-        # Colonne TOTAL (dernière colonne)
-        for row, categorie in enumerate(categories):
-            total_item = QTableWidgetItem(f"{totals_by_category[categorie]:.1f}" if totals_by_category[categorie] > 0 else "")
-            total_item.setFont(QFont("Arial", 9, QFont.Weight.Bold))
-            total_item.setBackground(QColor("#d5dbdb"))
-            total_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.table.setItem(row, col_index, total_item)
-        
-        # Grand total (coin inférieur droit)
-        grand_total_item = QTableWidgetItem(f"{grand_total:.1f}" if grand_total > 0 else "")
-        grand_total_item.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        grand_total_item.setBackground(QColor("#bdc3c7"))
-        grand_total_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.table.setItem(len(categories), col_index, grand_total_item)
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
+        self.table.setColumnWidth(0, 150)
     
     def export_to_excel(self):
         """Exporte le bilan des jours vers Excel"""
@@ -485,6 +399,11 @@ class BilanJoursDisplay(QDialog):
         if not file_path:
             return
         
+        # Import différé : openpyxl n'est chargé qu'à l'export
+        import openpyxl
+        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+        from openpyxl.utils import get_column_letter
+        
         try:
             # Créer un nouveau workbook
             wb = openpyxl.Workbook()
@@ -503,8 +422,12 @@ class BilanJoursDisplay(QDialog):
             
             center_alignment = Alignment(horizontal='center', vertical='center')
             
+            report = self.report
+            column_count = len(report.columns) + 1
+            last_column = get_column_letter(column_count)
+            
             # Titre
-            ws.merge_cells('A1:' + chr(65 + self.table.columnCount() - 1) + '1')
+            ws.merge_cells(f'A1:{last_column}1')
             title_cell = ws['A1']
             title_cell.value = "BILAN DES JOURS"
             title_cell.font = Font(name='Arial', size=16, bold=True)
@@ -512,7 +435,7 @@ class BilanJoursDisplay(QDialog):
             
             # Informations
             info_text = self.get_selection_info()
-            ws.merge_cells('A2:' + chr(65 + self.table.columnCount() - 1) + '2')
+            ws.merge_cells(f'A2:{last_column}2')
             info_cell = ws['A2']
             info_cell.value = info_text
             info_cell.font = Font(name='Arial', size=10)
@@ -520,54 +443,43 @@ class BilanJoursDisplay(QDialog):
             
             # En-têtes de colonnes
             start_row = 4
-            for col in range(self.table.columnCount()):
+            for col, header_text in enumerate(["Catégorie"] + list(report.columns)):
                 cell = ws.cell(row=start_row, column=col+1)
-                header_item = self.table.horizontalHeaderItem(col)
-                cell.value = header_item.text() if header_item else ""
+                cell.value = header_text
                 cell.font = header_font
                 cell.fill = header_fill
                 cell.alignment = center_alignment
             
             # Données
-            for row in range(self.table.rowCount()):
-                for col in range(self.table.columnCount()):
+            for row in range(report.row_count):
+                for col in range(column_count):
                     cell = ws.cell(row=start_row + 1 + row, column=col+1)
-                    table_item = self.table.item(row, col)
+                    cell.value = report.row_label(row) if col == 0 else report.cell_text(row, col - 1)
                     
-                    if table_item:
-                        cell.value = table_item.text()
-                        
-                        # Appliquer les styles
-                        if col == 0:  # Colonne catégorie
-                            if row == self.table.rowCount() - 1:  # Ligne total
-                                cell.font = total_font
-                                cell.fill = total_fill
-                            else:
-                                cell.font = category_font
-                                cell.fill = category_fill
-                        elif row == self.table.rowCount() - 1:  # Ligne total
-                            cell.font = total_font
-                            cell.fill = total_fill
-                        elif col == self.table.columnCount() - 1:  # Colonne total
+                    # Appliquer les styles
+                    if col == 0:  # Colonne catégorie
+                        if report.is_total_row(row):  # Ligne total
                             cell.font = total_font
                             cell.fill = total_fill
                         else:
-                            cell.font = data_font
-                        
-                        cell.alignment = center_alignment
+                            cell.font = category_font
+                            cell.fill = category_fill
+                    elif report.is_total_row(row):  # Ligne total
+                        cell.font = total_font
+                        cell.fill = total_fill
+                    elif report.is_total_column(col - 1):  # Colonne total
+                        cell.font = total_font
+                        cell.fill = total_fill
+                    else:
+                        cell.font = data_font
+                    
+                    cell.alignment = center_alignment
             
-            # Ajuster la largeur des colonnes
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 20)
-                ws.column_dimensions[column_letter].width = adjusted_width
+            # Ajuster la largeur des colonnes sur le tableau (les lignes de titre
+            # fusionnées ne comptent pas : leurs cellules fusionnées n'ont pas de lettre)
+            for col_idx, column in enumerate(ws.iter_cols(min_row=start_row, max_col=column_count), 1):
+                max_length = max((len(str(cell.value)) for cell in column if cell.value is not None), default=0)
+                ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 20)
             
             # Sauvegarder
             wb.save(file_path)
@@ -587,17 +499,8 @@ class BilanJoursDisplay(QDialog):
             return
         
         try:
-            printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-            printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-            printer.setOutputFileName(file_path)
-            printer.setPageMargins(20, 20, 20, 20, QPrinter.Unit.Millimeter)
-            
-            html_content = self.generate_html_content()
-            
-            from PyQt6.QtGui import QTextDocument
-            document = QTextDocument()
-            document.setHtml(html_content)
-            document.print(printer)
+            with pdf_document(file_path) as pdf:
+                self.draw_pdf(pdf)
             
             QMessageBox.information(self, "Export réussi", f"Le bilan des jours a été exporté vers :\n{file_path}")
             
@@ -608,79 +511,22 @@ class BilanJoursDisplay(QDialog):
         """Imprime le bilan des jours"""
         try:
             printer = QPrinter(QPrinter.PrinterMode.HighResolution)
+            printer.setPageOrientation(QPageLayout.Orientation.Landscape)
             print_dialog = QPrintDialog(printer, self)
             
             if print_dialog.exec() == QPrintDialog.DialogCode.Accepted:
-                html_content = self.generate_html_content()
-                
-                from PyQt6.QtGui import QTextDocument
-                document = QTextDocument()
-                document.setHtml(html_content)
-                document.print(printer)
+                with paged_document(printer) as pdf:
+                    self.draw_pdf(pdf)
                 
         except Exception as e:
             QMessageBox.critical(self, "Erreur d'impression", f"Erreur lors de l'impression :\n{str(e)}")
     
-    def generate_html_content(self):
-        """Génère le contenu HTML pour l'export PDF et l'impression"""
-        html = """
-        <html>
-        <head>
-            <style>
-                body { font-family: Arial, sans-serif; margin: 20px; }
-                h1 { text-align: center; color: #2c3e50; margin-bottom: 10px; }
-                .info { text-align: center; color: #7f8c8d; margin-bottom: 20px; font-size: 12px; }
-                table { border-collapse: collapse; width: 100%; margin: 20px 0; }
-                th, td { border: 1px solid #bdc3c7; padding: 8px; text-align: center; }
-                th { background-color: #366092; color: white; font-weight: bold; }
-                .category { background-color: #D9E2F3; font-weight: bold; }
-                .total-row { background-color: #ecf0f1; font-weight: bold; }
-                .total-col { background-color: #d5dbdb; font-weight: bold; }
-                .grand-total { background-color: #bdc3c7; font-weight: bold; }
-            </style>
-        </head>
-        <body>
-        """
-        
-        html += "<h1>BILAN DES JOURS</h1>"
-        html += f"<div class='info'>{self.get_selection_info()}</div>"
-        
-        html += "<table>"
-        
-        # En-têtes
-        html += "<tr>"
-        for col in range(self.table.columnCount()):
-            header_item = self.table.horizontalHeaderItem(col)
-            header_text = header_item.text() if header_item else ""
-            html += f"<th>{header_text}</th>"
-        html += "</tr>"
-        
-        # Données
-        for row in range(self.table.rowCount()):
-            html += "<tr>"
-            for col in range(self.table.columnCount()):
-                table_item = self.table.item(row, col)
-                cell_text = table_item.text() if table_item else ""
-                
-                # Déterminer la classe CSS
-                css_class = ""
-                if col == 0 and row < self.table.rowCount() - 1:  # Colonne catégorie (sauf total)
-                    css_class = "category"
-                elif row == self.table.rowCount() - 1:  # Ligne total
-                    if col == self.table.columnCount() - 1:  # Grand total
-                        css_class = "grand-total"
-                    else:
-                        css_class = "total-row"
-                elif col == self.table.columnCount() - 1:  # Colonne total
-                    css_class = "total-col"
-                
-                html += f"<td class='{css_class}'>{cell_text}</td>"
-            html += "</tr>"
-        
-        html += "</table>"
-        html += "</body></html>"
-        
-        return html
+    def draw_pdf(self, pdf):
+        """Dessine le bilan des jours (PDF ou impression) à partir du modèle du tableau"""
+        pdf.text("BILAN DES JOURS", size=16, bold=True, color="#2c3e50", alignment=Qt.AlignmentFlag.AlignHCenter)
+        pdf.text(self.get_selection_info(), size=9, color="#7f8c8d", alignment=Qt.AlignmentFlag.AlignHCenter)
+        pdf.space(12)
+        pdf.model_table(self.model, "#366092")
     
     def generate_filename(self, extension):
         """Génère un nom de fichier pour l'export"""
@@ -0,0 +1,99 @@
+"""
+Résultat calculé d'un bilan des jours, indépendant de l'affichage.
+
+Une ligne par catégorie suivie de la ligne TOTAL ; une colonne par direction
+(mode annuel, jours cumulés sur les années) ou par mois et par direction
+(mode mensuel), suivie de la colonne TOTAL. Les jours sont stockés ligne
+par ligne dans un seul vecteur de flottants (array 'd') ; les totaux sont
+calculés à la construction. Le tableau, l'export Excel, le PDF et
+l'impression lisent ce résultat.
+"""
+
+from array import array
+from typing import Mapping, Sequence
+
+TOTAL_LABEL = "TOTAL"
+MONTH_ABBREVIATIONS = ("Jan", "Fév", "Mar", "Avr", "Mai", "Jun",
+                       "Jul", "Aoû", "Sep", "Oct", "Nov", "Déc")
+
+
+class BilanJoursReport:
+    """
+    Bilan des jours calculé : catégories (lignes), en-têtes des colonnes de
+    jours (TOTAL compris) et matrice des jours, totaux compris.
+    Construit par from_period_data().
+    """
+
+    __slots__ = ("categories", "columns", "_values")
+
+    def __init__(self, categories: Sequence[str], columns: Sequence[str], values: array) -> None:
+        self.categories = tuple(categories)
+        self.columns = tuple(columns)
+        self._values = memoryview(values).toreadonly()
+
+    @classmethod
+    def from_period_data(cls, data: Mapping[str, Mapping[str, Mapping[str, float]]],
+                         categories: Sequence[str], directions: Sequence[str],
+                         granularity: str = "yearly") -> "BilanJoursReport":
+        """
+        Construit le bilan à partir des jours collectés par période
+        ({période: {direction: {catégorie: jours}}}, périodes 'AAAA' ou
+        'AAAA_MM' dans l'ordre chronologique).
+        """
+        headers = []
+        cells = []  # une liste de jours par colonne, une valeur par catégorie
+        if granularity == "monthly":
+            for period, period_data in data.items():
+                year, month = period.split("_")
+                for direction in directions:
+                    headers.append(f"{direction}\n{MONTH_ABBREVIATIONS[int(month) - 1]} {year}")
+                    direction_data = period_data.get(direction, {})
+                    cells.append([direction_data.get(categorie, 0.0) for categorie in categories])
+        else:
+            for direction in directions:
+                headers.append(direction)
+                cells.append([
+                    sum(period_data.get(direction, {}).get(categorie, 0.0) for period_data in data.values())
+                    for categorie in categories
+                ])
+        headers.append(TOTAL_LABEL)
+
+        width = len(headers)
+        total_row = len(categories) * width
+        values = array('d', bytes(8 * width * (len(categories) + 1)))
+        for col, column in enumerate(cells):
+            for row, jours in enumerate(column):
+                values[row * width + col] = jours
+                values[row * width + width - 1] += jours
+                values[total_row + col] += jours
+                values[total_row + width - 1] += jours
+        return cls(categories, headers, values)
+
+    @property
+    def row_count(self) -> int:
+        """Catégories puis la ligne TOTAL."""
+        return len(self.categories) + 1
+
+    def row_label(self, row: int) -> str:
+        return self.categories[row] if row < len(self.categories) else TOTAL_LABEL
+
+    def is_total_row(self, row: int) -> bool:
+        return row == len(self.categories)
+
+    def is_total_column(self, column: int) -> bool:
+        return column == len(self.columns) - 1
+
+    def value(self, row: int, column: int) -> float:
+        return self._values[row * len(self.columns) + column]
+
+    def cell_text(self, row: int, column: int) -> str:
+        """Jours affichés avec une décimale, vide si nul."""
+        jours = self.value(row, column)
+        return f"{jours:.1f}" if jours > 0 else ""
+
+
+__all__ = [
+    "BilanJoursReport",
+    "MONTH_ABBREVIATIONS",
+    "TOTAL_LABEL",
+]
@@ -1,10 +1,9 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
-    QComboBox, QHBoxLayout, QStackedWidget, QWidget, QMessageBox, QFileDialog
+    QComboBox, QHBoxLayout, QStackedWidget, QWidget, QMessageBox, QFileDialog, QApplication
 )
 from PyQt6.QtGui import QDoubleValidator
 from PyQt6.QtCore import Qt
-import sqlite3
 import re
 from calendar import month_name
 
@@ -13,253 +12,13 @@ from database import get_connection
 class BudgetEditDialog(QDialog):
      
     def __init__(self, projet_id, parent=None):
-        # --- Création table recettes si besoin ---
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Vérifier la structure actuelle de la table recettes
-        cursor.execute("PRAGMA table_info(recettes)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-        
-        # Si la table a la structure ancienne (avec id et libelle), la migrer
-        if 'id' in column_names and 'libelle' in column_names and 'ligne_index' not in column_names:
-            # Créer la nouvelle table avec la structure correcte
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS recettes_new (
-                    projet_id INTEGER,
-                    annee INTEGER,
-                    ligne_index INTEGER,
-                    mois TEXT,
-                    montant REAL,
-                    detail TEXT,
-                    PRIMARY KEY (projet_id, annee, ligne_index, mois)
-                )
-            """)
-            
-            # Copier les données en assignant des indices de ligne
-            cursor.execute("""
-                INSERT INTO recettes_new (projet_id, annee, ligne_index, mois, montant, detail)
-                SELECT projet_id, annee, 
-                       ROW_NUMBER() OVER (PARTITION BY projet_id, annee ORDER BY id) - 1 as ligne_index,
-                       mois, montant, COALESCE(libelle, '') as detail
-                FROM recettes
-            """)
-            
-            # Supprimer l'ancienne table et renommer la nouvelle
-            cursor.execute("DROP TABLE recettes")
-            cursor.execute("ALTER TABLE recettes_new RENAME TO recettes")
-        elif 'ligne_index' not in column_names:
-            # Créer la table avec la nouvelle structure
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS recettes (
-                    projet_id INTEGER,
-                    annee INTEGER,
-                    ligne_index INTEGER,
-                    mois TEXT,
-                    montant REAL,
-                    detail TEXT,
-                    PRIMARY KEY (projet_id, annee, ligne_index, mois)
-                )
-            """)
-        
-        conn.commit()
-        conn.close()
-        # --- Création table depenses si besoin ---
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Vérifier la structure actuelle de la table depenses
-        cursor.execute("PRAGMA table_info(depenses)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-        
-        # Si la table a la structure ancienne (avec id et libelle), la migrer
-        if 'id' in column_names and 'libelle' in column_names and 'categorie' not in column_names:
-            # Créer la nouvelle table avec la structure correcte
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS depenses_new (
-                    projet_id INTEGER,
-                    annee INTEGER,
-                    categorie TEXT,
-                    mois TEXT,
-                    montant REAL,
-                    detail TEXT,
-                    PRIMARY KEY (projet_id, annee, categorie, mois)
-                )
-            """)
-            
-            # Copier les données en utilisant libelle comme categorie
-            cursor.execute("""
-                INSERT INTO depenses_new (projet_id, annee, categorie, mois, montant, detail)
-                SELECT projet_id, annee, 
-                       COALESCE(libelle, 'Autres') as categorie,
-                       mois, montant, '' as detail
-                FROM depenses
-            """)
-            
-            # Supprimer l'ancienne table et renommer la nouvelle
-            cursor.execute("DROP TABLE depenses")
-            cursor.execute("ALTER TABLE depenses_new RENAME TO depenses")
-        elif 'categorie' not in column_names:
-            # Créer la table avec la nouvelle structure
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS depenses (
-                    projet_id INTEGER,
-                    annee INTEGER,
-                    categorie TEXT,
-                    mois TEXT,
-                    montant REAL,
-                    detail TEXT,
-                    PRIMARY KEY (projet_id, annee, categorie, mois)
-                )
-            """)
-        
-        conn.commit()
-        conn.close()
-        # --- Création table autres_depenses si besoin ---
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Vérifier la structure actuelle de la table autres_depenses
-        cursor.execute("PRAGMA table_info(autres_depenses)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-        
-        # Si la table a la structure ancienne (avec id et libelle), la migrer
-        if 'id' in column_names and 'libelle' in column_names and 'ligne_index' not in column_names:
-            # Créer la nouvelle table avec la structure correcte
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS autres_depenses_new (
-                    projet_id INTEGER,
-                    annee INTEGER,
-                    ligne_index INTEGER,
-                    mois TEXT,
-                    montant REAL,
-                    detail TEXT,
-                    PRIMARY KEY (projet_id, annee, ligne_index, mois)
-                )
-            """)
-            
-            # Copier les données en assignant des indices de ligne
-            cursor.execute("""
-                INSERT INTO autres_depenses_new (projet_id, annee, ligne_index, mois, montant, detail)
-                SELECT projet_id, annee, 
-                       ROW_NUMBER() OVER (PARTITION BY projet_id, annee ORDER BY id) - 1 as ligne_index,
-                       mois, montant, COALESCE(libelle, '') as detail
-                FROM autres_depenses
-            """)
-            
-            # Supprimer l'ancienne table et renommer la nouvelle
-            cursor.execute("DROP TABLE autres_depenses")
-            cursor.execute("ALTER TABLE autres_depenses_new RENAME TO autres_depenses")
-        elif 'ligne_index' not in column_names:
-            # Créer la table avec la nouvelle structure
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS autres_depenses (
-                    projet_id INTEGER,
-                    annee INTEGER,
-                    ligne_index INTEGER,
-                    mois TEXT,
-                    montant REAL,
-                    detail TEXT,
-                    PRIMARY KEY (projet_id, annee, ligne_index, mois)
-                )
-            """)
-        
-        conn.commit()
-        conn.close()
+        # La structure des tables temps_travail/recettes/depenses/autres_depenses est migrée par init_db()
         super().__init__(parent)
         self.projet_id = projet_id
         self.setWindowTitle("Budget du Projet")
         self.setMinimumSize(1100, 700)
         main_layout = QVBoxLayout()
 
-        # --- Création table temps_travail si besoin ---
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Vérifier la structure actuelle de la table temps_travail
-        cursor.execute("PRAGMA table_info(temps_travail)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-        
-        # Si la table n'a pas la colonne membre_id, la migrer
-        if 'membre_id' not in column_names:
-            # Ajouter la colonne membre_id
-            try:
-                cursor.execute("ALTER TABLE temps_travail ADD COLUMN membre_id TEXT")
-                
-                # Mettre à jour les données existantes avec des membre_id générés
-                cursor.execute("SELECT ROWID, projet_id, annee, direction, categorie FROM temps_travail")
-                existing_rows = cursor.fetchall()
-                
-                # Générer des membre_id uniques pour les données existantes
-                member_counters = {}
-                for rowid, projet_id, annee, direction, categorie in existing_rows:
-                    key = f"{direction}_{categorie}"
-                    if key not in member_counters:
-                        member_counters[key] = 0
-                    
-                    membre_id = f"{direction}_{categorie}_{member_counters[key]}"
-                    member_counters[key] += 1
-                    
-                    cursor.execute("UPDATE temps_travail SET membre_id = ? WHERE ROWID = ?", 
-                                 (membre_id, rowid))
-                
-                # Maintenant créer la nouvelle table avec la nouvelle structure
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS temps_travail_new (
-                        projet_id INTEGER,
-                        annee INTEGER,
-                        direction TEXT,
-                        categorie TEXT,
-                        membre_id TEXT,
-                        mois TEXT,
-                        jours REAL,
-                        PRIMARY KEY (projet_id, annee, membre_id, mois)
-                    )
-                """)
-                
-                # Copier les données vers la nouvelle table
-                cursor.execute("""
-                    INSERT INTO temps_travail_new (projet_id, annee, direction, categorie, membre_id, mois, jours)
-                    SELECT projet_id, annee, direction, categorie, membre_id, mois, jours
-                    FROM temps_travail
-                """)
-                
-                # Supprimer l'ancienne table et renommer la nouvelle
-                cursor.execute("DROP TABLE temps_travail")
-                cursor.execute("ALTER TABLE temps_travail_new RENAME TO temps_travail")
-                
-            except sqlite3.Error as e:
-                print(f"Erreur lors de la migration: {e}")
-        else:
-            # La table existe déjà avec la bonne structure, vérifier la clé primaire
-            cursor.execute("PRAGMA table_info(temps_travail)")
-            columns = cursor.fetchall()
-            
-            # Si la structure est différente, recréer la table
-            expected_columns = ['projet_id', 'annee', 'direction', 'categorie', 'membre_id', 'mois', 'jours']
-            actual_columns = [col[1] for col in columns]
-            
-            if actual_columns != expected_columns:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS temps_travail (
-                        projet_id INTEGER,
-                        annee INTEGER,
-                        direction TEXT,
-                        categorie TEXT,
-                        membre_id TEXT,
-                        mois TEXT,
-                        jours REAL,
-                        PRIMARY KEY (projet_id, annee, membre_id, mois)
-                    )
-                """)
-        
-        conn.commit()
-        conn.close()
-
         # --- Stockage des valeurs par année ---
         self.budget_data = {}  # {annee: {(row_index, mois): {'jours': X, 'direction': Y, 'categorie': Z, 'membre_id': W}}}
         self.recettes_data = {}  # {annee: {(ligne_index, mois): (montant, detail)}}
@@ -1404,7 +1163,20 @@ class BudgetEditDialog(QDialog):
 
     def generer_modele_excel(self):
         """Génère un fichier Excel modèle pour saisie manuelle"""
-        from generer_modele_excel import creer_modele_excel
+        from generer_modele_excel import creer_modele_excel, nom_fichier_modele
+        
+        box = QMessageBox(self)
+        box.setWindowTitle("Modèle Excel")
+        box.setText("Générer le modèle Excel :")
+        projet_btn = box.addButton("Ce projet", QMessageBox.ButtonRole.AcceptRole)
+        tous_btn = box.addButton("Tous les projets (dossier)...", QMessageBox.ButtonRole.AcceptRole)
+        box.addButton("Annuler", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        if box.clickedButton() is tous_btn:
+            self.generer_modeles_portefeuille()
+            return
+        if box.clickedButton() is not projet_btn:
+            return
         
         # Récupérer le code du projet pour le nom de fichier
         conn = get_connection()
@@ -1413,8 +1185,7 @@ class BudgetEditDialog(QDialog):
         result = cursor.fetchone()
         conn.close()
         
-        code_projet = result[0] if result else "Projet"
-        nom_defaut = f"Modele_{code_projet}.xlsx"
+        nom_defaut = nom_fichier_modele(result[0] if result else None)
         
         file_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -1442,6 +1213,38 @@ class BudgetEditDialog(QDialog):
             except Exception as e:
                 QMessageBox.critical(self, "Erreur", f"Erreur lors de la création du modèle :\n{e}")
     
+    def generer_modeles_portefeuille(self):
+        """Génère dans un dossier le modèle Excel de chaque projet non archivé"""
+        from generer_modele_excel import creer_modeles_excel
+        from project_archive import archived_project_ids
+        
+        dossier = QFileDialog.getExistingDirectory(self, "Dossier des modèles Excel")
+        if not dossier:
+            return
+        
+        conn = get_connection()
+        cursor = conn.cursor()
+        archives = set(archived_project_ids(cursor))
+        cursor.execute("SELECT id FROM projets ORDER BY code")
+        projet_ids = [row[0] for row in cursor.fetchall() if row[0] not in archives]
+        conn.close()
+        
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            chemins = creer_modeles_excel(dossier, projet_ids)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur lors de la création des modèles :\n{e}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        
+        QMessageBox.information(
+            self, "Modèles créés",
+            f"{len(chemins)} modèles Excel créés dans :\n{dossier}\n\n"
+            "Chaque modèle indique son projet : le dossier complété peut être\n"
+            "réimporté en une fois avec « Import par lot (dossier)... »."
+        )
+    
     def importer_modele_excel(self):
         """Ouvre le dialogue d'import depuis un modèle Excel"""
         from import_modele_excel_dialog import ImportExcelModeleDialog
@@ -1551,124 +1354,66 @@ class BudgetEditDialog(QDialog):
         conn = get_connection()
         cursor = conn.cursor()
         
-        # Vérifier si la colonne membre_id existe
-        cursor.execute("PRAGMA table_info(temps_travail)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
+        cursor.execute("""
+            SELECT direction, categorie, membre_id, mois, jours 
+            FROM temps_travail 
+            WHERE projet_id=? AND annee=?
+        """, (self.projet_id, int(year)))
+        rows = cursor.fetchall()
         
-        if 'membre_id' in column_names:
-            cursor.execute("""
-                SELECT direction, categorie, membre_id, mois, jours 
-                FROM temps_travail 
-                WHERE projet_id=? AND annee=?
-            """, (self.projet_id, int(year)))
-            rows = cursor.fetchall()
-            
-            if rows:
-                # Met aussi les données en mémoire pour cet année
-                data = {}
-
-                # Trouve la ligne correspondante pour chaque donnée
-                for direction, categorie, membre_id, mois, jours in rows:
-                    # Cherche la ligne correspondante par membre_id exact d'abord
-                    target_row = None
-                    for row, stored_membre_id in self.membre_mapping.items():
-                        if stored_membre_id == membre_id:
-                            target_row = row
-                            break
-                    
-                    # Si pas de correspondance exacte, cherche par direction/catégorie
-                    if target_row is None:
-                        for row in range(table.rowCount()):
-                            if row not in self.direction_rows:
-                                # Vérifier si cette ligne correspond à la direction/catégorie
-                                categorie_item = table.item(row, 0)
-                                if categorie_item and categorie_item.text() == categorie:
-                                    # Vérifier la direction (ligne précédente de type direction)
-                                    direction_row = None
-                                    for r in range(row - 1, -1, -1):
-                                        if r in self.direction_rows:
-                                            direction_item = table.item(r, 0)
-                                            if direction_item and direction_item.text() == direction:
-                                                target_row = row
-                                                break
+        if rows:
+            # Met aussi les données en mémoire pour cet année
+            data = {}
+
+            # Trouve la ligne correspondante pour chaque donnée
+            for direction, categorie, membre_id, mois, jours in rows:
+                # Cherche la ligne correspondante par membre_id exact d'abord
+                target_row = None
+                for row, stored_membre_id in self.membre_mapping.items():
+                    if stored_membre_id == membre_id:
+                        target_row = row
+                        break
+                
+                # Si pas de correspondance exacte, cherche par direction/catégorie
+                if target_row is None:
+                    for row in range(table.rowCount()):
+                        if row not in self.direction_rows:
+                            # Vérifier si cette ligne correspond à la direction/catégorie
+                            categorie_item = table.item(row, 0)
+                            if categorie_item and categorie_item.text() == categorie:
+                                # Vérifier la direction (ligne précédente de type direction)
+                                direction_row = None
+                                for r in range(row - 1, -1, -1):
+                                    if r in self.direction_rows:
+                                        direction_item = table.item(r, 0)
+                                        if direction_item and direction_item.text() == direction:
+                                            target_row = row
                                             break
-                                    if target_row is not None:
                                         break
-                    
-                    if target_row is not None and target_row not in self.direction_rows:
-                        # Trouve la colonne du mois
-                        for col in range(1, table.columnCount()):
-                            if colonnes[col] == mois:
-                                table.blockSignals(True)
-                                table.item(target_row, col).setText(str(jours))
-                                table.blockSignals(False)
-                                
-                                # Stocke aussi en mémoire
-                                key = (target_row, mois)
-                                data[key] = {
-                                    'jours': jours,
-                                    'direction': direction,
-                                    'categorie': categorie,
-                                    'membre_id': membre_id
-                                }
-                                break
+                                if target_row is not None:
+                                    break
                 
-                # Sauvegarde les données en mémoire
-                if data:
-                    self.budget_data[year] = data
-        else:
-            # Ancienne structure sans membre_id - méthode de fallback
-            cursor.execute("""
-                SELECT direction, categorie, mois, jours 
-                FROM temps_travail 
-                WHERE projet_id=? AND annee=?
-            """, (self.projet_id, int(year)))
-            rows = cursor.fetchall()
-            
-            if rows:
-                data = {}
-                # Méthode de fallback - cherche par direction et catégorie
-                for direction, categorie, mois, jours in rows:
-                    for row in range(table.rowCount()):
-                        if row in self.direction_rows:
-                            continue
-                        
-                        # Trouve la direction pour cette ligne
-                        current_direction = None
-                        for r in range(row + 1):
-                            if r in self.direction_rows:
-                                current_direction = table.item(r, 0).text()
-                        
-                        # Vérifie si c'est la bonne ligne
-                        if (current_direction == direction and 
-                            table.item(row, 0).text() == categorie):
+                if target_row is not None and target_row not in self.direction_rows:
+                    # Trouve la colonne du mois
+                    for col in range(1, table.columnCount()):
+                        if colonnes[col] == mois:
+                            table.blockSignals(True)
+                            table.item(target_row, col).setText(str(jours))
+                            table.blockSignals(False)
                             
-                            # Trouve la colonne du mois
-                            for col in range(1, table.columnCount()):
-                                if colonnes[col] == mois:
-                                    table.blockSignals(True)
-                                    table.item(row, col).setText(str(jours))
-                                    table.blockSignals(False)
-                                    
-                                    # Stocke aussi en mémoire avec le nouveau format
-                                    membre_id = self.membre_mapping.get(row, f"membre_{row}")
-                                    key = (row, mois)
-                                    data[key] = {
-                                        'jours': jours,
-                                        'direction': direction,
-                                        'categorie': categorie,
-                                        'membre_id': membre_id
-                                    }
-                                    found = True
-                                    break
-                        
-                        if found:
+                            # Stocke aussi en mémoire
+                            key = (target_row, mois)
+                            data[key] = {
+                                'jours': jours,
+                                'direction': direction,
+                                'categorie': categorie,
+                                'membre_id': membre_id
+                            }
                             break
-                
-                # Sauvegarde les données mises à jour
-                if data:
-                    self.budget_data[year] = data
+            
+            # Sauvegarde les données en mémoire
+            if data:
+                self.budget_data[year] = data
         
         conn.close()
 
@@ -67,7 +67,6 @@ class CategorieCoutDialog(QDialog):
         self.brouillons = {}  # année -> valeurs du tableau
         self.base_categories = list(DEFAULT_CATEGORIES)
         
-        self.ensure_table_exists()
         self.load_custom_categories()
         
         main_layout = QVBoxLayout()
@@ -531,21 +530,6 @@ class CategorieCoutDialog(QDialog):
         if show_message:
             QMessageBox.information(self, 'Sauvegarde', 'Les coûts ont été enregistrés avec succès.')
 
-    def ensure_table_exists(self):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''CREATE TABLE IF NOT EXISTS categorie_cout (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            annee INTEGER,
-            categorie TEXT,
-            libelle TEXT,
-            montant_charge REAL,
-            cout_production REAL,
-            cout_complet REAL
-        )''')
-        conn.commit()
-        conn.close()
-
     def get_default_year(self):
         import datetime
         return datetime.datetime.now().year
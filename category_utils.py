@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from database import get_connection
 
@@ -93,6 +93,61 @@ def list_category_labels() -> List[str]:
     return sorted(unique_labels)
 
 
+# Colonnes de taux journalier de categorie_cout, dans l'ordre de get_cost_rates()
+COST_TYPES: Tuple[str, ...] = ("montant_charge", "cout_production", "cout_complet")
+
+
+@lru_cache(maxsize=1)
+def get_cost_rates() -> Dict[Tuple[int, str], Tuple[Optional[float], ...]]:
+    """
+    Matrice des taux journaliers, chargée une seule fois :
+    (année, code de catégorie canonique) -> (montant_charge, cout_production, cout_complet).
+    En cas de doublon pour une même année et catégorie, la première ligne l'emporte
+    (comme un SELECT ... fetchone()).
+    """
+    rates: Dict[Tuple[int, str], Tuple[Optional[float], ...]] = {}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT annee, categorie, libelle, {', '.join(COST_TYPES)} FROM categorie_cout ORDER BY id"
+        )
+        for annee, code, label, *values in cursor.fetchall():
+            code = resolve_category_code(code or label)
+            if annee is None or not code:
+                continue
+            rates.setdefault((int(annee), code), tuple(values))
+    return rates
+
+
+def get_cost_rate(annee: int, categorie: str, cost_type: str = "montant_charge") -> Optional[float]:
+    """
+    Taux journalier d'une catégorie (code ou libellé) pour une année et un type
+    de coût, ou None s'il n'est pas défini.
+    """
+    code = resolve_category_code(categorie)
+    if not code or annee is None:
+        return None
+    values = get_cost_rates().get((int(annee), code))
+    if values is None:
+        return None
+    return values[COST_TYPES.index(cost_type)]
+
+
+def value_days(rows: Iterable[Tuple[int, str, float]], cost_type: str = "montant_charge") -> float:
+    """
+    Valorise des lignes (année, catégorie, jours) au taux de get_cost_rate :
+    la catégorie peut être saisie en code ou en libellé. Les catégories sans
+    taux ne comptent pas, comme dans une jointure sur categorie_cout.
+    """
+    total = 0.0
+    for annee, categorie, jours in rows:
+        taux = get_cost_rate(annee, categorie, cost_type)
+        if taux:
+            total += (jours or 0) * taux
+    return total
+
+
 def invalidate_category_cache() -> None:
-    """Vide le cache pour refléter les modifications utilisateur."""
+    """Vide les caches (catégories et taux) pour refléter les modifications utilisateur."""
     get_category_mappings.cache_clear()
+    get_cost_rates.cache_clear()
@@ -0,0 +1,554 @@
+"""
+Calcul du CIR d'un projet, sans dépendance à l'interface.
+
+Le calcul est séparé en deux étapes : load_cir_inputs() lit en une passe
+les données d'un projet, compute_cir_breakdown() les agrège mois par mois.
+Les simulations (voir scenario_simulation) rejouent la seconde étape sur
+des données déjà chargées avec d'autres taux, coefficients ou subventions.
+
+Les montants reproduisent les règles de CompteResultatDisplay (dont
+calculate_distributed_cir) : le CIR de la fiche projet est celui du compte
+de résultat du projet. benchmarks.consistency vérifie cette égalité.
+"""
+
+import datetime
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from category_utils import get_cost_rate
+from database import amortissements_by_period
+from month_utils import MONTH_NUMBERS, month_key
+from subvention_calculation import distributed_subvention
+
+# (annee, k1, k2, k3)
+CoeffsRow = Tuple[int, float, float, float]
+
+
+def _index_mois(date):
+    return date.year * 12 + date.month - 1
+
+
+def mois_entre(debut, fin):
+    """Liste des (année, mois) de debut à fin inclus"""
+    return [(i // 12, i % 12 + 1) for i in range(_index_mois(debut), _index_mois(fin) + 1)]
+
+
+def mois_actifs_par_annee(mois_projet):
+    """Mois actifs du projet, par année : {année: [mois, ...]}"""
+    mois_actifs = defaultdict(list)
+    for annee, mois in mois_projet:
+        mois_actifs[annee].append(mois)
+    return mois_actifs
+
+
+def temps_travail_mensuel(temps_travail, mois_actifs, cost_rate) -> Dict[Tuple[int, int], float]:
+    """
+    Temps de travail valorisé par (année, mois), avec la règle de redistribution
+    de CompteResultatDisplay.calculate_redistributed_temps_travail : si chaque
+    couple (membre, catégorie) de l'année n'a qu'une saisie, les jours sont
+    répartis sur les mois actifs, sinon les mois saisis sont conservés.
+    `cost_rate(annee, categorie)` donne le taux journalier (une fonction
+    renvoyant 1 donne les jours).
+    """
+    temps_par_annee = defaultdict(list)
+    for annee, mois_nom, membre_id, categorie, jours in temps_travail:
+        temps_par_annee[annee].append((mois_nom, membre_id, categorie, jours or 0))
+
+    temps_mensuel = defaultdict(float)
+    for annee, lignes in temps_par_annee.items():
+        if annee not in mois_actifs:
+            continue
+        couples = Counter((membre_id, categorie) for _, membre_id, categorie, _ in lignes)
+        if all(nb == 1 for nb in couples.values()):
+            # Une seule saisie par couple (membre, catégorie) : redistribution sur les mois actifs
+            for _, _, categorie, jours in lignes:
+                taux = cost_rate(annee, categorie)
+                if not taux:
+                    continue
+                part = jours / len(mois_actifs[annee]) * taux
+                for mois in mois_actifs[annee]:
+                    temps_mensuel[(annee, mois)] += part
+        else:
+            # Données réelles mois par mois
+            for mois_nom, _, categorie, jours in lignes:
+                taux = cost_rate(annee, categorie)
+                mois = MONTH_NUMBERS.get((mois_nom or '').strip().lower())
+                if taux is None or mois is None:
+                    continue
+                temps_mensuel[(annee, mois)] += jours * taux
+    return temps_mensuel
+
+
+def depenses_mensuelles(rows, mois_actifs) -> Dict[Tuple[int, int], float]:
+    """
+    Montants (année, mois, montant) par (année, mois), avec la règle de
+    CompteResultatDisplay.calculate_redistributed_expenses : une seule saisie
+    dans l'année est répartie sur les mois actifs.
+    """
+    par_annee = defaultdict(list)
+    for annee, mois_nom, montant in rows:
+        par_annee[annee].append((mois_nom, montant or 0))
+
+    resultat = defaultdict(float)
+    for annee, lignes in par_annee.items():
+        if annee not in mois_actifs:
+            continue
+        if len(lignes) == 1:
+            # Une seule saisie dans l'année : redistribution sur les mois actifs
+            part = lignes[0][1] / len(mois_actifs[annee])
+            for mois in mois_actifs[annee]:
+                resultat[(annee, mois)] += part
+        else:
+            for mois_nom, montant in lignes:
+                mois = MONTH_NUMBERS.get((mois_nom or '').strip().lower())
+                if mois is not None:
+                    resultat[(annee, mois)] += montant
+    return resultat
+
+
+def load_cir_coeffs(cursor) -> List[CoeffsRow]:
+    cursor.execute("SELECT annee, k1, k2, k3 FROM cir_coeffs")
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def load_subventions(cursor, project_id) -> List[dict]:
+    """Subventions d'un projet, au format de subvention_data de CompteResultatDisplay (avec l'id)."""
+    cursor.execute('''
+        SELECT nom, mode_simplifie, montant_forfaitaire, depenses_temps_travail, coef_temps_travail,
+               depenses_externes, coef_externes, depenses_autres_achats, coef_autres_achats,
+               depenses_dotation_amortissements, coef_dotation_amortissements, cd, taux,
+               date_debut_subvention, date_fin_subvention, montant_subvention_max, depenses_eligibles_max, id
+        FROM subventions WHERE projet_id = ?
+    ''', (project_id,))
+    subventions = []
+    for subvention in cursor.fetchall():
+        subventions.append({
+            'nom': subvention[0],
+            'mode_simplifie': subvention[1] or 0,
+            'montant_forfaitaire': subvention[2] or 0,
+            'depenses_temps_travail': subvention[3] or 0,
+            'coef_temps_travail': subvention[4] or 1,
+            'depenses_externes': subvention[5] or 0,
+            'coef_externes': subvention[6] or 1,
+            'depenses_autres_achats': subvention[7] or 0,
+            'coef_autres_achats': subvention[8] or 1,
+            'depenses_dotation_amortissements': subvention[9] or 0,
+            'coef_dotation_amortissements': subvention[10] or 1,
+            'cd': subvention[11] or 1,
+            'taux': subvention[12] or 100,
+            'date_debut_subvention': subvention[13],
+            'date_fin_subvention': subvention[14],
+            'montant_subvention_max': subvention[15],
+            'depenses_eligibles_max': subvention[16],
+            'id': subvention[17],
+        })
+    return subventions
+
+
+def load_cir_inputs(cursor, project_id) -> Optional[dict]:
+    """
+    Lit les données d'un projet utilisées par compute_cir_breakdown : dates,
+    temps de travail, dépenses, dotations et subventions. Les montants annuels
+    des subventions sans dates propres ('montants_annuels', règle de
+    subvention_calculation) sont calculés ici, compute_cir_breakdown ne lisant
+    pas la base.
+    Retourne None si les dates du projet sont absentes ou invalides.
+    """
+    cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id = ?", (project_id,))
+    projet_info = cursor.fetchone()
+    if not projet_info or not projet_info[0] or not projet_info[1]:
+        return None
+
+    try:
+        debut_projet = datetime.datetime.strptime(projet_info[0], '%m/%Y')
+        fin_projet = datetime.datetime.strptime(projet_info[1], '%m/%Y')
+    except ValueError:
+        return None
+
+    cursor.execute("""
+        SELECT annee, mois, membre_id, categorie, jours
+        FROM temps_travail WHERE projet_id = ?
+    """, (project_id,))
+    temps_travail = [tuple(row) for row in cursor.fetchall()]
+
+    def depenses(table_name):
+        cursor.execute(f"""
+            SELECT annee, mois, SUM(montant)
+            FROM {table_name}
+            WHERE projet_id = ?
+            GROUP BY annee, mois
+        """, (project_id,))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    # Dotations mensuelles de l'échéancier jusqu'à la fin du projet
+    dotations = amortissements_by_period(cursor, project_id, None, month_key(fin_projet.year, fin_projet.month))
+
+    subventions = load_subventions(cursor, project_id)
+    for data in subventions:
+        if not data['date_debut_subvention'] or not data['date_fin_subvention']:
+            # Taux de référence des montants : un taux simulé s'y applique proportionnellement
+            data['taux_reference'] = data['taux']
+            data['montants_annuels'] = {
+                annee: distributed_subvention(cursor, project_id, data, annee)
+                for annee in range(debut_projet.year, fin_projet.year + 1)
+            }
+
+    return {
+        'projet_id': project_id,
+        'debut': debut_projet,
+        'fin': fin_projet,
+        'temps_travail': temps_travail,
+        'depenses': depenses('depenses'),
+        'autres_depenses': depenses('autres_depenses'),
+        'dotations': dotations,
+        'subventions': subventions,
+    }
+
+
+def _coefficients(coeffs_rows: List[CoeffsRow], annee: int):
+    """(k1, k2, k3) de l'année, sinon ceux de la première ligne (repli de calculate_distributed_cir)."""
+    for row in coeffs_rows:
+        if row[0] == annee:
+            return tuple(row[1:])
+    return tuple(coeffs_rows[0][1:]) if coeffs_rows else None
+
+
+def repartition_subvention(data: dict, depenses_eligibles):
+    """
+    Répartition d'une subvention ayant ses propres dates sur toute sa période,
+    même hors de celle du projet, comme
+    CompteResultatDisplay.calculate_subvention_with_redistribution : au prorata
+    des dépenses éligibles du mois, ou du nombre de mois en mode simplifié.
+    `depenses_eligibles(data, annee, mois)` donne l'assiette d'un mois.
+    Retourne ({(année, mois): montant}, {(année, mois): assiette}), ou None
+    si les dates de la subvention sont absentes ou invalides.
+    """
+    if not data['date_debut_subvention'] or not data['date_fin_subvention']:
+        return None
+    try:
+        mois_subvention = mois_entre(
+            datetime.datetime.strptime(data['date_debut_subvention'], '%m/%Y'),
+            datetime.datetime.strptime(data['date_fin_subvention'], '%m/%Y')
+        )
+    except ValueError:
+        return None
+
+    eligibles = {cle: depenses_eligibles(data, *cle) for cle in mois_subvention}
+    depenses_totales = sum(eligibles.values())
+
+    if data['mode_simplifie']:
+        montant_total = float(data['montant_forfaitaire'])
+    else:
+        assiette = depenses_totales
+        if data['depenses_eligibles_max'] and data['depenses_eligibles_max'] > 0:
+            assiette = min(assiette, data['depenses_eligibles_max'])
+        montant_total = assiette * data['taux'] / 100
+        if data['montant_subvention_max'] and data['montant_subvention_max'] > 0:
+            montant_total = min(montant_total, data['montant_subvention_max'])
+
+    mensuel = {}
+    if montant_total > 0:
+        for cle in mois_subvention:
+            if data['mode_simplifie']:
+                mensuel[cle] = montant_total / len(mois_subvention)
+            elif depenses_totales > 0:
+                mensuel[cle] = montant_total * eligibles[cle] / depenses_totales
+    return mensuel, eligibles
+
+
+def subventions_datees(subventions: List[dict], depenses_eligibles) -> Dict[Tuple[int, int], float]:
+    """Total par (année, mois) des subventions ayant leurs propres dates (repartition_subvention)."""
+    resultat = defaultdict(float)
+    for data in subventions:
+        repartition = repartition_subvention(data, depenses_eligibles)
+        if repartition is None:
+            continue
+        for cle, montant in repartition[0].items():
+            resultat[cle] += montant
+    return resultat
+
+
+def _depenses_eligibles(inputs: dict, temps_mensuel, depenses_mensuel, autres_depenses_mensuel):
+    """Assiette mensuelle d'une subvention, même logique que _calculate_eligible_expenses_for_month."""
+    dotations = inputs['dotations']
+
+    def depenses_eligibles(data, annee, mois):
+        cle = (annee, mois)
+        total = 0
+        if data['depenses_temps_travail']:
+            total += temps_mensuel.get(cle, 0) * data['coef_temps_travail'] * data['cd']
+        if data['depenses_externes']:
+            total += depenses_mensuel.get(cle, 0) * data['coef_externes']
+        if data['depenses_autres_achats']:
+            total += autres_depenses_mensuel.get(cle, 0) * data['coef_autres_achats']
+        if data['depenses_dotation_amortissements']:
+            total += dotations.get(month_key(annee, mois), 0) * data['coef_dotation_amortissements']
+        return total
+
+    return depenses_eligibles
+
+
+def project_amounts(inputs: dict, cost_rate: Callable[[int, str], Optional[float]] = get_cost_rate) -> dict:
+    """
+    Montants mensuels d'un projet avec les règles de CompteResultatDisplay,
+    indépendants de la sélection de projets affichée :
+    - 'temps_travail' : temps valorisé au taux `cost_rate` (coût chargé pour le CIR)
+    - 'depenses', 'autres_depenses' : dépenses redistribuées
+    - 'subventions_datees' : subventions ayant leurs propres dates, sur tous
+      les mois de leur période (calculate_subvention_with_redistribution)
+    - 'subventions_non_datees' : {année: montant} des autres subventions
+    """
+    mois_projet = mois_entre(inputs['debut'], inputs['fin'])
+    mois_actifs = mois_actifs_par_annee(mois_projet)
+    temps_mensuel = temps_travail_mensuel(inputs['temps_travail'], mois_actifs, cost_rate)
+    depenses_mensuel = depenses_mensuelles(inputs['depenses'], mois_actifs)
+    autres_depenses_mensuel = depenses_mensuelles(inputs['autres_depenses'], mois_actifs)
+    depenses_eligibles = _depenses_eligibles(inputs, temps_mensuel, depenses_mensuel, autres_depenses_mensuel)
+
+    subventions_non_datees = defaultdict(float)
+    for data in inputs['subventions']:
+        if data['date_debut_subvention'] and data['date_fin_subvention']:
+            continue
+        # Montants annuels calculés par load_cir_inputs ; en mode détaillé
+        # le montant est proportionnel au taux
+        facteur = 1 if data['mode_simplifie'] else data['taux'] / data['taux_reference']
+        for annee, montant in data['montants_annuels'].items():
+            if montant * facteur > 0:
+                subventions_non_datees[annee] += montant * facteur
+
+    return {
+        'mois': mois_projet,
+        'mois_actifs': mois_actifs,
+        'temps_travail': temps_mensuel,
+        'depenses': depenses_mensuel,
+        'autres_depenses': autres_depenses_mensuel,
+        'subventions_datees': subventions_datees(inputs['subventions'], depenses_eligibles),
+        'subventions_non_datees': subventions_non_datees,
+    }
+
+
+def subventions_par_subvention(inputs: dict, montants: dict) -> List[Tuple[dict, Dict[Tuple[int, int], float],
+                                                                         Dict[Tuple[int, int], float]]]:
+    """
+    Détail de chaque subvention sur les mois du projet, à partir des montants
+    de project_amounts : (données, montants mensuels, dépenses éligibles
+    mensuelles). Une subvention sans dates propres couvre la période du projet,
+    son montant annuel étant réparti sur les mois actifs de l'année.
+    """
+    depenses_eligibles = _depenses_eligibles(
+        inputs, montants['temps_travail'], montants['depenses'], montants['autres_depenses'])
+    mois_projet = montants['mois']
+    mois_actifs = montants['mois_actifs']
+    detail = []
+    for data in inputs['subventions']:
+        repartition = repartition_subvention(data, depenses_eligibles)
+        if repartition is not None:
+            mensuel, eligibles = repartition
+            detail.append((
+                data,
+                {cle: mensuel[cle] for cle in mois_projet if cle in mensuel},
+                {cle: eligibles[cle] for cle in mois_projet if cle in eligibles},
+            ))
+        elif data['date_debut_subvention'] and data['date_fin_subvention']:
+            # Dates invalides : ignorée comme à l'écran
+            detail.append((data, {}, {}))
+        else:
+            facteur = 1 if data['mode_simplifie'] else data['taux'] / data['taux_reference']
+            mensuel = {}
+            for annee, mois in mois_projet:
+                montant = data['montants_annuels'].get(annee, 0) * facteur
+                if montant > 0:
+                    mensuel[(annee, mois)] = montant / len(mois_actifs[annee])
+            detail.append((data, mensuel, {cle: depenses_eligibles(data, *cle) for cle in mois_projet}))
+    return detail
+
+
+def amortissement_periode(inputs: dict, annee: int, mois: Optional[int] = None) -> float:
+    """
+    Dotation du projet pour un mois (jusqu'à la fin du projet) ou une année
+    (limitée aux mois du projet), comme calculate_amortissement_for_period.
+    """
+    dotations = inputs['dotations']
+    if mois is not None:
+        return dotations.get(month_key(annee, mois), 0)
+    debut = max(month_key(annee, 1), month_key(inputs['debut'].year, inputs['debut'].month))
+    fin = min(month_key(annee, 12), month_key(inputs['fin'].year, inputs['fin'].month))
+    return sum(dotations.get(periode, 0) for periode in range(debut, fin + 1))
+
+
+def amortissement_annuel_cir(inputs: dict, annee: int) -> float:
+    """
+    Dotation retenue dans l'assiette CIR annuelle : de janvier à la fin du
+    projet dans l'année, comme calculate_amortissement_for_year.
+    """
+    dotations = inputs['dotations']
+    fin = min(month_key(annee, 12), month_key(inputs['fin'].year, inputs['fin'].month))
+    return sum(dotations.get(periode, 0) for periode in range(month_key(annee, 1), fin + 1))
+
+
+def montant_periode(mensuel: Dict[Tuple[int, int], float], annee: int, mois: Optional[int] = None) -> float:
+    """Montant d'un mois, ou somme de l'année si `mois` est None."""
+    if mois is not None:
+        return mensuel.get((annee, mois), 0)
+    return sum(mensuel.get((annee, m), 0) for m in range(1, 13))
+
+
+def subventions_periode(montants: dict, annee: int, mois: Optional[int], mois_selection) -> float:
+    """
+    Subventions du projet pour la période, comme calculate_smart_distributed_subvention.
+    En mensuel, les subventions sans dates propres sont réparties sur
+    `mois_selection`, les mois actifs de l'année pour l'ensemble des projets
+    affichés (get_active_months_for_year).
+    """
+    total = montant_periode(montants['subventions_datees'], annee, mois)
+    annuel = montants['subventions_non_datees'].get(annee, 0)
+    if mois is None:
+        total += annuel
+    elif annuel and mois in mois_selection:
+        total += annuel / len(mois_selection)
+    return total
+
+
+def cir_periode(projets, coeffs_rows: List[CoeffsRow], annee: int, mois: Optional[int] = None,
+                mois_selection=()) -> float:
+    """
+    CIR d'une période pour des projets CIR, comme calculate_distributed_cir :
+    assiette = (temps × k1) + (amortissements × k2) - subventions cumulée sur
+    les projets actifs dans l'année, CIR = assiette × k3 si elle est positive.
+    `projets` : couples (données de load_cir_inputs, montants de project_amounts
+    calculés au coût chargé).
+    """
+    coeffs = _coefficients(coeffs_rows, annee)
+    if coeffs is None:
+        return 0
+    k1, k2, k3 = coeffs
+    assiette = 0
+    for inputs, montants in projets:
+        if not inputs['debut'].year <= annee <= inputs['fin'].year:
+            continue
+        temps = montant_periode(montants['temps_travail'], annee, mois)
+        if mois is None:
+            amortissements = amortissement_annuel_cir(inputs, annee)
+        else:
+            amortissements = amortissement_periode(inputs, annee, mois)
+        subventions = subventions_periode(montants, annee, mois, mois_selection)
+        assiette += (temps * k1) + (amortissements * k2) - subventions
+    return assiette * k3 if assiette > 0 else 0
+
+
+def compute_cir_breakdown(inputs: dict, coeffs_rows: List[CoeffsRow],
+                          cost_rate: Callable[[int, str], Optional[float]] = get_cost_rate) -> dict:
+    """
+    Décomposition du CIR d'un projet à partir des données de load_cir_inputs.
+    `cost_rate(annee, categorie)` donne le coût chargé journalier d'une catégorie.
+
+    Les montants suivent les règles du compte de résultat affiché pour ce seul
+    projet (CompteResultatDisplay) : le CIR annuel est celui de
+    calculate_distributed_cir, le CIR mensuel celui du compte de résultat mensuel.
+    """
+    montants = project_amounts(inputs, cost_rate)
+    mois_projet = montants['mois']
+    mois_actifs = montants['mois_actifs']
+    annees = sorted(mois_actifs)
+
+    def subventions(annee, mois=None):
+        return subventions_periode(montants, annee, mois, mois_actifs[annee])
+
+    # Mois du projet
+    temps_travail = [montants['temps_travail'].get(cle, 0) for cle in mois_projet]
+    amortissements = [amortissement_periode(inputs, *cle) for cle in mois_projet]
+    subventions_mensuelles = [subventions(*cle) for cle in mois_projet]
+    assiette_mensuelle = []
+    cir_mensuel = []
+    for (annee, _), temps, amort, subv in zip(mois_projet, temps_travail, amortissements, subventions_mensuelles):
+        coeffs = _coefficients(coeffs_rows, annee)
+        assiette = (temps * coeffs[0]) + (amort * coeffs[1]) - subv if coeffs else 0
+        assiette_mensuelle.append(assiette)
+        cir_mensuel.append(assiette * coeffs[2] if coeffs and assiette > 0 else 0)
+
+    # Années du projet
+    coeffs_par_annee = {row[0] for row in coeffs_rows}
+    coefficients = [_coefficients(coeffs_rows, annee) for annee in annees]
+    coefficients_par_defaut = [annee not in coeffs_par_annee for annee in annees]
+    temps_travail_annuel = [montant_periode(montants['temps_travail'], annee) for annee in annees]
+    amortissements_annuels = [amortissement_periode(inputs, annee) for annee in annees]
+    subventions_annuelles = [subventions(annee) for annee in annees]
+    assiette_annuelle = []
+    cir_annuel = []
+    for annee, coeffs, temps, subv in zip(annees, coefficients, temps_travail_annuel, subventions_annuelles):
+        if coeffs is None:
+            assiette_annuelle.append(0)
+        else:
+            assiette_annuelle.append((temps * coeffs[0]) + (amortissement_annuel_cir(inputs, annee) * coeffs[1]) - subv)
+        cir_annuel.append(cir_periode([(inputs, montants)], coeffs_rows, annee))
+
+    return {
+        'mois': mois_projet,
+        'temps_travail': temps_travail,
+        'amortissements': amortissements,
+        'subventions': subventions_mensuelles,
+        'assiette_mensuelle': assiette_mensuelle,
+        'cir_mensuel': cir_mensuel,
+        'annees': annees,
+        'coefficients': coefficients,
+        'coefficients_par_defaut': coefficients_par_defaut,
+        'temps_travail_annuel': temps_travail_annuel,
+        'amortissements_annuels': amortissements_annuels,
+        'subventions_annuelles': subventions_annuelles,
+        'assiette_annuelle': assiette_annuelle,
+        'cir_annuel': cir_annuel,
+        'montant_net_eligible_total': sum(a for a, c in zip(assiette_annuelle, cir_annuel) if c > 0),
+        'cir_total': sum(cir_annuel),
+    }
+
+
+def calculate_cir_breakdown(cursor, project_id):
+    """
+    Calcule en une seule passe la décomposition du CIR d'un projet sur toute sa durée.
+
+    Les données (temps de travail, coûts chargés, dépenses, investissements, subventions,
+    coefficients) sont lues une seule fois puis agrégées mois par mois en mémoire.
+
+    Assiette = (temps_travail × k1) + (amortissements × k2) - subventions,
+    CIR = assiette × k3 si l'assiette de la période est positive. L'assiette
+    annuelle retient les dotations de janvier à la fin du projet dans l'année
+    (calculate_amortissement_for_year), le compte de résultat mensuel celles
+    du mois.
+
+    Retourne None si les dates du projet sont absentes ou invalides, sinon un dict :
+    - 'mois' : liste des (année, mois) du projet
+    - 'temps_travail', 'amortissements', 'subventions' : montants mensuels
+    - 'assiette_mensuelle', 'cir_mensuel' : assiette et CIR du compte de résultat mensuel
+    - 'annees', 'coefficients' ((k1, k2, k3) ou None), 'coefficients_par_defaut'
+      (True si les coefficients d'une autre année ont été utilisés)
+    - 'temps_travail_annuel', 'amortissements_annuels', 'subventions_annuelles' :
+      lignes du compte de résultat annuel
+    - 'assiette_annuelle', 'cir_annuel' : assiette et CIR de calculate_distributed_cir
+    - 'montant_net_eligible_total', 'cir_total'
+    """
+    inputs = load_cir_inputs(cursor, project_id)
+    if inputs is None:
+        return None
+    return compute_cir_breakdown(inputs, load_cir_coeffs(cursor))
+
+
+__all__ = [
+    "amortissement_annuel_cir",
+    "amortissement_periode",
+    "calculate_cir_breakdown",
+    "cir_periode",
+    "compute_cir_breakdown",
+    "depenses_mensuelles",
+    "load_cir_coeffs",
+    "load_cir_inputs",
+    "load_subventions",
+    "mois_actifs_par_annee",
+    "mois_entre",
+    "montant_periode",
+    "project_amounts",
+    "repartition_subvention",
+    "subventions_datees",
+    "subventions_par_subvention",
+    "subventions_periode",
+    "temps_travail_mensuel",
+]
@@ -11,7 +11,6 @@ class CIRDialog(QDialog):
         self._dirty = False
         self._loading = False
         self.brouillons = {}
-        self.ensure_table_exists()
         main_layout = QVBoxLayout()
 
         # Sélection de l'année
@@ -107,19 +106,6 @@ class CIRDialog(QDialog):
                 item.setText("")
                 self._loading = False
 
-    def ensure_table_exists(self):
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''CREATE TABLE IF NOT EXISTS cir_coeffs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            annee INTEGER,
-            k1 REAL,
-            k2 REAL,
-            k3 REAL
-        )''')
-        conn.commit()
-        conn.close()
-
     def get_default_year(self):
         import datetime
         return datetime.datetime.now().year
@@ -2,16 +2,324 @@ import sqlite3
 import datetime
 import re
 import traceback
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableView, QTableWidget,
                             QTableWidgetItem, QPushButton, QMessageBox,
                             QFileDialog, QHeaderView, QGroupBox, QGridLayout,
                             QColorDialog, QLineEdit, QComboBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor, QFont, QPageLayout
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 
-from database import get_connection
-from category_utils import resolve_category_code
+from database import amortissements_between, get_connection, period_key
+from category_utils import get_cost_rate, get_cost_rates, resolve_category_code, value_days
+from compte_resultat_report import (
+    COST_TYPE_LABELS, HEADER, INDICATOR, RESULT, SEPARATOR, TOTAL, CompteResultatReport, format_currency
+)
+from month_utils import month_key, month_name
+from pdf_renderer import paged_document, pdf_document
+import profiling
+
+
+class CompteResultatTableModel(QAbstractTableModel):
+    """
+    Compte de résultat (CompteResultatReport) : colonne des postes puis une
+    colonne par période (et TOTAL). Le texte et le style de chaque cellule
+    sont calculés à l'affichage, aucune cellule n'est créée à l'avance.
+    `backgrounds` remplace les couleurs des en-têtes, totaux et résultat
+    (couleurs des paramètres d'export pour le PDF).
+    """
+
+    def __init__(self, parent=None, backgrounds=None):
+        super().__init__(parent)
+        self._report = None
+        self._bold = QFont()
+        self._bold.setBold(True)
+        self._white = QColor(255, 255, 255)
+        self._indicator_color = QColor(100, 100, 100)
+        self._backgrounds = backgrounds or {
+            HEADER: QColor(52, 73, 94),
+            TOTAL: QColor(52, 152, 219),
+            RESULT: QColor(231, 76, 60),
+        }
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self._report is None else len(self._report.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self._report is None else len(self._report.columns) + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        report = self._report
+        report_row = report.rows[index.row()]
+        column = index.column() - 1
+        kind = report_row.kind
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return report_row.label if column < 0 else report.cell_text(report_row, column)
+        if column < 0:
+            # Colonne des postes : en-têtes, totaux et résultat colorés
+            if kind not in self._backgrounds:
+                return None
+            if role == Qt.ItemDataRole.FontRole:
+                return self._bold
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return self._backgrounds[kind]
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return self._white
+            return None
+        if kind in (HEADER, SEPARATOR):
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        # Lignes TOTAL (bleu) et RÉSULTAT FINANCIER (rouge) entièrement colorées,
+        # toute la colonne TOTAL en gras
+        if role == Qt.ItemDataRole.FontRole:
+            if kind in (TOTAL, RESULT) or report.is_total_column(column):
+                return self._bold
+            return None
+        if role == Qt.ItemDataRole.BackgroundRole and kind in (TOTAL, RESULT):
+            return self._backgrounds[kind]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if kind == INDICATOR:
+                # Indicateurs légèrement en retrait visuellement
+                return self._indicator_color
+            if kind in (TOTAL, RESULT):
+                return self._white
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            if section == 0:
+                return "Poste"
+            if self._report is not None:
+                return self._report.columns[section - 1]
+        return super().headerData(section, orientation, role)
+
+    def set_report(self, report):
+        self.beginResetModel()
+        self._report = report
+        self.endResetModel()
+
+
+def load_export_settings():
+    """Paramètres d'export (couleurs, logo) enregistrés, ou valeurs par défaut"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM export_settings WHERE id = 1')
+        result = cursor.fetchone()
+        
+        if result:
+            settings = type('Settings', (), {})()
+            settings.title_color = result[1]
+            settings.header_color = result[2]
+            settings.total_color = result[3]
+            settings.result_color = result[4]
+            settings.logo_path = result[5]
+            settings.logo_position = result[6]
+        else:
+            # Paramètres par défaut
+            settings = type('Settings', (), {})()
+            settings.title_color = '#2c3e50'
+            settings.header_color = '#34495e'
+            settings.total_color = '#3498db'
+            settings.result_color = '#2ecc71'
+            settings.logo_path = ''
+            settings.logo_position = 'Haut gauche'
+        
+        conn.close()
+        return settings
+        
+    except Exception:
+        # En cas d'erreur, utiliser les paramètres par défaut
+        settings = type('Settings', (), {})()
+        settings.title_color = '#2c3e50'
+        settings.header_color = '#34495e'
+        settings.total_color = '#3498db'
+        settings.result_color = '#2ecc71'
+        settings.logo_path = ''
+        settings.logo_position = 'Haut gauche'
+        return settings
+
+
+def write_report_sheet(ws, report, info, settings):
+    """
+    Écrit un compte de résultat calculé dans une feuille openpyxl : titre,
+    informations de sélection, logo, en-têtes puis valeurs (nombres, pas
+    le texte affiché), avec les couleurs des paramètres d'export.
+    """
+    from openpyxl.styles import Font, Alignment, PatternFill
+    
+    column_count = len(report.columns) + 1
+    
+    # Convertir les couleurs hex en couleurs openpyxl (sans le #)
+    def hex_to_openpyxl(hex_color):
+        return hex_color.lstrip('#').upper()
+    
+    # Déterminer la structure selon la présence du logo
+    if settings.logo_path and settings.logo_path.strip():
+        # Titre
+        title_cell = ws.cell(row=1, column=1)
+        title_cell.value = f"COMPTE DE RÉSULTAT"
+        title_color = hex_to_openpyxl(settings.title_color)
+        title_cell.font = Font(bold=True, size=16, color=title_color)
+        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=column_count)
+        
+        # Sous-titre avec informations
+        subtitle_cell = ws.cell(row=2, column=1)
+        subtitle_cell.value = info
+        subtitle_cell.font = Font(size=10, color="666666")
+        ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=column_count)
+        
+        # Essayer d'insérer le logo comme image
+        try:
+            import os
+            from openpyxl.drawing.image import Image
+            
+            if os.path.exists(settings.logo_path):
+                logo_img = Image(settings.logo_path)
+                
+                # Redimensionner le logo (max 100px de hauteur)
+                max_height = 100
+                if logo_img.height > max_height:
+                    ratio = max_height / logo_img.height
+                    logo_img.height = max_height
+                    logo_img.width = int(logo_img.width * ratio)
+                
+                # Position selon le paramètre
+                if settings.logo_position == "Haut droite":
+                    logo_img.anchor = f"{chr(65 + column_count - 1)}3"  # Dernière colonne
+                elif settings.logo_position == "Haut centre":
+                    middle_col = column_count // 2
+                    logo_img.anchor = f"{chr(65 + middle_col)}3"
+                else:  # Haut gauche par défaut
+                    logo_img.anchor = "A3"
+                
+                ws.add_image(logo_img)
+                
+                # Ajuster la hauteur des lignes pour le logo
+                ws.row_dimensions[3].height = max(60, logo_img.height * 0.75)
+                ws.row_dimensions[4].height = 20
+                
+                header_row = 5
+            else:
+                # Si le fichier n'existe pas, juste noter le nom
+                logo_note_cell = ws.cell(row=3, column=1)
+                logo_name = os.path.basename(settings.logo_path)
+                logo_note_cell.value = f"Logo configuré: {logo_name} (Position: {settings.logo_position})"
+                logo_note_cell.font = Font(italic=True, size=9, color="999999")
+                header_row = 4
+                
+        except ImportError:
+            # Si openpyxl.drawing.image n'est pas disponible
+            logo_note_cell = ws.cell(row=3, column=1)
+            logo_note_cell.value = f"Logo: {os.path.basename(settings.logo_path)} (Position: {settings.logo_position})"
+            logo_note_cell.font = Font(italic=True, size=9, color="999999")
+            header_row = 4
+        except Exception:
+            # Autre erreur avec le logo
+            header_row = 3
+    else:
+        header_row = 1
+    
+    # Exporter les en-têtes de colonnes à la bonne ligne
+    header_fill_color = hex_to_openpyxl(settings.header_color)
+    for col, header_text in enumerate(["Poste"] + list(report.columns), start=1):
+        cell = ws.cell(row=header_row, column=col)
+        cell.value = header_text
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.fill = PatternFill(start_color=header_fill_color, end_color=header_fill_color, fill_type="solid")
+        cell.alignment = Alignment(horizontal='center')
+    
+    # Exporter les valeurs du compte de résultat (nombres, pas le texte affiché)
+    row_colors = {
+        HEADER: header_fill_color,
+        TOTAL: hex_to_openpyxl(settings.total_color),
+        RESULT: hex_to_openpyxl(settings.result_color),
+    }
+    number_formats = {
+        "nb_jours_total": '#\\ ##0\\ "jours"',
+        "cout_moyen_par_jour": '#\\ ##0.00\\ "€/jour"',
+    }
+    data_start_row = header_row + 1
+    for row, report_row in enumerate(report.rows):
+        fill_color = row_colors.get(report_row.kind)
+        cell = ws.cell(row=data_start_row + row, column=1)
+        cell.value = report_row.label
+        if fill_color:
+            cell.font = Font(bold=True, color="FFFFFF")
+            cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+        if report_row.kind in (HEADER, SEPARATOR):
+            continue
+        
+        for col in range(len(report.columns)):
+            cell = ws.cell(row=data_start_row + row, column=col + 2)
+            note = report.note(col) if report_row.key == "credit_impot" else ""
+            value = report.export_value(report_row, col)
+            if note:
+                cell.value = note
+            elif value:
+                cell.value = value
+                # Format français : espace pour milliers, virgule pour décimales
+                cell.number_format = number_formats.get(report_row.key, '#\\ ##0.00')
+            cell.alignment = Alignment(horizontal='right')
+            # Lignes TOTAL et RÉSULTAT entièrement colorées
+            if report_row.kind in (TOTAL, RESULT):
+                cell.font = Font(bold=True, color="FFFFFF")
+                cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+            elif report.is_total_column(col):
+                cell.font = Font(bold=True)
+    
+    # Ajuster la largeur des colonnes
+    try:
+        for col_num in range(1, column_count + 1):
+            max_length = 0
+            for row_num in range(1, ws.max_row + 1):
+                try:
+                    cell = ws.cell(row=row_num, column=col_num)
+                    if cell.value and not hasattr(cell, '_merge_parent'):  # Éviter les cellules fusionnées
+                        if len(str(cell.value)) > max_length:
+                            max_length = len(str(cell.value))
+                except:
+                    continue
+            
+            # Calculer la lettre de colonne
+            if col_num <= 26:
+                column_letter = chr(64 + col_num)  # A, B, C, etc.
+            else:
+                column_letter = chr(64 + (col_num - 1) // 26) + chr(65 + (col_num - 1) % 26)
+            
+            adjusted_width = min(max(max_length + 2, 10), 50)
+            ws.column_dimensions[column_letter].width = adjusted_width
+    except Exception as e:
+        # Si l'ajustement automatique échoue, utiliser des largeurs fixes
+        for i in range(column_count):
+            column_letter = chr(65 + i)  # A, B, C, etc.
+            ws.column_dimensions[column_letter].width = 20
+
+
+def draw_report_pdf(pdf, report, info, settings):
+    """Dessine un compte de résultat calculé (PDF ou impression) avec les paramètres d'export"""
+    if settings.logo_path and settings.logo_path.strip():
+        pdf.logo(settings.logo_path, settings.logo_position)
+    
+    pdf.text("COMPTE DE RÉSULTAT", size=16, bold=True, color=settings.title_color,
+             alignment=Qt.AlignmentFlag.AlignHCenter)
+    pdf.text(info, size=11, color="#7f8c8d", alignment=Qt.AlignmentFlag.AlignHCenter)
+    pdf.space(12)
+    
+    # Même rendu que le tableau, avec les couleurs des paramètres d'export
+    model = CompteResultatTableModel(backgrounds={
+        HEADER: QColor(settings.header_color),
+        TOTAL: QColor(settings.total_color),
+        RESULT: QColor(settings.result_color),
+    })
+    model.set_report(report)
+    pdf.model_table(model, settings.header_color)
+
 
 class CompteResultatDisplay(QDialog):
     def __init__(self, parent, config_data):
@@ -25,6 +333,7 @@ class CompteResultatDisplay(QDialog):
         self.period_type = config_data.get('period_type', 'yearly')  # 'yearly' ou 'monthly'
         self.granularity = config_data.get('granularity', 'yearly')  # 'yearly' ou 'monthly'
         self.cost_type = config_data.get('cost_type', 'cout_production')  # Type de coût sélectionné
+        self.report = None  # CompteResultatReport calculé par load_data
         
         # Vérifier si au moins un projet a le CIR activé
         self.has_cir_projects = self.check_cir_projects()
@@ -37,44 +346,7 @@ class CompteResultatDisplay(QDialog):
     
     def load_export_settings(self):
         """Charge les paramètres d'export depuis la base de données"""
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM export_settings WHERE id = 1')
-            result = cursor.fetchone()
-            
-            if result:
-                settings = type('Settings', (), {})()
-                settings.title_color = result[1]
-                settings.header_color = result[2]
-                settings.total_color = result[3]
-                settings.result_color = result[4]
-                settings.logo_path = result[5]
-                settings.logo_position = result[6]
-            else:
-                # Paramètres par défaut
-                settings = type('Settings', (), {})()
-                settings.title_color = '#2c3e50'
-                settings.header_color = '#34495e'
-                settings.total_color = '#3498db'
-                settings.result_color = '#2ecc71'
-                settings.logo_path = ''
-                settings.logo_position = 'Haut gauche'
-            
-            conn.close()
-            return settings
-            
-        except Exception:
-            # En cas d'erreur, utiliser les paramètres par défaut
-            settings = type('Settings', (), {})()
-            settings.title_color = '#2c3e50'
-            settings.header_color = '#34495e'
-            settings.total_color = '#3498db'
-            settings.result_color = '#2ecc71'
-            settings.logo_path = ''
-            settings.logo_position = 'Haut gauche'
-            return settings
+        return load_export_settings()
     
     def check_cir_projects(self):
         """Vérifie si au moins un projet a le CIR activé"""
@@ -99,27 +371,8 @@ class CompteResultatDisplay(QDialog):
             conn.close()
     
     def format_currency(self, value, with_decimals=False):
-        """Formate une valeur monétaire avec le formatage français :
-        - Séparateur des milliers : espace
-        - Arrondissement à l'entier le plus proche par défaut
-        """
-        if value == 0:
-            return ""
-        
-        if with_decimals:
-            # Formatage avec 2 décimales
-            formatted = f"{value:,.2f}"
-            # Remplacer la virgule (séparateur des milliers) par un espace
-            # et le point (séparateur des décimales) par une virgule
-            formatted = formatted.replace(",", "TEMP").replace(".", ",").replace("TEMP", " ")
-        else:
-            # Formatage sans décimales - arrondir à l'entier le plus proche
-            rounded_value = round(value)
-            formatted = f"{rounded_value:,}"
-            # Remplacer la virgule (séparateur des milliers) par un espace
-            formatted = formatted.replace(",", " ")
-        
-        return formatted
+        """Formate une valeur monétaire avec le formatage français (voir compte_resultat_report)"""
+        return format_currency(value, with_decimals)
     
     def init_ui(self):
         """Initialise l'interface utilisateur"""
@@ -132,7 +385,9 @@ class CompteResultatDisplay(QDialog):
         # Pas de section de configuration
         
         # Tableau principal du compte de résultat
-        self.table = QTableWidget()
+        self.model = CompteResultatTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.setup_table()
         layout.addWidget(self.table)
         
@@ -255,37 +510,12 @@ class CompteResultatDisplay(QDialog):
             conn.close()
     
     def setup_table(self):
-        """Configure le tableau du compte de résultat"""
-        # Le nombre de colonnes dépend de la granularité et des années
-        if self.granularity == 'monthly':
-            # Une colonne par mois actif pour chaque année
-            columns = ["Poste"]
-            for year in sorted(self.years):
-                active_months = self.get_active_months_for_year(year)
-                for month in active_months:
-                    columns.append(f"{month:02d}/{year}")
-            columns.append("TOTAL")
-        else:
-            # Une colonne par année
-            columns = ["Poste"] + [str(year) for year in sorted(self.years)]
-            if len(self.years) > 1:
-                columns.append("TOTAL")
-        
-        self.table.setColumnCount(len(columns))
-        self.table.setHorizontalHeaderLabels(columns)
-        
-        # Configuration de l'apparence
-        # Définir une largeur minimum pour la première colonne (libellés)
-        self.table.setColumnWidth(0, 250)  # Largeur fixe de 250 pixels pour les libellés
-        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
-        # Les autres colonnes s'adaptent automatiquement
-        for col in range(1, len(columns)):
-            self.table.horizontalHeader().setSectionResizeMode(col, QHeaderView.ResizeMode.Stretch)
+        """Configure le tableau du compte de résultat (colonnes définies par populate_table)"""
         self.table.setAlternatingRowColors(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         
         # Rendre le tableau en lecture seule
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
     
     def create_buttons(self):
         """Crée les boutons d'actions"""
@@ -333,15 +563,17 @@ class CompteResultatDisplay(QDialog):
     def load_data(self):
         """Charge et affiche les données du compte de résultat"""
         try:
-            # Collecter toutes les données
+            # Collecter toutes les données, puis calculer une fois les lignes dérivées et les totaux
             data = self.collect_financial_data()
+            self.report = CompteResultatReport.from_period_data(data, self.has_cir_projects, self.cost_type)
             
             # Afficher dans le tableau
-            self.populate_table(data)
+            self.populate_table(self.report)
             
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des données: {str(e)}")
     
+    @profiling.profiled("Compte de résultat")
     def collect_financial_data(self):
         """Collecte toutes les données financières"""
         conn = get_connection()
@@ -364,23 +596,10 @@ class CompteResultatDisplay(QDialog):
         finally:
             conn.close()
     
+    @profiling.profiled("collect_period_data")
     def collect_period_data(self, cursor, year, month=None):
         """Collecte les données pour une période spécifique"""
-        # Conditions de filtrage et définition des noms de mois
-        month_names = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-                      "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
-        
-        if month:
-            # Filtrage mensuel - utilise les noms de mois français
-            month_condition = f"AND mois = '{month_names[month-1]}'"
-            year_condition = f"AND annee = {year}"
-        else:
-            # Filtrage annuel
-            month_condition = ""
-            year_condition = f"AND annee = {year}"
-        
-        project_condition = f"AND projet_id IN ({','.join(['?'] * len(self.project_ids))})"
-        
+        etapes = profiling.stages("collect_period_data")
         data = {
             # RECETTES
             'recettes': 0,
@@ -405,6 +624,7 @@ class CompteResultatDisplay(QDialog):
         except sqlite3.OperationalError:
             # Table n'existe pas encore
             data['recettes'] = 0
+        etapes.mark('Recettes')
         
         # 2. SUBVENTIONS - NOUVELLE LOGIQUE avec redistribution automatique
         try:
@@ -430,6 +650,7 @@ class CompteResultatDisplay(QDialog):
             data['subventions'] = subventions_total
         except Exception as e:
             data['subventions'] = 0
+        etapes.mark('Subventions')
         
         # 3. ACHATS ET SOUS-TRAITANCE - NOUVELLE LOGIQUE avec redistribution automatique
         try:
@@ -444,6 +665,7 @@ class CompteResultatDisplay(QDialog):
             data['achats_sous_traitance'] = achats_total
         except Exception as e:
             data['achats_sous_traitance'] = 0
+        etapes.mark('Achats et sous-traitance')
         
         # 4. AUTRES ACHATS - NOUVELLE LOGIQUE avec redistribution automatique
         try:
@@ -458,6 +680,7 @@ class CompteResultatDisplay(QDialog):
             data['autres_achats'] = autres_achats_total
         except Exception as e:
             data['autres_achats'] = 0
+        etapes.mark('Autres achats')
         
         # 5. COÛT DIRECT - temps_travail * (type de coût sélectionné) AVEC REDISTRIBUTION AUTOMATIQUE
         try:
@@ -490,31 +713,38 @@ class CompteResultatDisplay(QDialog):
             # Vérification pour debug : si le coût direct est 0, vérifier pourquoi
             if data['cout_direct'] == 0:
                 # Compter les entrées de temps de travail
-                count_query = f"""
-                    SELECT COUNT(*) FROM temps_travail t
-                    WHERE t.annee = {year} {month_condition.replace('mois', 't.mois') if month_condition else ''} 
-                    AND t.projet_id IN ({','.join(['?'] * len(self.project_ids))})
-                """
-                cursor.execute(count_query, self.project_ids)
+                placeholders = ','.join(['?'] * len(self.project_ids))
+                if month:
+                    cursor.execute(f"""
+                        SELECT COUNT(*) FROM temps_travail t
+                        WHERE t.periode = ? AND t.projet_id IN ({placeholders})
+                    """, [month_key(year, month)] + list(self.project_ids))
+                else:
+                    cursor.execute(f"""
+                        SELECT COUNT(*) FROM temps_travail t
+                        WHERE t.annee = ? AND t.projet_id IN ({placeholders})
+                    """, [year] + list(self.project_ids))
                 temps_count = cursor.fetchone()[0]
                 
                 # Compter les catégories de coût disponibles
-                cursor.execute(f"SELECT COUNT(*) FROM categorie_cout WHERE annee = {year}")
+                cursor.execute("SELECT COUNT(*) FROM categorie_cout WHERE annee = ?", (year,))
                 cat_count = cursor.fetchone()[0]
                 if temps_count > 0:
                     # Vérifier les catégories qui ne matchent pas
                     cursor.execute(f"""
                         SELECT DISTINCT t.categorie 
                         FROM temps_travail t 
-                        WHERE t.annee = {year} AND t.projet_id IN ({','.join(['?'] * len(self.project_ids))})
-                        AND t.categorie NOT IN (SELECT libelle FROM categorie_cout WHERE annee = {year})
-                    """, self.project_ids)
-                    missing_cats = [row[0] for row in cursor.fetchall()]
+                        WHERE t.annee = ? AND t.projet_id IN ({placeholders})
+                    """, [year] + list(self.project_ids))
+                    rates = get_cost_rates()
+                    missing_cats = [row[0] for row in cursor.fetchall()
+                                    if (year, resolve_category_code(row[0])) not in rates]
                         
         except sqlite3.OperationalError as e:
             data['cout_direct'] = 0
             data['nb_jours_total'] = 0
             data['cout_moyen_par_jour'] = 0
+        etapes.mark('Coût direct')
         
         # 6. DOTATION AUX AMORTISSEMENTS
         try:
@@ -529,6 +759,7 @@ class CompteResultatDisplay(QDialog):
             data['dotation_amortissements'] = amortissements_total
         except sqlite3.OperationalError:
             data['dotation_amortissements'] = 0
+        etapes.mark('Amortissements')
         
         # 7. CRÉDIT D'IMPÔT RECHERCHE (CIR) - Calculé avec répartition équitable simple
         try:
@@ -555,17 +786,13 @@ class CompteResultatDisplay(QDialog):
             data['credit_impot'] = 0
         except Exception as e:
             data['credit_impot'] = 0
+        etapes.mark('CIR')
         
         return data
     
     def get_cost_type_label(self):
         """Retourne le libellé du type de coût sélectionné"""
-        cost_type_mapping = {
-            'montant_charge': 'Salaire (montant chargé)',
-            'cout_production': 'Salaire (coût de production)',
-            'cout_complet': 'Salaire (coût complet)'
-        }
-        return cost_type_mapping.get(self.cost_type, 'Salaire (coût direct)')
+        return COST_TYPE_LABELS.get(self.cost_type, 'Salaire (coût direct)')
     
     def generate_filename(self, extension):
         """Génère un nom de fichier basé sur la configuration"""
@@ -623,6 +850,7 @@ class CompteResultatDisplay(QDialog):
         
         return filename
 
+    @profiling.profiled("calculate_distributed_cir")
     def calculate_distributed_cir(self, cursor, target_year, target_month=None):
         """
         Calcule le CIR directement pour la période demandée selon la formule :
@@ -730,247 +958,23 @@ class CompteResultatDisplay(QDialog):
             traceback.print_exc()
             return 0
 
-    def populate_table(self, data):
-        """Remplit le tableau avec les données"""
-        # Structure du compte de résultat selon vos spécifications
-        structure = [
-            ("CHARGES", "header"),
-            ("Achats et sous-traitance", "achats_sous_traitance"),
-            ("Autres achats", "autres_achats"),
-            ("Dotation aux amortissements", "dotation_amortissements"),
-            (self.get_cost_type_label(), "cout_direct"),  # Nom dynamique selon le type de coût
-            ("  - Nombre de jours TOTAL", "nb_jours_total"),
-            ("  - Coût moyen par jour", "cout_moyen_par_jour"),
-            ("TOTAL CHARGES", "total_charges"),
-            ("", "separator"),
-            ("PRODUITS", "header"),
-            ("Chiffre d'affaires", "recettes"),
-            ("Subventions", "subventions"),
-            ("TOTAL PRODUITS", "total_produits"),
-        ]
-        
-        # Ajouter la ligne CIR APRÈS le total produits si au moins un projet a le CIR activé
-        if self.has_cir_projects:
-            structure.append(("", "separator"))  # Ligne vide avant le CIR
-            structure.append(("Crédit d'impôt recherche", "credit_impot"))
-        
-        structure.extend([
-            ("", "separator"),
-            ("RÉSULTAT FINANCIER", "resultat_financier")
-        ])
-        
-        self.table.setRowCount(len(structure))
-        
-        # Colonnes de données (exclut la première colonne "Poste")
-        data_columns = list(data.keys())
-        if len(data_columns) > 1:
-            data_columns.append("TOTAL")  # Ajouter une colonne total si plusieurs périodes
-        
-        for row, (label, data_key) in enumerate(structure):
-            # Colonne des postes
-            item = QTableWidgetItem(label)
-            
-            if data_key == "header":
-                font = QFont()
-                font.setBold(True)
-                item.setFont(font)
-                item.setBackground(QColor(52, 73, 94))
-                item.setForeground(QColor(255, 255, 255))
-            elif data_key.startswith("total_") or data_key.startswith("resultat_"):
-                font = QFont()
-                font.setBold(True)
-                item.setFont(font)
-                if "resultat" in data_key:
-                    # Ligne RÉSULTAT FINANCIER entièrement en rouge
-                    item.setBackground(QColor(231, 76, 60))
-                    item.setForeground(QColor(255, 255, 255))
-                elif data_key.startswith("total_"):
-                    # Lignes TOTAL CHARGES et TOTAL PRODUITS en bleu
-                    item.setBackground(QColor(52, 152, 219))
-                    item.setForeground(QColor(255, 255, 255))
-            
-            self.table.setItem(row, 0, item)
-            
-            # Colonnes de données
-            # Trier les clés chronologiquement pour la granularité mensuelle
-            if self.granularity == 'monthly':
-                # Créer une liste de tuples (année, mois, clé) pour un tri chronologique correct
-                period_tuples = []
-                for key in data.keys():
-                    if '/' in key:  # Format "MM/YYYY"
-                        parts = key.split('/')
-                        month_num = int(parts[0])
-                        year_num = int(parts[1])
-                        period_tuples.append((year_num, month_num, key))
-                
-                # Trier par année puis par mois
-                period_tuples.sort(key=lambda x: (x[0], x[1]))
-                sorted_periods = [t[2] for t in period_tuples]
-            else:
-                # Pour la granularité annuelle, le tri alphabétique fonctionne
-                sorted_periods = sorted(data.keys())
-            
-            for col, period in enumerate(sorted_periods, 1):
-                if data_key == "separator" or data_key == "header":
-                    # Lignes vides ou en-têtes
-                    self.table.setItem(row, col, QTableWidgetItem(""))
-                elif data_key.startswith("total_") or data_key.startswith("resultat_"):
-                    # Calculs des totaux
-                    value = self.calculate_total(data[period], data_key)
-                    item = QTableWidgetItem(self.format_currency(value) if value != 0 else "")
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                    
-                    font = QFont()
-                    font.setBold(True)
-                    item.setFont(font)
-                    
-                    if "resultat_financier" in data_key:
-                        # Ligne RÉSULTAT FINANCIER entièrement en rouge
-                        item.setBackground(QColor(231, 76, 60))
-                        item.setForeground(QColor(255, 255, 255))
-                    elif "total_" in data_key:
-                        item.setBackground(QColor(52, 152, 219))
-                        item.setForeground(QColor(255, 255, 255))
-                    
-                    self.table.setItem(row, col, item)
-                else:
-                    # Données simples
-                    value = data[period].get(data_key, 0)
-                    
-                    # Formatage spécial pour les nouveaux indicateurs
-                    if data_key == "nb_jours_total":
-                        # Afficher le nombre de jours sans décimales
-                        item = QTableWidgetItem(f"{self.format_currency(value, False)} jours" if value != 0 else "")
-                    elif data_key == "cout_moyen_par_jour":
-                        # Afficher le coût moyen par jour avec 2 décimales et €/jour
-                        item = QTableWidgetItem(f"{self.format_currency(value)} €/jour" if value != 0 else "")
-                    elif data_key == "credit_impot":
-                        # Formatage spécial pour le CIR avec gestion de la note explicative
-                        note = data[period].get('credit_impot_note', "")
-                        if note:
-                            item = QTableWidgetItem(note)
-                        else:
-                            # Le CIR est affiché en NÉGATIF mais calculé positivement dans le résultat
-                            cir_value = value
-                            if cir_value != 0:
-                                # Afficher en négatif pour indiquer que c'est un crédit
-                                item = QTableWidgetItem(f"-{self.format_currency(abs(cir_value))}")
-                            else:
-                                item = QTableWidgetItem("")
-                    else:
-                        # Formatage normal pour les autres données
-                        formatted_value = self.format_currency(value) if value != 0 else ""
-                        item = QTableWidgetItem(formatted_value)
-                    
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                    
-                    # Style spécial pour les indicateurs (légèrement en retrait visuellement)
-                    if data_key in ["nb_jours_total", "cout_moyen_par_jour"]:
-                        item.setForeground(QColor(100, 100, 100))  # Couleur légèrement grisée
-                    
-                    self.table.setItem(row, col, item)
-            
-            # Colonne TOTAL si plusieurs périodes
-            if len(data) > 1 and col < self.table.columnCount() - 1:
-                total_value = self.calculate_row_total(data, data_key)
-                if total_value is not None:
-                    # Formatage spécial pour les nouveaux indicateurs dans la colonne TOTAL
-                    if data_key == "nb_jours_total":
-                        item = QTableWidgetItem(f"{self.format_currency(total_value, False)} jours" if total_value != 0 else "")
-                    elif data_key == "cout_moyen_par_jour":
-                        item = QTableWidgetItem(f"{self.format_currency(total_value)} €/jour" if total_value != 0 else "")
-                    elif data_key == "credit_impot":
-                        # CIR affiché en négatif dans la colonne TOTAL aussi
-                        if total_value != 0:
-                            item = QTableWidgetItem(f"-{self.format_currency(abs(total_value))}")
-                        else:
-                            item = QTableWidgetItem("")
-                    else:
-                        item = QTableWidgetItem(self.format_currency(total_value) if total_value != 0 else "")
-                    
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                    
-                    # Toute la colonne TOTAL en gras
-                    font = QFont()
-                    font.setBold(True)
-                    item.setFont(font)
-                    
-                    # Style spécial pour les indicateurs
-                    if data_key in ["nb_jours_total", "cout_moyen_par_jour"]:
-                        item.setForeground(QColor(100, 100, 100))
-                    elif data_key.startswith("total_") or data_key.startswith("resultat_"):
-                        if "resultat_financier" in data_key:
-                            # Ligne RÉSULTAT FINANCIER entièrement en rouge
-                            item.setBackground(QColor(231, 76, 60))
-                            item.setForeground(QColor(255, 255, 255))
-                        elif data_key.startswith("total_"):
-                            # Lignes TOTAL CHARGES et TOTAL PRODUITS en bleu
-                            item.setBackground(QColor(52, 152, 219))
-                            item.setForeground(QColor(255, 255, 255))
-                    
-                    self.table.setItem(row, self.table.columnCount() - 1, item)
-    
-    def calculate_total(self, period_data, total_type):
-        """Calcule les totaux selon le type"""
-        if total_type == "total_produits":
-            # TOTAL PRODUITS = uniquement recettes + subventions (sans le CIR)
-            total_produits = period_data.get('recettes', 0) + period_data.get('subventions', 0)
-            return total_produits
-        elif total_type == "total_charges":
-            # TOTAL CHARGES = uniquement les vraies charges, sans le CIR
-            total_charges = (period_data.get('achats_sous_traitance', 0) + 
-                           period_data.get('autres_achats', 0) + 
-                           period_data.get('cout_direct', 0) + 
-                           period_data.get('dotation_amortissements', 0))
-            
-            # Ne pas inclure le CIR dans le total des charges
-            return total_charges
-        elif total_type == "resultat_financier":
-            total_produits = self.calculate_total(period_data, "total_produits")
-            total_charges = self.calculate_total(period_data, "total_charges")
-            
-            # Le résultat = produits - charges + CIR (le CIR améliore le résultat)
-            resultat = total_produits - total_charges
-            if self.has_cir_projects:
-                cir_value = period_data.get('credit_impot', 0)
-                resultat += abs(cir_value)  # Ajouter le CIR au résultat final
-            
-            return resultat
-        
-        return 0
-    
-    def calculate_row_total(self, all_data, data_key):
-        """Calcule le total d'une ligne sur toutes les périodes"""
-        if data_key == "separator" or data_key == "header":
-            return None
-        
-        if data_key.startswith("total_") or data_key.startswith("resultat_"):
-            # Pour les totaux calculés, sommer les résultats de chaque période
-            total = 0
-            for period_data in all_data.values():
-                total += self.calculate_total(period_data, data_key)
-            return total
-        elif data_key == "cout_moyen_par_jour":
-            # Pour le coût moyen par jour, recalculer la moyenne globale
-            total_cout = 0
-            total_jours = 0
-            for period_data in all_data.values():
-                total_cout += period_data.get('cout_direct', 0)
-                total_jours += period_data.get('nb_jours_total', 0)
-            
-            return total_cout / total_jours if total_jours > 0 else 0
+    def populate_table(self, report):
+        """Affiche le compte de résultat calculé"""
+        self.model.set_report(report)
+        # Largeur fixe pour les libellés. En mode annuel les autres colonnes
+        # s'adaptent ; en mode mensuel elles gardent leur largeur et le tableau défile.
+        header = self.table.horizontalHeader()
+        if self.granularity == 'monthly':
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         else:
-            # Pour les données simples, sommer directement
-            total = 0
-            for period_data in all_data.values():
-                total += period_data.get(data_key, 0)
-            return total
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
+        self.table.setColumnWidth(0, 250)
     
     def export_to_excel(self):
         """Exporte vers Excel"""
         try:
             from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill
             
             # Charger les paramètres d'export
             settings = self.load_export_settings()
@@ -991,173 +995,7 @@ class CompteResultatDisplay(QDialog):
             wb = Workbook()
             ws = wb.active
             ws.title = "Compte de Résultat"
-            
-            # Convertir les couleurs hex en couleurs openpyxl (sans le #)
-            def hex_to_openpyxl(hex_color):
-                return hex_color.lstrip('#').upper()
-            
-            # Déterminer la structure selon la présence du logo
-            if settings.logo_path and settings.logo_path.strip():
-                # Titre
-                title_cell = ws.cell(row=1, column=1)
-                title_cell.value = f"COMPTE DE RÉSULTAT"
-                title_color = hex_to_openpyxl(settings.title_color)
-                title_cell.font = Font(bold=True, size=16, color=title_color)
-                ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=self.table.columnCount())
-                
-                # Sous-titre avec informations
-                subtitle_cell = ws.cell(row=2, column=1)
-                subtitle_cell.value = self.get_selection_info()
-                subtitle_cell.font = Font(size=10, color="666666")
-                ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=self.table.columnCount())
-                
-                # Essayer d'insérer le logo comme image
-                try:
-                    import os
-                    from openpyxl.drawing.image import Image
-                    
-                    if os.path.exists(settings.logo_path):
-                        logo_img = Image(settings.logo_path)
-                        
-                        # Redimensionner le logo (max 100px de hauteur)
-                        max_height = 100
-                        if logo_img.height > max_height:
-                            ratio = max_height / logo_img.height
-                            logo_img.height = max_height
-                            logo_img.width = int(logo_img.width * ratio)
-                        
-                        # Position selon le paramètre
-                        if settings.logo_position == "Haut droite":
-                            logo_img.anchor = f"{chr(65 + self.table.columnCount() - 1)}3"  # Dernière colonne
-                        elif settings.logo_position == "Haut centre":
-                            middle_col = self.table.columnCount() // 2
-                            logo_img.anchor = f"{chr(65 + middle_col)}3"
-                        else:  # Haut gauche par défaut
-                            logo_img.anchor = "A3"
-                        
-                        ws.add_image(logo_img)
-                        
-                        # Ajuster la hauteur des lignes pour le logo
-                        ws.row_dimensions[3].height = max(60, logo_img.height * 0.75)
-                        ws.row_dimensions[4].height = 20
-                        
-                        header_row = 5
-                    else:
-                        # Si le fichier n'existe pas, juste noter le nom
-                        logo_note_cell = ws.cell(row=3, column=1)
-                        logo_name = os.path.basename(settings.logo_path)
-                        logo_note_cell.value = f"Logo configuré: {logo_name} (Position: {settings.logo_position})"
-                        logo_note_cell.font = Font(italic=True, size=9, color="999999")
-                        header_row = 4
-                        
-                except ImportError:
-                    # Si openpyxl.drawing.image n'est pas disponible
-                    logo_note_cell = ws.cell(row=3, column=1)
-                    logo_note_cell.value = f"Logo: {os.path.basename(settings.logo_path)} (Position: {settings.logo_position})"
-                    logo_note_cell.font = Font(italic=True, size=9, color="999999")
-                    header_row = 4
-                except Exception:
-                    # Autre erreur avec le logo
-                    header_row = 3
-            else:
-                header_row = 1
-            
-            # Exporter les en-têtes de colonnes à la bonne ligne
-            for col in range(self.table.columnCount()):
-                header_item = self.table.horizontalHeaderItem(col)
-                cell = ws.cell(row=header_row, column=col+1)
-                cell.value = header_item.text() if header_item else ""
-                cell.font = Font(bold=True, color="FFFFFF")
-                header_color = hex_to_openpyxl(settings.header_color)
-                cell.fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
-                cell.alignment = Alignment(horizontal='center')
-            
-            # Exporter les données du tableau
-            data_start_row = header_row + 1
-            for row in range(self.table.rowCount()):
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    cell = ws.cell(row=data_start_row + row, column=col+1)
-                    
-                    if item and item.text():
-                        # Pour la première colonne (postes), garder le texte
-                        if col == 0:
-                            cell.value = item.text()
-                            # Appliquer le style selon le type de ligne
-                            if "PRODUITS" in item.text() or "CHARGES" in item.text():
-                                cell.font = Font(bold=True, color="FFFFFF")
-                                header_color = hex_to_openpyxl(settings.header_color)
-                                cell.fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
-                            elif "TOTAL" in item.text():
-                                cell.font = Font(bold=True, color="FFFFFF")
-                                total_color = hex_to_openpyxl(settings.total_color)
-                                cell.fill = PatternFill(start_color=total_color, end_color=total_color, fill_type="solid")
-                            elif "RÉSULTAT" in item.text():
-                                cell.font = Font(bold=True, color="FFFFFF")
-                                result_color = hex_to_openpyxl(settings.result_color)
-                                cell.fill = PatternFill(start_color=result_color, end_color=result_color, fill_type="solid")
-                        else:
-                            # Pour les colonnes de données, convertir en nombre si possible
-                            try:
-                                # Enlever les espaces et virgules pour la conversion
-                                # Le texte contient maintenant des espaces comme séparateurs de milliers et des virgules comme décimales
-                                value_str = item.text().replace(" ", "").replace(",", ".")
-                                if value_str and value_str not in ["jours", "€/jour"]:
-                                    # Enlever les unités si présentes
-                                    value_str = value_str.replace(" jours", "").replace(" €/jour", "")
-                                    cell.value = float(value_str)
-                                    # Format français : espace pour milliers, virgule pour décimales
-                                    cell.number_format = '#\\ ##0.00'
-                                else:
-                                    cell.value = ""
-                            except ValueError:
-                                cell.value = item.text()
-                            
-                            cell.alignment = Alignment(horizontal='right')
-                            
-                            # Appliquer les couleurs aux colonnes de données selon le type de ligne
-                            first_col_item = self.table.item(row, 0)
-                            if first_col_item:
-                                first_col_text = first_col_item.text()
-                                if "PRODUITS" in first_col_text or "CHARGES" in first_col_text:
-                                    cell.font = Font(bold=True, color="FFFFFF")
-                                    header_color = hex_to_openpyxl(settings.header_color)
-                                    cell.fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
-                                elif "TOTAL" in first_col_text:
-                                    cell.font = Font(bold=True, color="FFFFFF")
-                                    total_color = hex_to_openpyxl(settings.total_color)
-                                    cell.fill = PatternFill(start_color=total_color, end_color=total_color, fill_type="solid")
-                                elif "RÉSULTAT" in first_col_text:
-                                    cell.font = Font(bold=True, color="FFFFFF")
-                                    result_color = hex_to_openpyxl(settings.result_color)
-                                    cell.fill = PatternFill(start_color=result_color, end_color=result_color, fill_type="solid")
-            
-            # Ajuster la largeur des colonnes
-            try:
-                for col_num in range(1, self.table.columnCount() + 1):
-                    max_length = 0
-                    for row_num in range(1, ws.max_row + 1):
-                        try:
-                            cell = ws.cell(row=row_num, column=col_num)
-                            if cell.value and not hasattr(cell, '_merge_parent'):  # Éviter les cellules fusionnées
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                        except:
-                            continue
-                    
-                    # Calculer la lettre de colonne
-                    if col_num <= 26:
-                        column_letter = chr(64 + col_num)  # A, B, C, etc.
-                    else:
-                        column_letter = chr(64 + (col_num - 1) // 26) + chr(65 + (col_num - 1) % 26)
-                    
-                    adjusted_width = min(max(max_length + 2, 10), 50)
-                    ws.column_dimensions[column_letter].width = adjusted_width
-            except Exception as e:
-                # Si l'ajustement automatique échoue, utiliser des largeurs fixes
-                for i in range(self.table.columnCount()):
-                    column_letter = chr(65 + i)  # A, B, C, etc.
-                    ws.column_dimensions[column_letter].width = 20
+            write_report_sheet(ws, self.report, self.get_selection_info(), settings)
             
             wb.save(file_path)
             QMessageBox.information(self, "Export réussi", f"Fichier exporté: {file_path}")
@@ -1170,8 +1008,6 @@ class CompteResultatDisplay(QDialog):
     def export_to_pdf(self):
         """Exporte vers PDF"""
         try:
-            from PyQt6.QtGui import QTextDocument
-            
             # Générer le nom de fichier basé sur la configuration
             default_filename = self.generate_filename("pdf")
             
@@ -1185,17 +1021,8 @@ class CompteResultatDisplay(QDialog):
             if not file_path:
                 return
             
-            printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-            printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-            printer.setOutputFileName(file_path)
-            
-            # Ne pas définir de marges personnalisées pour éviter les problèmes de compatibilité
-            
-            html_content = self.generate_html_content()
-            
-            document = QTextDocument()
-            document.setHtml(html_content)
-            document.print(printer)
+            with pdf_document(file_path) as pdf:
+                self.draw_pdf(pdf)
             
             QMessageBox.information(self, "Export réussi", f"Fichier exporté: {file_path}")
             
@@ -1206,155 +1033,23 @@ class CompteResultatDisplay(QDialog):
         """Imprime le compte de résultat"""
         try:
             printer = QPrinter(QPrinter.PrinterMode.HighResolution)
+            printer.setPageOrientation(QPageLayout.Orientation.Landscape)
             
             dialog = QPrintDialog(printer, self)
             if dialog.exec() != QPrintDialog.DialogCode.Accepted:
                 return
             
-            html_content = self.generate_html_content()
-            
-            from PyQt6.QtGui import QTextDocument
-            document = QTextDocument()
-            document.setHtml(html_content)
-            document.print(printer)
+            with paged_document(printer) as pdf:
+                self.draw_pdf(pdf)
             
             QMessageBox.information(self, "Impression", "Document envoyé à l'imprimante.")
             
         except Exception as e:
             QMessageBox.critical(self, "Erreur d'impression", f"Erreur lors de l'impression: {str(e)}")
     
-    def generate_html_content(self):
-        """Génère le contenu HTML pour l'export"""
-        # Charger les paramètres d'export
-        settings = self.load_export_settings()
-        
-        # Gérer le logo
-        logo_html = ""
-        if settings.logo_path and settings.logo_path.strip():
-            import os
-            import base64
-            
-            try:
-                if os.path.exists(settings.logo_path):
-                    with open(settings.logo_path, 'rb') as image_file:
-                        encoded_string = base64.b64encode(image_file.read()).decode()
-                    
-                    # Déterminer le type MIME
-                    ext = os.path.splitext(settings.logo_path)[1].lower()
-                    mime_type = {
-                        '.png': 'image/png',
-                        '.jpg': 'image/jpeg',
-                        '.jpeg': 'image/jpeg',
-                        '.gif': 'image/gif',
-                        '.bmp': 'image/bmp'
-                    }.get(ext, 'image/png')
-                    
-                    # Position du logo
-                    position_style = {
-                        'Haut gauche': 'float: left;',
-                        'Haut droite': 'float: right;',
-                        'Haut centre': 'display: block; margin: 0 auto;'
-                    }.get(settings.logo_position, 'float: left;')
-                    
-                    logo_html = f"""
-                    <div style="margin-bottom: 20px;">
-                        <img src="data:{mime_type};base64,{encoded_string}" 
-                             style="max-height: 80px; max-width: 200px; {position_style}" 
-                             alt="Logo">
-                    </div>
-                    """
-            except Exception:
-                # Si le logo ne peut pas être chargé, on continue sans
-                pass
-        
-        html = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                h1 {{ text-align: center; color: {settings.title_color}; }}
-                h2 {{ text-align: center; color: #7f8c8d; font-size: 12pt; }}
-                table {{ border-collapse: collapse; width: 100%; margin-top: 20px; }}
-                th, td {{ border: 1px solid #bdc3c7; padding: 8px; text-align: left; }}
-                th {{ background-color: {settings.header_color}; color: white; font-weight: bold; }}
-                th.total-header {{ background-color: {settings.header_color}; color: white; font-weight: bold; border: 1px solid #bdc3c7; }}
-                .header {{ background-color: {settings.header_color}; color: white; font-weight: bold; }}
-                .total {{ background-color: {settings.total_color}; color: white; font-weight: bold; }}
-                .result {{ background-color: {settings.result_color}; color: white; font-weight: bold; }}
-                .amount {{ text-align: right; }}
-                .total-column {{ font-weight: bold; text-align: right; }}
-                .logo-container {{ overflow: auto; margin-bottom: 20px; }}
-            </style>
-        </head>
-        <body>
-            {logo_html}
-            <div style="clear: both;"></div>
-            <h1>COMPTE DE RÉSULTAT</h1>
-            <h2>{self.get_selection_info()}</h2>
-            <table>
-        """
-        
-        # En-têtes de colonnes
-        html += "<tr>"
-        for col in range(self.table.columnCount()):
-            header_item = self.table.horizontalHeaderItem(col)
-            header_text = header_item.text() if header_item else ""
-            # Utiliser une classe CSS pour l'en-tête de la colonne TOTAL
-            if header_text == "TOTAL":
-                html += f"<th class='total-header'>{header_text}</th>"
-            else:
-                html += f"<th>{header_text}</th>"
-        html += "</tr>"
-        
-        # Données
-        for row in range(self.table.rowCount()):
-            html += "<tr>"
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                value = item.text() if item else ""
-                
-                # Vérifier si on est dans la colonne TOTAL
-                header_item = self.table.horizontalHeaderItem(col)
-                is_total_column = header_item and header_item.text() == "TOTAL"
-                
-                # Déterminer la classe CSS selon le contenu et la position
-                css_class = ""
-                first_col_item = self.table.item(row, 0)
-                first_col_text = first_col_item.text() if first_col_item else ""
-                
-                if col == 0:  # Première colonne (libellés)
-                    if first_col_text == "PRODUITS" or first_col_text == "CHARGES":
-                        css_class = "header"
-                    elif "TOTAL" in first_col_text:
-                        css_class = "total"
-                    elif "RÉSULTAT" in first_col_text:
-                        css_class = "result"
-                else:  # Colonnes de données
-                    # Pour les lignes d'en-tête de sections simples (CHARGES/PRODUITS uniquement), 
-                    # ne pas appliquer la couleur de fond aux cellules de données
-                    if first_col_text == "PRODUITS" or first_col_text == "CHARGES":
-                        # Cellules de données des lignes d'en-tête simples : style normal
-                        css_class = "total-column" if is_total_column else "amount"
-                    elif "TOTAL" in first_col_text:
-                        # Lignes TOTAL : toute la ligne colorée
-                        css_class = "total"
-                    elif "RÉSULTAT" in first_col_text:
-                        # Lignes RÉSULTAT : toute la ligne colorée
-                        css_class = "result"
-                    else:
-                        # Autres lignes normales
-                        css_class = "total-column" if is_total_column else "amount"
-                
-                html += f'<td class="{css_class}">{value}</td>'
-            html += "</tr>"
-        
-        html += """
-            </table>
-        </body>
-        </html>
-        """
-        
-        return html
+    def draw_pdf(self, pdf):
+        """Dessine le compte de résultat (PDF ou impression) avec les paramètres d'export"""
+        draw_report_pdf(pdf, self.report, self.get_selection_info(), self.load_export_settings())
     
     def calculate_smart_distributed_subvention(self, cursor, project_id, year, month, projet_info):
         """
@@ -1945,21 +1640,21 @@ class CompteResultatDisplay(QDialog):
                 if month is not None:
                     # Mois spécifique
                     cursor.execute(f"""
-                        SELECT COALESCE(SUM(t.jours * c.montant_charge), 0)
+                        SELECT t.annee, t.categorie, SUM(t.jours)
                         FROM temps_travail t
-                        JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
                         WHERE t.annee = ? AND t.mois = ? AND t.projet_id = ?
+                        GROUP BY t.annee, t.categorie
                     """, (year, month_names[month-1], project_id))
                 else:
                     # Année complète
                     cursor.execute(f"""
-                        SELECT COALESCE(SUM(t.jours * c.montant_charge), 0)
+                        SELECT t.annee, t.categorie, SUM(t.jours)
                         FROM temps_travail t
-                        JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
                         WHERE t.annee = ? AND t.projet_id = ?
+                        GROUP BY t.annee, t.categorie
                     """, (year, project_id))
                 
-                cout_temps = cursor.fetchone()[0] or 0
+                cout_temps = value_days(cursor.fetchall())
                 cout_temps_eligible = cout_temps * coef_temps_travail
                 depenses_eligibles += cout_temps_eligible
                 
@@ -2019,13 +1714,13 @@ class CompteResultatDisplay(QDialog):
             
             while current_date <= fin:
                 cursor.execute(f"""
-                    SELECT COALESCE(SUM(t.jours * c.montant_charge), 0)
+                    SELECT t.annee, t.categorie, SUM(t.jours)
                     FROM temps_travail t
-                    JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
                     WHERE t.annee = ? AND t.mois = ? AND t.projet_id = ?
+                    GROUP BY t.annee, t.categorie
                 """, (current_date.year, month_names[current_date.month-1], project_id))
                 
-                cout_mois = cursor.fetchone()[0] or 0
+                cout_mois = value_days(cursor.fetchall())
                 cout_total += cout_mois
                 
                 # Passer au mois suivant
@@ -2071,30 +1766,17 @@ class CompteResultatDisplay(QDialog):
             return 0
     
     def calculate_amortissements_for_period(self, cursor, project_id, date_debut, date_fin):
-        """Calcule les amortissements pour une période donnée"""
-        try:
-            debut = datetime.datetime.strptime(date_debut, '%m/%Y')
-            fin = datetime.datetime.strptime(date_fin, '%m/%Y')
-            
-            total_amort = 0
-            current_date = debut
-            
-            while current_date <= fin:
-                amort_mois = self.calculate_amortissement_for_period(
-                    cursor, project_id, current_date.year, current_date.month
-                )
-                total_amort += amort_mois
-                
-                # Passer au mois suivant
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1)
-            
-            return total_amort
-            
-        except Exception as e:
+        """Calcule les amortissements pour une période donnée (dates 'MM/AAAA' incluses)"""
+        debut, fin = period_key(date_debut), period_key(date_fin)
+        if debut is None or fin is None:
+            return 0
+        
+        # Comme calculate_amortissement_for_period mois par mois : bornée par la fin du projet
+        cursor.execute("SELECT periode_debut, periode_fin FROM projets WHERE id = ?", (project_id,))
+        projet = cursor.fetchone()
+        if not projet or projet[0] is None or projet[1] is None:
             return 0
+        return amortissements_between(cursor, project_id, debut, min(fin, projet[1]))
     
     def calculate_monthly_distributed_subvention(self, cursor, project_id, subvention_data, year, month, projet_info):
         """
@@ -2176,9 +1858,6 @@ class CompteResultatDisplay(QDialog):
     def calculate_monthly_distributed_cir(self, cursor, cir_project_ids, year, month, k1, k2, k3):
         """Calcule le CIR pour un mois spécifique en répartissant intelligemment"""
         try:
-            month_names = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-                          "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
-            
             # 1. Calculer le CIR total annuel pour tous les projets CIR
             cir_annuel_total = self.calculate_annual_distributed_cir(cursor, cir_project_ids, year, k1, k2, k3)
             
@@ -2203,12 +1882,12 @@ class CompteResultatDisplay(QDialog):
                         
                     # Coûts directs (temps de travail) de l'année
                     cursor.execute(f"""
-                        SELECT COALESCE(SUM(t.jours * c.montant_charge), 0)
+                        SELECT t.annee, t.categorie, SUM(t.jours)
                         FROM temps_travail t
-                        JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
                         WHERE t.annee = ? AND t.projet_id = ?
+                        GROUP BY t.annee, t.categorie
                     """, (year, project_id))
-                    cout_temps_annuel = cursor.fetchone()[0] or 0
+                    cout_temps_annuel = value_days(cursor.fetchall())
                     
                     # Amortissements de l'année
                     amort_annuel = self.calculate_amortissement_for_period(cursor, project_id, year)
@@ -2240,13 +1919,13 @@ class CompteResultatDisplay(QDialog):
                         continue
                         
                     # Coûts directs (temps de travail) du mois
-                    cursor.execute(f"""
-                        SELECT COALESCE(SUM(t.jours * c.montant_charge), 0)
+                    cursor.execute("""
+                        SELECT t.annee, t.categorie, SUM(t.jours)
                         FROM temps_travail t
-                        JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
-                        WHERE t.annee = ? AND t.mois = ? AND t.projet_id = ?
-                    """, (year, month_names[month-1], project_id))
-                    cout_temps_mois = cursor.fetchone()[0] or 0
+                        WHERE t.projet_id = ? AND t.periode = ?
+                        GROUP BY t.annee, t.categorie
+                    """, (project_id, month_key(year, month)))
+                    cout_temps_mois = value_days(cursor.fetchall())
                     
                     # Amortissements du mois
                     amort_mois = self.calculate_amortissement_for_period(cursor, project_id, year, month)
@@ -2297,12 +1976,12 @@ class CompteResultatDisplay(QDialog):
                         
                     # Coûts directs (temps de travail) de l'année
                     cursor.execute(f"""
-                        SELECT COALESCE(SUM(t.jours * c.montant_charge), 0)
+                        SELECT t.annee, t.categorie, SUM(t.jours)
                         FROM temps_travail t
-                        JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
                         WHERE t.annee = ? AND t.projet_id = ?
+                        GROUP BY t.annee, t.categorie
                     """, (year, project_id))
-                    cout_temps = cursor.fetchone()[0] or 0
+                    cout_temps = value_days(cursor.fetchall())
                     total_montant_charge += cout_temps
                     
                     # Amortissements de l'année
@@ -2525,17 +2204,10 @@ class CompteResultatDisplay(QDialog):
                 if not categorie_code:
                     continue
                     
-                # Récupérer le montant chargé pour cette catégorie et cette année
-                cursor.execute("""
-                    SELECT montant_charge 
-                    FROM categorie_cout 
-                    WHERE categorie = ? AND annee = ?
-                """, (categorie_code, annee))
-                
-                cout_row = cursor.fetchone()
-                if cout_row and cout_row[0]:
-                    montant_charge = float(cout_row[0])
-                    cout_total_temps += jours * montant_charge
+                # Montant chargé pour cette catégorie et cette année
+                montant_charge = get_cost_rate(annee, categorie_code)
+                if montant_charge:
+                    cout_total_temps += jours * float(montant_charge)
                 else:
                     # Si pas de coût pour cette année/catégorie, utiliser une valeur par défaut
                     cout_total_temps += jours * 500  # 500€ par jour par défaut
@@ -2547,66 +2219,15 @@ class CompteResultatDisplay(QDialog):
     
     def calculate_amortissements_total_subvention_style(self, cursor, project_id, projet_info):
         """Calcule les amortissements totaux exactement comme dans subvention_dialog.py"""
-        import datetime
+        if not projet_info or not projet_info[0] or not projet_info[1]:
+            return 0
         
-        try:
-            if not projet_info or not projet_info[0] or not projet_info[1]:
-                return 0
-            
-            # Convertir les dates MM/yyyy en objets datetime - MÊME LOGIQUE
-            try:
-                debut_projet = datetime.datetime.strptime(projet_info[0], '%m/%Y')
-                fin_projet = datetime.datetime.strptime(projet_info[1], '%m/%Y')
-            except ValueError:
-                return 0
-            
-            cursor.execute("""
-                SELECT montant, date_achat, duree 
-                FROM investissements 
-                WHERE projet_id = ?
-            """, (project_id,))
-            
-            amortissements_total = 0
-            
-            for montant, date_achat, duree in cursor.fetchall():
-                try:
-                    # MÊME LOGIQUE QUE subvention_dialog.py lignes 177-213
-                    # Convertir la date d'achat en datetime
-                    achat_date = datetime.datetime.strptime(date_achat, '%m/%Y')
-                    
-                    # La dotation commence le mois suivant l'achat
-                    debut_amort = achat_date.replace(day=1)
-                    debut_amort = datetime.datetime(debut_amort.year, debut_amort.month, 1) + datetime.timedelta(days=32)
-                    debut_amort = debut_amort.replace(day=1)
-                    
-                    # La fin de l'amortissement est soit la fin du projet, soit la fin de la période d'amortissement
-                    fin_amort = achat_date.replace(day=1)
-                    # Ajouter durée années à la date d'achat
-                    fin_amort = datetime.datetime(fin_amort.year + int(duree), fin_amort.month, 1)
-                    
-                    # Prendre la date la plus proche entre fin du projet et fin d'amortissement
-                    fin_effective = min(fin_projet, fin_amort)
-                    
-                    # Si le début d'amortissement est après la fin du projet, pas d'amortissement
-                    if debut_amort > fin_projet:
-                        continue
-                        
-                    # Calculer le nombre de mois d'amortissement effectif
-                    mois_amort = (fin_effective.year - debut_amort.year) * 12 + fin_effective.month - debut_amort.month + 1
-                    
-                    # Calculer la dotation mensuelle (montant / durée en mois)
-                    dotation_mensuelle = float(montant) / (int(duree) * 12)
-                    
-                    # Ajouter au total des amortissements
-                    amortissements_total += dotation_mensuelle * mois_amort
-                except Exception:
-                    # En cas d'erreur dans le calcul, ignorer cet investissement
-                    continue
-            
-            return amortissements_total
-            
-        except Exception as e:
+        debut_projet, fin_projet = period_key(projet_info[0]), period_key(projet_info[1])
+        if debut_projet is None or fin_projet is None:
             return 0
+        
+        # Toutes les dotations de l'échéancier jusqu'à la fin du projet
+        return amortissements_between(cursor, project_id, None, fin_projet)
     
     
     def calculate_amortissement_for_period(self, cursor, project_id, year, month=None):
@@ -2615,156 +2236,41 @@ class CompteResultatDisplay(QDialog):
         - Amortissement mensuel = montant total / (durée amortissement × 12)
         - Début d'amortissement = mois suivant le mois d'achat
         - CORRECTION: Respecte les dates de début et fin du projet
+        Les dotations mensuelles sont lues dans l'échéancier (table amortissements).
         """
-        import datetime
+        cursor.execute("SELECT periode_debut, periode_fin FROM projets WHERE id = ?", (project_id,))
+        projet = cursor.fetchone()
+        if not projet or projet[0] is None or projet[1] is None:
+            return 0
+        debut_projet, fin_projet = projet
         
-        try:
-            # Récupérer les dates du projet
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id = ?", (project_id,))
-            projet_info = cursor.fetchone()
-            if not projet_info or not projet_info[0] or not projet_info[1]:
+        if month:
+            # Calcul pour un mois spécifique (jusqu'à la fin du projet)
+            periode = month_key(year, month)
+            if periode > fin_projet:
                 return 0
-            
-            # Convertir les dates du projet
-            debut_projet = datetime.datetime.strptime(projet_info[0], '%m/%Y')
-            fin_projet = datetime.datetime.strptime(projet_info[1], '%m/%Y')
-            
-            # Récupérer tous les investissements du projet
-            cursor.execute('''
-                SELECT montant, date_achat, duree 
-                FROM investissements 
-                WHERE projet_id = ?
-            ''', (project_id,))
-            
-            amortissements_total = 0
-            
-            for montant_inv, date_achat, duree in cursor.fetchall():
-                try:
-                    # Convertir la date d'achat (format 'MM/YYYY')
-                    achat_date = datetime.datetime.strptime(date_achat, '%m/%Y')
-                    
-                    # La dotation commence le mois suivant l'achat (comme dans project_details_dialog.py)
-                    debut_amort = achat_date.replace(day=1)
-                    debut_amort = datetime.datetime(debut_amort.year, debut_amort.month, 1) + datetime.timedelta(days=32)
-                    debut_amort = debut_amort.replace(day=1)
-                    
-                    # La fin de l'amortissement est soit la fin du projet, soit la fin de la période d'amortissement
-                    fin_amort = achat_date.replace(day=1)
-                    # Ajouter durée années à la date d'achat
-                    fin_amort = datetime.datetime(fin_amort.year + int(duree), fin_amort.month, 1)
-                    
-                    # Prendre la date la plus proche entre fin du projet et fin d'amortissement
-                    fin_effective = min(fin_projet, fin_amort)
-                    
-                    # Si le début d'amortissement est après la fin du projet, pas d'amortissement
-                    if debut_amort > fin_projet:
-                        continue
-                    
-                    # Calculer la dotation mensuelle (montant / durée en mois)
-                    dotation_mensuelle = float(montant_inv) / (int(duree) * 12)
-                    
-                    if month:
-                        # Calcul pour un mois spécifique
-                        mois_demande = datetime.datetime(year, month, 1)
-                        
-                        # Vérifier si ce mois tombe dans la période d'amortissement ET dans le projet
-                        if debut_amort <= mois_demande <= fin_effective:
-                            amortissements_total += dotation_mensuelle
-                    
-                    else:
-                        # Calcul pour une année complète
-                        # Calculer le nombre de mois d'amortissement effectif dans cette année
-                        debut_annee = datetime.datetime(year, 1, 1)
-                        fin_annee = datetime.datetime(year, 12, 31)
-                        
-                        # CORRECTION: Intersection entre [début_amort, fin_effective], [début_annee, fin_annee] ET [début_projet, fin_projet]
-                        debut_periode = max(debut_amort, debut_annee, debut_projet)
-                        fin_periode = min(fin_effective, fin_annee, fin_projet)
-                        
-                        if debut_periode <= fin_periode:
-                            # Calculer le nombre de mois dans cette intersection
-                            mois_amort_annee = (fin_periode.year - debut_periode.year) * 12 + fin_periode.month - debut_periode.month + 1
-                            amortissements_total += dotation_mensuelle * mois_amort_annee
-                
-                except (ValueError, TypeError) as e:
-                    continue
-            
-            return amortissements_total
-            
-        except Exception as e:
-            return 0
+            return amortissements_between(cursor, project_id, periode, periode)
+        
+        # Calcul pour une année complète, limité à la durée du projet
+        return amortissements_between(
+            cursor, project_id, max(month_key(year, 1), debut_projet), min(month_key(year, 12), fin_projet)
+        )
     
     def calculate_amortissement_for_year(self, cursor, project_id, year, month, projet_info):
         """Calcule les amortissements pour une année donnée"""
-        import datetime
+        if not projet_info or not projet_info[0] or not projet_info[1]:
+            return 0
         
-        try:
-            if not projet_info or not projet_info[0] or not projet_info[1]:
-                return 0
-                
-            debut_projet = datetime.datetime.strptime(projet_info[0], '%m/%Y')
-            fin_projet = datetime.datetime.strptime(projet_info[1], '%m/%Y')
-            
-            # Récupérer tous les investissements du projet
-            cursor.execute('''
-                SELECT montant, date_achat, duree 
-                FROM investissements 
-                WHERE projet_id = ?
-            ''', (project_id,))
-            
-            amortissements_total = 0
-            
-            for montant_inv, date_achat, duree in cursor.fetchall():
-                try:
-                    # Convertir la date d'achat en datetime
-                    achat_date = datetime.datetime.strptime(date_achat, '%m/%Y')
-                    
-                    # La dotation commence le mois suivant l'achat
-                    debut_amort = achat_date.replace(day=1)
-                    debut_amort = datetime.datetime(debut_amort.year, debut_amort.month, 1) + datetime.timedelta(days=32)
-                    debut_amort = debut_amort.replace(day=1)
-                    
-                    # La fin de l'amortissement
-                    fin_amort = datetime.datetime(achat_date.year + int(duree), achat_date.month, 1)
-                    fin_effective = min(fin_projet, fin_amort)
-                    
-                    # Si le début d'amortissement est après la fin du projet, pas d'amortissement
-                    if debut_amort > fin_projet:
-                        continue
-                    
-                    # Pour l'année spécifique, calculer la part d'amortissement
-                    year_start = datetime.datetime(year, 1, 1)
-                    year_end = datetime.datetime(year, 12, 31)
-                    
-                    # Intersection avec l'année demandée
-                    period_start = max(debut_amort, year_start)
-                    period_end = min(fin_effective, year_end)
-                    
-                    if period_start <= period_end:
-                        # Calculer le nombre de mois dans cette année
-                        if month:
-                            # Pour un mois spécifique
-                            month_start = datetime.datetime(year, month, 1)
-                            month_end = datetime.datetime(year, month, 28)  # Approximation
-                            if period_start <= month_end and period_end >= month_start:
-                                mois_amort = 1
-                            else:
-                                mois_amort = 0
-                        else:
-                            # Pour toute l'année
-                            mois_amort = (period_end.year - period_start.year) * 12 + period_end.month - period_start.month + 1
-                        
-                        # Calculer la dotation mensuelle
-                        dotation_mensuelle = float(montant_inv) / (int(duree) * 12)
-                        amortissements_total += dotation_mensuelle * mois_amort
-                
-                except Exception:
-                    continue
-            
-            return amortissements_total
-            
-        except Exception as e:
+        debut_projet, fin_projet = period_key(projet_info[0]), period_key(projet_info[1])
+        if debut_projet is None or fin_projet is None:
             return 0
+        
+        # Dotations jusqu'à la fin du projet, pour le mois ou l'année demandé
+        if month:
+            debut, fin = month_key(year, month), month_key(year, month)
+        else:
+            debut, fin = month_key(year, 1), month_key(year, 12)
+        return amortissements_between(cursor, project_id, debut, min(fin, fin_projet))
     
     def calculate_redistributed_expenses(self, cursor, project_id, year, month, table_name):
         """
@@ -2937,18 +2443,10 @@ class CompteResultatDisplay(QDialog):
             cout_total = 0
             
             for membre_id, categorie, mois_original, jours_total in temps_travail_data:
-                # Récupérer le coût unitaire pour cette catégorie/année
-                cursor.execute(f"""
-                    SELECT {cost_type} 
-                    FROM categorie_cout 
-                    WHERE libelle = ? AND annee = ?
-                """, (categorie, year))
-                
-                cout_unitaire = cursor.fetchone()
-                if not cout_unitaire or not cout_unitaire[0]:
+                # Coût unitaire pour cette catégorie/année
+                cout_unitaire = get_cost_rate(year, categorie, cost_type)
+                if not cout_unitaire:
                     continue
-                    
-                cout_unitaire = cout_unitaire[0]
                 
                 # Redistribuer les jours sur tous les mois actifs
                 jours_par_mois = jours_total / len(mois_actifs)
@@ -2973,28 +2471,24 @@ class CompteResultatDisplay(QDialog):
         Calcule le temps de travail réel sans redistribution
         """
         try:
-            month_names = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
-                          "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre"]
-            
             if month is not None:
                 # Calcul pour un mois spécifique
                 cursor.execute(f"""
-                    SELECT COALESCE(SUM(t.jours * c.{cost_type}), 0)
+                    SELECT t.annee, t.categorie, SUM(t.jours)
                     FROM temps_travail t
-                    JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
-                    WHERE t.projet_id = ? AND t.annee = ? AND t.mois = ?
-                """, (project_id, year, month_names[month-1]))
+                    WHERE t.projet_id = ? AND t.periode = ?
+                    GROUP BY t.annee, t.categorie
+                """, (project_id, month_key(year, month)))
             else:
                 # Calcul pour toute l'année
                 cursor.execute(f"""
-                    SELECT COALESCE(SUM(t.jours * c.{cost_type}), 0)
+                    SELECT t.annee, t.categorie, SUM(t.jours)
                     FROM temps_travail t
-                    JOIN categorie_cout c ON t.categorie = c.libelle AND t.annee = c.annee
                     WHERE t.projet_id = ? AND t.annee = ?
+                    GROUP BY t.annee, t.categorie
                 """, (project_id, year))
             
-            result = cursor.fetchone()
-            return result[0] if result else 0
+            return value_days(cursor.fetchall(), cost_type)
             
         except Exception as e:
             return 0
@@ -3177,11 +2671,11 @@ class CompteResultatDisplay(QDialog):
                 else:
                     # PAS DE REDISTRIBUTION : utiliser les données réelles
                     if month is not None:
-                        # Mode mensuel
+                        # Mode mensuel (mois stocké sous son nom)
                         cursor.execute("""
                             SELECT COALESCE(SUM(montant), 0) FROM recettes 
                             WHERE projet_id = ? AND annee = ? AND mois = ?
-                        """, (project_id, year, month))
+                        """, (project_id, year, month_name(month)))
                     else:
                         # Mode annuel
                         cursor.execute("""
@@ -3472,20 +2966,7 @@ class ExportSettingsDialog(QDialog):
             conn = get_connection()
             cursor = conn.cursor()
             
-            # Créer la table si elle n'existe pas
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS export_settings (
-                    id INTEGER PRIMARY KEY,
-                    title_color TEXT DEFAULT '#2c3e50',
-                    header_color TEXT DEFAULT '#34495e',
-                    total_color TEXT DEFAULT '#3498db',
-                    result_color TEXT DEFAULT '#2ecc71',
-                    logo_path TEXT DEFAULT '',
-                    logo_position TEXT DEFAULT 'Haut gauche'
-                )
-            ''')
-            
-            # Récupérer les paramètres
+            # Récupérer les paramètres (table créée par init_db)
             cursor.execute('SELECT * FROM export_settings WHERE id = 1')
             result = cursor.fetchone()
             
@@ -3524,19 +3005,6 @@ class ExportSettingsDialog(QDialog):
         cursor = conn.cursor()
         
         try:
-            # Créer la table si elle n'existe pas
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS export_settings (
-                    id INTEGER PRIMARY KEY,
-                    title_color TEXT DEFAULT '#2c3e50',
-                    header_color TEXT DEFAULT '#34495e',
-                    total_color TEXT DEFAULT '#3498db',
-                    result_color TEXT DEFAULT '#2ecc71',
-                    logo_path TEXT DEFAULT '',
-                    logo_position TEXT DEFAULT 'Haut gauche'
-                )
-            ''')
-            
             # Insérer ou mettre à jour
             cursor.execute('''
                 INSERT OR REPLACE INTO export_settings 
@@ -0,0 +1,213 @@
+"""
+Résultat calculé d'un compte de résultat, indépendant de l'affichage.
+
+Chaque ligne du compte de résultat est un vecteur de flottants (array 'd') :
+une valeur par période, suivie de la colonne TOTAL lorsqu'il y a plusieurs
+périodes. Les lignes dérivées (totaux, résultat financier, coût moyen par
+jour) et la colonne TOTAL sont calculées une seule fois, à la construction.
+Le tableau, l'export Excel, le PDF et l'impression lisent ce résultat sans
+recalculer. Les vecteurs sont exposés en lecture seule.
+"""
+
+from array import array
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+TOTAL_COLUMN = "TOTAL"
+
+# Types de lignes
+HEADER = "header"
+SEPARATOR = "separator"
+AMOUNT = "amount"
+INDICATOR = "indicator"
+TOTAL = "total"
+RESULT = "result"
+
+# Montants collectés pour chaque période (CompteResultatDisplay.collect_period_data)
+COLLECTED_KEYS = (
+    "achats_sous_traitance", "autres_achats", "dotation_amortissements", "cout_direct",
+    "nb_jours_total", "recettes", "subventions", "credit_impot",
+)
+CHARGES_KEYS = ("achats_sous_traitance", "autres_achats", "cout_direct", "dotation_amortissements")
+PRODUITS_KEYS = ("recettes", "subventions")
+
+COST_TYPE_LABELS = {
+    'montant_charge': 'Salaire (montant chargé)',
+    'cout_production': 'Salaire (coût de production)',
+    'cout_complet': 'Salaire (coût complet)',
+}
+
+
+class ReportRow(NamedTuple):
+    label: str
+    # Clé du vecteur de valeurs ('' pour les en-têtes et séparateurs)
+    key: str
+    kind: str
+
+
+def report_rows(cost_type: str, has_cir: bool) -> Tuple[ReportRow, ...]:
+    """Lignes du compte de résultat, dans l'ordre d'affichage."""
+    rows = [
+        ReportRow("CHARGES", "", HEADER),
+        ReportRow("Achats et sous-traitance", "achats_sous_traitance", AMOUNT),
+        ReportRow("Autres achats", "autres_achats", AMOUNT),
+        ReportRow("Dotation aux amortissements", "dotation_amortissements", AMOUNT),
+        ReportRow(COST_TYPE_LABELS.get(cost_type, 'Salaire (coût direct)'), "cout_direct", AMOUNT),
+        ReportRow("  - Nombre de jours TOTAL", "nb_jours_total", INDICATOR),
+        ReportRow("  - Coût moyen par jour", "cout_moyen_par_jour", INDICATOR),
+        ReportRow("TOTAL CHARGES", "total_charges", TOTAL),
+        ReportRow("", "", SEPARATOR),
+        ReportRow("PRODUITS", "", HEADER),
+        ReportRow("Chiffre d'affaires", "recettes", AMOUNT),
+        ReportRow("Subventions", "subventions", AMOUNT),
+        ReportRow("TOTAL PRODUITS", "total_produits", TOTAL),
+    ]
+    # Le CIR est présenté après les produits, hors total des produits
+    if has_cir:
+        rows.append(ReportRow("", "", SEPARATOR))
+        rows.append(ReportRow("Crédit d'impôt recherche", "credit_impot", AMOUNT))
+    rows.append(ReportRow("", "", SEPARATOR))
+    rows.append(ReportRow("RÉSULTAT FINANCIER", "resultat_financier", RESULT))
+    return tuple(rows)
+
+
+def period_sort_key(period: str) -> Tuple[int, int]:
+    """Clé de tri chronologique d'une période 'MM/AAAA' ou 'AAAA'."""
+    if '/' in period:
+        month, year = period.split('/')
+        return int(year), int(month)
+    return int(period), 0
+
+
+def format_currency(value: float, with_decimals: bool = False) -> str:
+    """
+    Formate un montant à la française (espace pour les milliers, virgule
+    décimale), arrondi à l'entier par défaut. Chaîne vide pour 0.
+    """
+    if value == 0:
+        return ""
+    if with_decimals:
+        formatted = f"{value:,.2f}"
+        return formatted.replace(",", "TEMP").replace(".", ",").replace("TEMP", " ")
+    return f"{round(value):,}".replace(",", " ")
+
+
+class CompteResultatReport:
+    """
+    Compte de résultat calculé : périodes, lignes et un vecteur de valeurs par
+    ligne (périodes puis TOTAL). Construit par from_period_data().
+    """
+
+    __slots__ = ("rows", "periods", "columns", "has_total", "has_cir", "_values", "_notes")
+
+    def __init__(self, rows: Sequence[ReportRow], periods: Sequence[str],
+                 values: Mapping[str, array], notes: Sequence[str], has_cir: bool) -> None:
+        self.rows = tuple(rows)
+        self.periods = tuple(periods)
+        self.has_total = len(self.periods) > 1
+        self.columns = self.periods + ((TOTAL_COLUMN,) if self.has_total else ())
+        self.has_cir = has_cir
+        self._values: Dict[str, memoryview] = {
+            key: memoryview(vector).toreadonly() for key, vector in values.items()
+        }
+        # Note explicative du CIR par période ('' si aucune)
+        self._notes = tuple(notes)
+
+    @classmethod
+    def from_period_data(cls, data: Mapping[str, Mapping[str, float]], has_cir: bool,
+                         cost_type: str = "cout_production") -> "CompteResultatReport":
+        """
+        Construit le résultat à partir des données collectées par période
+        ({période: {clé: montant}}). Toutes les lignes dérivées et la colonne
+        TOTAL sont calculées ici.
+        """
+        periods = sorted(data, key=period_sort_key)
+        with_total = len(periods) > 1
+        values: Dict[str, array] = {}
+
+        def vector(amounts: Iterable[float]) -> array:
+            vec = array('d', amounts)
+            if with_total:
+                vec.append(sum(vec))
+            return vec
+
+        for key in COLLECTED_KEYS:
+            values[key] = vector(float(data[p].get(key, 0) or 0) for p in periods)
+
+        values["total_charges"] = vector(
+            sum(values[key][i] for key in CHARGES_KEYS) for i in range(len(periods)))
+        values["total_produits"] = vector(
+            sum(values[key][i] for key in PRODUITS_KEYS) for i in range(len(periods)))
+        # Le CIR améliore le résultat sans entrer dans les produits
+        values["resultat_financier"] = vector(
+            values["total_produits"][i] - values["total_charges"][i]
+            + (abs(values["credit_impot"][i]) if has_cir else 0)
+            for i in range(len(periods)))
+
+        # Coût moyen par jour : ratio par colonne (TOTAL compris), pas une somme
+        cout, jours = values["cout_direct"], values["nb_jours_total"]
+        values["cout_moyen_par_jour"] = array(
+            'd', (cout[i] / jours[i] if jours[i] > 0 else 0.0 for i in range(len(cout))))
+
+        notes = [str(data[p].get('credit_impot_note', '') or '') for p in periods]
+        return cls(report_rows(cost_type, has_cir), periods, values, notes, has_cir)
+
+    def values(self, key: str) -> memoryview:
+        """Vecteur (lecture seule) d'une ligne : une valeur par colonne de self.columns."""
+        return self._values[key]
+
+    def value(self, key: str, column: int) -> float:
+        return self._values[key][column]
+
+    def total(self, key: str) -> float:
+        """Valeur de la dernière colonne (TOTAL, ou la période unique)."""
+        return self._values[key][-1]
+
+    def note(self, column: int) -> str:
+        """Note explicative du CIR pour une colonne de période ('' sinon)."""
+        return self._notes[column] if column < len(self._notes) else ''
+
+    def is_total_column(self, column: int) -> bool:
+        return self.has_total and column == len(self.columns) - 1
+
+    def cell_text(self, row: ReportRow, column: int) -> str:
+        """Texte affiché pour une ligne et une colonne de valeurs."""
+        if row.kind in (HEADER, SEPARATOR):
+            return ""
+        value = self._values[row.key][column]
+        if row.key == "nb_jours_total":
+            return f"{format_currency(value, False)} jours" if value != 0 else ""
+        if row.key == "cout_moyen_par_jour":
+            return f"{format_currency(value)} €/jour" if value != 0 else ""
+        if row.key == "credit_impot":
+            note = self.note(column)
+            if note:
+                return note
+            # Le CIR est affiché en négatif (crédit) mais ajouté au résultat
+            return f"-{format_currency(abs(value))}" if value != 0 else ""
+        return format_currency(value)
+
+    def export_value(self, row: ReportRow, column: int) -> Optional[float]:
+        """Valeur numérique exportée (CIR en négatif, comme affiché), None si vide."""
+        if row.kind in (HEADER, SEPARATOR):
+            return None
+        value = self._values[row.key][column]
+        if row.key == "credit_impot":
+            return -abs(value)
+        return value
+
+
+__all__ = [
+    "AMOUNT",
+    "COST_TYPE_LABELS",
+    "CompteResultatReport",
+    "HEADER",
+    "INDICATOR",
+    "RESULT",
+    "ReportRow",
+    "SEPARATOR",
+    "TOTAL",
+    "TOTAL_COLUMN",
+    "format_currency",
+    "period_sort_key",
+    "report_rows",
+]
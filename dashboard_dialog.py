@@ -0,0 +1,160 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView, QGridLayout, QGroupBox
+)
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+from portfolio_summary import load_summaries, portfolio_totals
+
+# (en-tête, attribut de ProjectSummary) ; les colonnes après les 4 premières sont des montants
+COLUMNS = (
+    ('Code projet', 'code'),
+    ('Nom projet', 'nom'),
+    ('Chef de projet', 'chef'),
+    ('Etat', 'etat'),
+    ('Budget', 'budget'),
+    ('Coûts à date', 'couts_a_date'),
+    ('Temps de travail', 'temps_travail'),
+    ('Dépenses externes', 'depenses_externes'),
+    ('Autres achats', 'autres_achats'),
+    ('Amortissements', 'amortissements'),
+    ('Recettes', 'recettes'),
+    ('Subventions', 'subventions'),
+    ('CIR', 'cir'),
+    ('Résultat', 'resultat'),
+)
+FIRST_AMOUNT_COLUMN = 4
+
+# Indicateurs du portefeuille affichés au-dessus du tableau (libellé, clé de portfolio_totals)
+PORTFOLIO_KPIS = (
+    ('Budget total', 'budget'),
+    ('Coûts à date', 'couts_a_date'),
+    ('Recettes', 'recettes'),
+    ('Subventions', 'subventions'),
+    ('CIR', 'cir'),
+    ('Résultat', 'resultat'),
+)
+
+
+def format_amount(value):
+    return f"{value:,.0f} €".replace(',', ' ')
+
+
+class DashboardTableModel(QAbstractTableModel):
+    """Synthèse des projets, une ligne par projet (ProjectSummary)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        value = getattr(row, COLUMNS[column][1])
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_amount(value) if column >= FIRST_AMOUNT_COLUMN else value
+        if role == Qt.ItemDataRole.UserRole:
+            # Valeur brute pour le tri des colonnes de montants
+            return value
+        if role == Qt.ItemDataRole.TextAlignmentRole and column >= FIRST_AMOUNT_COLUMN:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def project_id_at(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows[row].projet_id
+        return None
+
+
+class DashboardDialog(QDialog):
+    """
+    Tableau de bord du portefeuille : indicateurs par projet et totaux.
+    Les indicateurs proviennent de la table synthese_projets ; seuls les
+    projets modifiés depuis le dernier affichage sont recalculés.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Tableau de bord des projets')
+        self.resize(1300, 700)
+
+        layout = QVBoxLayout()
+
+        totals_box = QGroupBox('Portefeuille')
+        totals_layout = QGridLayout()
+        self.total_labels = {}
+        for col, (label, key) in enumerate(PORTFOLIO_KPIS):
+            title = QLabel(label)
+            title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            value = QLabel()
+            value.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            value.setStyleSheet("font-size: 16px; font-weight: bold;")
+            totals_layout.addWidget(title, 0, col)
+            totals_layout.addWidget(value, 1, col)
+            self.total_labels[key] = value
+        totals_box.setLayout(totals_layout)
+        layout.addWidget(totals_box)
+
+        self.model = DashboardTableModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(Qt.ItemDataRole.UserRole)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setDefaultSectionSize(24)
+        self.table.setSortingEnabled(True)
+        self.table.doubleClicked.connect(self.open_project)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.info_label = QLabel()
+        btn_refresh = QPushButton('Actualiser')
+        btn_refresh.clicked.connect(self.refresh)
+        btn_close = QPushButton('Fermer')
+        btn_close.clicked.connect(self.close)
+        btn_layout.addWidget(self.info_label)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_refresh)
+        btn_layout.addWidget(btn_close)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+        self.refresh()
+        self.table.resizeColumnsToContents()
+
+    def refresh(self):
+        summaries = load_summaries()
+        self.model.set_rows(summaries)
+        totals = portfolio_totals(summaries)
+        for key, label in self.total_labels.items():
+            label.setText(format_amount(totals[key]))
+        self.info_label.setText(f'{len(summaries)} projets')
+
+    def open_project(self, proxy_index):
+        projet_id = self.model.project_id_at(self.proxy.mapToSource(proxy_index).row())
+        if projet_id is None:
+            return
+        from project_details_dialog import ProjectDetailsDialog
+        dialog = ProjectDetailsDialog(self, projet_id)
+        dialog.exec()
+        # Seul le projet modifié est recalculé
+        self.refresh()
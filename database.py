@@ -1,10 +1,15 @@
 import sqlite3
 import datetime
+import re
 from contextlib import contextmanager
+from typing import Optional
 from pathlib import Path
 import sys
 import os
 
+from month_utils import MONTH_NUMBERS, month_name
+import sql_trace
+
 # Nom du fichier de base de données stocké à la racine du projet
 DB_FILENAME = "gestion_budget.db"
 
@@ -35,7 +40,10 @@ def get_connection() -> sqlite3.Connection:
     """
     Retourne une nouvelle connexion SQLite configurée.
     L'appelant est responsable de la fermeture/commit.
+    Si la trace SQL est active (voir sql_trace), la connexion est instrumentée.
     """
+    if sql_trace.is_enabled():
+        return _configure_connection(sql_trace.connect(DB_PATH))
     return _configure_connection(sqlite3.connect(DB_PATH))
 
 
@@ -55,148 +63,351 @@ def db_cursor():
 
 def init_db() -> None:
     """
-    Crée les tables principales et applique les migrations connues.
+    Applique les migrations du schéma non encore appliquées à la base (une
+    seule fois chacune, voir _MIGRATIONS), puis les resynchronisations de
+    données peu coûteuses (index de recherche, échéancier des amortissements)
+    utiles après une fusion de bases. À appeler une fois au démarrage : les
+    dialogues ne font ensuite aucune requête de structure.
     """
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS themes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT UNIQUE NOT NULL
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS projets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                code TEXT NOT NULL,
-                nom TEXT NOT NULL,
-                details TEXT,
-                date_debut TEXT,
-                date_fin TEXT,
-                livrables TEXT,
-                chef TEXT,
-                etat TEXT,
-                cir INTEGER,
-                subvention INTEGER,
-                theme_principal TEXT
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS projet_themes (
+        migrate_schema(conn)
+        _sync_search_index(cursor)
+        _sync_amortissements(cursor)
+        conn.commit()
+
+
+def migrate_schema(conn: sqlite3.Connection) -> int:
+    """
+    Applique dans l'ordre les migrations dont le numéro est supérieur à
+    PRAGMA user_version, chacune dans sa transaction avec la mise à jour de
+    user_version. Retourne le nombre de migrations appliquées.
+    """
+    cursor = conn.cursor()
+    version = cursor.execute("PRAGMA user_version").fetchone()[0]
+    pending = [(numero, migration) for numero, migration in _MIGRATIONS if numero > version]
+    for numero, migration in pending:
+        try:
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {numero}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return len(pending)
+
+
+def _create_base_tables(cursor: sqlite3.Cursor) -> None:
+    """
+    Crée les tables principales et convertit les structures antérieures
+    (colonnes ajoutées aux subventions, anciennes tables budgétaires, tâches
+    et temps de travail sans membre_id).
+    """
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS themes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT UNIQUE NOT NULL
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS projets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT NOT NULL,
+            nom TEXT NOT NULL,
+            details TEXT,
+            date_debut TEXT,
+            date_fin TEXT,
+            livrables TEXT,
+            chef TEXT,
+            etat TEXT,
+            cir INTEGER,
+            subvention INTEGER,
+            theme_principal TEXT
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS projet_themes (
+            projet_id INTEGER,
+            theme_id INTEGER,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE,
+            FOREIGN KEY(theme_id) REFERENCES themes(id),
+            PRIMARY KEY (projet_id, theme_id)
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS images (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            projet_id INTEGER,
+            nom TEXT,
+            data BLOB,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS investissements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            projet_id INTEGER,
+            nom TEXT,
+            montant REAL,
+            date_achat TEXT,
+            duree INTEGER,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS subventions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            projet_id INTEGER,
+            nom TEXT,
+            mode_simplifie INTEGER DEFAULT 0,
+            montant_forfaitaire REAL DEFAULT 0,
+            depenses_temps_travail INTEGER,
+            coef_temps_travail REAL,
+            depenses_externes INTEGER,
+            coef_externes REAL,
+            depenses_autres_achats INTEGER,
+            coef_autres_achats REAL,
+            depenses_dotation_amortissements INTEGER,
+            coef_dotation_amortissements REAL,
+            cd REAL,
+            taux REAL,
+            depenses_eligibles_max REAL DEFAULT 0,
+            montant_subvention_max REAL DEFAULT 0,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+        )'''
+    )
+
+    _add_missing_columns(cursor, "subventions", _SUBVENTIONS_ADDED_COLUMNS)
+
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS equipe (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            projet_id INTEGER,
+            type TEXT,
+            nombre INTEGER,
+            direction TEXT,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS actualites (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            projet_id INTEGER,
+            message TEXT NOT NULL,
+            date TEXT NOT NULL,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS directions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT UNIQUE NOT NULL
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS chefs_projet (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            prenom TEXT NOT NULL,
+            direction TEXT NOT NULL,
+            FOREIGN KEY(direction) REFERENCES directions(nom)
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS categorie_cout (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            annee INTEGER,
+            categorie TEXT,
+            libelle TEXT,
+            montant_charge REAL,
+            cout_production REAL,
+            cout_complet REAL
+        )'''
+    )
+    _migrate_temps_travail_table(cursor)
+    cursor.execute(_TEMPS_TRAVAIL_TABLE.format(table="temps_travail"))
+    # Tables budgétaires : les bases anciennes (id, libelle) sont converties
+    # par _migrate_budget_tables avant la création
+    _migrate_budget_tables(cursor)
+    for table, sql in _BUDGET_TABLES.items():
+        cursor.execute(sql.format(table=table))
+    _migrate_taches_table(cursor)
+    cursor.execute(_TACHES_TABLE.format(table="taches"))
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS amortissements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            projet_id INTEGER,
+            investissement_id INTEGER,
+            annee INTEGER,
+            mois TEXT,
+            montant REAL,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE,
+            FOREIGN KEY(investissement_id) REFERENCES investissements(id) ON DELETE CASCADE
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS cir_coeffs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            annee INTEGER UNIQUE,
+            k1 REAL,
+            k2 REAL,
+            k3 REAL
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS export_settings (
+            id INTEGER PRIMARY KEY,
+            title_color TEXT DEFAULT '#2c3e50',
+            header_color TEXT DEFAULT '#34495e',
+            total_color TEXT DEFAULT '#3498db',
+            result_color TEXT DEFAULT '#2ecc71',
+            logo_path TEXT DEFAULT '',
+            logo_position TEXT DEFAULT 'Haut gauche'
+        )'''
+    )
+
+
+# Colonnes ajoutées à subventions après sa création
+_SUBVENTIONS_ADDED_COLUMNS = (
+    ("depenses_eligibles_max", "REAL DEFAULT 0"),
+    ("montant_subvention_max", "REAL DEFAULT 0"),
+    ("mode_simplifie", "INTEGER DEFAULT 0"),
+    ("montant_forfaitaire", "REAL DEFAULT 0"),
+    ("date_debut_subvention", "TEXT"),
+    ("date_fin_subvention", "TEXT"),
+    ("assiette_eligible", "REAL DEFAULT 0"),
+    ("montant_estime_total", "REAL DEFAULT 0"),
+    ("date_derniere_maj", "TEXT"),
+)
+
+
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns) -> None:
+    """Ajoute à `table` les colonnes (nom, définition) absentes."""
+    existing = {col[1] for col in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def _create_archive_table(cursor: sqlite3.Cursor) -> None:
+    """Table des projets archivés (voir project_archive)."""
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS projets_archives (
+            projet_id INTEGER PRIMARY KEY,
+            date_archivage TEXT NOT NULL,
+            FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+        )'''
+    )
+
+
+# Structure actuelle des tables budgétaires saisies dans BudgetEditDialog
+_BUDGET_TABLES = {
+    "depenses": '''CREATE TABLE IF NOT EXISTS {table} (
                 projet_id INTEGER,
-                theme_id INTEGER,
-                FOREIGN KEY(projet_id) REFERENCES projets(id),
-                FOREIGN KEY(theme_id) REFERENCES themes(id),
-                PRIMARY KEY (projet_id, theme_id)
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS images (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                annee INTEGER,
+                categorie TEXT,
+                mois TEXT,
+                montant REAL,
+                detail TEXT,
+                PRIMARY KEY (projet_id, annee, categorie, mois),
+                FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+            )''',
+    "autres_depenses": '''CREATE TABLE IF NOT EXISTS {table} (
                 projet_id INTEGER,
-                nom TEXT,
-                data BLOB,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS investissements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                annee INTEGER,
+                ligne_index INTEGER,
+                mois TEXT,
+                montant REAL,
+                detail TEXT,
+                PRIMARY KEY (projet_id, annee, ligne_index, mois),
+                FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+            )''',
+    "recettes": '''CREATE TABLE IF NOT EXISTS {table} (
                 projet_id INTEGER,
-                nom TEXT,
+                annee INTEGER,
+                ligne_index INTEGER,
+                mois TEXT,
                 montant REAL,
-                date_achat TEXT,
-                duree INTEGER,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS subventions (
+                detail TEXT,
+                PRIMARY KEY (projet_id, annee, ligne_index, mois),
+                FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
+            )''',
+}
+
+# Copie des données de l'ancienne structure (id, libelle) vers la nouvelle
+_BUDGET_LEGACY_COPY = {
+    "depenses": '''INSERT INTO depenses_new (projet_id, annee, categorie, mois, montant, detail)
+                SELECT projet_id, annee, COALESCE(libelle, 'Autres'), mois, montant, ''
+                FROM depenses
+                WHERE projet_id IN (SELECT id FROM projets)''',
+    "autres_depenses": '''INSERT INTO autres_depenses_new (projet_id, annee, ligne_index, mois, montant, detail)
+                SELECT projet_id, annee,
+                       ROW_NUMBER() OVER (PARTITION BY projet_id, annee ORDER BY id) - 1,
+                       mois, montant, COALESCE(libelle, '')
+                FROM autres_depenses
+                WHERE projet_id IN (SELECT id FROM projets)''',
+    "recettes": '''INSERT INTO recettes_new (projet_id, annee, ligne_index, mois, montant, detail)
+                SELECT projet_id, annee,
+                       ROW_NUMBER() OVER (PARTITION BY projet_id, annee ORDER BY id) - 1,
+                       mois, montant, COALESCE(libelle, '')
+                FROM recettes
+                WHERE projet_id IN (SELECT id FROM projets)''',
+}
+
+
+def _migrate_budget_tables(cursor: sqlite3.Cursor) -> None:
+    """
+    Convertit les tables recettes/depenses/autres_depenses de l'ancienne
+    structure (id, libelle) vers la structure actuelle. Sans effet sur les
+    bases déjà converties ou neuves.
+    """
+    for table, copy_sql in _BUDGET_LEGACY_COPY.items():
+        columns = [col[1] for col in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+        if 'id' not in columns or 'libelle' not in columns:
+            continue
+        cursor.execute(f"DROP TABLE IF EXISTS {table}_new")
+        cursor.execute(_BUDGET_TABLES[table].format(table=f"{table}_new"))
+        cursor.execute(copy_sql)
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+
+# Structure actuelle de la table des tâches (TaskManagerDialog)
+_TACHES_TABLE = '''CREATE TABLE IF NOT EXISTS {table} (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 projet_id INTEGER,
                 nom TEXT,
-                mode_simplifie INTEGER DEFAULT 0,
-                montant_forfaitaire REAL DEFAULT 0,
-                depenses_temps_travail INTEGER,
-                coef_temps_travail REAL,
-                depenses_externes INTEGER,
-                coef_externes REAL,
-                depenses_autres_achats INTEGER,
-                coef_autres_achats REAL,
-                depenses_dotation_amortissements INTEGER,
-                coef_dotation_amortissements REAL,
-                cd REAL,
-                taux REAL,
-                depenses_eligibles_max REAL DEFAULT 0,
-                montant_subvention_max REAL DEFAULT 0,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
+                date_debut TEXT,
+                date_fin TEXT,
+                details TEXT,
+                pourcentage_budget REAL DEFAULT 0,
+                FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
             )'''
-        )
 
-        # Migrations incrémentales sur subventions
-        for statement in (
-            "ALTER TABLE subventions ADD COLUMN depenses_eligibles_max REAL DEFAULT 0",
-            "ALTER TABLE subventions ADD COLUMN montant_subvention_max REAL DEFAULT 0",
-            "ALTER TABLE subventions ADD COLUMN mode_simplifie INTEGER DEFAULT 0",
-            "ALTER TABLE subventions ADD COLUMN montant_forfaitaire REAL DEFAULT 0",
-            "ALTER TABLE subventions ADD COLUMN date_debut_subvention TEXT",
-            "ALTER TABLE subventions ADD COLUMN date_fin_subvention TEXT",
-            "ALTER TABLE subventions ADD COLUMN assiette_eligible REAL DEFAULT 0",
-            "ALTER TABLE subventions ADD COLUMN montant_estime_total REAL DEFAULT 0",
-            "ALTER TABLE subventions ADD COLUMN date_derniere_maj TEXT",
-        ):
-            try:
-                cursor.execute(statement)
-            except sqlite3.OperationalError:
-                pass
 
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS equipe (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                type TEXT,
-                nombre INTEGER,
-                direction TEXT,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS actualites (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                message TEXT NOT NULL,
-                date TEXT NOT NULL,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS directions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT UNIQUE NOT NULL
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS chefs_projet (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nom TEXT NOT NULL,
-                prenom TEXT NOT NULL,
-                direction TEXT NOT NULL,
-                FOREIGN KEY(direction) REFERENCES directions(nom)
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS categorie_cout (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                annee INTEGER,
-                categorie TEXT,
-                libelle TEXT,
-                montant_charge REAL,
-                cout_production REAL,
-                cout_complet REAL
-            )'''
-        )
-        cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS temps_travail (
+def _migrate_taches_table(cursor: sqlite3.Cursor) -> None:
+    """
+    Convertit la table taches de l'ancienne structure (description, statut,
+    responsable) ou sans pourcentage_budget vers la structure actuelle.
+    """
+    columns = [col[1] for col in cursor.execute("PRAGMA table_info(taches)").fetchall()]
+    if not columns or ('details' in columns and 'pourcentage_budget' in columns):
+        return
+    details = "description" if "description" in columns and "details" not in columns else "details"
+    cursor.execute("DROP TABLE IF EXISTS taches_new")
+    cursor.execute(_TACHES_TABLE.format(table="taches_new"))
+    cursor.execute(f"""
+        INSERT INTO taches_new (id, projet_id, nom, date_debut, date_fin, details, pourcentage_budget)
+        SELECT id, projet_id, nom, date_debut, date_fin, COALESCE({details}, ''), 0
+        FROM taches
+        WHERE projet_id IN (SELECT id FROM projets)
+    """)
+    cursor.execute("DROP TABLE taches")
+    cursor.execute("ALTER TABLE taches_new RENAME TO taches")
+
+
+# Structure actuelle de la table du temps de travail (BudgetEditDialog)
+_TEMPS_TRAVAIL_TABLE = '''CREATE TABLE IF NOT EXISTS {table} (
                 projet_id INTEGER,
                 annee INTEGER,
                 direction TEXT,
@@ -205,77 +416,602 @@ def init_db() -> None:
                 mois TEXT,
                 jours REAL,
                 PRIMARY KEY (projet_id, annee, membre_id, mois),
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
+                FOREIGN KEY(projet_id) REFERENCES projets(id) ON DELETE CASCADE
             )'''
+
+
+def _migrate_temps_travail_table(cursor: sqlite3.Cursor) -> None:
+    """
+    Convertit la table temps_travail sans membre_id (une ligne par direction,
+    catégorie et mois) : chaque ligne devient un membre
+    `direction_categorie_N`, numéroté par couple direction/catégorie.
+    """
+    columns = [col[1] for col in cursor.execute("PRAGMA table_info(temps_travail)").fetchall()]
+    if not columns or 'membre_id' in columns:
+        return
+    cursor.execute("DROP TABLE IF EXISTS temps_travail_new")
+    cursor.execute(_TEMPS_TRAVAIL_TABLE.format(table="temps_travail_new"))
+    cursor.execute("""
+        INSERT INTO temps_travail_new (projet_id, annee, direction, categorie, membre_id, mois, jours)
+        SELECT projet_id, annee, direction, categorie,
+               direction || '_' || categorie || '_'
+                   || (ROW_NUMBER() OVER (PARTITION BY direction, categorie ORDER BY rowid) - 1),
+               mois, jours
+        FROM temps_travail
+        WHERE projet_id IN (SELECT id FROM projets)
+    """)
+    cursor.execute("DROP TABLE temps_travail")
+    cursor.execute("ALTER TABLE temps_travail_new RENAME TO temps_travail")
+
+
+# Tables rattachées à un projet : (table, clés étrangères supprimées en cascade).
+# Supprimer une ligne de projets supprime ainsi toutes ses données en une requête.
+_CASCADE_TABLES = (
+    ("projet_themes", ("projet_id",)),
+    ("images", ("projet_id",)),
+    ("investissements", ("projet_id",)),
+    ("subventions", ("projet_id",)),
+    ("equipe", ("projet_id",)),
+    ("actualites", ("projet_id",)),
+    ("temps_travail", ("projet_id",)),
+    ("depenses", ("projet_id",)),
+    ("autres_depenses", ("projet_id",)),
+    ("recettes", ("projet_id",)),
+    ("taches", ("projet_id",)),
+    ("amortissements", ("projet_id", "investissement_id")),
+)
+_CASCADE_REFERENCES = {"projet_id": "projets", "investissement_id": "investissements"}
+
+# Index sur les clés étrangères qui ne sont pas déjà en tête d'une clé primaire
+# ou d'un index (projet_id, periode) : utilisés par les filtres par projet et
+# par la suppression en cascade.
+_FOREIGN_KEY_INDEXES = (
+    ("images", "projet_id"),
+    ("investissements", "projet_id"),
+    ("subventions", "projet_id"),
+    ("equipe", "projet_id"),
+    ("actualites", "projet_id"),
+    ("taches", "projet_id"),
+    ("amortissements", "investissement_id"),
+)
+
+
+def _cascade_sql(create_sql: str, table: str, columns) -> str:
+    """
+    Instruction CREATE TABLE `table`_cascade reprenant `create_sql` (colonnes
+    ajoutées par ALTER TABLE comprises) avec des clés étrangères ON DELETE CASCADE.
+    """
+    sql = re.sub(r'^CREATE TABLE\s+("?)\w+\1', f'CREATE TABLE {table}_cascade', create_sql.strip())
+    for column in columns:
+        reference = _CASCADE_REFERENCES[column]
+        clause = re.compile(
+            rf'FOREIGN KEY\s*\(\s*{column}\s*\)\s*REFERENCES\s+"?{reference}"?\s*\(\s*id\s*\)'
+            rf'(\s+ON\s+DELETE\s+\w+(\s+\w+)?)?',
+            re.IGNORECASE,
+        )
+        cascade = f'FOREIGN KEY({column}) REFERENCES {reference}(id) ON DELETE CASCADE'
+        if clause.search(sql):
+            sql = clause.sub(cascade, sql)
+        else:
+            # Contrainte de table ajoutée avant la parenthèse fermante
+            sql = sql[:sql.rindex(')')].rstrip() + f',\n                {cascade}\n            )'
+    return sql
+
+
+def _migrate_cascade_foreign_keys(cursor: sqlite3.Cursor) -> None:
+    """
+    Reconstruit les tables rattachées à un projet dont les clés étrangères ne
+    sont pas en ON DELETE CASCADE (bases antérieures), puis crée les index des
+    clés étrangères. Les lignes orphelines (projet supprimé) ne sont pas
+    recopiées. Les triggers et index des tables reconstruites sont recréés
+    par les migrations suivantes.
+    """
+    conn = cursor.connection
+    to_rebuild = []
+    for table, columns in _CASCADE_TABLES:
+        cascades = {
+            row[3] for row in cursor.execute(f"PRAGMA foreign_key_list({table})").fetchall()
+            if row[2] == _CASCADE_REFERENCES.get(row[3]) and row[6].upper() == "CASCADE"
+        }
+        if not set(columns) <= cascades:
+            to_rebuild.append((table, columns))
+
+    if to_rebuild:
+        # Procédure de reconstruction recommandée par SQLite : contrôles des
+        # clés étrangères désactivés (hors transaction) le temps de la copie
+        conn.commit()
+        cursor.execute("PRAGMA foreign_keys = OFF")
+        try:
+            cursor.execute("BEGIN")
+            for table, columns in to_rebuild:
+                create_sql = cursor.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()[0]
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_cascade")
+                cursor.execute(_cascade_sql(create_sql, table, columns))
+                orphan_filters = " AND ".join(
+                    f"({column} IS NULL OR {column} IN (SELECT id FROM {_CASCADE_REFERENCES[column]}))"
+                    for column in columns
+                )
+                cursor.execute(f"INSERT INTO {table}_cascade SELECT * FROM {table} WHERE {orphan_filters}")
+                cursor.execute(f"DROP TABLE {table}")
+                cursor.execute(f"ALTER TABLE {table}_cascade RENAME TO {table}")
+            violations = [
+                row for table, _ in to_rebuild
+                for row in cursor.execute(f"PRAGMA foreign_key_check({table})").fetchall()
+                if row[2] in _CASCADE_REFERENCES.values()
+            ]
+            if violations:
+                raise sqlite3.IntegrityError(f"Clés étrangères invalides après migration : {violations[:5]}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("PRAGMA foreign_keys = ON")
+
+    for table, column in _FOREIGN_KEY_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})")
+
+
+# Colonnes entières de période (annee * 12 + mois) dérivées des colonnes texte.
+# Les colonnes texte restent la référence ; les colonnes entières sont
+# maintenues par triggers et indexées pour permettre des filtres par plage en SQL.
+# (table, colonne texte 'MM/AAAA', colonne période)
+_DATE_PERIOD_COLUMNS = (
+    ("projets", "date_debut", "periode_debut"),
+    ("projets", "date_fin", "periode_fin"),
+    ("investissements", "date_achat", "periode_achat"),
+    ("subventions", "date_debut_subvention", "periode_debut_subvention"),
+    ("subventions", "date_fin_subvention", "periode_fin_subvention"),
+)
+
+# Tables avec une colonne annee INTEGER et un nom de mois en français
+_MONTH_PERIOD_TABLES = ("temps_travail", "depenses", "autres_depenses", "amortissements")
+
+
+def _date_period_sql(column: str) -> str:
+    """Expression SQL convertissant une date 'MM/AAAA' en annee * 12 + mois (NULL si invalide)."""
+    mois = f"CAST(substr({column}, 1, instr({column}, '/') - 1) AS INTEGER)"
+    annee = f"CAST(substr({column}, instr({column}, '/') + 1) AS INTEGER)"
+    return (
+        f"CASE WHEN instr({column}, '/') > 0 AND {mois} BETWEEN 1 AND 12 AND {annee} > 0 "
+        f"THEN {annee} * 12 + {mois} END"
+    )
+
+
+def _month_number_sql(column: str) -> str:
+    """Expression SQL convertissant un nom de mois français en numéro 1-12 (NULL si inconnu)."""
+    cases = " ".join(f"WHEN '{nom}' THEN {numero}" for nom, numero in MONTH_NUMBERS.items())
+    return f"CASE lower(trim({column})) {cases} END"
+
+
+def _migrate_period_columns(cursor: sqlite3.Cursor) -> None:
+    """
+    Ajoute les colonnes de période entières, leurs triggers de synchronisation
+    et leurs index. Idempotent (voir _MIGRATIONS).
+    """
+    for table, source, target in _DATE_PERIOD_COLUMNS:
+        _add_missing_columns(cursor, table, ((target, "INTEGER"),))
+        expression = _date_period_sql(source)
+        cursor.execute(f"UPDATE {table} SET {target} = {expression} WHERE {target} IS NOT {expression}")
+        for event, when in (("INSERT", "INSERT"), ("UPDATE", f"UPDATE OF {source}")):
+            cursor.execute(
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{target}_{event.lower()}
+                AFTER {when} ON {table}
+                BEGIN
+                    UPDATE {table} SET {target} = {_date_period_sql('NEW.' + source)}
+                    WHERE rowid = NEW.rowid;
+                END"""
+            )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{target} ON {table}({target})")
+
+    for table in _MONTH_PERIOD_TABLES:
+        _add_missing_columns(cursor, table, (("mois_num", "INTEGER"), ("periode", "INTEGER")))
+        mois_num = _month_number_sql("mois")
+        periode = f"annee * 12 + ({mois_num})"
+        cursor.execute(
+            f"UPDATE {table} SET mois_num = {mois_num}, periode = {periode} "
+            f"WHERE mois_num IS NOT {mois_num} OR periode IS NOT {periode}"
         )
+        new_mois_num = _month_number_sql("NEW.mois")
+        for event, when in (("INSERT", "INSERT"), ("UPDATE", "UPDATE OF annee, mois")):
+            cursor.execute(
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_periode_{event.lower()}
+                AFTER {when} ON {table}
+                BEGIN
+                    UPDATE {table}
+                    SET mois_num = {new_mois_num},
+                        periode = NEW.annee * 12 + ({new_mois_num})
+                    WHERE rowid = NEW.rowid;
+                END"""
+            )
         cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS depenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                annee INTEGER,
-                mois TEXT,
-                libelle TEXT,
-                montant REAL,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_projet_periode ON {table}(projet_id, periode)"
         )
+
+
+# Index plein texte (FTS5) sur les projets, actualités et tâches.
+# Une seule table virtuelle ; le rowid encode la source : id * 3 + type.
+SEARCH_TABLE = "recherche_fts"
+SEARCH_KIND_PROJET, SEARCH_KIND_ACTUALITE, SEARCH_KIND_TACHE = 0, 1, 2
+
+# (table source, type, expression projet_id, expression titre, expression contenu, colonnes surveillées)
+_SEARCH_SOURCES = (
+    ("projets", SEARCH_KIND_PROJET, "{r}.id",
+     "COALESCE({r}.code, '') || ' ' || COALESCE({r}.nom, '')",
+     "COALESCE({r}.details, '') || ' ' || COALESCE({r}.livrables, '')",
+     "code, nom, details, livrables"),
+    ("actualites", SEARCH_KIND_ACTUALITE, "{r}.projet_id", "''",
+     "COALESCE({r}.message, '')", "projet_id, message"),
+    ("taches", SEARCH_KIND_TACHE, "{r}.projet_id", "COALESCE({r}.nom, '')",
+     "COALESCE({r}.details, '')", "projet_id, nom, details"),
+)
+
+
+def _search_insert_sql(table: str, kind: int, projet_id: str, titre: str, contenu: str, ref: str) -> str:
+    return (
+        f"INSERT INTO {SEARCH_TABLE}(rowid, kind, projet_id, titre, contenu) "
+        f"SELECT {ref}.id * 3 + {kind}, {kind}, {projet_id.format(r=ref)}, "
+        f"{titre.format(r=ref)}, {contenu.format(r=ref)}"
+    )
+
+
+def _migrate_search_index(cursor: sqlite3.Cursor) -> None:
+    """
+    Crée l'index FTS5 et ses triggers de synchronisation, puis le reconstruit
+    s'il ne correspond plus aux tables sources. Sans effet si SQLite n'a pas
+    été compilé avec FTS5 (la recherche se rabat alors sur LIKE).
+    """
+    try:
         cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS autres_depenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                annee INTEGER,
-                mois TEXT,
-                libelle TEXT,
-                montant REAL,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+                kind UNINDEXED,
+                projet_id UNINDEXED,
+                titre,
+                contenu,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )"""
         )
+    except sqlite3.OperationalError:
+        return
+
+    for table, kind, projet_id, titre, contenu, colonnes in _SEARCH_SOURCES:
+        insert_new = _search_insert_sql(table, kind, projet_id, titre, contenu, "NEW")
+        delete_old = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id * 3 + {kind}"
         cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS recettes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                annee INTEGER,
-                mois TEXT,
-                libelle TEXT,
-                montant REAL,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_recherche_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                {insert_new};
+            END"""
         )
         cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS taches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                nom TEXT NOT NULL,
-                description TEXT,
-                date_debut TEXT,
-                date_fin TEXT,
-                statut TEXT,
-                responsable TEXT,
-                FOREIGN KEY(projet_id) REFERENCES projets(id)
-            )'''
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_recherche_update
+            AFTER UPDATE OF {colonnes} ON {table}
+            BEGIN
+                {delete_old};
+                {insert_new};
+            END"""
         )
         cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS amortissements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                investissement_id INTEGER,
-                annee INTEGER,
-                mois TEXT,
-                montant REAL,
-                FOREIGN KEY(projet_id) REFERENCES projets(id),
-                FOREIGN KEY(investissement_id) REFERENCES investissements(id)
-            )'''
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_recherche_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                {delete_old};
+            END"""
         )
+
+    _sync_search_index(cursor)
+
+
+def _sync_search_index(cursor: sqlite3.Cursor) -> None:
+    """
+    Reconstruit l'index de recherche s'il est vide ou désynchronisé (ex. base
+    modifiée par une version antérieure de l'application ou fusionnée).
+    """
+    try:
+        present = cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}").fetchone()[0]
+    except sqlite3.OperationalError:
+        # Pas de FTS5 : la recherche se rabat sur LIKE
+        return
+    attendu = sum(cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table, *_ in _SEARCH_SOURCES)
+    if attendu != present:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for table, kind, projet_id, titre, contenu, _ in _SEARCH_SOURCES:
+            cursor.execute(_search_insert_sql(table, kind, projet_id, titre, contenu, "src")
+                           + f" FROM {table} src")
+
+
+# Versions de données des projets pour la synthèse du tableau de bord.
+# projet_versions contient un compteur par projet, incrémenté par triggers à
+# chaque écriture dans ses données chiffrées, et la ligne projet_id = 0 pour
+# les paramètres communs à tous les projets (taux journaliers, coefficients
+# CIR). synthese_projets conserve les indicateurs calculés pour une version.
+GLOBAL_VERSION_ID = 0
+# Tables propres à chaque base (synthèses, état d'archivage lié au fichier
+# d'archive voisin) : ni exportées ni fusionnées
+LOCAL_TABLES = ("projet_versions", "synthese_projets", "projets_archives")
+
+# Tables dont les lignes appartiennent à un projet (colonne projet_id)
+_VERSIONED_PROJECT_TABLES = (
+    "temps_travail", "depenses", "autres_depenses", "recettes",
+    "investissements", "amortissements", "subventions",
+)
+# Tables de paramètres dont une modification concerne tous les projets
+_VERSIONED_GLOBAL_TABLES = ("categorie_cout", "cir_coeffs")
+
+
+def _migrate_project_versions(cursor: sqlite3.Cursor) -> None:
+    """
+    Crée les tables de versions et de synthèse ainsi que les triggers qui
+    incrémentent les versions. Idempotent (voir _MIGRATIONS).
+    """
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS projet_versions (
+            projet_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )'''
+    )
+    cursor.execute(
+        '''CREATE TABLE IF NOT EXISTS synthese_projets (
+            projet_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            version_globale INTEGER NOT NULL,
+            periode_calcul INTEGER NOT NULL,
+            temps_travail REAL NOT NULL DEFAULT 0,
+            depenses_externes REAL NOT NULL DEFAULT 0,
+            autres_achats REAL NOT NULL DEFAULT 0,
+            amortissements REAL NOT NULL DEFAULT 0,
+            recettes REAL NOT NULL DEFAULT 0,
+            subventions REAL NOT NULL DEFAULT 0,
+            cir REAL NOT NULL DEFAULT 0,
+            couts_a_date REAL NOT NULL DEFAULT 0,
+            recettes_a_date REAL NOT NULL DEFAULT 0
+        )'''
+    )
+    cursor.execute(
+        "INSERT OR IGNORE INTO projet_versions (projet_id, version) SELECT id, 0 FROM projets"
+    )
+    cursor.execute(
+        "INSERT OR IGNORE INTO projet_versions (projet_id, version) VALUES (?, 0)",
+        (GLOBAL_VERSION_ID,),
+    )
+
+    bump = "UPDATE projet_versions SET version = version + 1 WHERE projet_id"
+    for table in _VERSIONED_PROJECT_TABLES:
+        for event, ids in (("INSERT", "= NEW.projet_id"),
+                           ("UPDATE", "IN (OLD.projet_id, NEW.projet_id)"),
+                           ("DELETE", "= OLD.projet_id")):
+            cursor.execute(
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    {bump} {ids};
+                END"""
+            )
+    for table in _VERSIONED_GLOBAL_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    {bump} = {GLOBAL_VERSION_ID};
+                END"""
+            )
+
+    cursor.execute(
+        """CREATE TRIGGER IF NOT EXISTS trg_projets_version_insert
+        AFTER INSERT ON projets
+        BEGIN
+            INSERT OR IGNORE INTO projet_versions (projet_id, version) VALUES (NEW.id, 0);
+        END"""
+    )
+    cursor.execute(
+        f"""CREATE TRIGGER IF NOT EXISTS trg_projets_version_update
+        AFTER UPDATE OF date_debut, date_fin, cir ON projets
+        BEGIN
+            {bump} = NEW.id;
+        END"""
+    )
+    cursor.execute(
+        """CREATE TRIGGER IF NOT EXISTS trg_projets_version_delete
+        AFTER DELETE ON projets
+        BEGIN
+            DELETE FROM projet_versions WHERE projet_id = OLD.id;
+            DELETE FROM synthese_projets WHERE projet_id = OLD.id;
+        END"""
+    )
+
+
+def _reset_project_summaries(cursor: sqlite3.Cursor) -> None:
+    """
+    Vide synthese_projets après un changement du calcul des subventions ou
+    du CIR de la synthèse : les lignes existantes sont recalculées.
+    """
+    cursor.execute("DELETE FROM synthese_projets")
+
+
+# Migrations du schéma : (numéro, fonction(cursor)), appliquées une seule fois
+# chacune dans l'ordre par migrate_schema. PRAGMA user_version contient le
+# numéro de la dernière migration appliquée. Les bases antérieures au
+# versionnage (user_version = 0) peuvent être dans n'importe quel état
+# intermédiaire : ces premières migrations sont donc idempotentes.
+# Une évolution du schéma s'ajoute en fin de liste avec le numéro suivant ;
+# les migrations existantes ne sont ni modifiées ni renumérotées.
+_MIGRATIONS = (
+    (1, _create_base_tables),
+    (2, _migrate_cascade_foreign_keys),
+    (3, _migrate_period_columns),
+    (4, _migrate_search_index),
+    (5, _migrate_project_versions),
+    (6, _create_archive_table),
+    (7, _reset_project_summaries),
+    (8, _reset_project_summaries),
+)
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+
+def period_key(value) -> Optional[int]:
+    """
+    Clé de période entière (annee * 12 + mois) d'une date 'MM/AAAA',
+    identique aux colonnes periode_* calculées en base. None si invalide.
+    """
+    try:
+        mois, annee = map(int, str(value).split('/'))
+    except (TypeError, ValueError):
+        return None
+    if not 1 <= mois <= 12 or annee <= 0:
+        return None
+    return annee * 12 + mois
+
+
+# Échéancier des amortissements : une ligne par investissement et par mois de
+# dotation, dans la table amortissements (periode indexée avec projet_id).
+# Règle unique : dotation mensuelle = montant / (durée en années × 12), du mois
+# suivant l'achat jusqu'à l'achat + durée. L'échéancier n'est pas limité aux
+# dates du projet : chaque calcul borne sa plage de périodes.
+def refresh_amortissements(cursor: sqlite3.Cursor, projet_id: Optional[int] = None) -> None:
+    """
+    Régénère l'échéancier des investissements d'un projet (de tous les projets
+    si projet_id est None). À appeler après toute écriture dans investissements.
+    """
+    if projet_id is None:
+        cursor.execute("DELETE FROM amortissements")
+        cursor.execute("SELECT id, projet_id, montant, periode_achat, duree FROM investissements")
+    else:
+        cursor.execute("DELETE FROM amortissements WHERE projet_id = ?", (projet_id,))
         cursor.execute(
-            '''CREATE TABLE IF NOT EXISTS cir_coeffs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                annee INTEGER UNIQUE,
-                k1 REAL,
-                k2 REAL,
-                k3 REAL
-            )'''
+            "SELECT id, projet_id, montant, periode_achat, duree FROM investissements WHERE projet_id = ?",
+            (projet_id,),
         )
+
+    rows = []
+    for inv_id, inv_projet_id, montant, periode_achat, duree in cursor.fetchall():
+        try:
+            nb_mois = int(float(duree)) * 12
+            dotation = float(montant) / nb_mois
+        except (TypeError, ValueError, ZeroDivisionError):
+            continue
+        if periode_achat is None or nb_mois <= 0:
+            continue
+        for periode in range(periode_achat + 1, periode_achat + nb_mois + 1):
+            annee, mois = divmod(periode - 1, 12)
+            rows.append((inv_projet_id, inv_id, annee, month_name(mois + 1), dotation))
+    cursor.executemany(
+        "INSERT INTO amortissements (projet_id, investissement_id, annee, mois, montant) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def _sync_amortissements(cursor: sqlite3.Cursor) -> None:
+    """
+    Régénère l'échéancier s'il ne correspond plus aux investissements
+    (bases antérieures, fusion de bases, modification hors application).
+    """
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(montant), 0) FROM amortissements")
+    nb_lignes, total = cursor.fetchone()
+    cursor.execute("""
+        SELECT COALESCE(SUM(CAST(duree AS INTEGER) * 12), 0), COALESCE(SUM(montant), 0)
+        FROM investissements
+        WHERE periode_achat IS NOT NULL AND CAST(duree AS INTEGER) > 0 AND montant IS NOT NULL
+    """)
+    nb_attendu, total_attendu = cursor.fetchone()
+    if nb_lignes != nb_attendu or abs(float(total) - float(total_attendu)) > 0.01:
+        refresh_amortissements(cursor)
+
+
+def amortissements_between(cursor: sqlite3.Cursor, projet_id: int,
+                           debut: Optional[int] = None, fin: Optional[int] = None) -> float:
+    """
+    Total des dotations d'un projet sur les périodes [debut, fin] (clés
+    annee * 12 + mois, bornes incluses, None : non bornée).
+    """
+    cursor.execute(
+        """SELECT COALESCE(SUM(montant), 0) FROM amortissements
+           WHERE projet_id = ? AND periode BETWEEN ? AND ?""",
+        (projet_id, debut if debut is not None else 0, fin if fin is not None else 1 << 62),
+    )
+    return float(cursor.fetchone()[0])
+
+
+def amortissements_by_period(cursor: sqlite3.Cursor, projet_id: int,
+                             debut: Optional[int] = None, fin: Optional[int] = None) -> dict:
+    """Dotations d'un projet par période {annee * 12 + mois: montant} sur [debut, fin]."""
+    cursor.execute(
+        """SELECT periode, SUM(montant) FROM amortissements
+           WHERE projet_id = ? AND periode BETWEEN ? AND ?
+           GROUP BY periode""",
+        (projet_id, debut if debut is not None else 0, fin if fin is not None else 1 << 62),
+    )
+    return {periode: float(total) for periode, total in cursor.fetchall()}
+
+
+def project_selection_sql(cursor: sqlite3.Cursor, project_ids) -> str:
+    """
+    Charge les identifiants dans une table temporaire et retourne la
+    sous-requête qui les liste (pas de limite sur le nombre de paramètres).
+    """
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS selection_projets (id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM temp.selection_projets")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO temp.selection_projets (id) VALUES (?)",
+        ((int(pid),) for pid in project_ids),
+    )
+    return "SELECT id FROM temp.selection_projets"
+
+
+def delete_projects(cursor: sqlite3.Cursor, project_ids) -> int:
+    """
+    Supprime des projets et, par ON DELETE CASCADE, toutes leurs données.
+    Une seule requête ; l'appelant valide la transaction. Retourne le nombre
+    de projets supprimés.
+    """
+    selection = project_selection_sql(cursor, project_ids)
+    cursor.execute(f"DELETE FROM projets WHERE id IN ({selection})")
+    return cursor.rowcount
+
+
+def export_projects(conn: sqlite3.Connection, project_ids, path: str) -> None:
+    """
+    Copie des projets, leurs données et les tables de référence (thèmes,
+    directions, chefs de projet, catégories, coefficients CIR) dans une
+    nouvelle base `path`, réimportable par fusion. Copie ensembliste :
+    une requête INSERT ... SELECT par table.
+    """
+    cursor = conn.cursor()
+    conn.commit()
+    cursor.execute("ATTACH DATABASE ? AS export", (path,))
+    # Copie à l'identique : pas de contrôle des clés étrangères (hors transaction)
+    cursor.execute("PRAGMA foreign_keys = OFF")
+    try:
+        selection = project_selection_sql(cursor, project_ids)
+        tables = cursor.execute(
+            "SELECT name, sql FROM main.sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' AND name NOT LIKE ?",
+            (f"{SEARCH_TABLE}%",),
+        ).fetchall()
+        for name, create_sql in tables:
+            if name in LOCAL_TABLES:
+                continue
+            cursor.execute(re.sub(r'^CREATE TABLE\s+("?)\w+\1', f'CREATE TABLE export."{name}"', create_sql.strip()))
+            columns = [col[1] for col in cursor.execute(f"PRAGMA main.table_info({name})").fetchall()]
+            if name == "projets":
+                where = f" WHERE id IN ({selection})"
+            elif "projet_id" in columns:
+                where = f" WHERE projet_id IN ({selection})"
+            else:
+                where = ""
+            cursor.execute(f"INSERT INTO export.{name} SELECT * FROM main.{name}{where}")
         conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.execute("DETACH DATABASE export")
 
 
 def recalculate_all_subventions():
@@ -385,8 +1121,6 @@ def _calculate_project_data(cursor, projet_id, date_debut, date_fin, cd):
     Calcule les données agrégées d'un projet sur une période donnée.
     Similaire à la logique dans SubventionDialog.get_project_data()
     """
-    import datetime
-    
     # Parser les dates MM/yyyy
     try:
         debut_mois, debut_annee = map(int, date_debut.split('/'))
@@ -400,13 +1134,6 @@ def _calculate_project_data(cursor, projet_id, date_debut, date_fin, cd):
             'amortissements': 0
         }
     
-    debut_date = datetime.date(debut_annee, debut_mois, 1)
-    # Fin du mois de fin
-    if fin_mois == 12:
-        fin_date = datetime.date(fin_annee + 1, 1, 1) - datetime.timedelta(days=1)
-    else:
-        fin_date = datetime.date(fin_annee, fin_mois + 1, 1) - datetime.timedelta(days=1)
-    
     # Calculer le temps de travail total avec coût de catégorie
     cursor.execute("""
         SELECT tt.annee, tt.categorie, SUM(tt.jours)
@@ -415,16 +1142,14 @@ def _calculate_project_data(cursor, projet_id, date_debut, date_fin, cd):
         GROUP BY tt.annee, tt.categorie
     """, (projet_id,))
     
+    # Import local : category_utils dépend de ce module
+    from category_utils import get_cost_rate
+    
     temps_travail_total = 0
     for row in cursor.fetchall():
         annee, categorie, jours = row
-        # Récupérer le coût de production pour cette catégorie/année
-        cursor.execute("""
-            SELECT cout_production FROM categorie_cout
-            WHERE annee = ? AND categorie = ?
-        """, (annee, categorie))
-        cout_row = cursor.fetchone()
-        cout_prod = cout_row[0] if cout_row and cout_row[0] else 0
+        # Coût de production pour cette catégorie/année (libellé ou code)
+        cout_prod = get_cost_rate(annee, categorie, 'cout_production') or 0
         temps_travail_total += jours * cout_prod
     
     # Dépenses externes
@@ -439,40 +1164,10 @@ def _calculate_project_data(cursor, projet_id, date_debut, date_fin, cd):
     """, (projet_id,))
     autres_achats = cursor.fetchone()[0] or 0
     
-    # Amortissements (calcul sur la période de la subvention)
-    cursor.execute("""
-        SELECT montant, date_achat, duree FROM investissements WHERE projet_id = ?
-    """, (projet_id,))
-    
-    amortissements_total = 0
-    for inv_row in cursor.fetchall():
-        montant, date_achat, duree = inv_row
-        if not date_achat or not duree or not montant:
-            continue
-        
-        try:
-            achat_mois, achat_annee = map(int, date_achat.split('/'))
-            debut_amort = datetime.date(achat_annee, achat_mois, 1)
-            
-            # Fin amortissement = début + durée
-            fin_mois_amort = achat_mois + int(duree) * 12
-            fin_annee_amort = achat_annee + (fin_mois_amort - 1) // 12
-            fin_mois_amort = ((fin_mois_amort - 1) % 12) + 1
-            fin_amort = datetime.date(fin_annee_amort, fin_mois_amort, 1)
-            
-            # Intersection avec la période de subvention
-            debut_effective = max(debut_amort, debut_date)
-            fin_effective = min(fin_amort, fin_date)
-            
-            if debut_effective > fin_effective:
-                continue
-            
-            # Calculer le nombre de mois d'amortissement
-            mois_amort = (fin_effective.year - debut_effective.year) * 12 + fin_effective.month - debut_effective.month + 1
-            dotation_mensuelle = float(montant) / (int(duree) * 12)
-            amortissements_total += dotation_mensuelle * mois_amort
-        except:
-            continue
+    # Amortissements : dotations de l'échéancier sur la période de la subvention
+    amortissements_total = amortissements_between(
+        cursor, projet_id, debut_annee * 12 + debut_mois, fin_annee * 12 + fin_mois
+    )
     
     return {
         'temps_travail_total': temps_travail_total,
@@ -482,4 +1177,7 @@ def _calculate_project_data(cursor, projet_id, date_debut, date_fin, cd):
     }
 
 
-__all__ = ["DB_FILE", "DB_PATH", "db_cursor", "get_connection", "init_db", "recalculate_all_subventions"]
+__all__ = [
+    "DB_FILE", "DB_PATH", "SCHEMA_VERSION", "db_cursor", "delete_projects", "export_projects", "get_connection",
+    "init_db", "migrate_schema", "period_key", "project_selection_sql", "recalculate_all_subventions",
+]
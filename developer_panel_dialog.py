@@ -0,0 +1,185 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton,
+    QTabWidget, QWidget, QFileDialog, QMessageBox, QHeaderView, QCheckBox, QListWidget,
+    QListWidgetItem, QPlainTextEdit, QSplitter
+)
+from PyQt6.QtCore import Qt
+
+import profiling
+import sql_trace
+
+
+class DeveloperPanelDialog(QDialog):
+    """
+    Panneau développeur (Ctrl+Maj+D dans la fenêtre principale) : statistiques
+    de la trace SQL et journal du profilage des calculs. Fenêtre non modale,
+    pour rejouer une action dans l'application puis actualiser.
+    """
+
+    SQL_HEADERS = ['Nombre', 'Total (ms)', 'Moyenne (ms)', 'Max (ms)', 'Appelant', 'Requête']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Panneau développeur')
+        self.resize(1100, 600)
+        self.setModal(False)
+
+        layout = QVBoxLayout()
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self._build_sql_tab(), 'Requêtes SQL')
+        self.tabs.addTab(self._build_profiling_tab(), 'Profilage')
+        layout.addWidget(self.tabs)
+
+        btn_close = QPushButton('Fermer')
+        btn_close.clicked.connect(self.close)
+        close_layout = QHBoxLayout()
+        close_layout.addStretch()
+        close_layout.addWidget(btn_close)
+        layout.addLayout(close_layout)
+        self.setLayout(layout)
+
+        self.refresh_sql()
+        self.refresh_profiling()
+
+    def _build_sql_tab(self):
+        widget = QWidget()
+        layout = QVBoxLayout()
+
+        self.sql_summary = QLabel()
+        layout.addWidget(self.sql_summary)
+
+        self.sql_table = QTableWidget(0, len(self.SQL_HEADERS))
+        self.sql_table.setHorizontalHeaderLabels(self.SQL_HEADERS)
+        self.sql_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.sql_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.sql_table.setWordWrap(False)
+        header = self.sql_table.horizontalHeader()
+        header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
+        header.setStretchLastSection(True)
+        layout.addWidget(self.sql_table)
+
+        btn_layout = QHBoxLayout()
+        btn_refresh = QPushButton('Actualiser')
+        btn_refresh.clicked.connect(self.refresh_sql)
+        btn_reset = QPushButton('Réinitialiser')
+        btn_reset.clicked.connect(self.reset_sql)
+        btn_export = QPushButton('Enregistrer le rapport...')
+        btn_export.clicked.connect(self.export_sql)
+        btn_layout.addWidget(btn_refresh)
+        btn_layout.addWidget(btn_reset)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_export)
+        layout.addLayout(btn_layout)
+
+        widget.setLayout(layout)
+        return widget
+
+    def refresh_sql(self):
+        stats = sql_trace.snapshot()
+        if not sql_trace.is_enabled():
+            self.sql_summary.setText(
+                f'Trace SQL désactivée. Relancer avec {sql_trace.CLI_FLAG} ou {sql_trace.ENV_VAR}=1.')
+        else:
+            total_count = sum(s.count for s in stats)
+            total_ms = sum(s.total_s for s in stats) * 1000
+            self.sql_summary.setText(
+                f'{total_count} exécutions, {len(stats)} requêtes distinctes, {total_ms:.1f} ms en SQL')
+
+        self.sql_table.setSortingEnabled(False)
+        self.sql_table.setRowCount(len(stats))
+        for row, stat in enumerate(stats):
+            values = [
+                stat.count,
+                round(stat.total_s * 1000, 2),
+                round(stat.total_s * 1000 / stat.count, 3) if stat.count else 0.0,
+                round(stat.max_s * 1000, 2),
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem()
+                # Valeur numérique pour que le tri de la colonne soit correct
+                item.setData(Qt.ItemDataRole.DisplayRole, value)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.sql_table.setItem(row, col, item)
+            self.sql_table.setItem(row, 4, QTableWidgetItem(stat.caller))
+            sql_item = QTableWidgetItem(stat.sql)
+            sql_item.setToolTip(stat.sql)
+            self.sql_table.setItem(row, 5, sql_item)
+        self.sql_table.setSortingEnabled(True)
+
+    def reset_sql(self):
+        sql_trace.reset()
+        self.refresh_sql()
+
+    def export_sql(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Enregistrer la trace SQL', sql_trace.LOG_FILENAME, 'Fichiers texte (*.log *.txt)')
+        if not file_path:
+            return
+        sql_trace.report(file_path)
+        QMessageBox.information(self, 'Trace SQL', f'Rapport enregistré dans {file_path}')
+
+    def _build_profiling_tab(self):
+        widget = QWidget()
+        layout = QVBoxLayout()
+
+        options_layout = QHBoxLayout()
+        self.profiling_check = QCheckBox('Profiler les calculs')
+        self.profiling_check.setChecked(profiling.is_enabled())
+        self.cprofile_check = QCheckBox('Inclure le profil cProfile')
+        self.cprofile_check.setChecked(profiling.uses_cprofile())
+        self.cprofile_check.setEnabled(profiling.is_enabled())
+        self.profiling_check.toggled.connect(self.on_profiling_options_changed)
+        self.cprofile_check.toggled.connect(self.on_profiling_options_changed)
+        options_layout.addWidget(self.profiling_check)
+        options_layout.addWidget(self.cprofile_check)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.profiling_list = QListWidget()
+        self.profiling_list.currentItemChanged.connect(self.show_profiling_entry)
+        self.profiling_detail = QPlainTextEdit()
+        self.profiling_detail.setReadOnly(True)
+        self.profiling_detail.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        splitter.addWidget(self.profiling_list)
+        splitter.addWidget(self.profiling_detail)
+        layout.addWidget(splitter)
+
+        btn_layout = QHBoxLayout()
+        btn_refresh = QPushButton('Actualiser')
+        btn_refresh.clicked.connect(self.refresh_profiling)
+        btn_clear = QPushButton('Vider')
+        btn_clear.clicked.connect(self.clear_profiling)
+        btn_layout.addWidget(btn_refresh)
+        btn_layout.addWidget(btn_clear)
+        btn_layout.addStretch()
+        btn_layout.addWidget(QLabel(f'Journal également écrit dans {profiling.LOG_FILENAME}'))
+        layout.addLayout(btn_layout)
+
+        widget.setLayout(layout)
+        return widget
+
+    def on_profiling_options_changed(self, _checked=None):
+        enabled = self.profiling_check.isChecked()
+        self.cprofile_check.setEnabled(enabled)
+        profiling.set_enabled(enabled, self.cprofile_check.isChecked())
+
+    def refresh_profiling(self):
+        self.profiling_list.clear()
+        self.profiling_detail.clear()
+        for entry in profiling.entries():
+            item = QListWidgetItem(f'{entry.timestamp}  {entry.name}  {entry.duration_s * 1000:.1f} ms')
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            self.profiling_list.addItem(item)
+        if self.profiling_list.count():
+            self.profiling_list.setCurrentRow(0)
+
+    def show_profiling_entry(self, current, _previous=None):
+        if current is None:
+            self.profiling_detail.clear()
+            return
+        self.profiling_detail.setPlainText(profiling.format_entry(current.data(Qt.ItemDataRole.UserRole)))
+
+    def clear_profiling(self):
+        profiling.clear()
+        self.refresh_profiling()
@@ -4,7 +4,9 @@ import sqlite3
 import os
 import shutil
 
-from database import DB_PATH, get_connection
+from database import DB_PATH, SEARCH_TABLE, LOCAL_TABLES, get_connection, init_db, refresh_amortissements
+from category_utils import invalidate_category_cache
+from task_allocation import invalidate_task_allocation
 
 class ImportExportDialog(QDialog):
     def __init__(self, parent=None):
@@ -122,8 +124,10 @@ class ImportExportDialog(QDialog):
         try:
             with get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
-                tables = [row[0] for row in cursor.fetchall()]
+                # L'index de recherche (table FTS et tables internes) est reconstruit par init_db
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE ? ORDER BY name",
+                               (f"{SEARCH_TABLE}%",))
+                tables = [row[0] for row in cursor.fetchall() if row[0] not in LOCAL_TABLES]
 
                 for table in tables:
                     self.table_list.addItem(table)
@@ -181,6 +185,13 @@ class ImportExportDialog(QDialog):
                     # Fermer toutes les connexions existantes
                     if os.path.exists(DB_PATH):
                         os.remove(DB_PATH)
+                        invalidate_category_cache()
+                        invalidate_task_allocation()
+                        # Les compteurs de version repartent de zéro avec la nouvelle base
+                        from project_details_dialog import invalidate_section_cache
+                        invalidate_section_cache()
+                        # Base vide avec le schéma courant (les dialogues ne créent plus de tables)
+                        init_db()
                         QMessageBox.information(self, 'Suppression effectuée', 'La base de données a été supprimée avec succès.')
                         
                         # Fermer la fenêtre et rafraîchir l'interface parent
@@ -202,8 +213,11 @@ class ImportExportDialog(QDialog):
         target_cursor = target_conn.cursor()
         
         # Obtenir la liste de toutes les tables
-        source_cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in source_cursor.fetchall()]
+        # L'index de recherche et la synthèse des projets ne sont pas fusionnés :
+        # les triggers les mettent à jour
+        source_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE ?",
+                              (f"{SEARCH_TABLE}%",))
+        tables = [row[0] for row in source_cursor.fetchall() if row[0] not in LOCAL_TABLES]
         
         for table_name in tables:
             try:
@@ -224,9 +238,13 @@ class ImportExportDialog(QDialog):
                 print(f"Erreur lors de la fusion de la table {table_name}: {e}")
                 continue
         
+        # L'échéancier des amortissements est régénéré à partir des investissements fusionnés
+        refresh_amortissements(target_cursor)
         target_conn.commit()
         source_conn.close()
         target_conn.close()
+        # Les catégories et taux journaliers ont pu changer
+        invalidate_category_cache()
 
     def merge_projects_table(self, source_cursor, target_cursor):
         """Fusionne intelligemment la table projets"""
@@ -235,6 +253,8 @@ class ImportExportDialog(QDialog):
         
         for project_row in source_projects:
             # Structure: id, code, nom, details, date_debut, date_fin, livrables, chef, etat, cir, subvention, theme_principal
+            # (les colonnes suivantes, ex. periode_debut/periode_fin, sont recalculées par triggers)
+            project_row = tuple(project_row[:12])
             old_id, code, nom = project_row[0], project_row[1], project_row[2]
             
             # Vérifier si un projet avec même code existe (plus restrictif)
@@ -371,7 +391,8 @@ class ImportExportDialog(QDialog):
         backup_cursor = backup_conn.cursor()
 
         # Créer les tables nécessaires dans la base de données exportée (exclure les tables système)
-        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE ?",
+                       (f"{SEARCH_TABLE}%",))
         for (create_table_sql,) in cursor.fetchall():
             if create_table_sql:  # Éviter les None
                 backup_cursor.execute(create_table_sql)
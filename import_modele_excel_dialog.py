@@ -3,10 +3,9 @@ Script d'import de données depuis un fichier Excel modèle vers la base de donn
 Import les données de Temps de travail, Dépenses externes, Autres dépenses et Recettes
 """
 
-import pandas as pd
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLabel, QComboBox, QFileDialog, QMessageBox,
-                             QProgressBar, QTextEdit, QGroupBox)
+                             QProgressBar, QTextEdit, QGroupBox, QApplication)
 from PyQt6.QtCore import Qt
 from database import get_connection
 import traceback
@@ -91,6 +90,14 @@ class ImportExcelModeleDialog(QDialog):
         self.btn_close = QPushButton("Fermer")
         self.btn_close.clicked.connect(self.close)
         
+        self.btn_batch = QPushButton("Import par lot (dossier)...")
+        self.btn_batch.setToolTip(
+            "Importer tous les modèles Excel d'un dossier :\n"
+            "le projet cible de chaque fichier est lu dans le modèle"
+        )
+        self.btn_batch.clicked.connect(self.import_batch)
+        
+        btn_layout.addWidget(self.btn_batch)
         btn_layout.addStretch()
         btn_layout.addWidget(self.btn_import)
         btn_layout.addWidget(self.btn_close)
@@ -118,6 +125,9 @@ class ImportExcelModeleDialog(QDialog):
     
     def load_excel_data(self):
         """Charge et valide les données du fichier Excel"""
+        # Import différé : pandas n'est chargé qu'à la lecture d'un fichier
+        import pandas as pd
+
         try:
             self.log("Chargement du fichier Excel...")
             
@@ -278,6 +288,49 @@ class ImportExcelModeleDialog(QDialog):
             self.progress_bar.setVisible(False)
             self.btn_import.setEnabled(True)
     
+    def import_batch(self):
+        """Importe tous les modèles d'un dossier, chacun dans son projet, en une transaction"""
+        from modele_excel_import import apply_modeles, list_modeles, parse_modeles
+        
+        folder = QFileDialog.getExistingDirectory(self, "Sélectionner le dossier des modèles Excel")
+        if not folder:
+            return
+        paths = list_modeles(folder)
+        if not paths:
+            QMessageBox.information(self, "Import par lot", "Aucun fichier .xlsx dans ce dossier.")
+            return
+        
+        self.log(f"\n=== IMPORT PAR LOT : {len(paths)} fichiers ===")
+        self.btn_batch.setEnabled(False)
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            report = apply_modeles(parse_modeles(paths))
+        except Exception as e:
+            self.log(f"\n✗ ERREUR GRAVE : {e}")
+            self.log(traceback.format_exc())
+            QMessageBox.critical(self, "Erreur", f"Erreur lors de l'import, aucune donnée importée :\n{e}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+            self.btn_batch.setEnabled(True)
+        
+        for name, count in report.imported.items():
+            self.log(f"✓ {name} : {count} lignes")
+        for error in report.errors:
+            self.log(f"  ✗ {error}")
+        self.log("\n=== IMPORT TERMINÉ ===")
+        self.log(f"Total : {report.line_count} lignes dans {len(report.imported)} fichiers, "
+                 f"{len(report.errors)} erreurs")
+        
+        message = (f"Fichiers importés : {len(report.imported)} / {len(paths)}\n"
+                   f"Lignes importées : {report.line_count}\n"
+                   f"Erreurs : {len(report.errors)}")
+        if report.errors:
+            message += "\n\nLe détail des erreurs est dans le journal d'import."
+            QMessageBox.warning(self, "Import par lot terminé", message)
+        else:
+            QMessageBox.information(self, "Import par lot terminé", message)
+    
     def import_temps_travail(self, cursor):
         """Importe les données de temps de travail"""
         inserted = 0
@@ -1,19 +1,33 @@
+import startup_timing
+startup_timing.install()  # Sans effet sauf si --startup-timing est passé
+import sql_trace
+sql_trace.install()  # Sans effet sauf si --sql-trace est passé
+import profiling
+profiling.install()  # Sans effet sauf si --profiling est passé
+
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QListWidget, QPushButton, QHBoxLayout,
     QMessageBox, QInputDialog,
     QDialog, QLabel, QLineEdit, QTextEdit, QDateEdit, QComboBox, QCheckBox, QSpinBox,
-    QFileDialog, QFormLayout, QGroupBox, QMenu, QGridLayout, QScrollArea, QTableWidget, QTableWidgetItem
+    QFileDialog, QFormLayout, QGroupBox, QMenu, QGridLayout, QScrollArea, QTableWidget, QTableWidgetItem,
+    QTableView, QListWidgetItem
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
+import multiprocessing
 import sqlite3
 import sys
 import datetime
 import re
 import os
-import pandas as pd  # Ajout pour lecture Excel
 
-from database import get_connection, init_db
-from category_utils import list_category_labels, resolve_category_code
+# Les dialogues et les bibliothèques lourdes (pandas, openpyxl) sont importés
+# à la demande dans les méthodes qui les utilisent, pour accélérer le démarrage.
+from database import amortissements_between, delete_projects, get_connection, init_db, refresh_amortissements
+from category_utils import get_cost_rate, list_category_labels, resolve_category_code
+from project_table_model import ProjectSortFilterProxyModel, ProjectTableModel, refresh_project_states
+
+startup_timing.mark("Imports de main.py")
 
 def get_equipe_categories():
     """Récupère les catégories d'équipe avec libellés lisibles."""
@@ -21,42 +35,39 @@ def get_equipe_categories():
     return categories
 
 class MainWindow(QWidget):
-    def edit_project(self):
+    def _selected_project(self):
+        """Retourne (id, code) du projet sélectionné dans la liste, ou None."""
         rows = self.project_table.selectionModel().selectedRows()
         if not rows:
+            return None
+        return self._project_at(rows[0])
+
+    def _project_at(self, proxy_index):
+        """Retourne (id, code) du projet affiché à l'index donné de la vue."""
+        source_index = self.project_proxy.mapToSource(proxy_index)
+        project = self.project_model.project_at(source_index.row())
+        if project is None:
+            return None
+        return project[0], project[1]
+
+    def edit_project(self):
+        selected = self._selected_project()
+        if not selected:
             QMessageBox.warning(self, 'Modifier', 'Sélectionnez un projet à modifier.')
             return
-        row = rows[0].row()
-        code = self.project_table.item(row, 0).text()
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM projets WHERE code=?', (code,))
-        res = cursor.fetchone()
-        conn.close()
-        if not res:
-            QMessageBox.warning(self, 'Erreur', 'Projet introuvable.')
-            return
-        projet_id = res[0]
+        projet_id, code = selected
         form = ProjectForm(self, projet_id)
         if form.exec():
             self.load_projects()
 
     def delete_project(self):
-        rows = self.project_table.selectionModel().selectedRows()
-        if not rows:
+        selected = self._selected_project()
+        if not selected:
             QMessageBox.warning(self, 'Supprimer', 'Sélectionnez un projet à supprimer.')
             return
-        row = rows[0].row()
-        code = self.project_table.item(row, 0).text()
+        pid, code = selected
         conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute('SELECT id FROM projets WHERE code=?', (code,))
-        res = cursor.fetchone()
-        if not res:
-            conn.close()
-            QMessageBox.warning(self, 'Erreur', 'Projet introuvable.')
-            return
-        pid = res[0]
         
         # Confirmation simple
         message_confirmation = f'Voulez-vous vraiment supprimer le projet {code} ?'
@@ -68,23 +79,11 @@ class MainWindow(QWidget):
         
         if confirm == QMessageBox.StandardButton.Yes:
             try:
-                # Supprimer dans l'ordre pour éviter les contraintes
-                tables_a_supprimer = [
-                    'recettes', 'depenses', 'autres_depenses', 'temps_travail',
-                    'taches', 'actualites', 'images', 'investissements', 
-                    'subventions', 'equipe', 'projet_themes', 'amortissements'
-                ]
-                
-                for table in tables_a_supprimer:
-                    try:
-                        cursor.execute(f'DELETE FROM {table} WHERE projet_id=?', (pid,))
-                    except sqlite3.Error as e:
-                        print(f"Erreur suppression {table}: {e}")
-                        # Continue même en cas d'erreur sur une table
-                        
-                # Finalement supprimer le projet
-                cursor.execute('DELETE FROM projets WHERE id=?', (pid,))
+                # Les données liées sont supprimées par ON DELETE CASCADE
+                delete_projects(cursor, [pid])
                 conn.commit()
+                from project_archive import purge_projects
+                purge_projects([pid])
                 
                 QMessageBox.information(self, 'Succès', f'Projet {code} et toutes ses données associées ont été supprimés.')
                 self.load_projects()
@@ -105,23 +104,49 @@ class MainWindow(QWidget):
             int(screen.width() * 0.9),
             int(screen.height() * 0.85)
         )
+        self.developer_panel = None
         init_db()
+        startup_timing.mark("init_db")
         self.setup_ui()
+        startup_timing.mark("Construction de l'interface")
         self.load_projects()
+        startup_timing.mark("Chargement des projets")
 
     def setup_ui(self):
         layout = QVBoxLayout()
         
+        # Recherche plein texte (projets, actualités, tâches)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('Rechercher dans les projets, actualités et tâches...')
+        self.search_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.search_edit)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(180)
+        self.search_results.hide()
+        layout.addWidget(self.search_results)
+        # Recherche lancée après une courte pause dans la saisie
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_edit.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_results.itemDoubleClicked.connect(self.open_search_result)
+        # Panneau développeur (trace SQL, profilage)
+        self.developer_shortcut = QShortcut(QKeySequence('Ctrl+Shift+D'), self)
+        self.developer_shortcut.activated.connect(self.open_developer_panel)
+
         # Zone principale avec tableau et bouton impression à droite
         main_area = QHBoxLayout()
         
-        # Tableau des projets
-        from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem
-        self.project_table = QTableWidget()
-        self.project_table.setColumnCount(4)
-        self.project_table.setHorizontalHeaderLabels(['Code projet', 'Nom projet', 'Chef de projet', 'Etat'])
-        self.project_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.project_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        # Tableau des projets (vue sur un modèle : seules les lignes visibles sont dessinées)
+        self.project_model = ProjectTableModel(self)
+        self.project_proxy = ProjectSortFilterProxyModel(self)
+        self.project_proxy.setSourceModel(self.project_model)
+        self.project_table = QTableView()
+        self.project_table.setModel(self.project_proxy)
+        self.project_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.project_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.project_table.verticalHeader().setDefaultSectionSize(24)
         # Activer le tri par colonnes
         self.project_table.setSortingEnabled(True)
         main_area.addWidget(self.project_table)
@@ -140,6 +165,12 @@ class MainWindow(QWidget):
         self.btn_bilan_jours.setMinimumWidth(150)
         self.btn_bilan_jours.setStyleSheet("QPushButton { font-size: 14px; font-weight: bold; }")
         right_area.addWidget(self.btn_bilan_jours)
+
+        self.btn_dashboard = QPushButton('Tableau de bord')
+        self.btn_dashboard.setMinimumHeight(60)
+        self.btn_dashboard.setMinimumWidth(150)
+        self.btn_dashboard.setStyleSheet("QPushButton { font-size: 14px; font-weight: bold; }")
+        right_area.addWidget(self.btn_dashboard)
         right_area.addStretch()  # Espace en dessous pour centrer
         
         main_area.addLayout(right_area)
@@ -149,9 +180,11 @@ class MainWindow(QWidget):
         self.btn_new = QPushButton('Nouveau projet')
         self.btn_edit = QPushButton('Modifier le projet sélectionné')
         self.btn_delete = QPushButton('Supprimer')
+        self.btn_cleanup = QPushButton('Nettoyer les projets...')
         self.btn_themes = QPushButton('Gérer les thèmes')
         self.btn_couts_categorie = QPushButton('Coûts par catégorie')
         self.btn_cir = QPushButton('CIR')
+        self.btn_simulations = QPushButton('Simulations')
         self.btn_directions = QPushButton('Gérer les directions')
         self.btn_project_managers = QPushButton('Gérer les chefs de projet')
         self.btn_import_export = QPushButton('Importer / Exporter BDD')
@@ -161,9 +194,11 @@ class MainWindow(QWidget):
         btn_layout.addWidget(self.btn_new)
         btn_layout.addWidget(self.btn_edit)
         btn_layout.addWidget(self.btn_delete)
+        btn_layout.addWidget(self.btn_cleanup)
         btn_layout.addWidget(self.btn_themes)
         btn_layout.addWidget(self.btn_couts_categorie, alignment=Qt.AlignmentFlag.AlignRight)
         btn_layout.addWidget(self.btn_cir, alignment=Qt.AlignmentFlag.AlignRight)
+        btn_layout.addWidget(self.btn_simulations, alignment=Qt.AlignmentFlag.AlignRight)
         btn_layout.addWidget(self.btn_directions)
         btn_layout.addWidget(self.btn_project_managers)
         btn_layout.addWidget(self.btn_import_export)
@@ -172,12 +207,15 @@ class MainWindow(QWidget):
         self.btn_new.clicked.connect(self.open_project_form)
         self.btn_edit.clicked.connect(self.edit_project)
         self.btn_delete.clicked.connect(self.delete_project)
+        self.btn_cleanup.clicked.connect(self.open_project_cleanup_dialog)
         self.btn_themes.clicked.connect(self.open_theme_manager)
-        self.project_table.cellDoubleClicked.connect(self.show_project_details)
+        self.project_table.doubleClicked.connect(self.show_project_details)
         self.btn_couts_categorie.clicked.connect(self.open_categorie_cout_dialog)
         self.btn_cir.clicked.connect(self.open_cir_dialog)
+        self.btn_simulations.clicked.connect(self.open_scenario_dialog)
         self.btn_print_budget.clicked.connect(self.handle_print_budget)
         self.btn_bilan_jours.clicked.connect(self.handle_bilan_jours)
+        self.btn_dashboard.clicked.connect(self.open_dashboard)
         self.btn_directions.clicked.connect(self.open_direction_manager)
         self.btn_project_managers.clicked.connect(self.open_project_manager_dialog)
         self.btn_import_export.clicked.connect(self.open_import_export_dialog)
@@ -187,100 +225,60 @@ class MainWindow(QWidget):
         dialog = CategorieCoutDialog(self)
         dialog.exec()
 
-    def calculate_project_status(self, date_debut, date_fin):
-        """Calcule automatiquement l'état d'un projet basé sur ses dates"""
-        if not date_debut or not date_fin:
-            return "En cours"  # État par défaut si dates manquantes
-            
-        try:
-            date_aujourd_hui = datetime.date.today()
-            
-            # Convertir les dates MM/yyyy en objets date
-            debut_mois, debut_annee = map(int, date_debut.split('/'))
-            fin_mois, fin_annee = map(int, date_fin.split('/'))
-            
-            # Premier jour du mois de début
-            debut_projet = datetime.date(debut_annee, debut_mois, 1)
-            
-            # Dernier jour du mois de fin
-            if fin_mois == 12:
-                fin_projet = datetime.date(fin_annee + 1, 1, 1) - datetime.timedelta(days=1)
-            else:
-                fin_projet = datetime.date(fin_annee, fin_mois + 1, 1) - datetime.timedelta(days=1)
-            
-            # Déterminer l'état selon les dates
-            if date_aujourd_hui < debut_projet:
-                return "Futur"
-            elif date_aujourd_hui > fin_projet:
-                return "Terminé"
-            else:
-                return "En cours"
-                
-        except Exception:
-            # En cas d'erreur de parsing, retourner l'état par défaut
-            return "En cours"
-
     def load_projects(self):
-        # Désactiver temporairement le tri pour éviter les bugs d'affichage
-        self.project_table.setSortingEnabled(False)
-        
-        # Vider complètement le tableau
-        self.project_table.clearContents()
-        self.project_table.setRowCount(0)
-        
-        conn = get_connection()
-        cursor = conn.cursor()
-        # Jointure pour récupérer le nom complet du chef de projet + dates pour calcul automatique
-        cursor.execute('''
-            SELECT p.id, p.code, p.nom, c.nom || ' ' || c.prenom AS chef_complet, p.etat, p.date_debut, p.date_fin
-            FROM projets p
-            LEFT JOIN chefs_projet c ON p.chef = c.id
-            ORDER BY p.id DESC
-        ''')
-        
-        projects_to_update = []  # Liste des projets dont l'état doit être mis à jour
-        results = cursor.fetchall()
-        
-        # Définir le nombre de lignes avant d'insérer les données
-        self.project_table.setRowCount(len(results))
-        
-        for row_idx, (pid, code, nom, chef_complet, etat_actuel, date_debut, date_fin) in enumerate(results):
-            # Calculer l'état automatique basé sur les dates
-            etat_auto = self.calculate_project_status(date_debut, date_fin)
-            
-            # Si l'état calculé diffère de l'état en base, noter pour mise à jour
-            if etat_auto != etat_actuel:
-                projects_to_update.append((pid, etat_auto))
-                etat_affiche = etat_auto  # Afficher le nouvel état
-            else:
-                etat_affiche = etat_actuel  # Garder l'état existant
-            
-            # Ajouter la ligne au tableau (pas besoin d'insertRow car on a déjà défini le nombre de lignes)
-            self.project_table.setItem(row_idx, 0, QTableWidgetItem(str(code)))
-            self.project_table.setItem(row_idx, 1, QTableWidgetItem(str(nom)))
-            self.project_table.setItem(row_idx, 2, QTableWidgetItem(str(chef_complet) if chef_complet else "Non assigné"))
-            self.project_table.setItem(row_idx, 3, QTableWidgetItem(str(etat_affiche)))
-        
-        # Mettre à jour les états en base de données si nécessaire
-        for pid, nouvel_etat in projects_to_update:
-            cursor.execute('UPDATE projets SET etat = ? WHERE id = ?', (nouvel_etat, pid))
-        
-        if projects_to_update:
-            conn.commit()  # Sauvegarder les changements seulement s'il y en a
-            
-        conn.close()
-        
-        # Réactiver le tri après avoir mis à jour toutes les données
-        self.project_table.setSortingEnabled(True)
-        
-        # Ajuster automatiquement la largeur des colonnes au contenu
-        self.project_table.resizeColumnsToContents()
+        # État recalculé en SQL ; les changements sont enregistrés en une seule requête
+        rows = refresh_project_states()
+        if self.project_model.set_rows(rows):
+            # Ajuster la largeur des colonnes seulement quand la liste a changé
+            self.project_table.resizeColumnsToContents()
+
+    def run_search(self):
+        """Filtre la liste des projets et affiche les résultats classés de la recherche."""
+        from search_index import format_result_html, search, search_project_ids
+
+        self.search_results.clear()
+        text = self.search_edit.text().strip()
+        if not text:
+            self.search_results.hide()
+            self.project_proxy.set_project_ids(None)
+            return
+
+        # Le filtre porte sur tous les projets trouvés, la limite ne concerne que la liste de résultats
+        self.project_proxy.set_project_ids(search_project_ids(text))
+        results = search(text)
+        if not results:
+            self.search_results.addItem('Aucun résultat')
+        for result in results:
+            item = QListWidgetItem()
+            item.setData(Qt.ItemDataRole.UserRole, result.projet_id)
+            label = QLabel(format_result_html(result))
+            label.setTextFormat(Qt.TextFormat.RichText)
+            label.setWordWrap(True)
+            item.setSizeHint(label.sizeHint())
+            self.search_results.addItem(item)
+            self.search_results.setItemWidget(item, label)
+        self.search_results.show()
+
+    def open_search_result(self, item):
+        projet_id = item.data(Qt.ItemDataRole.UserRole)
+        if projet_id is None:
+            return
+        from project_details_dialog import ProjectDetailsDialog
+        dialog = ProjectDetailsDialog(self, projet_id)
+        dialog.exec()
+        self.load_projects()
 
     def open_project_form(self):
         form = ProjectForm(self)
         if form.exec():
             self.load_projects()
 
+    def open_project_cleanup_dialog(self):
+        from project_cleanup_dialog import ProjectCleanupDialog
+        dialog = ProjectCleanupDialog(self)
+        dialog.exec()
+        self.load_projects()
+
     def open_theme_manager(self):
         dialog = ThemeManager(self)
         dialog.exec()
@@ -294,6 +292,11 @@ class MainWindow(QWidget):
         dialog = CIRDialog(self)
         dialog.exec()
 
+    def open_scenario_dialog(self):
+        from scenario_dialog import ScenarioDialog
+        dialog = ScenarioDialog(self)
+        dialog.exec()
+
     def open_project_manager_dialog(self):
         from project_manager_dialog import ProjectManagerDialog
         dialog = ProjectManagerDialog()
@@ -309,17 +312,18 @@ class MainWindow(QWidget):
         from bilan_jours_config_dialog import show_bilan_jours_config_dialog
         show_bilan_jours_config_dialog(self, None)
 
-    def show_project_details(self, row, column):
-        code = self.project_table.item(row, 0).text()
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM projets WHERE code=?', (code,))
-        res = cursor.fetchone()
-        conn.close()
-        if not res:
+    def open_dashboard(self):
+        from dashboard_dialog import DashboardDialog
+        dialog = DashboardDialog(self)
+        dialog.exec()
+        self.load_projects()
+
+    def show_project_details(self, index):
+        selected = self._project_at(index)
+        if not selected:
             QMessageBox.warning(self, 'Erreur', 'Projet introuvable.')
             return
-        projet_id = res[0]
+        projet_id = selected[0]
         # Correction : import ici
         from project_details_dialog import ProjectDetailsDialog
         dialog = ProjectDetailsDialog(self, projet_id)
@@ -327,6 +331,15 @@ class MainWindow(QWidget):
         # Rafraîchir la liste après fermeture du dialogue (au cas où des modifications auraient été faites)
         self.load_projects()
 
+    def open_developer_panel(self):
+        from developer_panel_dialog import DeveloperPanelDialog
+        if self.developer_panel is None:
+            self.developer_panel = DeveloperPanelDialog(self)
+        self.developer_panel.refresh_sql()
+        self.developer_panel.refresh_profiling()
+        self.developer_panel.show()
+        self.developer_panel.raise_()
+
     def open_import_export_dialog(self):
         from import_export_dialog import ImportExportDialog
         dialog = ImportExportDialog(self)
@@ -817,6 +830,7 @@ class ProjectForm(QDialog):
                                             WHERE projet_id=? AND nom=? AND montant=? AND date_achat=? AND duree=? 
                                             LIMIT 1''',
                                           (self.projet_id, nom, montant, date_achat, duree))
+                            refresh_amortissements(cursor, self.projet_id)
                             conn.commit()
                             conn.close()
                         except Exception as e:
@@ -863,6 +877,7 @@ class ProjectForm(QDialog):
                                       WHERE projet_id=? AND nom=? AND montant=? AND date_achat=? AND duree=?''',
                                   (new_nom, float(new_montant.replace(',', '.')), new_date_achat, int(new_duree),
                                    self.projet_id, old_nom, float(old_montant.replace(',', '.')), old_date_achat, int(old_duree)))
+                    refresh_amortissements(cursor, self.projet_id)
                     conn.commit()
                     conn.close()
                 except Exception as e:
@@ -975,6 +990,7 @@ class ProjectForm(QDialog):
                     cursor.execute('''INSERT INTO investissements (projet_id, nom, montant, date_achat, duree) 
                                       VALUES (?, ?, ?, ?, ?)''',
                                   (self.projet_id, nom, float(montant.replace(',', '.')), date_achat, int(duree)))
+                    refresh_amortissements(cursor, self.projet_id)
                     conn.commit()
                     conn.close()
                 except Exception as e:
@@ -1033,17 +1049,10 @@ class ProjectForm(QDialog):
             if not categorie_code:
                 continue
                 
-            # Récupérer le montant chargé pour cette catégorie et cette année
-            cursor.execute("""
-                SELECT montant_charge 
-                FROM categorie_cout 
-                WHERE categorie = ? AND annee = ?
-            """, (categorie_code, annee))
-            
-            cout_row = cursor.fetchone()
-            if cout_row and cout_row[0]:
-                montant_charge = float(cout_row[0])
-                cout_total_temps += jours * montant_charge
+            # Montant chargé pour cette catégorie et cette année
+            montant_charge = get_cost_rate(annee, categorie_code)
+            if montant_charge:
+                cout_total_temps += jours * float(montant_charge)
             else:
                 cout_total_temps += jours * 500  # 500€ par jour par défaut
         
@@ -1071,46 +1080,10 @@ class ProjectForm(QDialog):
         if autres_depenses_row and autres_depenses_row[0]:
             assiette_data['autres_achats'] = float(autres_depenses_row[0])
         
-        # 5. Calculer les dotations aux amortissements
-        cursor.execute("""
-            SELECT montant, date_achat, duree 
-            FROM investissements 
-            WHERE projet_id = ?
-        """, (self.projet_id,))
-        
-        amortissements_total = 0
-        
-        for montant, date_achat, duree in cursor.fetchall():
-            try:
-                # Convertir la date d'achat en datetime
-                achat_date = datetime.datetime.strptime(date_achat, '%m/%Y')
-                
-                # La dotation commence le mois suivant l'achat
-                debut_amort = achat_date.replace(day=1)
-                debut_amort = datetime.datetime(debut_amort.year, debut_amort.month, 1) + datetime.timedelta(days=32)
-                debut_amort = debut_amort.replace(day=1)
-                
-                # La fin de l'amortissement est soit la fin du projet, soit la fin de la période d'amortissement
-                fin_amort = achat_date.replace(day=1)
-                fin_amort = datetime.datetime(fin_amort.year + int(duree), fin_amort.month, 1)
-                
-                # Prendre la date la plus proche entre fin du projet et fin d'amortissement
-                fin_effective = min(fin_projet, fin_amort)
-                
-                # Si le début d'amortissement est après la fin du projet, pas d'amortissement
-                if debut_amort > fin_projet:
-                    continue
-                    
-                # Calculer le nombre de mois d'amortissement effectif
-                mois_amort = (fin_effective.year - debut_amort.year) * 12 + fin_effective.month - debut_amort.month + 1
-                
-                # Calculer la dotation mensuelle (montant / durée en mois)
-                dotation_mensuelle = float(montant) / (int(duree) * 12)
-                
-                # Ajouter au total des amortissements
-                amortissements_total += dotation_mensuelle * mois_amort
-            except Exception:
-                continue
+        # 5. Dotations aux amortissements de l'échéancier jusqu'à la fin du projet
+        amortissements_total = amortissements_between(
+            cursor, self.projet_id, None, fin_projet.year * 12 + fin_projet.month
+        )
         
         assiette_data['amortissements'] = amortissements_total
         
@@ -1383,6 +1356,8 @@ class ProjectForm(QDialog):
                 print(f"Erreur lors de la sauvegarde de l'investissement: {e}")
                 # Continue avec les autres investissements
                 continue
+
+        refresh_amortissements(cursor, projet_id)
         
         # Sauvegarde des données d'équipe
         cursor.execute('DELETE FROM equipe WHERE projet_id=?', (projet_id,))
@@ -1494,6 +1469,8 @@ class ProjectForm(QDialog):
             except Exception as e:
                 print(f"Erreur lors de la sauvegarde de l'investissement: {e}")
                 continue
+
+        refresh_amortissements(cursor, projet_id)
         
         # Sauvegarde des données d'équipe
         cursor.execute('DELETE FROM equipe WHERE projet_id=?', (projet_id,))
@@ -1526,7 +1503,16 @@ class ProjectForm(QDialog):
         if not self.projet_id:
             self.projet_id = projet_id
             
-        # Ouvrir le dialogue de budget
+        # Ouvrir le dialogue de budget (sauf projet archivé : le détail est dans l'archive)
+        from project_archive import is_archived
+        with get_connection() as conn:
+            archived = is_archived(conn.cursor(), projet_id)
+        if archived:
+            QMessageBox.information(self, 'Projet archivé',
+                                    'Le projet est enregistré, mais son budget est archivé sous forme de synthèse.\n'
+                                    'Restaurez-le depuis « Nettoyer les projets... » pour le modifier.')
+            self.load_project_data()
+            return
         from budget_edit_dialog import BudgetEditDialog
         budget_dialog = BudgetEditDialog(projet_id, self)
         budget_dialog.exec()
@@ -1940,8 +1926,21 @@ class DirectionManager(QDialog):
             self.load_directions()
 
 
+def _on_first_paint():
+    startup_timing.mark("Premier affichage de la fenêtre")
+    startup_timing.report()
+
+
 if __name__ == '__main__':
+    # Exécutable PyInstaller : les processus de l'import par lot relancent l'exécutable
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
+    startup_timing.mark("QApplication")
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
+    if startup_timing.is_enabled():
+        # Exécuté par la boucle d'événements une fois la fenêtre affichée
+        QTimer.singleShot(0, _on_first_paint)
+    exit_code = app.exec()
+    sql_trace.report()  # Écrit sql_trace.log si la trace SQL est active
+    sys.exit(exit_code)
@@ -0,0 +1,307 @@
+"""
+Import groupé de fichiers Excel modèles (voir generer_modele_excel), sans
+dépendance à l'interface.
+
+L'import se fait en deux étapes :
+- parse_modeles() lit les classeurs en parallèle dans des processus séparés
+  (openpyxl en lecture seule) : projet cible, lignes converties et erreurs
+  de conversion de chaque fichier ;
+- apply_modeles() écrit ensuite toutes les lignes valides dans une seule
+  transaction (BEGIN IMMEDIATE : un seul écrivain), par executemany.
+
+Le projet cible d'un classeur est identifié par son code : propriété
+« identifiant » du document, ligne « Projet : CODE - nom » de la feuille
+Instructions, ou à défaut nom de fichier Modele_CODE.xlsx proposé par
+BudgetEditDialog. Les lignes sont écrites comme dans ImportExcelModeleDialog,
+mais en mise à jour si elles existent déjà (réimport d'un modèle mensuel).
+Les dépenses externes n'ont qu'une ligne par mois en base : les lignes d'un
+même mois d'un même fichier sont cumulées (libellés joints). Les autres
+doublons (même membre et même mois, mois de dépenses déjà importé depuis
+un autre fichier, par exemple) sont signalés et seule la première ligne
+est écrite.
+"""
+
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from database import get_connection
+from project_archive import archived_project_ids
+import profiling
+
+SHEET_INSTRUCTIONS = "Instructions"
+SHEET_TEMPS = "Temps de Travail"
+SHEET_DEPENSES = "Dépenses Externes"
+SHEET_AUTRES = "Autres Dépenses"
+SHEET_RECETTES = "Recettes"
+# Libellé de la ligne d'identification du projet dans la feuille Instructions
+PROJET_LABEL = "Projet : "
+# Catégorie des dépenses externes importées (comme ImportExcelModeleDialog)
+DEPENSES_CATEGORIE = "Dépenses Externes"
+
+_DESCRIPTION = re.compile(r'Année|format|ex:', re.IGNORECASE)
+_NOM_FICHIER = re.compile(r'^Modele_(.+)\.xlsx$', re.IGNORECASE)
+
+
+class ParsedModele(NamedTuple):
+    path: str
+    projet_code: Optional[str]
+    # (annee, direction, categorie, membre_id, mois, jours)
+    temps: List[Tuple]
+    # (annee, mois, detail, montant, ligne_index) pour les trois feuilles de montants
+    depenses: List[Tuple]
+    autres: List[Tuple]
+    recettes: List[Tuple]
+    errors: List[str]
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.temps) + len(self.depenses) + len(self.autres) + len(self.recettes)
+
+
+class ImportReport(NamedTuple):
+    # nom de fichier -> nombre de lignes écrites en base (dépenses externes
+    # d'un même mois et d'un même fichier cumulées en une ligne)
+    imported: Dict[str, int]
+    # erreurs de lecture, d'identification, de conversion et doublons, préfixées du nom de fichier
+    errors: List[str]
+
+    @property
+    def line_count(self) -> int:
+        return sum(self.imported.values())
+
+
+def list_modeles(folder: str) -> List[str]:
+    """Classeurs .xlsx d'un dossier (hors fichiers temporaires d'Excel), triés par nom."""
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith('.xlsx') and not name.startswith('~$')
+    )
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def _number(value) -> float:
+    # Accepter point ou virgule comme séparateur décimal
+    return float(str(value).replace(',', '.'))
+
+
+def _data_rows(ws):
+    """(numéro de ligne Excel, {en-tête: valeur}) des lignes de données d'une feuille."""
+    rows = ws.iter_rows(values_only=True)
+    headers = [_text(value) for value in next(rows, ())]
+    for numero, values in enumerate(rows, start=2):
+        row = dict(zip(headers, values))
+        annee = row.get('Année')
+        # Lignes vides et ligne de description des colonnes ignorées
+        if annee is None or _text(annee) == '' or _DESCRIPTION.search(str(annee)):
+            continue
+        yield numero, row
+
+
+def _projet_code(wb, path) -> Optional[str]:
+    code = _text(wb.properties.identifier)
+    if code:
+        return code
+    if SHEET_INSTRUCTIONS in wb.sheetnames:
+        for (value,) in wb[SHEET_INSTRUCTIONS].iter_rows(min_row=1, max_row=5, max_col=1, values_only=True):
+            text = _text(value)
+            if text.startswith(PROJET_LABEL):
+                return text[len(PROJET_LABEL):].split(' - ', 1)[0].strip() or None
+    match = _NOM_FICHIER.match(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def parse_modele(path: str) -> ParsedModele:
+    """Lit un classeur modèle (exécuté dans un processus de parse_modeles)."""
+    from openpyxl import load_workbook
+
+    temps, depenses, autres, recettes, errors = [], [], [], [], []
+    try:
+        wb = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        return ParsedModele(path, None, temps, depenses, autres, recettes, [f"lecture impossible : {e}"])
+    try:
+        projet_code = _projet_code(wb, path)
+
+        if SHEET_TEMPS in wb.sheetnames:
+            for numero, row in _data_rows(wb[SHEET_TEMPS]):
+                try:
+                    temps.append((
+                        int(_number(row['Année'])), _text(row['Direction']), _text(row['Catégorie']),
+                        _text(row['Membre ID']), _text(row['Mois']), _number(row['Jours']),
+                    ))
+                except (KeyError, TypeError, ValueError) as e:
+                    errors.append(f"{SHEET_TEMPS}, ligne {numero} : {e}")
+
+        for sheet, lignes in ((SHEET_DEPENSES, depenses), (SHEET_AUTRES, autres), (SHEET_RECETTES, recettes)):
+            if sheet not in wb.sheetnames:
+                continue
+            for numero, row in _data_rows(wb[sheet]):
+                try:
+                    # ligne_index : position de la ligne, comme ImportExcelModeleDialog
+                    lignes.append((int(_number(row['Année'])), _text(row['Mois']), _text(row['Libellé']),
+                                   _number(row['Montant']), numero - 1))
+                except (KeyError, TypeError, ValueError) as e:
+                    errors.append(f"{sheet}, ligne {numero} : {e}")
+    finally:
+        wb.close()
+    return ParsedModele(path, projet_code, temps, depenses, autres, recettes, errors)
+
+
+@profiling.profiled("Import groupé (lecture)")
+def parse_modeles(paths: Sequence[str], max_workers: Optional[int] = None) -> List[ParsedModele]:
+    """Lit les classeurs en parallèle (un processus par cœur), dans l'ordre de `paths`."""
+    if len(paths) <= 1:
+        return [parse_modele(path) for path in paths]
+    workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_modele, paths))
+
+
+def resolve_projects(cursor, parsed: Sequence[ParsedModele]) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Projet cible de chaque fichier : (chemin -> projet_id, erreurs). Les codes
+    inconnus, ambigus ou de projets archivés sont signalés.
+    """
+    cursor.execute("SELECT id, code FROM projets")
+    ids_par_code: Dict[str, List[int]] = {}
+    for projet_id, code in cursor.fetchall():
+        ids_par_code.setdefault(_text(code).lower(), []).append(projet_id)
+    archives = set(archived_project_ids(cursor))
+
+    targets, errors = {}, []
+    for modele in parsed:
+        if not modele.projet_code:
+            errors.append(f"{modele.name} : projet non identifié (ni métadonnées, ni nom Modele_CODE.xlsx)")
+            continue
+        ids = ids_par_code.get(modele.projet_code.lower(), [])
+        if not ids:
+            errors.append(f"{modele.name} : projet « {modele.projet_code} » introuvable")
+        elif len(ids) > 1:
+            errors.append(f"{modele.name} : plusieurs projets ont le code « {modele.projet_code} »")
+        elif ids[0] in archives:
+            errors.append(f"{modele.name} : projet « {modele.projet_code} » archivé, restaurez-le avant l'import")
+        else:
+            targets[modele.path] = ids[0]
+    return targets, errors
+
+
+@profiling.profiled("Import groupé (écriture)")
+def apply_modeles(parsed: Sequence[ParsedModele]) -> ImportReport:
+    """
+    Écrit les lignes de tous les fichiers identifiés dans une seule transaction ;
+    en cas d'erreur SQLite rien n'est écrit et l'erreur est propagée.
+    """
+    errors = [f"{modele.name} : {error}" for modele in parsed for error in modele.errors]
+    imported = {}
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            targets, target_errors = resolve_projects(cursor, parsed)
+            errors[:0] = target_errors
+            # Lignes à écrire par clé primaire -> (valeurs, fichier d'origine)
+            temps, autres, recettes = {}, {}, {}
+            # Dépenses externes : une ligne par mois, les montants d'un même mois sont
+            # cumulés au sein d'un fichier ; un mois déjà importé depuis un autre
+            # fichier est signalé et ignoré, comme pour les autres feuilles
+            depenses = {}
+            for modele in parsed:
+                projet_id = targets.get(modele.path)
+                if projet_id is None:
+                    continue
+                imported[modele.name] = 0
+                for annee, direction, categorie, membre_id, mois, jours in modele.temps:
+                    key = (projet_id, annee, membre_id, mois)
+                    if key in temps:
+                        errors.append(f"{modele.name} : {SHEET_TEMPS} : {membre_id} {mois} {annee} en double, "
+                                      f"seule la première ligne est importée")
+                    else:
+                        temps[key] = ((projet_id, annee, direction, categorie, membre_id, mois, jours), modele.name)
+                for annee, mois, detail, montant, _ in modele.depenses:
+                    key = (projet_id, annee, mois)
+                    if key in depenses and depenses[key][2] != modele.name:
+                        errors.append(f"{modele.name} : {SHEET_DEPENSES} : {mois} {annee} déjà importé "
+                                      f"depuis {depenses[key][2]}")
+                    elif key in depenses:
+                        depenses[key][0] += montant
+                        if detail:
+                            depenses[key][1].append(detail)
+                    else:
+                        depenses[key] = [montant, [detail] if detail else [], modele.name]
+                for sheet, lignes, rows in ((SHEET_AUTRES, modele.autres, autres),
+                                            (SHEET_RECETTES, modele.recettes, recettes)):
+                    for annee, mois, detail, montant, ligne_index in lignes:
+                        key = (projet_id, annee, ligne_index, mois)
+                        if key in rows:
+                            errors.append(f"{modele.name} : {sheet}, ligne {ligne_index + 1} déjà importée "
+                                          f"depuis {rows[key][1]}")
+                        else:
+                            rows[key] = ((projet_id, annee, ligne_index, mois, montant, detail), modele.name)
+
+            depenses = {
+                key: ((key[0], key[1], DEPENSES_CATEGORIE, key[2], montant, " ; ".join(details)), name)
+                for key, (montant, details, name) in depenses.items()
+            }
+            # Lignes réellement écrites par fichier
+            for rows in (temps, depenses, autres, recettes):
+                for _, name in rows.values():
+                    imported[name] += 1
+            temps, depenses, autres, recettes = (
+                [values for values, _ in rows.values()] for rows in (temps, depenses, autres, recettes)
+            )
+
+            cursor.executemany("""
+                INSERT INTO temps_travail (projet_id, annee, direction, categorie, membre_id, mois, jours)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (projet_id, annee, membre_id, mois)
+                DO UPDATE SET direction = excluded.direction, categorie = excluded.categorie, jours = excluded.jours
+            """, temps)
+            cursor.executemany("""
+                INSERT INTO depenses (projet_id, annee, categorie, mois, montant, detail)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (projet_id, annee, categorie, mois)
+                DO UPDATE SET montant = excluded.montant, detail = excluded.detail
+            """, depenses)
+            for table, rows in (("autres_depenses", autres), ("recettes", recettes)):
+                cursor.executemany(f"""
+                    INSERT INTO {table} (projet_id, annee, ligne_index, mois, montant, detail)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (projet_id, annee, ligne_index, mois)
+                    DO UPDATE SET montant = excluded.montant, detail = excluded.detail
+                """, rows)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+    return ImportReport(imported, errors)
+
+
+def import_folder(folder: str) -> ImportReport:
+    """Importe tous les modèles d'un dossier : lecture parallèle puis écriture en une transaction."""
+    return apply_modeles(parse_modeles(list_modeles(folder)))
+
+
+__all__ = [
+    "ImportReport",
+    "PROJET_LABEL",
+    "ParsedModele",
+    "apply_modeles",
+    "import_folder",
+    "list_modeles",
+    "parse_modele",
+    "parse_modeles",
+    "resolve_projects",
+]
@@ -0,0 +1,31 @@
+from typing import Dict, Optional, Tuple
+
+# Noms des mois tels qu'ils sont stockés dans les colonnes texte `mois`
+MOIS_FR: Tuple[str, ...] = (
+    "Janvier", "Février", "Mars", "Avril", "Mai", "Juin",
+    "Juillet", "Août", "Septembre", "Octobre", "Novembre", "Décembre",
+)
+
+# Nom de mois (en minuscules, avec ou sans accents) -> numéro 1-12
+MONTH_NUMBERS: Dict[str, int] = {nom.lower(): i for i, nom in enumerate(MOIS_FR, start=1)}
+MONTH_NUMBERS.update({"fevrier": 2, "aout": 8, "decembre": 12})
+
+
+def month_name(month: int) -> str:
+    """Nom français d'un mois numéroté de 1 à 12."""
+    return MOIS_FR[month - 1]
+
+
+def month_key(year: int, month: int) -> int:
+    """Clé de période entière (annee * 12 + mois), comme la colonne `periode` en base."""
+    return int(year) * 12 + int(month)
+
+
+def month_number(name: Optional[str]) -> Optional[int]:
+    """Numéro (1-12) d'un nom de mois français, ou None s'il est inconnu."""
+    if not name:
+        return None
+    return MONTH_NUMBERS.get(name.strip().lower())
+
+
+__all__ = ["MOIS_FR", "MONTH_NUMBERS", "month_key", "month_name", "month_number"]
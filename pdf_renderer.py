@@ -0,0 +1,364 @@
+"""
+Rendu PDF direct des rapports : textes, tableaux et images sont dessinés
+avec QPainter sur un QPdfWriter (export) ou un QPrinter (impression,
+aperçu), sans passer par du HTML et QTextDocument.
+
+Les tableaux de rapports sont lus dans un modèle Qt (texte et style par
+rôles, voir CompteResultatTableModel et BilanJoursTableModel). Quand les
+colonnes ne tiennent pas sur la largeur de la page, elles sont réparties sur
+plusieurs pages, la première colonne (libellés) étant répétée sur chacune ;
+l'en-tête du tableau est répété en haut de chaque page.
+"""
+
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+
+from PyQt6.QtCore import QLineF, QMarginsF, QRectF, Qt
+from PyQt6.QtGui import (QColor, QFont, QFontMetricsF, QImage, QPageLayout, QPageSize, QPainter,
+                         QPdfWriter, QPen)
+
+FONT_FAMILY = "Arial"
+BORDER_COLOR = "#bdc3c7"
+PDF_RESOLUTION = 300
+PAGE_MARGIN_MM = 15
+# Dimensions en points (1/72 de pouce)
+CELL_PADDING = 4
+MAX_LABEL_WIDTH = 220
+MAX_COLUMN_WIDTH = 120
+LOGO_MAX_SIZE = (200, 80)
+FOOTER_HEIGHT = 18
+
+LOGO_POSITIONS = {
+    'Haut gauche': Qt.AlignmentFlag.AlignLeft,
+    'Haut droite': Qt.AlignmentFlag.AlignRight,
+    'Haut centre': Qt.AlignmentFlag.AlignHCenter,
+}
+
+
+def _flags(alignment, wrap=False):
+    """Drapeaux entiers de QPainter.drawText (alignement et retour à la ligne)."""
+    value = getattr(alignment, 'value', alignment)
+    if wrap:
+        value |= Qt.TextFlag.TextWordWrap.value
+    return value
+
+
+@lru_cache(maxsize=8)
+def _scaled_image(path, mtime, width, height):
+    image = QImage(path)
+    if image.isNull():
+        return image
+    return image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                        Qt.TransformationMode.SmoothTransformation)
+
+
+def scaled_logo(path, width, height):
+    """
+    Logo chargé et redimensionné (en pixels du périphérique), ou None.
+    Le résultat est mis en cache tant que le fichier n'est pas modifié.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    image = _scaled_image(path, os.path.getmtime(path), int(width), int(height))
+    return None if image.isNull() else image
+
+
+class PdfPainter:
+    """
+    Mise en page séquentielle, de haut en bas, sur un périphérique paginé
+    (QPdfWriter ou QPrinter). Les positions sont en pixels du périphérique ;
+    les tailles passées aux méthodes sont en points.
+    """
+
+    def __init__(self, device, footer=""):
+        self.device = device
+        self.footer = footer
+        self.painter = QPainter()
+        self.pt = device.logicalDpiY() / 72
+        self.width = device.width()
+        self.height = device.height() - FOOTER_HEIGHT * self.pt
+        self.page = 1
+        self.y = 0.0
+
+    def begin(self):
+        if not self.painter.begin(self.device):
+            raise OSError("Impossible d'ouvrir le document pour l'écriture")
+
+    def end(self):
+        self._draw_footer()
+        self.painter.end()
+
+    def font(self, size=9, bold=False, italic=False):
+        font = QFont(FONT_FAMILY)
+        font.setPointSizeF(size)
+        font.setBold(bold)
+        font.setItalic(italic)
+        return font
+
+    def metrics(self, font):
+        return QFontMetricsF(font, self.device)
+
+    # Pagination
+
+    def _draw_footer(self):
+        self.painter.setFont(self.font(8))
+        self.painter.setPen(QColor("#7f8c8d"))
+        rect = QRectF(0, self.height, self.width, FOOTER_HEIGHT * self.pt)
+        if self.footer:
+            self.painter.drawText(rect, _flags(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom),
+                                  self.footer)
+        self.painter.drawText(rect, _flags(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom),
+                              f"Page {self.page}")
+
+    def new_page(self):
+        self._draw_footer()
+        self.device.newPage()
+        self.page += 1
+        self.y = 0.0
+
+    def ensure_space(self, height):
+        """Passe à la page suivante si `height` pixels ne tiennent plus sur la page."""
+        if self.y > 0 and self.y + height > self.height:
+            self.new_page()
+
+    def space(self, points):
+        self.y += points * self.pt
+
+    # Blocs
+
+    def text(self, text, size=9, bold=False, italic=False, color="#000000",
+             alignment=Qt.AlignmentFlag.AlignLeft):
+        """Paragraphe sur toute la largeur, avec retour à la ligne."""
+        font = self.font(size, bold, italic)
+        flags = _flags(alignment, wrap=True)
+        height = self.metrics(font).boundingRect(QRectF(0, 0, self.width, 1e6), flags, text).height()
+        self.ensure_space(height)
+        self.painter.setFont(font)
+        self.painter.setPen(QColor(color))
+        self.painter.drawText(QRectF(0, self.y, self.width, height), flags, text)
+        self.y += height
+
+    def rule(self, color="#333333", thickness=1.0):
+        """Trait horizontal sur toute la largeur."""
+        pen = QPen(QColor(color))
+        pen.setWidthF(thickness * self.pt)
+        self.painter.setPen(pen)
+        self.painter.drawLine(QLineF(0, self.y, self.width, self.y))
+        self.y += thickness * self.pt
+
+    def logo(self, path, position='Haut gauche'):
+        """Logo des paramètres d'export (ignoré s'il ne peut pas être chargé)."""
+        image = scaled_logo(path, LOGO_MAX_SIZE[0] * self.pt, LOGO_MAX_SIZE[1] * self.pt)
+        if image is None:
+            return
+        alignment = LOGO_POSITIONS.get(position, Qt.AlignmentFlag.AlignLeft)
+        if alignment == Qt.AlignmentFlag.AlignRight:
+            x = self.width - image.width()
+        elif alignment == Qt.AlignmentFlag.AlignHCenter:
+            x = (self.width - image.width()) / 2
+        else:
+            x = 0
+        self.ensure_space(image.height())
+        self.painter.drawImage(QRectF(x, self.y, image.width(), image.height()), image)
+        self.y += image.height() + 10 * self.pt
+
+    def images(self, items, max_width=300, max_height=200):
+        """Images (légende, QImage) côte à côte, passant à la ligne au besoin."""
+        caption_font = self.font(9, bold=True)
+        caption_height = self.metrics(caption_font).height()
+        gap = 10 * self.pt
+        x = 0.0
+        line_height = 0.0
+        for caption, image in items:
+            if image.isNull():
+                continue
+            image = image.scaled(int(max_width * self.pt), int(max_height * self.pt),
+                                 Qt.AspectRatioMode.KeepAspectRatio,
+                                 Qt.TransformationMode.SmoothTransformation)
+            block_width = max(image.width(), self.metrics(caption_font).horizontalAdvance(caption))
+            block_width = min(block_width, self.width)
+            block_height = caption_height + image.height()
+            if x > 0 and x + block_width > self.width:
+                self.y += line_height + gap
+                x = 0.0
+                line_height = 0.0
+            if x == 0:
+                self.ensure_space(block_height)
+            self.painter.setFont(caption_font)
+            self.painter.setPen(QColor("#000000"))
+            self.painter.drawText(QRectF(x, self.y, block_width, caption_height),
+                                  _flags(Qt.AlignmentFlag.AlignLeft), caption)
+            self.painter.drawImage(QRectF(x, self.y + caption_height, image.width(), image.height()), image)
+            x += block_width + gap
+            line_height = max(line_height, block_height)
+        self.y += line_height
+
+    def _cell(self, rect, text, font, flags, background=None, foreground=None):
+        if background is not None:
+            self.painter.fillRect(rect, background)
+        pen = QPen(QColor(BORDER_COLOR))
+        pen.setWidthF(0.5 * self.pt)
+        self.painter.setPen(pen)
+        self.painter.drawRect(rect)
+        if text:
+            padding = CELL_PADDING * self.pt
+            self.painter.setFont(font)
+            self.painter.setPen(foreground if foreground is not None else QColor("#000000"))
+            self.painter.drawText(rect.adjusted(padding, 0, -padding, 0), flags, text)
+
+    def table(self, headers, rows, widths=None, header_background="#f2f2f2", header_color="#000000",
+              alignments=None):
+        """
+        Tableau de textes sur toute la largeur (ou selon `widths`, fractions
+        de la largeur), cellules avec retour à la ligne. L'en-tête est répété
+        après chaque saut de page.
+        """
+        rows = [[str(cell) if cell is not None else "" for cell in cells] for cells in rows]
+        widths = widths or [1 / len(headers)] * len(headers)
+        widths = [fraction * self.width for fraction in widths]
+        alignments = alignments or [Qt.AlignmentFlag.AlignLeft] * len(headers)
+        font = self.font(9)
+        header_font = self.font(9, bold=True)
+        padding = CELL_PADDING * self.pt
+
+        def row_height(cells, cell_font):
+            metrics = self.metrics(cell_font)
+            height = metrics.height()
+            for text, width, alignment in zip(cells, widths, alignments):
+                rect = QRectF(0, 0, width - 2 * padding, 1e6)
+                height = max(height, metrics.boundingRect(rect, _flags(alignment, wrap=True), text).height())
+            return height + 2 * padding
+
+        def draw_row(cells, cell_font, height, background=None, foreground=None):
+            x = 0.0
+            for text, width, alignment in zip(cells, widths, alignments):
+                flags = _flags(alignment | Qt.AlignmentFlag.AlignVCenter, wrap=True)
+                self._cell(QRectF(x, self.y, width, height), text, cell_font, flags, background, foreground)
+                x += width
+            self.y += height
+
+        header_height = row_height(headers, header_font)
+        header_args = (header_font, header_height, QColor(header_background), QColor(header_color))
+        self.ensure_space(header_height + row_height(rows[0], font) if rows else header_height)
+        draw_row(headers, *header_args)
+        for cells in rows:
+            height = row_height(cells, font)
+            if self.y + height > self.height:
+                self.new_page()
+                draw_row(headers, *header_args)
+            draw_row(cells, font, height)
+
+    def model_table(self, model, header_background, header_color="#ffffff", size=8):
+        """
+        Tableau lu dans un modèle Qt : texte (DisplayRole), gras (FontRole),
+        couleurs (BackgroundRole, ForegroundRole) et alignement
+        (TextAlignmentRole). Les colonnes qui dépassent la largeur de la page
+        sont reportées sur les pages suivantes, avec la colonne des libellés.
+        """
+        row_count, column_count = model.rowCount(), model.columnCount()
+        if column_count == 0:
+            return
+        font = self.font(size)
+        bold_font = self.font(size, bold=True)
+        cell_metrics = {False: self.metrics(font), True: self.metrics(bold_font)}
+        bold_metrics = cell_metrics[True]
+        padding = CELL_PADDING * self.pt
+        display = Qt.ItemDataRole.DisplayRole
+
+        headers = [str(model.headerData(col, Qt.Orientation.Horizontal, display) or "")
+                   for col in range(column_count)]
+        cells = [[model.data(model.index(row, col), display) or "" for col in range(column_count)]
+                 for row in range(row_count)]
+
+        # Largeur de chaque colonne : texte le plus large (mesuré en gras), plafonnée
+        widths = []
+        for col in range(column_count):
+            width = max(bold_metrics.horizontalAdvance(line) for line in headers[col].split("\n"))
+            for row in range(row_count):
+                if cells[row][col]:
+                    width = max(width, bold_metrics.horizontalAdvance(str(cells[row][col])))
+            limit = MAX_LABEL_WIDTH if col == 0 else MAX_COLUMN_WIDTH
+            widths.append(min(width + 2 * padding, limit * self.pt))
+
+        # Répartition des colonnes de valeurs en bandes tenant sur la largeur
+        bands = []
+        band = []
+        used = widths[0]
+        for col in range(1, column_count):
+            if band and used + widths[col] > self.width:
+                bands.append(band)
+                band = []
+                used = widths[0]
+            band.append(col)
+            used += widths[col]
+        bands.append(band)
+
+        row_height = bold_metrics.height() + 2 * padding
+        header_lines = max(header.count("\n") + 1 for header in headers)
+        header_height = header_lines * bold_metrics.height() + 2 * padding
+        header_flags = _flags(Qt.AlignmentFlag.AlignCenter)
+        header_background = QColor(header_background)
+        header_color = QColor(header_color)
+
+        def draw_header(columns):
+            x = 0.0
+            for col in columns:
+                self._cell(QRectF(x, self.y, widths[col], header_height), headers[col], bold_font,
+                           header_flags, header_background, header_color)
+                x += widths[col]
+            self.y += header_height
+
+        for band_index, band in enumerate(bands):
+            columns = [0] + band
+            if band_index > 0:
+                self.new_page()
+            self.ensure_space(header_height + row_height)
+            draw_header(columns)
+            for row in range(row_count):
+                if self.y + row_height > self.height:
+                    self.new_page()
+                    draw_header(columns)
+                x = 0.0
+                for col in columns:
+                    index = model.index(row, col)
+                    role_font = model.data(index, Qt.ItemDataRole.FontRole)
+                    bold = role_font is not None and role_font.bold()
+                    cell_font = bold_font if bold else font
+                    alignment = model.data(index, Qt.ItemDataRole.TextAlignmentRole)
+                    if alignment is None:
+                        alignment = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+                    text = str(cells[row][col])
+                    text_width = widths[col] - 2 * padding
+                    if cell_metrics[bold].horizontalAdvance(text) > text_width:
+                        text = cell_metrics[bold].elidedText(text, Qt.TextElideMode.ElideRight, text_width)
+                    self._cell(QRectF(x, self.y, widths[col], row_height), text, cell_font, _flags(alignment),
+                               model.data(index, Qt.ItemDataRole.BackgroundRole),
+                               model.data(index, Qt.ItemDataRole.ForegroundRole))
+                    x += widths[col]
+                self.y += row_height
+
+
+@contextmanager
+def paged_document(device, footer=""):
+    """Dessine sur un périphérique paginé déjà configuré (QPrinter de l'impression ou de l'aperçu)."""
+    pdf = PdfPainter(device, footer)
+    pdf.begin()
+    try:
+        yield pdf
+    finally:
+        pdf.end()
+
+
+@contextmanager
+def pdf_document(file_path, orientation=QPageLayout.Orientation.Landscape, footer=""):
+    """Document PDF A4 écrit dans `file_path`."""
+    writer = QPdfWriter(file_path)
+    writer.setResolution(PDF_RESOLUTION)
+    writer.setPageLayout(QPageLayout(
+        QPageSize(QPageSize.PageSizeId.A4), orientation,
+        QMarginsF(PAGE_MARGIN_MM, PAGE_MARGIN_MM, PAGE_MARGIN_MM, PAGE_MARGIN_MM),
+        QPageLayout.Unit.Millimeter,
+    ))
+    with paged_document(writer, footer) as pdf:
+        yield pdf
@@ -0,0 +1,210 @@
+import datetime
+import sqlite3
+from typing import Dict, List, NamedTuple, Optional
+
+from category_utils import get_cost_rate
+from cir_calculation import calculate_cir_breakdown
+from database import GLOBAL_VERSION_ID, get_connection
+from month_utils import month_key, month_number
+import profiling
+
+# Taux journalier utilisé pour valoriser le temps de travail (comme
+# l'assiette des subventions dans database._calculate_project_data)
+COST_TYPE = "cout_production"
+
+# Colonnes d'indicateurs de synthese_projets, dans l'ordre de ProjectSummary
+KPI_COLUMNS = (
+    "temps_travail", "depenses_externes", "autres_achats", "amortissements",
+    "recettes", "subventions", "cir", "couts_a_date", "recettes_a_date",
+)
+
+
+class ProjectSummary(NamedTuple):
+    projet_id: int
+    code: str
+    nom: str
+    chef: str
+    etat: str
+    temps_travail: float
+    depenses_externes: float
+    autres_achats: float
+    amortissements: float
+    recettes: float
+    subventions: float
+    cir: float
+    couts_a_date: float
+    recettes_a_date: float
+
+    @property
+    def budget(self) -> float:
+        """Coût total prévu : temps de travail, achats et dotations."""
+        return self.temps_travail + self.depenses_externes + self.autres_achats + self.amortissements
+
+    @property
+    def financement(self) -> float:
+        """Recettes, subventions et CIR."""
+        return self.recettes + self.subventions + self.cir
+
+    @property
+    def resultat(self) -> float:
+        return self.financement - self.budget
+
+
+def current_period() -> int:
+    today = datetime.date.today()
+    return month_key(today.year, today.month)
+
+
+def _sum_by_month(cursor: sqlite3.Cursor, table: str, projet_id: int, periode: int):
+    """Total et total jusqu'à `periode` incluse d'une table budgétaire (annee, mois, montant)."""
+    cursor.execute(
+        f"SELECT annee, mois, SUM(montant) FROM {table} WHERE projet_id = ? GROUP BY annee, mois",
+        (projet_id,),
+    )
+    total = a_date = 0.0
+    for annee, mois, montant in cursor.fetchall():
+        montant = float(montant or 0)
+        total += montant
+        numero = month_number(mois)
+        if annee is not None and numero is not None and month_key(annee, numero) <= periode:
+            a_date += montant
+    return total, a_date
+
+
+def compute_project_kpis(cursor: sqlite3.Cursor, projet_id: int, periode: int) -> Dict[str, float]:
+    """
+    Indicateurs d'un projet sur toute sa durée, et coûts/recettes jusqu'à
+    `periode` (annee * 12 + mois) incluse.
+    """
+    cursor.execute(
+        """SELECT annee, categorie, SUM(jours), SUM(CASE WHEN periode <= ? THEN jours END)
+           FROM temps_travail WHERE projet_id = ?
+           GROUP BY annee, categorie""",
+        (periode, projet_id),
+    )
+    temps_travail = temps_a_date = 0.0
+    for annee, categorie, jours, jours_a_date in cursor.fetchall():
+        taux = get_cost_rate(annee, categorie, COST_TYPE) or 0
+        temps_travail += (jours or 0) * taux
+        temps_a_date += (jours_a_date or 0) * taux
+
+    depenses, depenses_a_date = _sum_by_month(cursor, "depenses", projet_id, periode)
+    autres, autres_a_date = _sum_by_month(cursor, "autres_depenses", projet_id, periode)
+    recettes, recettes_a_date = _sum_by_month(cursor, "recettes", projet_id, periode)
+
+    cursor.execute(
+        """SELECT COALESCE(SUM(montant), 0), COALESCE(SUM(CASE WHEN periode <= ? THEN montant END), 0)
+           FROM amortissements WHERE projet_id = ?""",
+        (periode, projet_id),
+    )
+    amortissements, amortissements_a_date = cursor.fetchone()
+
+    # Subventions et CIR du compte de résultat annuel du projet (cir_calculation),
+    # et non lus dans subventions.montant_estime_total qui n'est mis à jour
+    # qu'à l'enregistrement d'une subvention
+    subventions = cir = 0.0
+    breakdown = calculate_cir_breakdown(cursor, projet_id)
+    if breakdown:
+        subventions = sum(breakdown['subventions_annuelles'])
+        cursor.execute("SELECT cir FROM projets WHERE id = ?", (projet_id,))
+        row = cursor.fetchone()
+        if row and row[0] == 1:
+            cir = breakdown['cir_total']
+
+    return {
+        "temps_travail": temps_travail,
+        "depenses_externes": depenses,
+        "autres_achats": autres,
+        "amortissements": float(amortissements),
+        "recettes": recettes,
+        "subventions": float(subventions),
+        "cir": float(cir),
+        "couts_a_date": temps_a_date + depenses_a_date + autres_a_date + float(amortissements_a_date),
+        "recettes_a_date": recettes_a_date,
+    }
+
+
+@profiling.profiled("Synthèse des projets")
+def refresh_summaries(cursor: sqlite3.Cursor, periode: Optional[int] = None) -> int:
+    """
+    Recalcule la synthèse des projets dont la version de données, la version
+    globale ou le mois de calcul ont changé depuis le dernier calcul.
+    Retourne le nombre de projets recalculés.
+    """
+    periode = current_period() if periode is None else periode
+    cursor.execute("SELECT version FROM projet_versions WHERE projet_id = ?", (GLOBAL_VERSION_ID,))
+    row = cursor.fetchone()
+    version_globale = row[0] if row else 0
+
+    cursor.execute(
+        """SELECT p.id, COALESCE(v.version, 0)
+           FROM projets p
+           LEFT JOIN projet_versions v ON v.projet_id = p.id
+           LEFT JOIN synthese_projets s ON s.projet_id = p.id
+           WHERE s.projet_id IS NULL
+              OR s.version != COALESCE(v.version, 0)
+              OR s.version_globale != ?
+              OR s.periode_calcul != ?""",
+        (version_globale, periode),
+    )
+    stale = cursor.fetchall()
+
+    colonnes = ", ".join(KPI_COLUMNS)
+    marqueurs = ", ".join("?" for _ in KPI_COLUMNS)
+    for projet_id, version in stale:
+        kpis = compute_project_kpis(cursor, projet_id, periode)
+        cursor.execute(
+            f"""INSERT OR REPLACE INTO synthese_projets
+                (projet_id, version, version_globale, periode_calcul, {colonnes})
+                VALUES (?, ?, ?, ?, {marqueurs})""",
+            (projet_id, version, version_globale, periode, *(kpis[c] for c in KPI_COLUMNS)),
+        )
+    return len(stale)
+
+
+def load_summaries(refresh: bool = True) -> List[ProjectSummary]:
+    """
+    Synthèse de tous les projets, mise à jour au préalable pour les seuls
+    projets modifiés si `refresh` est vrai.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if refresh and refresh_summaries(cursor):
+            conn.commit()
+        colonnes = ", ".join(f"COALESCE(s.{c}, 0)" for c in KPI_COLUMNS)
+        cursor.execute(f"""
+            SELECT p.id, p.code, p.nom, c.nom || ' ' || c.prenom, p.etat, {colonnes}
+            FROM projets p
+            LEFT JOIN chefs_projet c ON p.chef = c.id
+            LEFT JOIN synthese_projets s ON s.projet_id = p.id
+            ORDER BY p.id DESC
+        """)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return [
+        ProjectSummary(pid, str(code), str(nom), str(chef) if chef else "Non assigné", etat or "",
+                       *(float(v) for v in valeurs))
+        for pid, code, nom, chef, etat, *valeurs in rows
+    ]
+
+
+def portfolio_totals(summaries: List[ProjectSummary]) -> Dict[str, float]:
+    """Totaux du portefeuille : indicateurs stockés et dérivés (budget, financement, résultat)."""
+    totals = {c: sum(getattr(s, c) for s in summaries) for c in KPI_COLUMNS}
+    for name in ("budget", "financement", "resultat"):
+        totals[name] = sum(getattr(s, name) for s in summaries)
+    return totals
+
+
+__all__ = [
+    "COST_TYPE",
+    "KPI_COLUMNS",
+    "ProjectSummary",
+    "compute_project_kpis",
+    "current_period",
+    "load_summaries",
+    "portfolio_totals",
+    "refresh_summaries",
+]
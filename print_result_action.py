@@ -1,9 +1,57 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
                             QComboBox, QGroupBox, QListWidget, QListWidgetItem,
-                            QRadioButton, QButtonGroup, QMessageBox)
+                            QRadioButton, QButtonGroup, QMessageBox, QFileDialog, QApplication)
 from PyQt6.QtCore import Qt
 
 from database import get_connection
+from project_period_index import ProjectPeriodIndex
+
+COST_TYPE_NAMES = {
+    'montant_charge': 'Montant chargé',
+    'cout_production': 'Coût de production',
+    'cout_complet': 'Coût complet',
+}
+# Longueur maximale d'un nom de feuille Excel
+SHEET_TITLE_MAX = 31
+
+
+def _pack_selection_info(pack_report, granularity, cost_type):
+    """Texte d'information d'un rapport du pack (même forme que CompteResultatDisplay.get_selection_info)"""
+    from report_pack import CONSOLIDATED_LABEL
+    if pack_report.label == CONSOLIDATED_LABEL:
+        lines = [f"Projets: {len(pack_report.project_ids)} (consolidé)"]
+    else:
+        lines = [f"Projet: {pack_report.label}"]
+    years = pack_report.years
+    lines.append(f"Année: {years[0]}" if len(years) == 1 else f"Période: {years[0]} - {years[-1]}")
+    lines.append(f"Granularité: {'Mensuel' if granularity == 'monthly' else 'Annuel'}")
+    lines.append(f"Type de coût: {COST_TYPE_NAMES.get(cost_type, cost_type)}")
+    return " | ".join(lines)
+
+
+def _sheet_title(label, used):
+    """Nom de feuille Excel valide (31 caractères, sans []:*?/\\) et unique dans le classeur"""
+    base = re.sub(r'[\[\]:*?/\\]', '_', label).strip("' ")[:SHEET_TITLE_MAX] or "Projet"
+    title, index = base, 2
+    while title.lower() in used:
+        suffix = f" ({index})"
+        title = base[:SHEET_TITLE_MAX - len(suffix)] + suffix
+        index += 1
+    used.add(title.lower())
+    return title
+
+
+def _pack_file_part(pack_report):
+    """Partie du nom de fichier propre à un rapport du pack (code projet ou 'consolide')"""
+    from report_pack import CONSOLIDATED_LABEL
+    if pack_report.label == CONSOLIDATED_LABEL:
+        return "consolide"
+    code = pack_report.label.split(" - ", 1)[0]
+    return re.sub(r'[^\w\-_]', '', code) or f"PROJ{pack_report.project_ids[0]}"
 
 class PrintConfigDialog(QDialog):
     def __init__(self, parent, projet_id=None):
@@ -144,11 +192,17 @@ class PrintConfigDialog(QDialog):
         generate_btn.clicked.connect(self.generate_compte_resultat)
         generate_btn.setStyleSheet("QPushButton { background-color: #4CAF50; color: white; font-weight: bold; padding: 10px; }")
 
+        pack_btn = QPushButton("Pack de rapports...")
+        pack_btn.setToolTip("Un compte de résultat par projet et le compte consolidé, "
+                            "dans un classeur Excel ou un dossier de PDF")
+        pack_btn.clicked.connect(self.generate_report_pack)
+
         cancel_btn = QPushButton("Annuler")
         cancel_btn.clicked.connect(self.reject)
 
         buttons_layout.addStretch()
         buttons_layout.addWidget(generate_btn)
+        buttons_layout.addWidget(pack_btn)
         buttons_layout.addWidget(cancel_btn)
 
         layout.addLayout(buttons_layout)
@@ -160,6 +214,9 @@ class PrintConfigDialog(QDialog):
 
     def load_projects(self):
         """Charge les projets depuis la base de données"""
+        # Index des périodes des projets : les années proposées sont calculées sans requête SQL
+        self.period_index = ProjectPeriodIndex()
+
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT id, code, nom FROM projets ORDER BY code")
@@ -226,509 +283,131 @@ class PrintConfigDialog(QDialog):
             elif self.period_type.currentIndex() == 1:  # Plusieurs années
                 self.update_years_for_single_project_multiple_years()
 
-    def update_years_for_single_project_multiple_years(self):
-        """Met à jour la liste des années cochables pour un projet spécifique en mode 'plusieurs années'."""
-        project_id = self.project_combo.currentData()
-        if not project_id:
-            QMessageBox.warning(self, "Erreur", "Aucun projet sélectionné.")
-            self.years_list_widget.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id = ?", (project_id,))
-            result = cursor.fetchone()
-            if not result:
-                QMessageBox.warning(self, "Erreur", "Impossible de récupérer les dates pour le projet sélectionné.")
-                self.years_list_widget.clear()
-                return
-
-            date_debut, date_fin = result
-            if not date_debut or not date_fin:
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont manquantes pour ce projet.")
-                self.years_list_widget.clear()
-                return
-
-            # Extraire les années à partir des dates au format MM/AAAA
-            try:
-                debut_annee = int(date_debut.split("/")[1])
-                fin_annee = int(date_fin.split("/")[1])
-            except (IndexError, ValueError):
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont mal formatées (attendu: MM/AAAA).")
-                self.years_list_widget.clear()
-                return
-
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in range(debut_annee, fin_annee + 1):
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-
-        finally:
-            conn.close()
-
-    def update_years_for_all_projects(self):
-        """Met à jour la liste déroulante des années avec toutes les années où il y a au moins un projet."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE date_debut IS NOT NULL AND date_fin IS NOT NULL")
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
+    def _checked_data(self, list_widget):
+        """Retourne les données (UserRole) des éléments cochés d'une liste"""
+        checked = []
+        for i in range(list_widget.count()):
+            item = list_widget.item(i)
+            if item.checkState() == Qt.CheckState.Checked:
+                checked.append(item.data(Qt.ItemDataRole.UserRole))
+        return checked
 
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    # Extraire les années à partir des dates au format MM/AAAA
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    # Ajouter toutes les années entre début et fin (incluses)
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    # Si la conversion échoue, on ignore cette entrée
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets.")
-                self.year_combo.clear()
-                return
+    def _show_years(self, years, multiple, warning=None):
+        """Remplit la liste déroulante (année spécifique) ou la liste cochable (plusieurs années).
 
-            # Remplir la liste déroulante des années
+        Si aucune année n'est disponible, la liste est vidée et l'avertissement
+        éventuel (titre, message) est affiché.
+        """
+        if multiple:
+            self.years_list_widget.clear()
+        else:
             self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
-
-        finally:
-            conn.close()
-
-    def update_years_for_all_projects_multiple(self):
-        """Met à jour la liste des années cochables avec toutes les années où il y a au moins un projet."""
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE date_debut IS NOT NULL AND date_fin IS NOT NULL")
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec des dates valides n'a été trouvé.")
-                self.years_list_widget.clear()
-                return
 
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    # Extraire les années à partir des dates au format MM/AAAA
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    # Ajouter toutes les années entre début et fin (incluses)
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    # Si la conversion échoue, on ignore cette entrée
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets.")
-                self.years_list_widget.clear()
-                return
+        if not years:
+            if warning:
+                QMessageBox.warning(self, *warning)
+            return
 
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
+        for year in years:
+            if multiple:
                 item = QListWidgetItem(str(year))
                 item.setCheckState(Qt.CheckState.Unchecked)
                 self.years_list_widget.addItem(item)
+            else:
+                self.year_combo.addItem(str(year))
 
-        finally:
-            conn.close()
-
-    def update_years_for_selected_projects(self):
-        """Met à jour la liste déroulante des années avec les années des projets sélectionnés."""
-        # Récupérer les IDs des projets cochés
-        selected_project_ids = []
-        for i in range(self.project_list_widget.count()):
-            item = self.project_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_project_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_project_ids:
-            # Aucun projet sélectionné, vider la liste
-            self.year_combo.clear()
+    def _update_years_for_single_project(self, multiple):
+        project_id = self.project_combo.currentData()
+        if not project_id:
+            self._show_years([], multiple, ("Erreur", "Aucun projet sélectionné."))
             return
+        self._show_years(
+            self.period_index.years_for_project(project_id), multiple,
+            ("Erreur", "Les dates de début ou de fin sont manquantes ou mal formatées pour ce projet (attendu: MM/AAAA)."))
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les dates des projets sélectionnés
-            placeholders = ','.join('?' * len(selected_project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders}) 
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_project_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet sélectionné avec des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets sélectionnés.")
-                self.year_combo.clear()
-                return
-
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
-
-        finally:
-            conn.close()
+    def _update_years_for_all_projects(self, multiple):
+        if not self.period_index.has_dates(self.period_index.project_ids):
+            warning = ("Aucun projet trouvé", "Aucun projet avec des dates valides n'a été trouvé.")
+        else:
+            warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets.")
+        self._show_years(self.period_index.years_for_all_projects(), multiple, warning)
 
-    def update_years_for_selected_projects_multiple(self):
-        """Met à jour la liste des années cochables avec les années des projets sélectionnés."""
-        # Récupérer les IDs des projets cochés
-        selected_project_ids = []
-        for i in range(self.project_list_widget.count()):
-            item = self.project_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_project_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
+    def _update_years_for_selected_projects(self, multiple):
+        selected_project_ids = self._checked_data(self.project_list_widget)
         if not selected_project_ids:
             # Aucun projet sélectionné, vider la liste
-            self.years_list_widget.clear()
+            self._show_years([], multiple)
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les dates des projets sélectionnés
-            placeholders = ','.join('?' * len(selected_project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders}) 
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_project_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                # Ne pas afficher de message d'erreur si aucun projet n'est sélectionné
-                self.years_list_widget.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                self.years_list_widget.clear()
-                return
-
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-
-        finally:
-            conn.close()
+        warning = None
+        if not multiple:
+            if not self.period_index.has_dates(selected_project_ids):
+                warning = ("Aucun projet trouvé", "Aucun projet sélectionné avec des dates valides n'a été trouvé.")
+            else:
+                warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets sélectionnés.")
+        self._show_years(self.period_index.years_for_projects(selected_project_ids), multiple, warning)
 
-    def update_years_for_selected_themes(self):
-        """Met à jour la liste déroulante des années avec les années des projets liés aux thèmes sélectionnés."""
-        # Récupérer les IDs des thèmes cochés
-        selected_theme_ids = []
-        for i in range(self.theme_list_widget.count()):
-            item = self.theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_theme_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
+    def _update_years_for_selected_themes(self, multiple):
+        selected_theme_ids = self._checked_data(self.theme_list_widget)
         if not selected_theme_ids:
             # Aucun thème sélectionné, vider la liste
-            self.year_combo.clear()
+            self._show_years([], multiple)
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets liés aux thèmes sélectionnés
-            placeholders = ','.join('?' * len(selected_theme_ids))
-            cursor.execute(f"""
-                SELECT DISTINCT p.date_debut, p.date_fin 
-                FROM projets p
-                JOIN projet_themes pt ON p.id = pt.projet_id
-                WHERE pt.theme_id IN ({placeholders})
-                AND p.date_debut IS NOT NULL AND p.date_fin IS NOT NULL
-            """, selected_theme_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet lié aux thèmes sélectionnés avec des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
+        if not self.period_index.has_dates(self.period_index.projects_for_themes(selected_theme_ids)):
+            warning = ("Aucun projet trouvé", "Aucun projet lié aux thèmes sélectionnés avec des dates valides n'a été trouvé.")
+        else:
+            warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets liés aux thèmes sélectionnés.")
+        self._show_years(self.period_index.years_for_themes(selected_theme_ids), multiple, warning)
 
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets liés aux thèmes sélectionnés.")
-                self.year_combo.clear()
-                return
+    def _update_years_for_selected_main_themes(self, multiple):
+        selected_main_themes = self._checked_data(self.main_theme_list_widget)
+        if not selected_main_themes:
+            # Aucun thème principal sélectionné, vider la liste
+            self._show_years([], multiple)
+            return
 
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
+        if not self.period_index.has_dates(self.period_index.projects_for_main_themes(selected_main_themes)):
+            warning = ("Aucun projet trouvé", "Aucun projet avec les thèmes principaux sélectionnés et des dates valides n'a été trouvé.")
+        else:
+            warning = ("Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets avec les thèmes principaux sélectionnés.")
+        self._show_years(self.period_index.years_for_main_themes(selected_main_themes), multiple, warning)
 
-        finally:
-            conn.close()
+    def update_years_for_single_project_multiple_years(self):
+        """Met à jour la liste des années cochables pour un projet spécifique en mode 'plusieurs années'."""
+        self._update_years_for_single_project(multiple=True)
 
-    def update_years_for_selected_themes_multiple(self):
-        """Met à jour la liste des années cochables avec les années des projets liés aux thèmes sélectionnés."""
-        # Récupérer les IDs des thèmes cochés
-        selected_theme_ids = []
-        for i in range(self.theme_list_widget.count()):
-            item = self.theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_theme_ids.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_theme_ids:
-            # Aucun thème sélectionné, vider la liste
-            self.years_list_widget.clear()
-            return
+    def update_years_for_all_projects(self):
+        """Met à jour la liste déroulante des années avec toutes les années où il y a au moins un projet."""
+        self._update_years_for_all_projects(multiple=False)
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets liés aux thèmes sélectionnés
-            placeholders = ','.join('?' * len(selected_theme_ids))
-            cursor.execute(f"""
-                SELECT DISTINCT p.date_debut, p.date_fin 
-                FROM projets p
-                JOIN projet_themes pt ON p.id = pt.projet_id
-                WHERE pt.theme_id IN ({placeholders})
-                AND p.date_debut IS NOT NULL AND p.date_fin IS NOT NULL
-            """, selected_theme_ids)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet lié aux thèmes sélectionnés avec des dates valides n'a été trouvé.")
-                self.years_list_widget.clear()
-                return
+    def update_years_for_all_projects_multiple(self):
+        """Met à jour la liste des années cochables avec toutes les années où il y a au moins un projet."""
+        self._update_years_for_all_projects(multiple=True)
 
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
+    def update_years_for_selected_projects(self):
+        """Met à jour la liste déroulante des années avec les années des projets sélectionnés."""
+        self._update_years_for_selected_projects(multiple=False)
 
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets liés aux thèmes sélectionnés.")
-                self.years_list_widget.clear()
-                return
+    def update_years_for_selected_projects_multiple(self):
+        """Met à jour la liste des années cochables avec les années des projets sélectionnés."""
+        self._update_years_for_selected_projects(multiple=True)
 
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
+    def update_years_for_selected_themes(self):
+        """Met à jour la liste déroulante des années avec les années des projets liés aux thèmes sélectionnés."""
+        self._update_years_for_selected_themes(multiple=False)
 
-        finally:
-            conn.close()
+    def update_years_for_selected_themes_multiple(self):
+        """Met à jour la liste des années cochables avec les années des projets liés aux thèmes sélectionnés."""
+        self._update_years_for_selected_themes(multiple=True)
 
     def update_years_for_selected_main_themes(self):
         """Met à jour la liste déroulante des années avec les années des projets liés aux thèmes principaux sélectionnés."""
-        # Récupérer les thèmes principaux cochés
-        selected_main_themes = []
-        for i in range(self.main_theme_list_widget.count()):
-            item = self.main_theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_main_themes.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_main_themes:
-            # Aucun thème principal sélectionné, vider la liste
-            self.year_combo.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets avec les thèmes principaux sélectionnés
-            placeholders = ','.join('?' * len(selected_main_themes))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin 
-                FROM projets 
-                WHERE theme_principal IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_main_themes)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec les thèmes principaux sélectionnés et des dates valides n'a été trouvé.")
-                self.year_combo.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets avec les thèmes principaux sélectionnés.")
-                self.year_combo.clear()
-                return
-
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in years:
-                self.year_combo.addItem(str(year))
-
-        finally:
-            conn.close()
+        self._update_years_for_selected_main_themes(multiple=False)
 
     def update_years_for_selected_main_themes_multiple(self):
         """Met à jour la liste des années cochables avec les années des projets liés aux thèmes principaux sélectionnés."""
-        # Récupérer les thèmes principaux cochés
-        selected_main_themes = []
-        for i in range(self.main_theme_list_widget.count()):
-            item = self.main_theme_list_widget.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                selected_main_themes.append(item.data(Qt.ItemDataRole.UserRole))
-        
-        if not selected_main_themes:
-            # Aucun thème principal sélectionné, vider la liste
-            self.years_list_widget.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets avec les thèmes principaux sélectionnés
-            placeholders = ','.join('?' * len(selected_main_themes))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin 
-                FROM projets 
-                WHERE theme_principal IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, selected_main_themes)
-            
-            results = cursor.fetchall()
-            
-            if not results:
-                QMessageBox.warning(self, "Aucun projet trouvé", "Aucun projet avec les thèmes principaux sélectionnés et des dates valides n'a été trouvé.")
-                self.years_list_widget.clear()
-                return
-
-            years_set = set()
-            
-            for date_debut, date_fin in results:
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-
-            years = sorted(list(years_set))
-            
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année valide n'a été trouvée dans les projets avec les thèmes principaux sélectionnés.")
-                self.years_list_widget.clear()
-                return
-
-            # Remplir la liste des années cochables
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-
-        finally:
-            conn.close()
+        self._update_years_for_selected_main_themes(multiple=True)
 
     def on_project_selection_changed(self):
         """Appelée quand la sélection de projets ou thèmes change"""
@@ -767,60 +446,24 @@ class PrintConfigDialog(QDialog):
                 
         elif self.radio_all_projects.isChecked():
             # Tous les projets
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM projets")
-            project_ids = [row[0] for row in cursor.fetchall()]
-            conn.close()
+            project_ids = list(self.period_index.project_ids)
             
         elif self.radio_multiple_projects.isChecked():
             # Projets sélectionnés dans la liste
-            for i in range(self.project_list_widget.count()):
-                item = self.project_list_widget.item(i)
-                if item.checkState() == Qt.CheckState.Checked:
-                    project_ids.append(item.data(Qt.ItemDataRole.UserRole))
+            project_ids = self._checked_data(self.project_list_widget)
                     
         elif self.radio_by_theme.isChecked():
             # Projets par thèmes sélectionnés
-            selected_theme_ids = []
-            for i in range(self.theme_list_widget.count()):
-                item = self.theme_list_widget.item(i)
-                if item.checkState() == Qt.CheckState.Checked:
-                    selected_theme_ids.append(item.data(Qt.ItemDataRole.UserRole))
+            project_ids = self.period_index.projects_for_themes(self._checked_data(self.theme_list_widget))
             
-            if selected_theme_ids:
-                conn = get_connection()
-                cursor = conn.cursor()
-                placeholders = ','.join('?' * len(selected_theme_ids))
-                cursor.execute(f"""
-                    SELECT DISTINCT projet_id FROM projet_themes 
-                    WHERE theme_id IN ({placeholders})
-                """, selected_theme_ids)
-                project_ids = [row[0] for row in cursor.fetchall()]
-                conn.close()
         elif self.radio_by_main_theme.isChecked():
             # Projets par thème principal sélectionné
-            selected_main_themes = []
-            for i in range(self.main_theme_list_widget.count()):
-                item = self.main_theme_list_widget.item(i)
-                if item.checkState() == Qt.CheckState.Checked:
-                    selected_main_themes.append(item.data(Qt.ItemDataRole.UserRole))
-            
-            if selected_main_themes:
-                conn = get_connection()
-                cursor = conn.cursor()
-                placeholders = ','.join('?' * len(selected_main_themes))
-                cursor.execute(f"""
-                    SELECT id FROM projets 
-                    WHERE theme_principal IN ({placeholders})
-                """, selected_main_themes)
-                project_ids = [row[0] for row in cursor.fetchall()]
-                conn.close()
+            project_ids = self.period_index.projects_for_main_themes(self._checked_data(self.main_theme_list_widget))
         
         return project_ids
 
     def load_years_with_projects(self):
-        """Charge les années où des projets sélectionnés existent depuis la base de données"""
+        """Charge les années de début des projets sélectionnés"""
         # Pour "Tous les projets", récupérer toutes les années de tous les projets
         if self.radio_all_projects.isChecked():
             self.update_years_for_all_projects_multiple()
@@ -832,82 +475,14 @@ class PrintConfigDialog(QDialog):
             # Ne pas afficher de message d'erreur, juste vider la liste
             self.years_list_widget.clear()
             return
-            
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            # Récupérer les projets sélectionnés avec leurs dates
-            placeholders = ','.join('?' * len(project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_debut LIKE '__/____'
-            """, project_ids)
-            
-            years_set = set()
-            
-            for date_debut, date_fin in cursor.fetchall():
-                # Extraire l'année de début
-                if date_debut and len(date_debut) >= 7:
-                    year = int(date_debut[-4:])
-                    years_set.add(year)
 
-            years = sorted(list(years_set))
-
-            if not years:
-                QMessageBox.warning(self, "Aucune année trouvée", "Aucune année avec des projets sélectionnés n'a été trouvée.")
-
-            self.years_list_widget.clear()
-            for year in years:
-                item = QListWidgetItem(str(year))
-                item.setCheckState(Qt.CheckState.Unchecked)
-                self.years_list_widget.addItem(item)
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur lors du chargement des années : {str(e)}")
-        finally:
-            conn.close()
+        self._show_years(
+            self.period_index.start_years_for_projects(project_ids), True,
+            ("Aucune année trouvée", "Aucune année avec des projets sélectionnés n'a été trouvée."))
 
     def update_years_for_project(self):
         """Met à jour la liste des années disponibles pour le projet sélectionné."""
-        project_id = self.project_combo.currentData()
-        if not project_id:
-            QMessageBox.warning(self, "Erreur", "Aucun projet sélectionné.")
-            self.year_combo.clear()
-            return
-
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id = ?", (project_id,))
-            result = cursor.fetchone()
-            if not result:
-                QMessageBox.warning(self, "Erreur", "Impossible de récupérer les dates pour le projet sélectionné.")
-                self.year_combo.clear()
-                return
-
-            date_debut, date_fin = result
-            if not date_debut or not date_fin:
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont manquantes pour ce projet.")
-                self.year_combo.clear()
-                return
-
-            # Extraire les années à partir des dates au format MM/AAAA
-            try:
-                debut_annee = int(date_debut.split("/")[1])
-                fin_annee = int(date_fin.split("/")[1])
-            except (IndexError, ValueError):
-                QMessageBox.warning(self, "Erreur", "Les dates de début ou de fin sont mal formatées (attendu: MM/AAAA).")
-                self.year_combo.clear()
-                return
-
-            # Remplir la liste déroulante des années
-            self.year_combo.clear()
-            for year in range(debut_annee, fin_annee + 1):
-                self.year_combo.addItem(str(year))
-
-        finally:
-            conn.close()
+        self._update_years_for_single_project(multiple=False)
 
     def update_period_widgets(self):
         """Met à jour l'affichage selon le type de période sélectionné"""
@@ -1069,6 +644,109 @@ class PrintConfigDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de l'affichage du compte de résultat: {str(e)}")
     
+    def generate_report_pack(self):
+        """
+        Génère le compte de résultat de chaque projet sélectionné et le compte
+        consolidé, dans un classeur Excel (une feuille par rapport) ou un
+        dossier de PDF. Les données sont chargées une seule fois (ReportPackData).
+        """
+        project_ids = self.get_selected_project_ids()
+        if not project_ids:
+            QMessageBox.warning(self, "Avertissement", "Veuillez sélectionner au moins un projet.")
+            return
+        years = self.get_selected_years()
+        if not years:
+            QMessageBox.warning(self, "Avertissement", "Veuillez sélectionner au moins une année.")
+            return
+        granularity = "monthly" if self.radio_monthly.isChecked() else "yearly"
+        cost_type = self.get_cost_type()
+
+        box = QMessageBox(self)
+        box.setWindowTitle("Pack de rapports")
+        box.setText(f"Format du pack de rapports ({len(project_ids)} projet(s)) :")
+        excel_btn = box.addButton("Classeur Excel", QMessageBox.ButtonRole.AcceptRole)
+        pdf_btn = box.addButton("Dossier de PDF", QMessageBox.ButtonRole.AcceptRole)
+        box.addButton("Annuler", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        if box.clickedButton() not in (excel_btn, pdf_btn):
+            return
+
+        years_sorted = sorted(years)
+        years_part = str(years_sorted[0]) if len(years_sorted) == 1 else f"{years_sorted[0]}_{years_sorted[-1]}"
+        suffix = f"{years_part}_{'mensuel' if granularity == 'monthly' else 'annuel'}_{cost_type}"
+        if box.clickedButton() is excel_btn:
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "Enregistrer le pack de rapports", f"pack_compte_resultat_{suffix}.xlsx",
+                "Fichiers Excel (*.xlsx)")
+        else:
+            file_path = QFileDialog.getExistingDirectory(self, "Dossier des PDF du pack de rapports")
+        if not file_path:
+            return
+
+        try:
+            from compte_resultat_display import load_export_settings
+            from report_pack import ReportPackData
+
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            try:
+                reports = ReportPackData(project_ids, cost_type).reports(years, granularity)
+                if not reports:
+                    raise ValueError("aucun projet sélectionné n'a de dates valides sur les années choisies.")
+                settings = load_export_settings()
+                if box.clickedButton() is excel_btn:
+                    self._write_pack_workbook(file_path, reports, granularity, cost_type, settings)
+                    message = f"{len(reports)} rapport(s) exporté(s) dans {file_path}"
+                else:
+                    errors = self._write_pack_pdfs(file_path, reports, granularity, cost_type, suffix, settings)
+                    message = f"{len(reports) - len(errors)} PDF exporté(s) dans {file_path}"
+                    if errors:
+                        message += "\n\nÉchecs :\n" + "\n".join(errors)
+            finally:
+                QApplication.restoreOverrideCursor()
+            QMessageBox.information(self, "Pack de rapports", message)
+        except ImportError as e:
+            QMessageBox.critical(self, "Erreur", f"Module manquant pour l'export : {str(e)}")
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur lors de la génération du pack de rapports : {str(e)}")
+
+    def _write_pack_workbook(self, file_path, reports, granularity, cost_type, settings):
+        """Une feuille par rapport, le consolidé en premier"""
+        from openpyxl import Workbook
+        from compte_resultat_display import write_report_sheet
+
+        wb = Workbook()
+        wb.remove(wb.active)
+        used = set()
+        for pack_report in reports:
+            ws = wb.create_sheet(_sheet_title(pack_report.label, used))
+            write_report_sheet(ws, pack_report.report,
+                               _pack_selection_info(pack_report, granularity, cost_type), settings)
+        wb.save(file_path)
+
+    def _write_pack_pdfs(self, folder, reports, granularity, cost_type, suffix, settings):
+        """
+        Un PDF par rapport, écrits en parallèle (chaque fil peint son propre
+        QPdfWriter). Retourne la liste des échecs.
+        """
+        from compte_resultat_display import draw_report_pdf
+        from pdf_renderer import pdf_document
+
+        def write(pack_report):
+            path = os.path.join(folder, f"compte_resultat_{_pack_file_part(pack_report)}_{suffix}.pdf")
+            with pdf_document(path) as pdf:
+                draw_report_pdf(pdf, pack_report.report,
+                                _pack_selection_info(pack_report, granularity, cost_type), settings)
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(len(reports), os.cpu_count() or 1)) as executor:
+            futures = [(pack_report, executor.submit(write, pack_report)) for pack_report in reports]
+            for pack_report, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f"{pack_report.label} : {e}")
+        return errors
+
     def get_selected_years(self):
         """Retourne la liste des années sélectionnées"""
         if self.period_type.currentIndex() == 0:  # Année spécifique
@@ -1093,33 +771,7 @@ class PrintConfigDialog(QDialog):
         project_ids = self.get_selected_project_ids()
         if not project_ids:
             return []
-        
-        conn = get_connection()
-        cursor = conn.cursor()
-        try:
-            placeholders = ','.join('?' * len(project_ids))
-            cursor.execute(f"""
-                SELECT date_debut, date_fin FROM projets 
-                WHERE id IN ({placeholders})
-                AND date_debut IS NOT NULL AND date_fin IS NOT NULL
-            """, project_ids)
-            
-            years_set = set()
-            for date_debut, date_fin in cursor.fetchall():
-                try:
-                    debut_annee = int(date_debut.split("/")[1])
-                    fin_annee = int(date_fin.split("/")[1])
-                    
-                    for year in range(debut_annee, fin_annee + 1):
-                        years_set.add(year)
-                        
-                except (IndexError, ValueError):
-                    continue
-            
-            return sorted(list(years_set))
-            
-        finally:
-            conn.close()
+        return self.period_index.years_for_projects(project_ids)
     
     def get_period_type(self):
         """Retourne le type de période sélectionné"""
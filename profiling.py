@@ -0,0 +1,219 @@
+"""
+Profilage à la demande des calculs coûteux (compte de résultat, subventions,
+CIR, fiche projet, bilan des jours).
+
+Désactivé par défaut. Activé par l'option `--profiling`, la variable
+d'environnement GESTION_BUDGET_PROFILING (1 : durées seulement, « cprofile » :
+durées et profil cProfile) ou depuis le panneau développeur. Désactivé, le
+décorateur se limite à un test de booléen et stages() retourne un objet
+dont mark() ne fait rien.
+
+Chaque appel d'une fonction décorée par @profiled qui n'est pas imbriqué
+dans un autre produit une entrée du journal : durée totale, durée par étape
+(marquées avec stages().mark(...)) et par fonction profilée imbriquée, et le
+profil cProfile le cas échéant. Les dernières entrées sont conservées en
+mémoire (panneau développeur) et ajoutées à `profiling.log` à côté de la
+base de données, pour que les utilisateurs puissent transmettre leurs mesures.
+"""
+
+import cProfile
+import datetime
+import functools
+import io
+import os
+import pstats
+import sys
+import time
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional
+
+ENV_VAR = "GESTION_BUDGET_PROFILING"
+CLI_FLAG = "--profiling"
+LOG_FILENAME = "profiling.log"
+# Nombre d'entrées conservées en mémoire
+MAX_ENTRIES = 200
+# Taille au-delà de laquelle profiling.log est renommé en profiling.log.1
+MAX_LOG_BYTES = 1_000_000
+# Nombre de fonctions listées dans le profil cProfile d'une entrée
+TOP_FUNCTIONS = 25
+
+_enabled = False
+_use_cprofile = False
+_entries = deque(maxlen=MAX_ENTRIES)
+# Appel profilé le plus externe en cours (None hors de tout appel profilé)
+_current = None
+
+
+class ProfileEntry(NamedTuple):
+    timestamp: str
+    name: str
+    duration_s: float
+    # libellé -> [nombre, secondes]
+    stages: Dict[str, List[float]]
+    profile: str
+
+
+class _Call:
+    __slots__ = ("name", "stages")
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+
+    def add(self, label, duree):
+        stage = self.stages.get(label)
+        if stage is None:
+            self.stages[label] = [1, duree]
+        else:
+            stage[0] += 1
+            stage[1] += duree
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def uses_cprofile() -> bool:
+    return _use_cprofile
+
+
+def install(argv=None) -> bool:
+    """
+    Active le profilage s'il est demandé (option de ligne de commande ou
+    variable d'environnement). Retourne True si le profilage est actif.
+    """
+    argv = sys.argv if argv is None else argv
+    valeur = os.environ.get(ENV_VAR, "").strip().lower()
+    if CLI_FLAG in argv:
+        argv.remove(CLI_FLAG)
+        set_enabled(True, valeur == "cprofile")
+    elif valeur not in ("", "0"):
+        set_enabled(True, valeur == "cprofile")
+    return _enabled
+
+
+def set_enabled(enabled: bool, use_cprofile: bool = False) -> None:
+    global _enabled, _use_cprofile
+    _enabled = bool(enabled)
+    _use_cprofile = bool(enabled and use_cprofile)
+
+
+def profiled(name: Optional[str] = None):
+    """
+    Décorateur : chronomètre la fonction quand le profilage est actif.
+    Un appel imbriqué dans une autre fonction profilée est compté comme
+    une étape de l'appel externe.
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            if _current is not None:
+                debut = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _current.add(label, time.perf_counter() - debut)
+            return _run_outermost(label, func, args, kwargs)
+
+        return wrapper
+    return decorator
+
+
+def _run_outermost(label, func, args, kwargs):
+    global _current
+    call = _current = _Call(label)
+    profiler = cProfile.Profile() if _use_cprofile else None
+    debut = time.perf_counter()
+    try:
+        if profiler is not None:
+            return profiler.runcall(func, *args, **kwargs)
+        return func(*args, **kwargs)
+    finally:
+        duree = time.perf_counter() - debut
+        _current = None
+        _add_entry(ProfileEntry(
+            datetime.datetime.now().isoformat(timespec="seconds"),
+            label, duree, call.stages, _format_profile(profiler),
+        ))
+
+
+class _StageTimer:
+    __slots__ = ("_prefix", "_last")
+
+    def __init__(self, prefix):
+        self._prefix = prefix
+        self._last = time.perf_counter()
+
+    def mark(self, label: str) -> None:
+        """Attribue le temps écoulé depuis la marque précédente à `label`."""
+        maintenant = time.perf_counter()
+        if _current is not None:
+            _current.add(f"{self._prefix} / {label}", maintenant - self._last)
+        self._last = maintenant
+
+
+class _NullStageTimer:
+    __slots__ = ()
+
+    def mark(self, label: str) -> None:
+        pass
+
+
+_NULL_STAGES = _NullStageTimer()
+
+
+def stages(prefix: str):
+    """
+    Chronomètre d'étapes pour l'intérieur d'une fonction profilée :
+        etapes = profiling.stages("collect_period_data")
+        ...
+        etapes.mark("Recettes")
+    """
+    if not _enabled:
+        return _NULL_STAGES
+    return _StageTimer(prefix)
+
+
+def _format_profile(profiler) -> str:
+    if profiler is None:
+        return ""
+    flux = io.StringIO()
+    pstats.Stats(profiler, stream=flux).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    return flux.getvalue()
+
+
+def format_entry(entry: ProfileEntry) -> str:
+    lignes = [f"[{entry.timestamp}] {entry.name} : {entry.duration_s * 1000:.1f} ms"]
+    for label, (count, total) in sorted(entry.stages.items(), key=lambda item: item[1][1], reverse=True):
+        part = total / entry.duration_s * 100 if entry.duration_s else 0.0
+        lignes.append(f"    {total * 1000:10.1f} ms {part:5.1f} %  x{int(count):<6} {label}")
+    if entry.profile:
+        lignes.append(entry.profile.rstrip())
+    return "\n".join(lignes)
+
+
+def _add_entry(entry: ProfileEntry) -> None:
+    _entries.append(entry)
+    try:
+        from database import DB_FILE
+        path = DB_FILE.parent / LOG_FILENAME
+        if path.exists() and path.stat().st_size > MAX_LOG_BYTES:
+            os.replace(path, path.with_name(LOG_FILENAME + ".1"))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(format_entry(entry) + "\n")
+    except OSError as e:
+        if sys.stderr is not None:
+            print(f"Erreur lors de l'écriture du journal de profilage: {e}", file=sys.stderr)
+
+
+def entries() -> List[ProfileEntry]:
+    """Entrées du journal en mémoire, de la plus récente à la plus ancienne."""
+    return list(reversed(_entries))
+
+
+def clear() -> None:
+    _entries.clear()
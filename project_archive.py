@@ -0,0 +1,261 @@
+"""
+Archivage des projets terminés dans une base d'archive séparée.
+
+Les lignes détaillées d'un projet archivé (temps par membre, libellés des
+dépenses, lignes d'autres achats et de recettes, images) sont déplacées
+dans `gestion_budget_archive.db`, à côté de la base principale, attachée
+le temps de l'opération. La base principale conserve à leur place des
+lignes de synthèse dans les mêmes tables, si bien que les rapports et
+calculs (compte de résultat, CIR, subventions, bilan des jours) donnent les
+mêmes résultats sans lire l'archive :
+- temps_travail : jours cumulés par direction, catégorie et mois ; les
+  années saisies en une fois (une ligne par membre et catégorie, que les
+  calculs redistribuent sur les mois actifs) sont conservées telles quelles ;
+- depenses : déjà une ligne par catégorie et par mois, seul le détail est retiré ;
+- autres_depenses, recettes : montants cumulés par mois ;
+- images : aucune ligne (affichées depuis l'archive par la fiche projet).
+
+restore_projects() remet les lignes détaillées en place, à la place des
+synthèses ; les images ajoutées à la fiche pendant l'archivage sont gardées.
+"""
+
+import datetime
+import os
+import sqlite3
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+import database
+from database import get_connection, project_selection_sql
+
+ARCHIVE_FILENAME = "gestion_budget_archive.db"
+# Tables dont les lignes détaillées sont déplacées dans l'archive
+ARCHIVED_TABLES = ("temps_travail", "depenses", "autres_depenses", "recettes", "images")
+# Tables où la base principale garde une synthèse des projets archivés
+SUMMARY_TABLES = ARCHIVED_TABLES[:-1]
+# Identifiant de membre des lignes de synthèse de temps_travail
+ARCHIVE_MEMBER_SUFFIX = "archive"
+
+
+def archive_path() -> str:
+    """Chemin de la base d'archive, à côté de la base principale."""
+    return str(Path(database.DB_PATH).with_name(ARCHIVE_FILENAME))
+
+
+@contextmanager
+def attached_archive(conn: sqlite3.Connection):
+    """
+    Attache la base d'archive sous le nom `archive` (créée au besoin, avec
+    les colonnes des tables principales) le temps du bloc.
+    """
+    cursor = conn.cursor()
+    conn.commit()
+    cursor.execute("ATTACH DATABASE ? AS archive", (archive_path(),))
+    try:
+        for table in ARCHIVED_TABLES:
+            # Copie des colonnes sans contraintes : les projets restent dans la base principale
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_projet_id ON {table}(projet_id)")
+        yield cursor
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        cursor.execute("DETACH DATABASE archive")
+
+
+def archived_project_ids(cursor) -> List[int]:
+    cursor.execute("SELECT projet_id FROM projets_archives ORDER BY projet_id")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def is_archived(cursor, projet_id) -> bool:
+    cursor.execute("SELECT 1 FROM projets_archives WHERE projet_id = ?", (projet_id,))
+    return cursor.fetchone() is not None
+
+
+def _summarize_temps_travail(rows) -> List[Tuple]:
+    """
+    Lignes de synthèse de temps_travail, cumulées par direction, catégorie
+    et mois. Une année dont chaque couple (membre, catégorie) n'a qu'une
+    saisie est redistribuée par les calculs : ses lignes sont conservées
+    telles quelles, un cumul changerait leur mois ou leur redistribution.
+    """
+    couples = defaultdict(int)
+    for projet_id, annee, direction, categorie, membre_id, mois, jours in rows:
+        couples[(projet_id, annee, membre_id, categorie)] += 1
+    multiple = {(projet_id, annee) for (projet_id, annee, _, _), nb in couples.items() if nb > 1}
+
+    summary = []
+    totals = defaultdict(float)
+    for projet_id, annee, direction, categorie, membre_id, mois, jours in rows:
+        if (projet_id, annee) in multiple:
+            totals[(projet_id, annee, direction, categorie, mois)] += jours or 0
+        else:
+            summary.append((projet_id, annee, direction, categorie, membre_id, mois, jours))
+    summary.extend(
+        (projet_id, annee, direction, categorie, f"{direction}_{categorie}_{ARCHIVE_MEMBER_SUFFIX}", mois, jours)
+        for (projet_id, annee, direction, categorie, mois), jours in totals.items()
+    )
+    return summary
+
+
+def archive_projects(project_ids: Iterable[int]) -> int:
+    """
+    Déplace les lignes détaillées des projets dans la base d'archive et les
+    remplace par leur synthèse, en une transaction. Les projets déjà archivés
+    sont ignorés. Retourne le nombre de projets archivés.
+    """
+    conn = get_connection()
+    try:
+        with attached_archive(conn) as cursor:
+            archived = set(archived_project_ids(cursor))
+            project_ids = [pid for pid in project_ids if pid not in archived]
+            if not project_ids:
+                return 0
+            selection = project_selection_sql(cursor, project_ids)
+
+            cursor.execute(f"""
+                SELECT projet_id, annee, direction, categorie, membre_id, mois, jours
+                FROM main.temps_travail WHERE projet_id IN ({selection})
+            """)
+            temps_travail = _summarize_temps_travail(cursor.fetchall())
+
+            for table in ARCHIVED_TABLES:
+                columns = ", ".join(
+                    col[1] for col in cursor.execute(f"PRAGMA main.table_info({table})").fetchall()
+                )
+                cursor.execute(f"DELETE FROM archive.{table} WHERE projet_id IN ({selection})")
+                cursor.execute(
+                    f"INSERT INTO archive.{table} ({columns}) "
+                    f"SELECT {columns} FROM main.{table} WHERE projet_id IN ({selection})"
+                )
+
+            # Synthèses (calculées avant la suppression des lignes détaillées)
+            budget_lines = {}
+            for table in ("autres_depenses", "recettes"):
+                cursor.execute(f"""
+                    SELECT projet_id, annee, 0, mois, SUM(montant), ''
+                    FROM main.{table} WHERE projet_id IN ({selection})
+                    GROUP BY projet_id, annee, mois
+                """)
+                budget_lines[table] = cursor.fetchall()
+
+            for table in ("temps_travail", "autres_depenses", "recettes", "images"):
+                cursor.execute(f"DELETE FROM main.{table} WHERE projet_id IN ({selection})")
+            cursor.execute(f"UPDATE main.depenses SET detail = '' WHERE projet_id IN ({selection})")
+
+            cursor.executemany(
+                """INSERT INTO main.temps_travail (projet_id, annee, direction, categorie, membre_id, mois, jours)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                temps_travail,
+            )
+            for table, rows in budget_lines.items():
+                cursor.executemany(
+                    f"""INSERT INTO main.{table} (projet_id, annee, ligne_index, mois, montant, detail)
+                        VALUES (?, ?, ?, ?, ?, ?)""",
+                    rows,
+                )
+            date_archivage = datetime.datetime.now().strftime('%d/%m/%Y %H:%M')
+            cursor.executemany(
+                "INSERT INTO main.projets_archives (projet_id, date_archivage) VALUES (?, ?)",
+                ((pid, date_archivage) for pid in project_ids),
+            )
+            conn.commit()
+            return len(project_ids)
+    finally:
+        conn.close()
+
+
+def restore_projects(project_ids: Iterable[int]) -> int:
+    """
+    Remet en place les lignes détaillées de projets archivés et les retire
+    de l'archive. Si l'archive ne contient rien pour un projet (base
+    importée sans son archive), les lignes de synthèse sont conservées.
+    Retourne le nombre de projets restaurés.
+    """
+    conn = get_connection()
+    try:
+        with attached_archive(conn) as cursor:
+            archived = set(archived_project_ids(cursor))
+            project_ids = [pid for pid in project_ids if pid in archived]
+            if not project_ids:
+                return 0
+            selection = project_selection_sql(cursor, project_ids)
+            cursor.execute(f"""
+                SELECT DISTINCT projet_id FROM archive.temps_travail WHERE projet_id IN ({selection})
+                UNION SELECT DISTINCT projet_id FROM archive.depenses WHERE projet_id IN ({selection})
+                UNION SELECT DISTINCT projet_id FROM archive.autres_depenses WHERE projet_id IN ({selection})
+                UNION SELECT DISTINCT projet_id FROM archive.recettes WHERE projet_id IN ({selection})
+                UNION SELECT DISTINCT projet_id FROM archive.images WHERE projet_id IN ({selection})
+            """)
+            with_details = [row[0] for row in cursor.fetchall()]
+
+            if with_details:
+                selection = project_selection_sql(cursor, with_details)
+                for table in ARCHIVED_TABLES:
+                    columns = ", ".join(
+                        col[1] for col in cursor.execute(f"PRAGMA main.table_info({table})").fetchall()
+                        if col[1] not in ("mois_num", "periode")
+                    )
+                    if table in SUMMARY_TABLES:
+                        # Lignes de synthèse remplacées par le détail ; les images
+                        # ajoutées pendant l'archivage sont conservées (ids AUTOINCREMENT)
+                        cursor.execute(f"DELETE FROM main.{table} WHERE projet_id IN ({selection})")
+                    cursor.execute(
+                        f"INSERT INTO main.{table} ({columns}) "
+                        f"SELECT {columns} FROM archive.{table} WHERE projet_id IN ({selection})"
+                    )
+                    cursor.execute(f"DELETE FROM archive.{table} WHERE projet_id IN ({selection})")
+
+            selection = project_selection_sql(cursor, project_ids)
+            cursor.execute(f"DELETE FROM main.projets_archives WHERE projet_id IN ({selection})")
+            conn.commit()
+            return len(project_ids)
+    finally:
+        conn.close()
+
+
+def purge_projects(project_ids: Iterable[int]) -> None:
+    """Supprime de l'archive les lignes de projets supprimés de la base principale."""
+    if not os.path.exists(archive_path()):
+        return
+    conn = get_connection()
+    try:
+        with attached_archive(conn) as cursor:
+            selection = project_selection_sql(cursor, project_ids)
+            for table in ARCHIVED_TABLES:
+                cursor.execute(f"DELETE FROM archive.{table} WHERE projet_id IN ({selection})")
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def load_archived_images(projet_id) -> List[Tuple[str, bytes]]:
+    """Images (nom, données) d'un projet archivé, lues dans la base d'archive."""
+    if not os.path.exists(archive_path()):
+        return []
+    conn = sqlite3.connect(archive_path())
+    try:
+        try:
+            cursor = conn.execute("SELECT nom, data FROM images WHERE projet_id = ?", (projet_id,))
+        except sqlite3.OperationalError:
+            return []
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+__all__ = [
+    "ARCHIVED_TABLES",
+    "ARCHIVE_FILENAME",
+    "archive_path",
+    "archive_projects",
+    "archived_project_ids",
+    "attached_archive",
+    "is_archived",
+    "load_archived_images",
+    "purge_projects",
+    "restore_projects",
+]
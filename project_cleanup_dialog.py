@@ -0,0 +1,239 @@
+import os
+import sqlite3
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton,
+    QComboBox, QMessageBox, QFileDialog, QHeaderView
+)
+from PyQt6.QtCore import Qt
+
+from database import delete_projects, export_projects, get_connection
+from project_archive import archive_projects, purge_projects, restore_projects
+
+HEADERS = ['Code projet', 'Nom projet', 'Etat', 'Date de fin', 'Archivé le']
+STATE_FILTERS = ['Terminé', 'Tous', 'En cours', 'Futur', 'Archivés']
+
+
+class ProjectCleanupDialog(QDialog):
+    """
+    Suppression groupée de projets (par exemple tous les projets terminés),
+    éventuellement après export dans une base séparée. La suppression est une
+    seule requête dans une seule transaction : les données liées sont
+    supprimées par ON DELETE CASCADE.
+    Les projets peuvent aussi être archivés (détail déplacé dans la base
+    d'archive, synthèse conservée) puis restaurés.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Nettoyage des projets')
+        self.resize(800, 600)
+
+        layout = QVBoxLayout()
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel('Etat :'))
+        self.state_combo = QComboBox()
+        self.state_combo.addItems(STATE_FILTERS)
+        self.state_combo.currentTextChanged.connect(self.load_projects)
+        filter_layout.addWidget(self.state_combo)
+        filter_layout.addStretch()
+        btn_check_all = QPushButton('Tout cocher')
+        btn_check_all.clicked.connect(lambda: self.set_all_checked(True))
+        btn_uncheck_all = QPushButton('Tout décocher')
+        btn_uncheck_all.clicked.connect(lambda: self.set_all_checked(False))
+        filter_layout.addWidget(btn_check_all)
+        filter_layout.addWidget(btn_uncheck_all)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableWidget(0, len(HEADERS))
+        self.table.setHorizontalHeaderLabels(HEADERS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.itemChanged.connect(self.update_count)
+        layout.addWidget(self.table)
+
+        self.count_label = QLabel()
+        layout.addWidget(self.count_label)
+
+        btn_layout = QHBoxLayout()
+        btn_delete = QPushButton('Supprimer les projets cochés')
+        btn_delete.clicked.connect(self.delete_checked)
+        btn_export = QPushButton('Exporter puis supprimer...')
+        btn_export.clicked.connect(self.export_and_delete_checked)
+        btn_archive = QPushButton('Archiver')
+        btn_archive.setToolTip('Déplace le détail du budget et les images dans la base d\'archive')
+        btn_archive.clicked.connect(self.archive_checked)
+        btn_restore = QPushButton('Restaurer')
+        btn_restore.clicked.connect(self.restore_checked)
+        btn_close = QPushButton('Fermer')
+        btn_close.clicked.connect(self.close)
+        btn_layout.addWidget(btn_delete)
+        btn_layout.addWidget(btn_export)
+        btn_layout.addWidget(btn_archive)
+        btn_layout.addWidget(btn_restore)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_close)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+        self.load_projects()
+
+    def load_projects(self):
+        state = self.state_combo.currentText()
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            query = '''SELECT p.id, p.code, p.nom, p.etat, p.date_fin, a.date_archivage
+                       FROM projets p LEFT JOIN projets_archives a ON a.projet_id = p.id'''
+            order = ' ORDER BY p.periode_fin, p.code'
+            if state == 'Tous':
+                cursor.execute(query + order)
+            elif state == 'Archivés':
+                cursor.execute(query + ' WHERE a.projet_id IS NOT NULL' + order)
+            else:
+                cursor.execute(query + ' WHERE p.etat = ?' + order, (state,))
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        self.table.blockSignals(True)
+        self.table.setRowCount(len(rows))
+        for row, (pid, code, nom, etat, date_fin, date_archivage) in enumerate(rows):
+            code_item = QTableWidgetItem(str(code))
+            code_item.setData(Qt.ItemDataRole.UserRole, pid)
+            code_item.setFlags(code_item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            code_item.setCheckState(Qt.CheckState.Unchecked)
+            self.table.setItem(row, 0, code_item)
+            for col, value in enumerate((nom, etat, date_fin, date_archivage), start=1):
+                self.table.setItem(row, col, QTableWidgetItem(str(value or '')))
+        self.table.blockSignals(False)
+        self.table.resizeColumnToContents(0)
+        self.update_count()
+
+    def set_all_checked(self, checked):
+        state = Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
+        self.table.blockSignals(True)
+        for row in range(self.table.rowCount()):
+            self.table.item(row, 0).setCheckState(state)
+        self.table.blockSignals(False)
+        self.update_count()
+
+    def checked_projects(self):
+        """Liste des (id, code) des projets cochés."""
+        projects = []
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item.checkState() == Qt.CheckState.Checked:
+                projects.append((item.data(Qt.ItemDataRole.UserRole), item.text()))
+        return projects
+
+    def update_count(self, _item=None):
+        self.count_label.setText(f'{len(self.checked_projects())} projet(s) coché(s) sur {self.table.rowCount()}')
+
+    def _confirm(self, projects, action):
+        codes = ', '.join(code for _, code in projects[:10])
+        if len(projects) > 10:
+            codes += f' ... (+{len(projects) - 10})'
+        return QMessageBox.question(
+            self, 'Confirmation',
+            f'{action} {len(projects)} projet(s) et toutes leurs données ?\n\n{codes}',
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        ) == QMessageBox.StandardButton.Yes
+
+    def _delete(self, project_ids, conn):
+        cursor = conn.cursor()
+        try:
+            count = delete_projects(cursor, project_ids)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        purge_projects(project_ids)
+        return count
+
+    def delete_checked(self):
+        projects = self.checked_projects()
+        if not projects:
+            QMessageBox.warning(self, 'Nettoyage', 'Cochez au moins un projet.')
+            return
+        if not self._confirm(projects, 'Supprimer définitivement'):
+            return
+        conn = get_connection()
+        try:
+            count = self._delete([pid for pid, _ in projects], conn)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, 'Erreur', f'Erreur lors de la suppression: {e}')
+            return
+        finally:
+            conn.close()
+        QMessageBox.information(self, 'Succès', f'{count} projet(s) supprimé(s).')
+        self.load_projects()
+
+    def export_and_delete_checked(self):
+        projects = self.checked_projects()
+        if not projects:
+            QMessageBox.warning(self, 'Nettoyage', 'Cochez au moins un projet.')
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Exporter les projets avant suppression', 'projets_archives.db', 'Base de données SQLite (*.db)')
+        if not file_path:
+            return
+        if not self._confirm(projects, 'Exporter puis supprimer'):
+            return
+
+        project_ids = [pid for pid, _ in projects]
+        conn = get_connection()
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            # Les projets archivés sont exportés avec leur détail
+            restore_projects(project_ids)
+            export_projects(conn, project_ids, file_path)
+            count = self._delete(project_ids, conn)
+        except (OSError, sqlite3.Error) as e:
+            QMessageBox.critical(self, 'Erreur', f'Échec de l\'export ou de la suppression : {e}')
+            return
+        finally:
+            conn.close()
+        QMessageBox.information(
+            self, 'Succès',
+            f'{count} projet(s) exporté(s) dans {file_path} puis supprimé(s).\n'
+            'Le fichier peut être réimporté avec « Importer / Exporter BDD ».')
+        self.load_projects()
+
+    def archive_checked(self):
+        projects = self.checked_projects()
+        if not projects:
+            QMessageBox.warning(self, 'Archivage', 'Cochez au moins un projet.')
+            return
+        if QMessageBox.question(
+                self, 'Confirmation',
+                f'Archiver {len(projects)} projet(s) ?\n\n'
+                'Le détail du budget (temps par membre, lignes de dépenses et de recettes) et les images '
+                'sont déplacés dans la base d\'archive ; les rapports utilisent les totaux conservés. '
+                'Le budget ne peut plus être modifié avant restauration.',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        ) != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            count = archive_projects([pid for pid, _ in projects])
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, 'Erreur', f'Erreur lors de l\'archivage : {e}')
+            return
+        QMessageBox.information(self, 'Succès', f'{count} projet(s) archivé(s).')
+        self.load_projects()
+
+    def restore_checked(self):
+        projects = self.checked_projects()
+        if not projects:
+            QMessageBox.warning(self, 'Restauration', 'Cochez au moins un projet.')
+            return
+        try:
+            count = restore_projects([pid for pid, _ in projects])
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, 'Erreur', f'Erreur lors de la restauration : {e}')
+            return
+        QMessageBox.information(self, 'Succès', f'{count} projet(s) restauré(s).')
+        self.load_projects()
@@ -3,10 +3,14 @@ from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QColor
 import sqlite3
 import datetime
+from collections import OrderedDict
 from utils import format_montant, format_montant_aligne
 
-from database import get_connection
-from category_utils import resolve_category_code
+from database import GLOBAL_VERSION_ID, amortissements_between, get_connection
+from category_utils import COST_TYPES, get_cost_rate, resolve_category_code, value_days
+from month_utils import month_key
+from project_archive import is_archived, load_archived_images
+import profiling
 
 
 def _category_code(value: str) -> str:
@@ -17,6 +21,82 @@ def _category_code(value: str) -> str:
         return value.strip()
     return ""
 
+
+# Cache des sections coûteuses (budget, subventions, CIR, images), partagé entre
+# les ouvertures du dialogue : {(projet_id, section): (version, valeur)}, les
+# sections les moins récemment consultées étant oubliées au-delà de la limite
+_SECTION_CACHE_SIZE = 32
+_SECTION_CACHE = OrderedDict()
+# Absence de la section en cache (None est une valeur possible)
+_MISSING = object()
+
+
+def _project_data_version(cursor, projet_id):
+    """Versions des données dont dépendent les sections calculées d'un projet.
+
+    Les compteurs de projet_versions sont incrémentés par des déclencheurs à
+    toute modification du temps de travail, des dépenses, investissements et
+    subventions ou des dates du projet (version du projet), et des coûts par
+    catégorie ou des coefficients CIR (version globale) : un changement
+    invalide le cache.
+    """
+    cursor.execute(
+        'SELECT projet_id, version FROM projet_versions WHERE projet_id IN (?, ?)',
+        (projet_id, GLOBAL_VERSION_ID),
+    )
+    versions = dict(cursor.fetchall())
+    return versions.get(projet_id, 0), versions.get(GLOBAL_VERSION_ID, 0)
+
+
+def _cached_value(key, version):
+    """Valeur en cache pour cette version des données, ou _MISSING"""
+    cached = _SECTION_CACHE.get(key)
+    if cached is None or cached[0] != version:
+        return _MISSING
+    _SECTION_CACHE.move_to_end(key)
+    return cached[1]
+
+
+def _cache_value(key, version, value):
+    _SECTION_CACHE[key] = (version, value)
+    _SECTION_CACHE.move_to_end(key)
+    while len(_SECTION_CACHE) > _SECTION_CACHE_SIZE:
+        _SECTION_CACHE.popitem(last=False)
+
+
+def invalidate_section_cache():
+    """Oublie les sections calculées, par exemple après le remplacement de la base."""
+    _SECTION_CACHE.clear()
+
+
+def _images_version(cursor, projet_id):
+    """Empreinte légère des images du projet (sans charger les données binaires)"""
+    cursor.execute('SELECT id, nom, LENGTH(data) FROM images WHERE projet_id = ?', (projet_id,))
+    return tuple(tuple(row) for row in cursor.fetchall()) + (is_archived(cursor, projet_id),)
+
+
+def _project_images(cursor, projet_id):
+    """Images (nom, données) du projet, lues dans la base d'archive si le projet est archivé"""
+    cursor.execute('SELECT nom, data FROM images WHERE projet_id=? ORDER BY id', (projet_id,))
+    images = cursor.fetchall()
+    if not images and is_archived(cursor, projet_id):
+        images = load_archived_images(projet_id)
+    return images
+
+
+def _project_image_data(cursor, projet_id, index):
+    """Données de l'image à la position `index` de _project_images, ou None"""
+    cursor.execute('SELECT data FROM images WHERE projet_id=? ORDER BY id LIMIT 1 OFFSET ?', (projet_id, index))
+    row = cursor.fetchone()
+    if row is not None:
+        return row[0]
+    if is_archived(cursor, projet_id):
+        images = load_archived_images(projet_id)
+        if index < len(images):
+            return images[index][1]
+    return None
+
+
 class ProjectDetailsDialog(QDialog):
     def __init__(self, parent, projet_id):
         super().__init__(parent)
@@ -66,6 +146,7 @@ class ProjectDetailsDialog(QDialog):
                     if sub_layout is not None:
                         self._clear_layout(sub_layout)
 
+    @profiling.profiled("Fiche projet")
     def _load_project_data(self):
         """Charge les données du projet de manière optimisée"""
         # Éviter les double-chargements simultanés
@@ -129,111 +210,9 @@ class ProjectDetailsDialog(QDialog):
                 cursor.execute('SELECT direction, type, nombre FROM equipe WHERE projet_id=?', (self.projet_id,))
                 equipe = cursor.fetchall()
                 
-                # Images
-                cursor.execute('SELECT nom, data FROM images WHERE projet_id=?', (self.projet_id,))
-                images = cursor.fetchall()
-                
-                # OPTIMISATION: Calcul des coûts avec JOIN au lieu de boucle de requêtes
-                # Récupérer les dates du projet pour filtrer
-                cursor.execute('SELECT date_debut, date_fin FROM projets WHERE id = ?', (self.projet_id,))
-                dates_projet = cursor.fetchone()
-                date_debut_str = dates_projet[0] if dates_projet else None
-                date_fin_str = dates_projet[1] if dates_projet else None
-                
-                # Construire la requête avec filtre sur les dates si disponibles
-                if date_debut_str and date_fin_str:
-                    try:
-                        import datetime
-                        debut_projet = datetime.datetime.strptime(date_debut_str, '%m/%Y')
-                        fin_projet = datetime.datetime.strptime(date_fin_str, '%m/%Y')
-                        
-                        # Calculer les coûts en filtrant par période (comme compte_resultat_display)
-                        couts = self._calculate_costs_for_period(cursor, self.projet_id, debut_projet, fin_projet)
-                        
-                        # Ajouter dépenses filtrées par période (2 requêtes séparées pour éviter produit cartésien)
-                        annee_debut = debut_projet.year
-                        annee_fin = fin_projet.year
-                        
-                        # Dépenses externes
-                        cursor.execute('''
-                            SELECT COALESCE(SUM(montant), 0)
-                            FROM depenses
-                            WHERE projet_id = ? AND annee >= ? AND annee <= ?
-                        ''', (self.projet_id, annee_debut, annee_fin))
-                        depenses = cursor.fetchone()[0] or 0
-                        
-                        # Autres dépenses
-                        cursor.execute('''
-                            SELECT COALESCE(SUM(montant), 0)
-                            FROM autres_depenses
-                            WHERE projet_id = ? AND annee >= ? AND annee <= ?
-                        ''', (self.projet_id, annee_debut, annee_fin))
-                        autres_depenses = cursor.fetchone()[0] or 0
-                        
-                        total_depenses = depenses + autres_depenses
-                        couts["charge"] += total_depenses
-                        couts["direct"] += total_depenses
-                        couts["complet"] += total_depenses
-                    except:
-                        # Si erreur de parsing des dates, utiliser la requête sans filtre
-                        cursor.execute('''
-                            SELECT 
-                                SUM((cc.montant_charge * t.jours)) AS total_charge,
-                                SUM((cc.cout_production * t.jours)) AS total_direct,
-                                SUM((cc.cout_complet * t.jours)) AS total_complet
-                            FROM temps_travail t
-                            LEFT JOIN categorie_cout cc ON t.categorie = cc.libelle AND t.annee = cc.annee
-                            WHERE t.projet_id = ?
-                        ''', (self.projet_id,))
-                        couts_result = cursor.fetchone()
-                        couts = {
-                            "charge": couts_result[0] or 0,
-                            "direct": couts_result[1] or 0,
-                            "complet": couts_result[2] or 0
-                        }
-                        
-                        # Ajouter dépenses sans filtre (2 requêtes séparées)
-                        cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE projet_id = ?', (self.projet_id,))
-                        depenses = cursor.fetchone()[0] or 0
-                        
-                        cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM autres_depenses WHERE projet_id = ?', (self.projet_id,))
-                        autres_depenses = cursor.fetchone()[0] or 0
-                        
-                        total_depenses = depenses + autres_depenses
-                        couts["charge"] += total_depenses
-                        couts["direct"] += total_depenses
-                        couts["complet"] += total_depenses
-                else:
-                    # Pas de dates - calculer sans filtre
-                    cursor.execute('''
-                        SELECT 
-                            SUM((cc.montant_charge * t.jours)) AS total_charge,
-                            SUM((cc.cout_production * t.jours)) AS total_direct,
-                            SUM((cc.cout_complet * t.jours)) AS total_complet
-                        FROM temps_travail t
-                        LEFT JOIN categorie_cout cc ON t.categorie = cc.libelle AND t.annee = cc.annee
-                        WHERE t.projet_id = ?
-                    ''', (self.projet_id,))
-                    couts_result = cursor.fetchone()
-                    
-                    couts = {
-                        "charge": couts_result[0] or 0,
-                        "direct": couts_result[1] or 0,
-                        "complet": couts_result[2] or 0
-                    }
-                    
-                    # Ajouter dépenses sans filtre (2 requêtes séparées)
-                    cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE projet_id = ?', (self.projet_id,))
-                    depenses = cursor.fetchone()[0] or 0
-                    
-                    cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM autres_depenses WHERE projet_id = ?', (self.projet_id,))
-                    autres_depenses = cursor.fetchone()[0] or 0
-                    
-                    total_depenses = depenses + autres_depenses
-                    couts["charge"] += total_depenses
-                    couts["direct"] += total_depenses
-                    couts["complet"] += total_depenses
-                
+            # Les sections coûteuses (coûts, subventions, CIR, images) sont calculées
+            # après l'affichage de l'en-tête, voir _load_deferred_sections
+
             # Réorganisation de la mise en page avec une structure plus claire
             # Partie haute avec informations principales
             top_section = QHBoxLayout()
@@ -327,15 +306,16 @@ class ProjectDetailsDialog(QDialog):
             self.budget_vbox.addWidget(QLabel(f"<b>Budget Total :</b>"))
             
             # Créer les labels avec police monospace pour l'alignement
-            cout_charge_label = QLabel(f"Coût chargé     : {format_montant_aligne(couts['charge'])}")
+            # Valeurs provisoires, remplacées par refresh_budget une fois la fenêtre affichée
+            cout_charge_label = QLabel("Coût chargé     : calcul en cours...")
             cout_charge_label.setStyleSheet("font-family: 'Courier New', monospace;")
             self.budget_vbox.addWidget(cout_charge_label)
             
-            cout_production_label = QLabel(f"Coût production : {format_montant_aligne(couts['direct'])}")
+            cout_production_label = QLabel("Coût production : calcul en cours...")
             cout_production_label.setStyleSheet("font-family: 'Courier New', monospace;")
             self.budget_vbox.addWidget(cout_production_label)
             
-            cout_complet_label = QLabel(f"Coût complet    : {format_montant_aligne(couts['complet'])}")
+            cout_complet_label = QLabel("Coût complet    : calcul en cours...")
             cout_complet_label.setStyleSheet("font-family: 'Courier New', monospace;")
             self.budget_vbox.addWidget(cout_complet_label)
             
@@ -350,30 +330,10 @@ class ProjectDetailsDialog(QDialog):
             # Section images
             img_label = QLabel("<b>Images du projet :</b>")
             self.main_layout.addWidget(img_label)
-            img_hbox = QHBoxLayout()
-            for nom, data in images:
-                try:
-                    from PyQt6.QtGui import QPixmap
-                    pixmap = QPixmap()
-                    if pixmap.loadFromData(data):
-                        img_widget = QLabel()
-                        # Augmenter la taille d'affichage et améliorer la qualité
-                        scaled_pixmap = pixmap.scaled(300, 300, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                        img_widget.setPixmap(scaled_pixmap)
-                        img_widget.setStyleSheet("border: 2px solid gray; margin: 5px; background-color: white;")
-                        img_widget.setToolTip(f"{nom}\nTaille originale: {pixmap.width()}x{pixmap.height()}")  # Afficher le nom et la taille originale
-                        # Permettre le clic pour voir en taille réelle
-                        img_widget.mousePressEvent = lambda event, p=pixmap, n=nom: self.show_fullsize_image(p, n)
-                        img_widget.setCursor(Qt.CursorShape.PointingHandCursor)
-                        img_hbox.addWidget(img_widget)
-                except Exception as e:
-                    # En cas d'erreur, afficher un placeholder
-                    error_widget = QLabel(f"Erreur image:\n{nom}")
-                    error_widget.setFixedSize(300, 300)
-                    error_widget.setStyleSheet("border: 2px solid red; background-color: #ffeeee; color: red;")
-                    error_widget.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                    img_hbox.addWidget(error_widget)
-            self.main_layout.addLayout(img_hbox)
+            # Les images sont décodées après l'affichage (voir _load_images)
+            self.images_hbox = QHBoxLayout()
+            self.images_hbox.addWidget(QLabel("<i>Chargement des images...</i>"))
+            self.main_layout.addLayout(self.images_hbox)
 
             # Section actualités
             actualites_label = QLabel("<b>Actualités du projet :</b>")
@@ -426,8 +386,8 @@ class ProjectDetailsDialog(QDialog):
             # Espace vide en dessous
             self.main_layout.addStretch()
 
-            # Charger les subventions directement
-            self._load_subventions_data()
+            # Calculer les sections coûteuses une fois l'en-tête affiché
+            QTimer.singleShot(0, self._load_deferred_sections)
             
         except Exception as e:
             QMessageBox.critical(self, "Erreur de chargement", f"Erreur lors du chargement des données:\n{str(e)}")
@@ -437,27 +397,85 @@ class ProjectDetailsDialog(QDialog):
             self.setUpdatesEnabled(True)
             self._is_loading = False
 
-    def _load_subventions_data(self):
-        """Charge les données de subventions"""
+    def _cached_section(self, cursor, section, compute):
+        """Retourne le résultat d'une section coûteuse, recalculé seulement si les données ont changé"""
+        version = _project_data_version(cursor, self.projet_id)
+        key = (self.projet_id, section)
+        value = _cached_value(key, version)
+        if value is _MISSING:
+            value = compute(cursor)
+            _cache_value(key, version, value)
+        return value
+
+    @profiling.profiled("Fiche projet (sections calculées)")
+    def _load_deferred_sections(self):
+        """Charge les sections coûteuses (images, budget, subventions, CIR) après l'en-tête"""
+        # Le dialogue a pu être rechargé ou fermé entre-temps
+        if self._is_loading or not self.isVisible():
+            return
+        
+        etapes = profiling.stages("_load_deferred_sections")
+        self._load_images()
+        etapes.mark('Images')
+        
         try:
-            # Charger les subventions (sans recalculer le budget déjà fait)
-            self.refresh_subventions()
-            
-            # Afficher le CIR même s'il n'y a pas de subventions
-            if self.has_cir_activated():
-                with get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT COUNT(*) FROM subventions WHERE projet_id = ?', (self.projet_id,))
-                    has_subventions = cursor.fetchone()[0] > 0
-                
-                if not has_subventions:
-                    self.refresh_cir(0)
+            self.refresh_budget()
         except Exception as e:
             QMessageBox.warning(self, "Avertissement", f"Erreur lors du chargement des subventions:\n{str(e)}")
+        etapes.mark('Budget, subventions et CIR')
 
-    def show_fullsize_image(self, pixmap, nom):
-        """Affiche une image en taille réelle dans une nouvelle fenêtre"""
+    def _load_images(self):
+        """Affiche les images du projet (seules les vignettes sont mises en cache)"""
+        self._clear_layout(self.images_hbox)
+        
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            version = _images_version(cursor, self.projet_id)
+            key = (self.projet_id, 'images')
+            images = _cached_value(key, version)
+            if images is _MISSING:
+                from PyQt6.QtGui import QPixmap
+                images = []
+                for nom, data in _project_images(cursor, self.projet_id):
+                    pixmap = QPixmap()
+                    if pixmap.loadFromData(data):
+                        # Augmenter la taille d'affichage et améliorer la qualité ; l'image
+                        # pleine taille est décodée à nouveau au clic (show_fullsize_image)
+                        scaled_pixmap = pixmap.scaled(300, 300, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                        images.append((nom, scaled_pixmap, (pixmap.width(), pixmap.height())))
+                    else:
+                        images.append((nom, None, None))
+                _cache_value(key, version, images)
+        
+        for index, (nom, scaled_pixmap, taille) in enumerate(images):
+            if scaled_pixmap is not None:
+                img_widget = QLabel()
+                img_widget.setPixmap(scaled_pixmap)
+                img_widget.setStyleSheet("border: 2px solid gray; margin: 5px; background-color: white;")
+                img_widget.setToolTip(f"{nom}\nTaille originale: {taille[0]}x{taille[1]}")  # Afficher le nom et la taille originale
+                # Permettre le clic pour voir en taille réelle
+                img_widget.mousePressEvent = lambda event, i=index, n=nom: self.show_fullsize_image(i, n)
+                img_widget.setCursor(Qt.CursorShape.PointingHandCursor)
+                self.images_hbox.addWidget(img_widget)
+            else:
+                # En cas d'erreur, afficher un placeholder
+                error_widget = QLabel(f"Erreur image:\n{nom}")
+                error_widget.setFixedSize(300, 300)
+                error_widget.setStyleSheet("border: 2px solid red; background-color: #ffeeee; color: red;")
+                error_widget.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.images_hbox.addWidget(error_widget)
+
+    def show_fullsize_image(self, index, nom):
+        """Affiche en taille réelle l'image à la position `index` du projet, décodée à la demande"""
         from PyQt6.QtWidgets import QScrollArea
+        from PyQt6.QtGui import QPixmap
+        
+        with get_connection() as conn:
+            data = _project_image_data(conn.cursor(), self.projet_id, index)
+        pixmap = QPixmap()
+        if data is None or not pixmap.loadFromData(data):
+            QMessageBox.warning(self, "Image", f"Impossible d'afficher l'image {nom}.")
+            return
         
         dialog = QDialog(self)
         dialog.setWindowTitle(f"Image: {nom}")
@@ -620,6 +638,13 @@ class ProjectDetailsDialog(QDialog):
             )
 
     def edit_budget(self):
+        with get_connection() as conn:
+            archived = is_archived(conn.cursor(), self.projet_id)
+        if archived:
+            QMessageBox.information(self, "Projet archivé",
+                                    "Le budget de ce projet est archivé sous forme de synthèse.\n"
+                                    "Restaurez-le depuis « Nettoyer les projets... » pour le modifier.")
+            return
         from budget_edit_dialog import BudgetEditDialog
         dlg = BudgetEditDialog(self.projet_id, self)
         if dlg.exec():
@@ -798,14 +823,13 @@ class ProjectDetailsDialog(QDialog):
                     # PAS DE REDISTRIBUTION - utiliser les données réelles
                     mois_nom = month_names[month - 1]
                     cursor.execute("""
-                        SELECT SUM(tt.jours * cc.montant_charge)
+                        SELECT tt.annee, tt.categorie, SUM(tt.jours)
                         FROM temps_travail tt
-                        JOIN categorie_cout cc ON cc.libelle = tt.categorie AND cc.annee = tt.annee
                         WHERE tt.projet_id = ? AND tt.annee = ? AND tt.mois = ?
+                        GROUP BY tt.annee, tt.categorie
                     """, (project_id, year, mois_nom))
                     
-                    result = cursor.fetchone()
-                    return float(result[0]) if result and result[0] else 0
+                    return value_days(cursor.fetchall())
                 
                 else:
                     # REDISTRIBUTION - calculer le montant redistributé pour ce mois
@@ -813,14 +837,13 @@ class ProjectDetailsDialog(QDialog):
                     
                     # Récupérer le coût total de l'année et le redistribuer
                     cursor.execute("""
-                        SELECT SUM(tt.jours * cc.montant_charge)
+                        SELECT tt.annee, tt.categorie, SUM(tt.jours)
                         FROM temps_travail tt
-                        JOIN categorie_cout cc ON cc.libelle = tt.categorie AND cc.annee = tt.annee
                         WHERE tt.projet_id = ? AND tt.annee = ?
+                        GROUP BY tt.annee, tt.categorie
                     """, (project_id, year))
                     
-                    result = cursor.fetchone()
-                    total_annee = float(result[0]) if result and result[0] else 0
+                    total_annee = value_days(cursor.fetchall())
                     
                     # Redistribuer sur tous les mois du projet dans cette année
                     if total_annee > 0:
@@ -902,47 +925,9 @@ class ProjectDetailsDialog(QDialog):
                     return 0
             
             def calculate_amortissement_for_period(self, cursor, project_id, year, month):
-                """Calcule les amortissements pour une période"""
-                cursor.execute("""
-                    SELECT montant, date_achat, duree 
-                    FROM investissements 
-                    WHERE projet_id = ?
-                """, (project_id,))
-                
-                amortissements_total = 0
-                
-                for montant, date_achat, duree in cursor.fetchall():
-                    try:
-                        # Parser la date d'achat
-                        date_parts = date_achat.split('/')
-                        if len(date_parts) == 2:  # Format MM/yyyy
-                            mois_achat = int(date_parts[0])
-                            annee_achat = int(date_parts[1])
-                        elif len(date_parts) == 3:  # Format dd/MM/yyyy
-                            annee_achat = int(date_parts[2])
-                            mois_achat = int(date_parts[1])
-                        else:
-                            continue
-                            
-                        debut_amort = datetime.datetime(annee_achat, mois_achat, 1)
-                        
-                        # Calculer la fin d'amortissement
-                        fin_month = mois_achat + int(duree) - 1
-                        fin_year = annee_achat + (fin_month - 1) // 12
-                        fin_month = ((fin_month - 1) % 12) + 1
-                        fin_amort = datetime.datetime(fin_year, fin_month, 1)
-                        
-                        # Vérifier si le mois demandé est dans la période d'amortissement
-                        mois_demande = datetime.datetime(year, month, 1)
-                        if debut_amort <= mois_demande <= fin_amort:
-                            # Calculer la dotation mensuelle
-                            amortissement_mensuel = float(montant) / int(duree)
-                            amortissements_total += amortissement_mensuel
-                            
-                    except (ValueError, TypeError):
-                        continue
-                
-                return amortissements_total
+                """Dotations du mois lues dans l'échéancier des amortissements"""
+                periode = month_key(year, month)
+                return amortissements_between(cursor, project_id, periode, periode)
         
         # Créer l'instance helper
         helper = RedistributionHelper()
@@ -997,171 +982,133 @@ class ProjectDetailsDialog(QDialog):
         
         return data
 
-    def refresh_cir(self, total_subventions):
+    def _compute_cir(self, cursor):
+        """Calcule la décomposition du CIR du projet sur toute sa durée.
+        
+        Retourne le résultat de calculate_cir_breakdown complété du taux affiché
+        ('k3_display'), ou None si les dates du projet ne sont pas définies.
+        """
+        from cir_calculation import calculate_cir_breakdown
+        
+        breakdown = calculate_cir_breakdown(cursor, self.projet_id)
+        if breakdown is None:
+            return None
+        
+        # Taux affiché : k3 de la première année du projet qui a ses propres coefficients
+        breakdown['k3_display'] = 0.3  # Valeur par défaut
+        for coeffs, par_defaut in zip(breakdown['coefficients'], breakdown['coefficients_par_defaut']):
+            if not par_defaut and coeffs[2] is not None:
+                breakdown['k3_display'] = coeffs[2]
+                break
+        
+        return breakdown
+
+    def refresh_cir(self):
         """Calcule et affiche le montant du CIR sous forme de tableau avec répartition mensuelle"""
         with get_connection() as conn:
             cursor = conn.cursor()
+            breakdown = self._cached_section(cursor, 'cir', self._compute_cir)
+
+        if breakdown is None:
+            return
+        montant_net_eligible_total = breakdown['montant_net_eligible_total']
+        cir_total = breakdown['cir_total']
+        k3_display = breakdown['k3_display']
+
+        # Ajouter un titre pour le CIR
+        self.budget_vbox.addWidget(QLabel("<b>CIR :</b>"))
+
+        # Créer le tableau du CIR
+        cir_table = QTableWidget()
+        cir_table.setRowCount(1)  # Une seule ligne pour le CIR
+        cir_table.setColumnCount(3)
+        
+        # Définir les en-têtes
+        headers = ["Taux", "Coût éligible courant", "CIR attendue"]
+        cir_table.setHorizontalHeaderLabels(headers)
+        
+        # Ajuster la taille du tableau
+        cir_table.setMaximumHeight(80)  # Hauteur fixe pour une seule ligne
+        cir_table.setMinimumHeight(80)
+        cir_table.setMaximumWidth(350)  # Largeur fixe pour l'alignement
+        
+        # Configurer l'apparence du tableau
+        cir_table.setAlternatingRowColors(True)
+        cir_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        cir_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        
+        # Style similaire au tableau des subventions
+        cir_table.setStyleSheet("""
+            QHeaderView::section {
+                font-size: 10px;
+                font-weight: bold;
+                padding: 2px;
+                background-color: #f0f0f0;
+                border: 1px solid #d0d0d0;
+            }
+            QTableWidget {
+                font-size: 9px;
+            }
+        """)
+        
+        # Ajuster automatiquement la largeur des colonnes
+        header = cir_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)  # Taux
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)  # Coût éligible courant
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)  # CIR attendue
+        
+        # Définir les largeurs de colonnes pour le CIR
+        cir_table.setColumnWidth(0, 60)   # Taux
+        cir_table.setColumnWidth(1, 150)  # Coût éligible courant
+        cir_table.setColumnWidth(2, 120)  # CIR attendue
+
+        # Remplir les données du tableau avec les valeurs calculées mois par mois
+        taux_k3_percent = k3_display * 100  # Convertir en pourcentage
+        
+        # Vérifier si le CIR est applicable
+        if montant_net_eligible_total > 0:
+            # CIR applicable
+            # Taux (avec virgule française)
+            cir_table.setItem(0, 0, QTableWidgetItem(f"{taux_k3_percent:.1f}%".replace('.', ',')))
             
-            # Récupérer les coefficients CIR et dates du projet
-            cursor.execute('SELECT date_debut, date_fin FROM projets WHERE id = ?', (self.projet_id,))
-            date_row = cursor.fetchone()
-            
-            if not date_row or not date_row[0] or not date_row[1]:
-                return
+            # Coût éligible courant (total calculé mois par mois)
+            cir_table.setItem(0, 1, QTableWidgetItem(format_montant(montant_net_eligible_total)))
             
-            try:
-                import datetime
-                debut_projet = datetime.datetime.strptime(date_row[0], '%m/%Y')
-                fin_projet = datetime.datetime.strptime(date_row[1], '%m/%Y')
-            except ValueError:
-                return
-
-# UTILISER EXACTEMENT LA MÊME MÉTHODE QUE LE COMPTE DE RÉSULTAT
-            # Calcul année par année avec les coefficients de chaque année
-            cir_total = 0
-            montant_net_eligible_total = 0
-            
-            # Importer la classe CompteResultatDisplay pour utiliser EXACTEMENT ses méthodes
-            from compte_resultat_display import CompteResultatDisplay
-            temp_compte_resultat = CompteResultatDisplay(self, {
-                'project_ids': [self.projet_id], 
-                'years': list(range(debut_projet.year, fin_projet.year + 1)),
-                'period_type': 'yearly',
-                'granularity': 'yearly',
-                'cost_type': 'montant_charge'
-            })
-            
-            # Calculer le CIR année par année (chaque année utilise ses propres coefficients)
-            for year in range(debut_projet.year, fin_projet.year + 1):
-                # Utiliser EXACTEMENT la même méthode que le compte de résultat
-                cir_annuel = temp_compte_resultat.calculate_distributed_cir(cursor, year, None)
-                
-                if cir_annuel > 0:
-                    cir_total += cir_annuel
-                    
-                    # Récupérer les coefficients pour cette année (même logique que calculate_distributed_cir)
-                    cursor.execute('SELECT k1, k2, k3 FROM cir_coeffs WHERE annee = ?', (year,))
-                    cir_coeffs = cursor.fetchone()
-                    if not cir_coeffs:
-                        # Fallback identique à calculate_distributed_cir
-                        cursor.execute("SELECT k1, k2, k3 FROM cir_coeffs LIMIT 1")
-                        cir_coeffs = cursor.fetchone()
-                    
-                    if cir_coeffs:
-                        k1, k2, k3 = cir_coeffs
-                        
-                        # Calculer l'assiette pour cette année (pour l'affichage)
-                        # en utilisant EXACTEMENT les mêmes méthodes que calculate_distributed_cir
-                        temps_travail_annuel = 0
-                        amortissements_annuel = 0
-                        subventions_annuel = 0
-                        
-                        # Parcourir les mois de l'année qui sont dans la période du projet
-                        for month in range(1, 13):
-                            test_date = datetime.datetime(year, month, 1)
-                            if debut_projet <= test_date <= fin_projet:
-                                # Utiliser EXACTEMENT les mêmes méthodes que calculate_distributed_cir
-                                temps_travail_annuel += temp_compte_resultat.calculate_redistributed_temps_travail(
-                                    cursor, self.projet_id, year, month, 'montant_charge'
-                                )
-                                amortissements_annuel += temp_compte_resultat.calculate_amortissement_for_period(
-                                    cursor, self.projet_id, year, month
-                                )
-                                projet_info = (date_row[0], date_row[1])
-                                subventions_annuel += temp_compte_resultat.calculate_smart_distributed_subvention(
-                                    cursor, self.projet_id, year, month, projet_info
-                                )
-                        
-                        # Calculer l'assiette éligible avec les coefficients de cette année
-                        assiette_annuelle = (temps_travail_annuel * k1) + (amortissements_annuel * k2) - subventions_annuel
-                        if assiette_annuelle > 0:
-                            montant_net_eligible_total += assiette_annuelle
-            
-            # Récupérer k3 moyen pour l'affichage du taux
-            k3_display = 0.3  # Valeur par défaut
-            for year in range(debut_projet.year, fin_projet.year + 1):
-                cursor.execute('SELECT k3 FROM cir_coeffs WHERE annee = ?', (year,))
-                cir_coeffs = cursor.fetchone()
-                if cir_coeffs and cir_coeffs[0] is not None:
-                    k3_display = cir_coeffs[0]
-                    break
-
-            # Ajouter un titre pour le CIR
-            self.budget_vbox.addWidget(QLabel("<b>CIR :</b>"))
-
-            # Créer le tableau du CIR
-            cir_table = QTableWidget()
-            cir_table.setRowCount(1)  # Une seule ligne pour le CIR
-            cir_table.setColumnCount(3)
-            
-            # Définir les en-têtes
-            headers = ["Taux", "Coût éligible courant", "CIR attendue"]
-            cir_table.setHorizontalHeaderLabels(headers)
-            
-            # Ajuster la taille du tableau
-            cir_table.setMaximumHeight(80)  # Hauteur fixe pour une seule ligne
-            cir_table.setMinimumHeight(80)
-            cir_table.setMaximumWidth(350)  # Largeur fixe pour l'alignement
-            
-            # Configurer l'apparence du tableau
-            cir_table.setAlternatingRowColors(True)
-            cir_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-            cir_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-            
-            # Style similaire au tableau des subventions
-            cir_table.setStyleSheet("""
-                QHeaderView::section {
-                    font-size: 10px;
-                    font-weight: bold;
-                    padding: 2px;
-                    background-color: #f0f0f0;
-                    border: 1px solid #d0d0d0;
-                }
-                QTableWidget {
-                    font-size: 9px;
-                }
-            """)
+            # CIR attendu (total calculé mois par mois)
+            cir_table.setItem(0, 2, QTableWidgetItem(format_montant(cir_total)))
             
-            # Ajuster automatiquement la largeur des colonnes
-            header = cir_table.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)  # Taux
-            header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)  # Coût éligible courant
-            header.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)  # CIR attendue
-            
-            # Définir les largeurs de colonnes pour le CIR
-            cir_table.setColumnWidth(0, 60)   # Taux
-            cir_table.setColumnWidth(1, 150)  # Coût éligible courant
-            cir_table.setColumnWidth(2, 120)  # CIR attendue
-
-            # Remplir les données du tableau avec les valeurs calculées mois par mois
-            taux_k3_percent = k3_display * 100  # Convertir en pourcentage
-            
-            # Vérifier si le CIR est applicable
-            if montant_net_eligible_total > 0:
-                # CIR applicable
-                # Taux (avec virgule française)
-                cir_table.setItem(0, 0, QTableWidgetItem(f"{taux_k3_percent:.1f}%".replace('.', ',')))
-                
-                # Coût éligible courant (total calculé mois par mois)
-                cir_table.setItem(0, 1, QTableWidgetItem(format_montant(montant_net_eligible_total)))
-                
-                # CIR attendu (total calculé mois par mois)
-                cir_table.setItem(0, 2, QTableWidgetItem(format_montant(cir_total)))
-                
+        else:
+            # CIR non applicable
+            cir_table.setItem(0, 0, QTableWidgetItem(f"{taux_k3_percent:.1f}%".replace('.', ',')))
+            cir_table.setItem(0, 1, QTableWidgetItem("Non applicable"))
+            cir_table.setItem(0, 2, QTableWidgetItem("0 €"))
+            
+            # Colorer la ligne en rouge pour indiquer que le CIR n'est pas applicable
+            for col in range(3):
+                item = cir_table.item(0, col)
+                if item:
+                    item.setBackground(QColor(255, 235, 235))  # Fond rouge clair
+
+        # Détail annuel (assiette, coefficients, CIR) en infobulle
+        detail_lignes = []
+        for annee, coeffs, assiette, cir in zip(breakdown['annees'], breakdown['coefficients'],
+                                               breakdown['assiette_annuelle'], breakdown['cir_annuel']):
+            if coeffs is None:
+                detail_lignes.append(f"{annee} : coefficients CIR non définis")
             else:
-                # CIR non applicable
-                cir_table.setItem(0, 0, QTableWidgetItem(f"{taux_k3_percent:.1f}%".replace('.', ',')))
-                cir_table.setItem(0, 1, QTableWidgetItem("Non applicable"))
-                cir_table.setItem(0, 2, QTableWidgetItem("0 €"))
-                
-                # Colorer la ligne en rouge pour indiquer que le CIR n'est pas applicable
-                for col in range(3):
-                    item = cir_table.item(0, col)
-                    if item:
-                        item.setBackground(QColor(255, 235, 235))  # Fond rouge clair
-
-            # Ajouter le tableau directement au layout principal (il sera aligné automatiquement)
-            self.budget_vbox.addWidget(cir_table)
+                k1, k2, k3 = coeffs
+                detail_lignes.append(
+                    f"{annee} : assiette {format_montant(assiette)} "
+                    f"(k1={k1}, k2={k2}, k3={k3}) → CIR {format_montant(cir)}"
+                )
+        detail_cir = "\n".join(detail_lignes)
+        for col in range(3):
+            item = cir_table.item(0, col)
+            if item:
+                item.setToolTip(detail_cir)
+
+        # Ajouter le tableau directement au layout principal (il sera aligné automatiquement)
+        self.budget_vbox.addWidget(cir_table)
 
     def calculate_total_subventions_for_cir(self):
         """Calcule le total des subventions avec la même logique que refresh_subventions"""
@@ -1317,102 +1264,67 @@ class ProjectDetailsDialog(QDialog):
             "amortissements": total_amortissements
         }
 
-    def refresh_budget(self):
-        """Recalcule et met à jour les coûts du budget (version optimisée)."""
-        # Vider les caches pour forcer le recalcul avec les nouvelles données
-        self._subvention_data_cache.clear()
-        self._redistribution_cache.clear()
-        
-        # Forcer le traitement des événements UI pour fluidité
-        QApplication.instance().processEvents()
-        
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Récupérer les dates du projet pour filtrer
-            cursor.execute('SELECT date_debut, date_fin FROM projets WHERE id = ?', (self.projet_id,))
-            dates_projet = cursor.fetchone()
-            date_debut_str = dates_projet[0] if dates_projet else None
-            date_fin_str = dates_projet[1] if dates_projet else None
-            
-            # OPTIMISATION: Calcul des coûts avec filtrage par période comme compte_resultat_display
-            if date_debut_str and date_fin_str:
-                try:
-                    import datetime
-                    debut_projet = datetime.datetime.strptime(date_debut_str, '%m/%Y')
-                    fin_projet = datetime.datetime.strptime(date_fin_str, '%m/%Y')
-                    
-                    # Utiliser la même fonction que _load_project_data
-                    couts = self._calculate_costs_for_period(cursor, self.projet_id, debut_projet, fin_projet)
-                    missing_data = False
-                    
-                    # Ajouter dépenses filtrées par période (2 requêtes séparées)
-                    annee_debut = debut_projet.year
-                    annee_fin = fin_projet.year
-                    
-                    cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE projet_id = ? AND annee >= ? AND annee <= ?',
-                                   (self.projet_id, annee_debut, annee_fin))
-                    depenses = cursor.fetchone()[0] or 0
-                    
-                    cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM autres_depenses WHERE projet_id = ? AND annee >= ? AND annee <= ?',
-                                   (self.projet_id, annee_debut, annee_fin))
-                    autres_depenses = cursor.fetchone()[0] or 0
-                    
-                    total_depenses = depenses + autres_depenses
-                    couts["charge"] += total_depenses
-                    couts["direct"] += total_depenses
-                    couts["complet"] += total_depenses
-                except Exception:
-                    # En cas d'erreur, calculer sans filtre
-                    cursor.execute('''
-                        SELECT 
-                            SUM(COALESCE(cc.montant_charge * t.jours, 0)) AS total_charge,
-                            SUM(COALESCE(cc.cout_production * t.jours, 0)) AS total_direct,
-                            SUM(COALESCE(cc.cout_complet * t.jours, 0)) AS total_complet,
-                            COUNT(CASE WHEN cc.libelle IS NULL THEN 1 END) AS missing_count
-                        FROM temps_travail t
-                        LEFT JOIN categorie_cout cc ON t.categorie = cc.libelle AND t.annee = cc.annee
-                        WHERE t.projet_id = ?
-                    ''', (self.projet_id,))
-                    couts_result = cursor.fetchone()
-                    couts = {
-                        "charge": couts_result[0] or 0,
-                        "direct": couts_result[1] or 0,
-                        "complet": couts_result[2] or 0
-                    }
-                    missing_data = (couts_result[3] or 0) > 0
-                    
-                    # Ajouter dépenses sans filtre (2 requêtes séparées)
-                    cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE projet_id = ?', (self.projet_id,))
-                    depenses = cursor.fetchone()[0] or 0
-                    
-                    cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM autres_depenses WHERE projet_id = ?', (self.projet_id,))
-                    autres_depenses = cursor.fetchone()[0] or 0
-                    
-                    total_depenses = depenses + autres_depenses
-                    couts["charge"] += total_depenses
-                    couts["direct"] += total_depenses
-                    couts["complet"] += total_depenses
-            else:
-                # Pas de dates - calculer sans filtre
-                cursor.execute('''
-                    SELECT 
-                        SUM(COALESCE(cc.montant_charge * t.jours, 0)) AS total_charge,
-                        SUM(COALESCE(cc.cout_production * t.jours, 0)) AS total_direct,
-                        SUM(COALESCE(cc.cout_complet * t.jours, 0)) AS total_complet,
-                        COUNT(CASE WHEN cc.libelle IS NULL THEN 1 END) AS missing_count
-                    FROM temps_travail t
-                    LEFT JOIN categorie_cout cc ON t.categorie = cc.libelle AND t.annee = cc.annee
-                    WHERE t.projet_id = ?
-                ''', (self.projet_id,))
-                couts_result = cursor.fetchone()
+    def _temps_travail_costs(self, cursor, annee_debut=None, annee_fin=None):
+        """
+        Temps de travail du projet valorisé aux trois coûts (chargé, production,
+        complet) avec get_cost_rate, éventuellement limité à des années.
+        Retourne (couts, vrai si une catégorie n'a pas de taux).
+        """
+        if annee_debut and annee_fin:
+            cursor.execute(
+                'SELECT annee, categorie, SUM(jours) FROM temps_travail '
+                'WHERE projet_id = ? AND annee >= ? AND annee <= ? GROUP BY annee, categorie',
+                (self.projet_id, annee_debut, annee_fin))
+        else:
+            cursor.execute(
+                'SELECT annee, categorie, SUM(jours) FROM temps_travail WHERE projet_id = ? GROUP BY annee, categorie',
+                (self.projet_id,))
+        rows = cursor.fetchall()
+        couts = {
+            cle: value_days(rows, cost_type)
+            for cle, cost_type in zip(("charge", "direct", "complet"), COST_TYPES)
+        }
+        missing_data = any(get_cost_rate(annee, categorie) is None for annee, categorie, _ in rows)
+        return couts, missing_data
+
+    def _compute_budget(self, cursor):
+        """Calcule les coûts du budget (chargé, production, complet) du projet"""
+        # Récupérer les dates du projet pour filtrer
+        cursor.execute('SELECT date_debut, date_fin FROM projets WHERE id = ?', (self.projet_id,))
+        dates_projet = cursor.fetchone()
+        date_debut_str = dates_projet[0] if dates_projet else None
+        date_fin_str = dates_projet[1] if dates_projet else None
+        
+        # OPTIMISATION: Calcul des coûts avec filtrage par période comme compte_resultat_display
+        if date_debut_str and date_fin_str:
+            try:
+                import datetime
+                debut_projet = datetime.datetime.strptime(date_debut_str, '%m/%Y')
+                fin_projet = datetime.datetime.strptime(date_fin_str, '%m/%Y')
                 
-                couts = {
-                    "charge": couts_result[0] or 0,
-                    "direct": couts_result[1] or 0,
-                    "complet": couts_result[2] or 0
-                }
-                missing_data = (couts_result[3] or 0) > 0
+                # Même redistribution mensuelle que compte_resultat_display
+                couts = self._calculate_costs_for_period(cursor, self.projet_id, debut_projet, fin_projet)
+                missing_data = False
+                
+                # Ajouter dépenses filtrées par période (2 requêtes séparées)
+                annee_debut = debut_projet.year
+                annee_fin = fin_projet.year
+                
+                cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE projet_id = ? AND annee >= ? AND annee <= ?',
+                               (self.projet_id, annee_debut, annee_fin))
+                depenses = cursor.fetchone()[0] or 0
+                
+                cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM autres_depenses WHERE projet_id = ? AND annee >= ? AND annee <= ?',
+                               (self.projet_id, annee_debut, annee_fin))
+                autres_depenses = cursor.fetchone()[0] or 0
+                
+                total_depenses = depenses + autres_depenses
+                couts["charge"] += total_depenses
+                couts["direct"] += total_depenses
+                couts["complet"] += total_depenses
+            except Exception:
+                # En cas d'erreur, calculer sans filtre
+                couts, missing_data = self._temps_travail_costs(cursor)
                 
                 # Ajouter dépenses sans filtre (2 requêtes séparées)
                 cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE projet_id = ?', (self.projet_id,))
@@ -1425,7 +1337,34 @@ class ProjectDetailsDialog(QDialog):
                 couts["charge"] += total_depenses
                 couts["direct"] += total_depenses
                 couts["complet"] += total_depenses
+        else:
+            # Pas de dates - calculer sans filtre
+            couts, missing_data = self._temps_travail_costs(cursor)
+            
+            # Ajouter dépenses sans filtre (2 requêtes séparées)
+            cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM depenses WHERE projet_id = ?', (self.projet_id,))
+            depenses = cursor.fetchone()[0] or 0
+            
+            cursor.execute('SELECT COALESCE(SUM(montant), 0) FROM autres_depenses WHERE projet_id = ?', (self.projet_id,))
+            autres_depenses = cursor.fetchone()[0] or 0
+            
+            total_depenses = depenses + autres_depenses
+            couts["charge"] += total_depenses
+            couts["direct"] += total_depenses
+            couts["complet"] += total_depenses
+
+        return couts, missing_data
 
+    def refresh_budget(self):
+        """Recalcule et met à jour les coûts du budget (version optimisée)."""
+        # Vider les caches pour forcer le recalcul avec les nouvelles données
+        self._subvention_data_cache.clear()
+        self._redistribution_cache.clear()
+        
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            couts, missing_data = self._cached_section(cursor, 'budget', self._compute_budget)
+            
             # Mise à jour des labels avec alignement
             cout_charge_label = self.budget_vbox.itemAt(1).widget()
             cout_charge_label.setText(f"Coût chargé     : {format_montant_aligne(couts['charge'])}")
@@ -1451,7 +1390,31 @@ class ProjectDetailsDialog(QDialog):
                 has_subventions = cursor.fetchone()[0] > 0
                 
                 if not has_subventions:
-                    self.refresh_cir(0)
+                    self.refresh_cir()
+
+    def _compute_subventions(self, cursor):
+        """Calcule le total des subventions et le détail de chaque subvention du projet.
+        
+        Les montants sont ceux de cir_calculation (règles du compte de résultat),
+        sur les mois du projet.
+        Retourne (total_subventions, lignes) ou None si le projet n'a pas de subvention
+        ou pas de dates valides.
+        """
+        from cir_calculation import load_cir_inputs, project_amounts, subventions_par_subvention
+
+        inputs = load_cir_inputs(cursor, self.projet_id)
+        if inputs is None or not inputs['subventions']:
+            return None
+
+        total_subventions = 0
+        lignes = []
+        for data, mensuel, eligibles in subventions_par_subvention(inputs, project_amounts(inputs)):
+            montant_total_estime = sum(mensuel.values())
+            total_subventions += montant_total_estime
+            lignes.append((data['nom'], data['mode_simplifie'], data['taux'], data['montant_subvention_max'],
+                           data['depenses_eligibles_max'], sum(eligibles.values()), montant_total_estime))
+
+        return total_subventions, lignes
 
     def refresh_subventions(self):
         """Affiche les montants des subventions sous forme de tableau (recalcule avec la logique de répartition)"""
@@ -1459,9 +1422,6 @@ class ProjectDetailsDialog(QDialog):
         self._subvention_data_cache.clear()
         self._redistribution_cache.clear()
         
-        # Forcer le traitement des événements UI pour fluidité
-        QApplication.instance().processEvents()
-        
         # Supprimer les anciens labels de subventions (s'ils existent)
         while self.budget_vbox.count() > 4:  # Garder seulement les 4 premiers items (titre + 3 coûts)
             item = self.budget_vbox.takeAt(self.budget_vbox.count() - 1)
@@ -1470,227 +1430,100 @@ class ProjectDetailsDialog(QDialog):
 
         with get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Récupérer toutes les subventions pour ce projet avec leurs paramètres
-            try:
-                cursor.execute('''
-                    SELECT nom, mode_simplifie, montant_forfaitaire, depenses_temps_travail, coef_temps_travail, 
-                           depenses_externes, coef_externes, depenses_autres_achats, coef_autres_achats, 
-                           depenses_dotation_amortissements, coef_dotation_amortissements, cd, taux,
-                           date_debut_subvention, date_fin_subvention, montant_subvention_max, depenses_eligibles_max
-                    FROM subventions 
-                    WHERE projet_id = ?
-                ''', (self.projet_id,))
-                subventions = cursor.fetchall()
-            except sqlite3.OperationalError:
-                # Fallback pour les anciennes bases de données
-                try:
-                    cursor.execute('''
-                        SELECT nom, mode_simplifie, montant_forfaitaire, depenses_temps_travail, coef_temps_travail, 
-                               depenses_externes, coef_externes, depenses_autres_achats, coef_autres_achats, 
-                               depenses_dotation_amortissements, coef_dotation_amortissements, cd, taux
-                        FROM subventions 
-                        WHERE projet_id = ?
-                    ''', (self.projet_id,))
-                    # Ajouter des valeurs par défaut pour les colonnes manquantes
-                    subventions = [list(row) + [None, None, 0, 0] for row in cursor.fetchall()]
-                except sqlite3.OperationalError:
-                    subventions = []
-
-            if not subventions:
-                return
+            resultat = self._cached_section(cursor, 'subventions', self._compute_subventions)
 
-            # Récupérer les dates du projet pour déterminer les années à calculer
-            cursor.execute('SELECT date_debut, date_fin FROM projets WHERE id = ?', (self.projet_id,))
-            date_row = cursor.fetchone()
-            
-            if not date_row or not date_row[0] or not date_row[1]:
-                return
+        if resultat is None:
+            return
+        _, lignes = resultat
+
+        # Ajouter un séparateur et titre
+        self.budget_vbox.addWidget(QLabel(""))
+        self.budget_vbox.addWidget(QLabel("<b>Subventions :</b>"))
+
+        # Créer le tableau des subventions
+        subv_table = QTableWidget()
+        subv_table.setRowCount(len(lignes))
+        subv_table.setColumnCount(6)
+        
+        # Définir les en-têtes avec sauts de ligne pour réduire la largeur
+        headers = ["Nom", "Coût éligible\nmax", "Aide\nmax", "Taux", "Coût éligible\ncourant", "Subvention\nattendue"]
+        subv_table.setHorizontalHeaderLabels(headers)
+        
+        # Ajuster la taille du tableau - largeur réduite
+        subv_table.setMaximumHeight(120 + len(lignes) * 25)  # Hauteur adaptative
+        subv_table.setMinimumHeight(60 + len(lignes) * 25)
+        subv_table.setMinimumWidth(500)  # Largeur réduite
+        subv_table.setMaximumWidth(550)  # Largeur maximum pour rester compact
+        
+        # Configurer l'apparence du tableau
+        subv_table.setAlternatingRowColors(True)
+        subv_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        subv_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        
+        # Style du tableau
+        subv_table.setStyleSheet("""
+            QHeaderView::section {
+                font-size: 9px;
+                font-weight: bold;
+                padding: 2px;
+                background-color: #f0f0f0;
+                border: 1px solid #d0d0d0;
+                text-align: center;
+            }
+            QTableWidget {
+                font-size: 9px;
+            }
+        """)
+        
+        # Ajuster automatiquement la largeur des colonnes
+        header = subv_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)  # Nom
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)  # Coût éligible max
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)  # Aide max
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Fixed)  # Taux
+        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)  # Coût éligible courant
+        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Fixed)  # Subvention attendue
+        
+        # Définir les largeurs de colonnes
+        subv_table.setColumnWidth(0, 80)   # Nom
+        subv_table.setColumnWidth(1, 85)   # Coût éligible max
+        subv_table.setColumnWidth(2, 75)   # Aide max
+        subv_table.setColumnWidth(3, 50)   # Taux
+        subv_table.setColumnWidth(4, 100)  # Coût éligible courant
+        subv_table.setColumnWidth(5, 100)  # Subvention attendue
+
+        for row, (nom, mode_simplifie, taux, montant_max, depenses_max,
+                  assiette_totale_courante, montant_total_estime) in enumerate(lignes):
+            # Nom de la subvention
+            subv_table.setItem(row, 0, QTableWidgetItem(nom or ""))
+            
+            # Coût éligible max
+            if mode_simplifie:
+                subv_table.setItem(row, 1, QTableWidgetItem("---"))
+            else:
+                subv_table.setItem(row, 1, QTableWidgetItem(format_montant(depenses_max) if depenses_max and depenses_max > 0 else "Illimité"))
             
-            try:
-                import datetime
-                debut_projet = datetime.datetime.strptime(date_row[0], '%m/%Y')
-                fin_projet = datetime.datetime.strptime(date_row[1], '%m/%Y')
-                # Calculer les années du projet
-                annees_projet = list(range(debut_projet.year, fin_projet.year + 1))
-            except ValueError:
-                return
+            # Aide max
+            subv_table.setItem(row, 2, QTableWidgetItem(format_montant(montant_max) if montant_max and montant_max > 0 else "Illimité"))
 
-            # Ajouter un séparateur et titre
-            self.budget_vbox.addWidget(QLabel(""))
-            self.budget_vbox.addWidget(QLabel("<b>Subventions :</b>"))
-
-            # Créer le tableau des subventions
-            subv_table = QTableWidget()
-            subv_table.setRowCount(len(subventions))
-            subv_table.setColumnCount(6)
-            
-            # Définir les en-têtes avec sauts de ligne pour réduire la largeur
-            headers = ["Nom", "Coût éligible\nmax", "Aide\nmax", "Taux", "Coût éligible\ncourant", "Subvention\nattendue"]
-            subv_table.setHorizontalHeaderLabels(headers)
-            
-            # Ajuster la taille du tableau - largeur réduite
-            subv_table.setMaximumHeight(120 + len(subventions) * 25)  # Hauteur adaptative
-            subv_table.setMinimumHeight(60 + len(subventions) * 25)
-            subv_table.setMinimumWidth(500)  # Largeur réduite
-            subv_table.setMaximumWidth(550)  # Largeur maximum pour rester compact
-            
-            # Configurer l'apparence du tableau
-            subv_table.setAlternatingRowColors(True)
-            subv_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-            subv_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-            
-            # Style du tableau
-            subv_table.setStyleSheet("""
-                QHeaderView::section {
-                    font-size: 9px;
-                    font-weight: bold;
-                    padding: 2px;
-                    background-color: #f0f0f0;
-                    border: 1px solid #d0d0d0;
-                    text-align: center;
-                }
-                QTableWidget {
-                    font-size: 9px;
-                }
-            """)
+            # Taux
+            subv_table.setItem(row, 3, QTableWidgetItem(f"{taux:.1f}%".replace('.', ',') if taux else "0,0%"))
             
-            # Ajuster automatiquement la largeur des colonnes
-            header = subv_table.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)  # Nom
-            header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)  # Coût éligible max
-            header.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)  # Aide max
-            header.setSectionResizeMode(3, QHeaderView.ResizeMode.Fixed)  # Taux
-            header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)  # Coût éligible courant
-            header.setSectionResizeMode(5, QHeaderView.ResizeMode.Fixed)  # Subvention attendue
-            
-            # Définir les largeurs de colonnes
-            subv_table.setColumnWidth(0, 80)   # Nom
-            subv_table.setColumnWidth(1, 85)   # Coût éligible max
-            subv_table.setColumnWidth(2, 75)   # Aide max
-            subv_table.setColumnWidth(3, 50)   # Taux
-            subv_table.setColumnWidth(4, 100)  # Coût éligible courant
-            subv_table.setColumnWidth(5, 100)  # Subvention attendue
-
-            # UTILISER EXACTEMENT LA MÊME MÉTHODE QUE LE COMPTE DE RÉSULTAT
-            # Calculer le TOTAL des subventions avec la méthode du compte de résultat
-            from compte_resultat_display import CompteResultatDisplay
-            temp_compte_resultat = CompteResultatDisplay(None, {
-                'project_ids': [self.projet_id], 
-                'years': annees_projet,
-                'period_type': 'yearly',
-                'granularity': 'yearly',
-                'cost_type': 'montant_charge'
-            })
-            
-            # Calculer le total global en utilisant EXACTEMENT la même méthode que le compte de résultat
-            total_subventions = 0
-            projet_info = (date_row[0], date_row[1])
-            
-            for annee in annees_projet:
-                for mois in range(1, 13):
-                    mois_date = datetime.datetime(annee, mois, 1)
-                    if debut_projet <= mois_date <= fin_projet:
-                        # Appeler EXACTEMENT la même fonction que le compte de résultat
-                        subv_mensuelle = temp_compte_resultat.calculate_smart_distributed_subvention(
-                            cursor, self.projet_id, annee, mois, projet_info
-                        )
-                        total_subventions += subv_mensuelle
-            
-            # Maintenant calculer chaque subvention individuellement pour l'affichage
-            for row, subv in enumerate(subventions):
-                (nom, mode_simplifie, montant_forfaitaire, dep_temps, coef_temps, dep_ext, coef_ext, 
-                 dep_autres, coef_autres, dep_amort, coef_amort, cd, taux, 
-                 date_debut_subv, date_fin_subv, montant_max, depenses_max) = subv
-                
-                # Construire le dictionnaire de données de subvention
-                subvention_data = {
-                    'nom': nom,
-                    'mode_simplifie': mode_simplifie or 0,
-                    'montant_forfaitaire': montant_forfaitaire or 0,
-                    'depenses_temps_travail': dep_temps or 0,
-                    'coef_temps_travail': coef_temps or 1,
-                    'depenses_externes': dep_ext or 0,
-                    'coef_externes': coef_ext or 1,
-                    'depenses_autres_achats': dep_autres or 0,
-                    'coef_autres_achats': coef_autres or 1,
-                    'depenses_dotation_amortissements': dep_amort or 0,
-                    'coef_dotation_amortissements': coef_amort or 1,
-                    'cd': cd or 1,
-                    'taux': taux or 100,
-                    'date_debut_subvention': date_debut_subv,
-                    'date_fin_subvention': date_fin_subv,
-                    'montant_subvention_max': montant_max,
-                    'depenses_eligibles_max': depenses_max
-                }
-                
-                # Calculer le montant de cette subvention avec la même méthode
-                montant_total_estime = 0
-                assiette_totale_courante = 0
-                
-                # Calculer les années de la période de subvention
-                if date_debut_subv and date_fin_subv:
-                    try:
-                        debut_subv = datetime.datetime.strptime(date_debut_subv, '%m/%Y')
-                        fin_subv = datetime.datetime.strptime(date_fin_subv, '%m/%Y')
-                        annees_subvention = list(range(debut_subv.year, fin_subv.year + 1))
-                    except ValueError:
-                        annees_subvention = annees_projet
-                else:
-                    annees_subvention = annees_projet
-                
-                for annee in annees_subvention:
-                    for mois in range(1, 13):
-                        mois_date = datetime.datetime(annee, mois, 1)
-                        if debut_projet <= mois_date <= fin_projet:
-                            # Utiliser la même méthode que calculate_smart_distributed_subvention
-                            if date_debut_subv and date_fin_subv:
-                                montant_mensuel = temp_compte_resultat.calculate_subvention_with_redistribution(
-                                    cursor, self.projet_id, subvention_data, annee, mois, date_debut_subv, date_fin_subv
-                                )
-                            else:
-                                montant_mensuel = temp_compte_resultat.calculate_monthly_subvention_fallback(
-                                    cursor, self.projet_id, subvention_data, annee, mois, projet_info
-                                )
-                            
-                            montant_total_estime += montant_mensuel
-                            
-                            # Calculer l'assiette pour affichage
-                            assiette_mensuelle = temp_compte_resultat.calculate_period_eligible_expenses_with_redistribution(
-                                cursor, self.projet_id, subvention_data, annee, mois
-                            )
-                            assiette_totale_courante += assiette_mensuelle
-                
-                # Nom de la subvention
-                subv_table.setItem(row, 0, QTableWidgetItem(nom or ""))
-                
-                # Coût éligible max
-                if mode_simplifie:
-                    subv_table.setItem(row, 1, QTableWidgetItem("---"))
-                else:
-                    subv_table.setItem(row, 1, QTableWidgetItem(format_montant(depenses_max) if depenses_max and depenses_max > 0 else "Illimité"))
-                
-                # Aide max
-                subv_table.setItem(row, 2, QTableWidgetItem(format_montant(montant_max) if montant_max and montant_max > 0 else "Illimité"))
-
-                # Taux
-                subv_table.setItem(row, 3, QTableWidgetItem(f"{taux:.1f}%".replace('.', ',') if taux else "0,0%"))
-                
-                # Coût éligible courant
-                if mode_simplifie:
-                    subv_table.setItem(row, 4, QTableWidgetItem("---"))
-                else:
-                    subv_table.setItem(row, 4, QTableWidgetItem(format_montant(assiette_totale_courante)))
-                
-                # Subvention attendue
-                subv_table.setItem(row, 5, QTableWidgetItem(format_montant(montant_total_estime)))
+            # Coût éligible courant
+            if mode_simplifie:
+                subv_table.setItem(row, 4, QTableWidgetItem("---"))
+            else:
+                subv_table.setItem(row, 4, QTableWidgetItem(format_montant(assiette_totale_courante)))
+            
+            # Subvention attendue
+            subv_table.setItem(row, 5, QTableWidgetItem(format_montant(montant_total_estime)))
 
-            # Ajouter le tableau au layout
-            self.budget_vbox.addWidget(subv_table)
+        # Ajouter le tableau au layout
+        self.budget_vbox.addWidget(subv_table)
 
-            # Calculer et afficher le CIR si le projet l'a activé
-            if self.has_cir_activated():
-                self.refresh_cir(total_subventions)
+        # Calculer et afficher le CIR si le projet l'a activé
+        if self.has_cir_activated():
+            self.refresh_cir()
 
     def refresh_project_data(self):
         """Rafraîchit toutes les données du projet dans la page de détails"""
@@ -1865,19 +1698,12 @@ class ProjectDetailsDialog(QDialog):
             if not categorie_code:
                 continue
             
-            # Récupérer le coût pour cette catégorie
-            cursor.execute("""
-                SELECT montant_charge 
-                FROM categorie_cout 
-                WHERE categorie = ? AND annee = ?
-            """, (categorie_code, year))
-            
-            cout_row = cursor.fetchone()
-            if cout_row and cout_row[0]:
-                montant_charge = float(cout_row[0])
+            # Coût pour cette catégorie
+            montant_charge = get_cost_rate(year, categorie_code)
+            if montant_charge:
                 # Redistribuer les jours sur tous les mois du projet
                 jours_par_mois = jours / total_mois
-                cout_total += jours_par_mois * montant_charge
+                cout_total += jours_par_mois * float(montant_charge)
         
         return cout_total
 
@@ -1926,51 +1752,12 @@ class ProjectDetailsDialog(QDialog):
             return float(total_annee)
 
     def calculate_amortissements_for_period(self, cursor, project_id, year, month):
-        """Calcule les amortissements pour une période"""
-        cursor.execute("""
-            SELECT montant, date_achat, duree 
-            FROM investissements 
-            WHERE projet_id = ?
-        """, (project_id,))
-        
-        amortissements_total = 0
-        
-        for montant, date_achat, duree in cursor.fetchall():
-            try:
-                import datetime
-                # Convertir la date d'achat en datetime
-                achat_date = datetime.datetime.strptime(date_achat, '%m/%Y')
-                
-                # La dotation commence le mois suivant l'achat
-                debut_amort = achat_date.replace(day=1)
-                debut_amort = datetime.datetime(debut_amort.year, debut_amort.month, 1) + datetime.timedelta(days=32)
-                debut_amort = debut_amort.replace(day=1)
-                
-                # Calculer la dotation mensuelle
-                dotation_mensuelle = float(montant) / (int(duree) * 12)
-                
-                if month is not None:
-                    # Pour un mois spécifique
-                    periode_demandee = datetime.datetime(year, month, 1)
-                    
-                    # Vérifier si ce mois est dans la période d'amortissement
-                    fin_amort = datetime.datetime(debut_amort.year + int(duree), debut_amort.month, 1)
-                    
-                    if debut_amort <= periode_demandee < fin_amort:
-                        amortissements_total += dotation_mensuelle
-                else:
-                    # Pour toute l'année
-                    for m in range(1, 13):
-                        periode_m = datetime.datetime(year, m, 1)
-                        fin_amort = datetime.datetime(debut_amort.year + int(duree), debut_amort.month, 1)
-                        
-                        if debut_amort <= periode_m < fin_amort:
-                            amortissements_total += dotation_mensuelle
-                            
-            except Exception:
-                continue
-        
-        return amortissements_total
+        """Calcule les amortissements pour un mois (ou toute l'année si month est None)"""
+        if month is not None:
+            debut = fin = month_key(year, month)
+        else:
+            debut, fin = month_key(year, 1), month_key(year, 12)
+        return amortissements_between(cursor, project_id, debut, fin)
 
     def calculate_temps_travail_real_for_month(self, cursor, project_id, year, month):
         """Calcule le coût du temps de travail RÉEL pour un mois spécifique (sans redistribution)"""
@@ -1998,17 +1785,10 @@ class ProjectDetailsDialog(QDialog):
             if not categorie_code:
                 continue
             
-            # Récupérer le coût pour cette catégorie et cette année
-            cursor.execute("""
-                SELECT montant_charge 
-                FROM categorie_cout 
-                WHERE categorie = ? AND annee = ?
-            """, (categorie_code, year))
-            
-            cout_row = cursor.fetchone()
-            if cout_row and cout_row[0]:
-                montant_charge = float(cout_row[0])
-                cout_total += jours * montant_charge
+            # Coût pour cette catégorie et cette année
+            montant_charge = get_cost_rate(year, categorie_code)
+            if montant_charge:
+                cout_total += jours * float(montant_charge)
             else:
                 # Valeur par défaut si pas de coût défini
                 cout_total += jours * 500
@@ -2019,12 +1799,9 @@ class ProjectDetailsDialog(QDialog):
         """Ouvre l'aperçu d'impression de la page des détails du projet"""
         try:
             from PyQt6.QtPrintSupport import QPrintPreviewDialog, QPrinter
-            from PyQt6.QtGui import QTextDocument
-            from PyQt6.QtCore import QMarginsF
-            import datetime
             
-            # Créer le document HTML
-            html_content = self.generate_print_html()
+            # Données lues une fois, le document est redessiné à chaque aperçu
+            print_data = self.collect_print_data()
             
             # Créer l'objet printer avec configuration minimale
             printer = QPrinter()
@@ -2040,7 +1817,7 @@ class ProjectDetailsDialog(QDialog):
             preview_dialog.setWindowTitle("Aperçu d'impression - Détails du projet")
             
             # Connecter le signal pour générer le contenu
-            preview_dialog.paintRequested.connect(lambda: self.print_document(printer, html_content))
+            preview_dialog.paintRequested.connect(lambda device: self.print_document(device, print_data))
             
             # Redimensionner la fenêtre d'aperçu
             screen = preview_dialog.screen().geometry()
@@ -2063,17 +1840,15 @@ class ProjectDetailsDialog(QDialog):
                 f"Erreur lors de l'ouverture de l'aperçu d'impression :\n{str(e)}"
             )
 
-    def print_document(self, printer, html_content):
-        """Imprime le document HTML sur l'imprimante/PDF"""
-        from PyQt6.QtGui import QTextDocument
+    def print_document(self, printer, print_data):
+        """Dessine la fiche projet sur l'imprimante/PDF"""
+        from pdf_renderer import paged_document
         
-        document = QTextDocument()
-        document.setHtml(html_content)
-        document.print(printer)
+        with paged_document(printer, footer="Document généré automatiquement par le système de gestion de budget") as pdf:
+            self.draw_print_document(pdf, print_data)
 
-    def generate_print_html(self):
-        """Génère le contenu HTML formaté pour l'impression"""
-        # Récupérer toutes les données du projet
+    def collect_print_data(self):
+        """Récupère toutes les données imprimées de la fiche projet"""
         with get_connection() as conn:
             cursor = conn.cursor()
             
@@ -2109,50 +1884,22 @@ class ProjectDetailsDialog(QDialog):
             actualites = cursor.fetchall()
             
             # Images
-            cursor.execute('SELECT nom, data FROM images WHERE projet_id=?', (self.projet_id,))
-            images = cursor.fetchall()
+            images = _project_images(cursor, self.projet_id)
             
             # Calcul des coûts avec filtre sur les dates du projet
-            import datetime as dt_module
             annee_debut = None
             annee_fin = None
             if date_debut and date_fin:
                 try:
-                    debut_parsed = dt_module.datetime.strptime(date_debut, '%m/%Y')
-                    fin_parsed = dt_module.datetime.strptime(date_fin, '%m/%Y')
+                    debut_parsed = datetime.datetime.strptime(date_debut, '%m/%Y')
+                    fin_parsed = datetime.datetime.strptime(date_fin, '%m/%Y')
                     annee_debut = debut_parsed.year
                     annee_fin = fin_parsed.year
                 except:
                     pass
             
-            # Calcul optimisé avec JOIN et filtre sur années
-            if annee_debut and annee_fin:
-                cursor.execute('''
-                    SELECT 
-                        SUM(COALESCE(cc.montant_charge * t.jours, 0)) AS total_charge,
-                        SUM(COALESCE(cc.cout_production * t.jours, 0)) AS total_direct,
-                        SUM(COALESCE(cc.cout_complet * t.jours, 0)) AS total_complet
-                    FROM temps_travail t
-                    LEFT JOIN categorie_cout cc ON t.categorie = cc.libelle AND t.annee = cc.annee
-                    WHERE t.projet_id = ? AND t.annee >= ? AND t.annee <= ?
-                ''', (self.projet_id, annee_debut, annee_fin))
-            else:
-                cursor.execute('''
-                    SELECT 
-                        SUM(COALESCE(cc.montant_charge * t.jours, 0)) AS total_charge,
-                        SUM(COALESCE(cc.cout_production * t.jours, 0)) AS total_direct,
-                        SUM(COALESCE(cc.cout_complet * t.jours, 0)) AS total_complet
-                    FROM temps_travail t
-                    LEFT JOIN categorie_cout cc ON t.categorie = cc.libelle AND t.annee = cc.annee
-                    WHERE t.projet_id = ?
-                ''', (self.projet_id,))
-            
-            couts_result = cursor.fetchone()
-            couts = {
-                "charge": couts_result[0] or 0,
-                "direct": couts_result[1] or 0,
-                "complet": couts_result[2] or 0
-            }
+            # Temps de travail valorisé, filtré sur les années du projet
+            couts, _ = self._temps_travail_costs(cursor, annee_debut, annee_fin)
 
             # Ajouter les dépenses externes et autres avec filtre
             if annee_debut and annee_fin:
@@ -2179,462 +1926,154 @@ class ProjectDetailsDialog(QDialog):
                 couts["direct"] += montant_autres
                 couts["complet"] += montant_autres
 
-        # Génération du HTML
-        from datetime import datetime
-        from utils import format_montant
-        import html as html_module
-        
-        # Fonction pour échapper les caractères HTML
-        def escape_html(text):
-            return html_module.escape(str(text)) if text else ""
-        
-        date_impression = datetime.now().strftime("%d/%m/%Y à %H:%M")
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Détails du projet - {projet[1] if projet[1] else 'Sans nom'}</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    font-size: 12pt;
-                    line-height: 1.4;
-                    margin: 20px;
-                    padding: 0;
-                    max-width: 100%;
-                }}
-                .header {{
-                    text-align: center;
-                    border-bottom: 2px solid #333;
-                    padding-bottom: 10px;
-                    margin-bottom: 20px;
-                }}
-                .project-title {{
-                    font-size: 18pt;
-                    font-weight: bold;
-                    color: #333;
-                    margin-bottom: 5px;
-                }}
-                .project-code {{
-                    font-size: 14pt;
-                    color: #666;
-                    margin-bottom: 5px;
-                }}
-                .print-date {{
-                    font-size: 9pt;
-                    color: #888;
-                    font-style: italic;
-                }}
-                .section {{
-                    margin-bottom: 20px;
-                    break-inside: avoid;
-                }}
-                .section-title {{
-                    font-size: 14pt;
-                    font-weight: bold;
-                    color: #333;
-                    border-bottom: 1px solid #ccc;
-                    padding-bottom: 5px;
-                    margin-bottom: 10px;
-                }}
-                .info-grid {{
-                    display: table;
-                    width: 100%;
-                    margin-bottom: 15px;
-                }}
-                .info-grid > div {{
-                    display: table-cell;
-                    width: 50%;
-                    vertical-align: top;
-                    padding-right: 20px;
-                }}
-                .info-item {{
-                    margin-bottom: 8px;
-                }}
-                .info-label {{
-                    font-weight: bold;
-                    color: #333;
-                }}
-                .details-box {{
-                    background-color: #f9f9f9;
-                    border: 1px solid #ddd;
-                    padding: 10px;
-                    border-radius: 4px;
-                    margin-bottom: 10px;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-bottom: 15px;
-                }}
-                th, td {{
-                    border: 1px solid #ddd;
-                    padding: 8px;
-                    text-align: left;
-                }}
-                th {{
-                    background-color: #f2f2f2;
-                    font-weight: bold;
-                }}
-                .budget-table {{
-                    width: 50%;
-                }}
-                .budget-table td:last-child {{
-                    text-align: right;
-                    font-family: 'Courier New', monospace;
-                }}
-                .actualites-table {{
-                    margin-top: 10px;
-                }}
-                .actualites-table td:first-child {{
-                    width: 120px;
-                    text-align: center;
-                    font-size: 9pt;
-                }}
-                .footer {{
-                    margin-top: 30px;
-                    text-align: center;
-                    font-size: 9pt;
-                    color: #666;
-                    border-top: 1px solid #ccc;
-                    padding-top: 10px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <div class="project-title">{escape_html(projet[1]) if projet[1] else 'Projet sans nom'}</div>
-                <div class="project-code">Code: {escape_html(projet[0]) if projet[0] else 'Non défini'}</div>
-                <div class="print-date">Imprimé le {date_impression}</div>
-            </div>
-
-            <div class="section">
-                <div class="section-title">Informations générales</div>
-                <div class="info-grid">
-                    <div>
-                        <div class="info-item">
-                            <span class="info-label">Date de début:</span> {escape_html(projet[3]) if projet[3] else 'Non définie'}
-                        </div>
-                        <div class="info-item">
-                            <span class="info-label">Date de fin:</span> {escape_html(projet[4]) if projet[4] else 'Non définie'}
-                        </div>
-                        <div class="info-item">
-                            <span class="info-label">État:</span> {escape_html(projet[7]) if projet[7] else 'Non défini'}
-                        </div>
-                        <div class="info-item">
-                            <span class="info-label">Chef de projet:</span> {escape_html(projet[6]) if projet[6] else 'Non défini'}
-                        </div>
-                    </div>
-                    <div>
-                        <div class="info-item">
-                            <span class="info-label">CIR:</span> {'Oui' if projet[8] else 'Non'}
-                        </div>
-                        <div class="info-item">
-                            <span class="info-label">Subvention:</span> {'Oui' if projet[9] else 'Non'}
-                        </div>
-                        {f"<div class='info-item'><span class='info-label'>Thème principal:</span> {escape_html(projet[10])}</div>" if projet[10] else ""}
-                        {f"<div class='info-item'><span class='info-label'>Thèmes:</span> {escape_html(', '.join(themes))}</div>" if themes else ""}
-                    </div>
-                </div>
-                
-                {f'''<div class="details-box">
-                    <div class="info-label">Détails du projet:</div>
-                    <div>{escape_html(projet[2]) if projet[2] else "Aucun détail"}</div>
-                </div>''' if projet[2] else ''}
-                
-                {f'''<div class="details-box">
-                    <div class="info-label">Livrables:</div>
-                    <div>{escape_html(projet[5]) if projet[5] else "Aucun livrable défini"}</div>
-                </div>''' if projet[5] else ''}
-            </div>
-        """
-        
-        # Section Équipe
-        if equipe:
-            equipe_par_direction = {}
-            for direction, type_, nombre in equipe:
-                if nombre > 0:
-                    if direction not in equipe_par_direction:
-                        equipe_par_direction[direction] = []
-                    equipe_par_direction[direction].append(f"{type_}: {nombre}")
-            
-            if equipe_par_direction:
-                html += '''
-                <div class="section">
-                    <div class="section-title">Équipe</div>
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>Direction</th>
-                                <th>Composition</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                '''
-                for direction, membres in equipe_par_direction.items():
-                    html += f'''
-                            <tr>
-                                <td>{escape_html(direction)}</td>
-                                <td>{escape_html(", ".join(membres))}</td>
-                            </tr>
-                    '''
-                html += '''
-                        </tbody>
-                    </table>
-                </div>
-                '''
-
-        # Section Investissements
-        if investissements:
-            html += '''
-            <div class="section">
-                <div class="section-title">Investissements</div>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Montant</th>
-                            <th>Date d'achat</th>
-                            <th>Durée (années)</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-            '''
-            for montant, date_achat, duree in investissements:
-                html += f'''
-                        <tr>
-                            <td>{format_montant(montant)}</td>
-                            <td>{escape_html(date_achat)}</td>
-                            <td>{duree}</td>
-                        </tr>
-                '''
-            html += '''
-                    </tbody>
-                </table>
-            </div>
-            '''
-
-        # Section Budget
-        html += f'''
-        <div class="section">
-            <div class="section-title">Budget</div>
-            <table class="budget-table">
-                <thead>
-                    <tr>
-                        <th>Type de coût</th>
-                        <th>Montant</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    <tr>
-                        <td>Coût chargé</td>
-                        <td>{format_montant(couts["charge"])}</td>
-                    </tr>
-                    <tr>
-                        <td>Coût production</td>
-                        <td>{format_montant(couts["direct"])}</td>
-                    </tr>
-                    <tr>
-                        <td>Coût complet</td>
-                        <td>{format_montant(couts["complet"])}</td>
-                    </tr>
-                </tbody>
-            </table>
-        </div>
-        '''
-
-        # Section Subventions
-        if projet[9]:  # Si le projet a des subventions
-            cursor.execute('''
-                SELECT nom, mode_simplifie, montant_forfaitaire, depenses_temps_travail, coef_temps_travail, 
-                       depenses_externes, coef_externes, depenses_autres_achats, coef_autres_achats, 
-                       depenses_dotation_amortissements, coef_dotation_amortissements, cd, taux,
-                       date_debut_subvention, date_fin_subvention, montant_subvention_max, depenses_eligibles_max
-                FROM subventions 
-                WHERE projet_id = ?
-            ''', (self.projet_id,))
-            subventions_data = cursor.fetchall()
-            
-            if subventions_data:
-                html += '''
-                <div class="section">
-                    <div class="section-title">Subventions</div>
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>Nom</th>
-                                <th>Type</th>
-                                <th>Période</th>
-                                <th>Taux</th>
-                                <th>Montant max</th>
-                                <th>Dépenses éligibles max</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                '''
-                
-                for subv in subventions_data:
-                    nom, mode_simplifie, montant_forfaitaire, dep_temps, coef_temps, dep_ext, coef_ext, dep_autres, coef_autres, dep_amort, coef_amort, cd, taux, date_debut, date_fin, montant_max, depenses_max = subv
-                    
-                    type_subv = "Forfaitaire" if mode_simplifie else "Au réel"
-                    periode = f"{date_debut} - {date_fin}" if date_debut and date_fin else "Non définie"
-                    taux_display = f"{taux}%" if taux else "Non défini"
-                    montant_max_display = format_montant(montant_max) if montant_max else "Non défini"
-                    depenses_max_display = format_montant(depenses_max) if depenses_max else "Non défini"
-                    
-                    html += f'''
-                            <tr>
-                                <td>{escape_html(nom)}</td>
-                                <td>{type_subv}</td>
-                                <td>{periode}</td>
-                                <td>{taux_display}</td>
-                                <td>{montant_max_display}</td>
-                                <td>{depenses_max_display}</td>
-                            </tr>
-                    '''
-                
-                html += '''
-                        </tbody>
-                    </table>
-                </div>
-                '''
-
-        # Section CIR
-        if projet[8]:  # Si le projet a le CIR activé
-            # Récupérer les coefficients CIR
-            cursor.execute('SELECT date_debut, date_fin FROM projets WHERE id = ?', (self.projet_id,))
-            date_row = cursor.fetchone()
-            
-            if date_row and date_row[0] and date_row[1]:
+            # Subventions (si le projet en a)
+            subventions = []
+            if projet[9]:
+                cursor.execute('''
+                    SELECT nom, mode_simplifie, taux, date_debut_subvention, date_fin_subvention,
+                           montant_subvention_max, depenses_eligibles_max
+                    FROM subventions 
+                    WHERE projet_id = ?
+                ''', (self.projet_id,))
+                subventions = cursor.fetchall()
+
+            # CIR : taux k3 de la première année du projet (None : pas de section,
+            # 'indisponible' : dates du projet illisibles)
+            cir_taux = None
+            if projet[8] and date_debut and date_fin:
                 try:
-                    import datetime
-                    debut_projet = datetime.datetime.strptime(date_row[0], '%m/%Y')
-                    fin_projet = datetime.datetime.strptime(date_row[1], '%m/%Y')
-                    
-                    # Récupérer les coefficients CIR pour la première année
+                    debut_projet = datetime.datetime.strptime(date_debut, '%m/%Y')
+                    datetime.datetime.strptime(date_fin, '%m/%Y')
                     cursor.execute('SELECT k1, k2, k3 FROM cir_coeffs WHERE annee = ?', (debut_projet.year,))
                     cir_coeffs = cursor.fetchone()
-                    
-                    if cir_coeffs and cir_coeffs[2]:  # k3 existe
-                        k3 = cir_coeffs[2]
-                        taux_cir = k3 * 100
-                        
-                        html += f'''
-                        <div class="section">
-                            <div class="section-title">Crédit d'Impôt Recherche (CIR)</div>
-                            <table class="budget-table">
-                                <thead>
-                                    <tr>
-                                        <th>Information</th>
-                                        <th>Valeur</th>
-                                    </tr>
-                                </thead>
-                                <tbody>
-                                    <tr>
-                                        <td>Statut</td>
-                                        <td>Activé</td>
-                                    </tr>
-                                    <tr>
-                                        <td>Taux applicable</td>
-                                        <td>{taux_cir:.1f}%</td>
-                                    </tr>
-                                    <tr>
-                                        <td>Période d'application</td>
-                                        <td>{date_row[0]} - {date_row[1]}</td>
-                                    </tr>
-                                </tbody>
-                            </table>
-                        </div>
-                        '''
+                    if cir_coeffs and cir_coeffs[2]:
+                        cir_taux = cir_coeffs[2] * 100
                 except:
-                    html += '''
-                    <div class="section">
-                        <div class="section-title">Crédit d'Impôt Recherche (CIR)</div>
-                        <p>CIR activé - Informations détaillées non disponibles</p>
-                    </div>
-                    '''
-
-        # Section Images
-        if images:
-            html += '''
-            <div class="section">
-                <div class="section-title">Images du projet</div>
-                <div style="text-align: center;">
-            '''
-            
-            for nom, data in images:
-                try:
-                    # Convertir les données binaires en base64 pour l'inclusion dans le HTML
-                    import base64
-                    image_base64 = base64.b64encode(data).decode('utf-8')
-                    
-                    # Détecter le type d'image (simple détection basée sur les premiers bytes)
-                    if data.startswith(b'\xFF\xD8\xFF'):
-                        mime_type = 'image/jpeg'
-                    elif data.startswith(b'\x89PNG'):
-                        mime_type = 'image/png'
-                    elif data.startswith(b'GIF'):
-                        mime_type = 'image/gif'
-                    else:
-                        mime_type = 'image/jpeg'  # Par défaut
-                    
-                    html += f'''
-                        <div style="margin: 10px; display: inline-block;">
-                            <p style="font-weight: bold; margin-bottom: 5px;">{escape_html(nom)}</p>
-                            <img src="data:{mime_type};base64,{image_base64}" 
-                                 style="max-width: 300px; max-height: 200px; border: 1px solid #ddd; border-radius: 4px;" 
-                                 alt="{escape_html(nom)}" />
-                        </div>
-                    '''
-                except Exception as e:
-                    # En cas d'erreur, afficher juste le nom de l'image
-                    html += f'''
-                        <div style="margin: 10px; display: inline-block;">
-                            <p style="font-weight: bold;">{escape_html(nom)}</p>
-                            <p style="color: #666; font-style: italic;">Image non disponible</p>
-                        </div>
-                    '''
-            
-            html += '''
-                </div>
-            </div>
-            '''
-
-        # Section Actualités
-        if actualites:
-            html += '''
-            <div class="section">
-                <div class="section-title">Actualités du projet</div>
-                <table class="actualites-table">
-                    <thead>
-                        <tr>
-                            <th>Date</th>
-                            <th>Message</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-            '''
-            for message, date in actualites:
-                html += f'''
-                        <tr>
-                            <td>{escape_html(date)}</td>
-                            <td>{escape_html(message)}</td>
-                        </tr>
-                '''
-            html += '''
-                    </tbody>
-                </table>
-            </div>
-            '''
-
-        html += '''
-            <div class="footer">
-                Document généré automatiquement par le système de gestion de budget
-            </div>
-        </body>
-        </html>
-        '''
-        
-        return html
+                    cir_taux = 'indisponible'
 
+        return {
+            'projet': projet,
+            'themes': themes,
+            'equipe': equipe,
+            'investissements': investissements,
+            'actualites': actualites,
+            'images': images,
+            'couts': couts,
+            'subventions': subventions,
+            'cir_taux': cir_taux,
+        }
+
+    def draw_print_document(self, pdf, print_data):
+        """Dessine la fiche projet section par section"""
+        from PyQt6.QtGui import QImage
+        
+        projet = print_data['projet']
+        date_impression = datetime.datetime.now().strftime("%d/%m/%Y à %H:%M")
+        center = Qt.AlignmentFlag.AlignHCenter
+        right = Qt.AlignmentFlag.AlignRight
+        
+        def section(title):
+            pdf.space(14)
+            pdf.ensure_space(60 * pdf.pt)
+            pdf.text(title, size=14, bold=True, color="#333333")
+            pdf.space(3)
+            pdf.rule("#cccccc", 0.5)
+            pdf.space(6)
+        
+        def info(label, value):
+            pdf.text(f"{label} : {value}", size=11)
+            pdf.space(3)
+        
+        # En-tête
+        pdf.text(projet[1] if projet[1] else 'Projet sans nom', size=18, bold=True, color="#333333", alignment=center)
+        pdf.text(f"Code: {projet[0] if projet[0] else 'Non défini'}", size=14, color="#666666", alignment=center)
+        pdf.text(f"Imprimé le {date_impression}", size=9, italic=True, color="#888888", alignment=center)
+        pdf.space(6)
+        pdf.rule("#333333", 2)
+        
+        # Informations générales
+        section("Informations générales")
+        info("Date de début", projet[3] if projet[3] else 'Non définie')
+        info("Date de fin", projet[4] if projet[4] else 'Non définie')
+        info("État", projet[7] if projet[7] else 'Non défini')
+        info("Chef de projet", projet[6] if projet[6] else 'Non défini')
+        info("CIR", 'Oui' if projet[8] else 'Non')
+        info("Subvention", 'Oui' if projet[9] else 'Non')
+        if projet[10]:
+            info("Thème principal", projet[10])
+        if print_data['themes']:
+            info("Thèmes", ', '.join(print_data['themes']))
+        if projet[2]:
+            pdf.space(6)
+            pdf.text("Détails du projet:", size=11, bold=True)
+            pdf.text(projet[2], size=11)
+        if projet[5]:
+            pdf.space(6)
+            pdf.text("Livrables:", size=11, bold=True)
+            pdf.text(projet[5], size=11)
+        
+        # Équipe
+        equipe_par_direction = {}
+        for direction, type_, nombre in print_data['equipe']:
+            if nombre > 0:
+                equipe_par_direction.setdefault(direction, []).append(f"{type_}: {nombre}")
+        if equipe_par_direction:
+            section("Équipe")
+            pdf.table(["Direction", "Composition"],
+                      [(direction, ", ".join(membres)) for direction, membres in equipe_par_direction.items()],
+                      widths=[0.3, 0.7])
+        
+        # Investissements
+        if print_data['investissements']:
+            section("Investissements")
+            pdf.table(["Montant", "Date d'achat", "Durée (années)"],
+                      [(format_montant(montant), date_achat, duree)
+                       for montant, date_achat, duree in print_data['investissements']])
+        
+        # Budget
+        couts = print_data['couts']
+        section("Budget")
+        pdf.table(["Type de coût", "Montant"],
+                  [("Coût chargé", format_montant(couts["charge"])),
+                   ("Coût production", format_montant(couts["direct"])),
+                   ("Coût complet", format_montant(couts["complet"]))],
+                  widths=[0.3, 0.2], alignments=[Qt.AlignmentFlag.AlignLeft, right])
+        
+        # Subventions
+        if print_data['subventions']:
+            section("Subventions")
+            rows = []
+            for nom, mode_simplifie, taux, date_debut, date_fin, montant_max, depenses_max in print_data['subventions']:
+                rows.append((
+                    nom,
+                    "Forfaitaire" if mode_simplifie else "Au réel",
+                    f"{date_debut} - {date_fin}" if date_debut and date_fin else "Non définie",
+                    f"{taux}%" if taux else "Non défini",
+                    format_montant(montant_max) if montant_max else "Non défini",
+                    format_montant(depenses_max) if depenses_max else "Non défini",
+                ))
+            pdf.table(["Nom", "Type", "Période", "Taux", "Montant max", "Dépenses éligibles max"], rows)
+        
+        # CIR
+        if print_data['cir_taux'] is not None:
+            section("Crédit d'Impôt Recherche (CIR)")
+            if print_data['cir_taux'] != 'indisponible':
+                pdf.table(["Information", "Valeur"],
+                          [("Statut", "Activé"),
+                           ("Taux applicable", f"{print_data['cir_taux']:.1f}%"),
+                           ("Période d'application", f"{projet[3]} - {projet[4]}")],
+                          widths=[0.3, 0.2])
+            else:
+                pdf.text("CIR activé - Informations détaillées non disponibles", size=11)
+        
+        # Images
+        if print_data['images']:
+            section("Images du projet")
+            pdf.images([(nom, QImage.fromData(data)) for nom, data in print_data['images']])
+        
+        # Actualités
+        if print_data['actualites']:
+            section("Actualités du projet")
+            pdf.table(["Date", "Message"],
+                      [(date, message) for message, date in print_data['actualites']],
+                      widths=[0.18, 0.82], alignments=[center, Qt.AlignmentFlag.AlignLeft])
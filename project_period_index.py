@@ -0,0 +1,168 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from database import get_connection
+
+Interval = Tuple[int, int]
+
+
+def parse_period_year(value: Optional[str]) -> Optional[int]:
+    """
+    Retourne l'année d'une date au format 'MM/AAAA', ou None si elle est
+    absente ou mal formatée.
+    """
+    if not value:
+        return None
+    try:
+        return int(value.split("/")[1])
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Fusionne des intervalles d'années [début, fin] (bornes incluses).
+    Deux intervalles contigus (2023-2024 et 2025-2026) sont fusionnés.
+    """
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def expand_intervals(intervals: Iterable[Interval]) -> List[int]:
+    """Liste triée des années couvertes par des intervalles déjà fusionnés."""
+    years: List[int] = []
+    for start, end in intervals:
+        years.extend(range(start, end + 1))
+    return years
+
+
+class ProjectPeriodIndex:
+    """
+    Index en mémoire des périodes des projets.
+
+    Les dates et thèmes de tous les projets sont chargés en deux requêtes ;
+    les unions d'intervalles par thème et par thème principal sont
+    précalculées. Les dialogues de configuration obtiennent ensuite les
+    années couvertes par une sélection sans requête SQL. Appeler refresh()
+    après une modification des projets pour resynchroniser l'index.
+    """
+
+    def __init__(self) -> None:
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Recharge les dates et thèmes de tous les projets."""
+        self.project_ids: List[int] = []
+        self._intervals: Dict[int, Interval] = {}
+        self._has_dates: Set[int] = set()
+        self._start_years: Dict[int, int] = {}
+        self._projects_by_theme: Dict[int, Set[int]] = defaultdict(set)
+        self._projects_by_main_theme: Dict[str, Set[int]] = defaultdict(set)
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, date_debut, date_fin, theme_principal FROM projets")
+            for project_id, date_debut, date_fin, theme_principal in cursor.fetchall():
+                self.project_ids.append(project_id)
+                if theme_principal:
+                    self._projects_by_main_theme[theme_principal].add(project_id)
+                if date_debut is None or date_fin is None:
+                    continue
+                self._has_dates.add(project_id)
+
+                debut_annee = parse_period_year(date_debut)
+                fin_annee = parse_period_year(date_fin)
+                if debut_annee is not None and fin_annee is not None:
+                    self._intervals[project_id] = (debut_annee, fin_annee)
+                # Année de début au format strict MM/AAAA
+                if len(date_debut) == 7 and date_debut[2] == "/" and debut_annee is not None:
+                    self._start_years[project_id] = debut_annee
+
+            cursor.execute("SELECT projet_id, theme_id FROM projet_themes")
+            for project_id, theme_id in cursor.fetchall():
+                self._projects_by_theme[theme_id].add(project_id)
+        finally:
+            conn.close()
+
+        self._theme_intervals = {
+            theme_id: self._merged(project_ids)
+            for theme_id, project_ids in self._projects_by_theme.items()
+        }
+        self._main_theme_intervals = {
+            theme: self._merged(project_ids)
+            for theme, project_ids in self._projects_by_main_theme.items()
+        }
+        self._all_intervals = self._merged(self.project_ids)
+
+    def _merged(self, project_ids: Iterable[int]) -> List[Interval]:
+        return merge_intervals(
+            self._intervals[pid] for pid in project_ids if pid in self._intervals
+        )
+
+    # ------------------------------------------------------------------
+    # Projets d'une sélection
+    # ------------------------------------------------------------------
+    def projects_for_themes(self, theme_ids: Iterable[int]) -> List[int]:
+        """Projets liés à au moins un des thèmes donnés."""
+        project_ids: Set[int] = set()
+        for theme_id in theme_ids:
+            project_ids |= self._projects_by_theme.get(theme_id, set())
+        return sorted(project_ids)
+
+    def projects_for_main_themes(self, themes: Iterable[str]) -> List[int]:
+        """Projets dont le thème principal fait partie de ceux donnés."""
+        project_ids: Set[int] = set()
+        for theme in themes:
+            project_ids |= self._projects_by_main_theme.get(theme, set())
+        return sorted(project_ids)
+
+    def has_dates(self, project_ids: Iterable[int]) -> bool:
+        """Indique si au moins un des projets a ses deux dates renseignées."""
+        return any(pid in self._has_dates for pid in project_ids)
+
+    # ------------------------------------------------------------------
+    # Années couvertes
+    # ------------------------------------------------------------------
+    def years_for_project(self, project_id: int) -> List[int]:
+        interval = self._intervals.get(project_id)
+        return expand_intervals([interval]) if interval else []
+
+    def years_for_projects(self, project_ids: Iterable[int]) -> List[int]:
+        return expand_intervals(self._merged(project_ids))
+
+    def years_for_all_projects(self) -> List[int]:
+        return expand_intervals(self._all_intervals)
+
+    def years_for_themes(self, theme_ids: Iterable[int]) -> List[int]:
+        return expand_intervals(merge_intervals(
+            interval
+            for theme_id in theme_ids
+            for interval in self._theme_intervals.get(theme_id, [])
+        ))
+
+    def years_for_main_themes(self, themes: Iterable[str]) -> List[int]:
+        return expand_intervals(merge_intervals(
+            interval
+            for theme in themes
+            for interval in self._main_theme_intervals.get(theme, [])
+        ))
+
+    def start_years_for_projects(self, project_ids: Iterable[int]) -> List[int]:
+        """Années de début (distinctes, triées) des projets donnés."""
+        return sorted({
+            self._start_years[pid] for pid in project_ids if pid in self._start_years
+        })
+
+
+__all__ = [
+    "ProjectPeriodIndex",
+    "expand_intervals",
+    "merge_intervals",
+    "parse_period_year",
+]
@@ -0,0 +1,144 @@
+import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+from database import get_connection
+
+# (id, code, nom, chef de projet, état)
+ProjectRow = Tuple[int, str, str, str, str]
+
+HEADERS = ('Code projet', 'Nom projet', 'Chef de projet', 'Etat')
+
+# État calculé à partir des colonnes de période entières (annee * 12 + mois)
+# maintenues par triggers : "Futur" avant le mois de début, "Terminé" après le
+# mois de fin, "En cours" sinon ou si les dates sont manquantes/invalides.
+STATUS_SQL = '''
+    CASE
+        WHEN p.periode_debut IS NULL OR p.periode_fin IS NULL THEN 'En cours'
+        WHEN :aujourd_hui < p.periode_debut THEN 'Futur'
+        WHEN :aujourd_hui > p.periode_fin THEN 'Terminé'
+        ELSE 'En cours'
+    END
+'''
+
+
+def fetch_projects(cursor) -> Tuple[List[ProjectRow], List[Tuple[str, int]]]:
+    """
+    Charge la liste des projets avec leur état recalculé en SQL.
+    Retourne (lignes, mises_a_jour) où mises_a_jour contient les couples
+    (nouvel_etat, id) des projets dont l'état en base est obsolète.
+    """
+    today = datetime.date.today()
+    cursor.execute(f'''
+        SELECT p.id, p.code, p.nom, c.nom || ' ' || c.prenom AS chef_complet,
+               p.etat, {STATUS_SQL} AS etat_auto
+        FROM projets p
+        LEFT JOIN chefs_projet c ON p.chef = c.id
+        ORDER BY p.id DESC
+    ''', {'aujourd_hui': today.year * 12 + today.month})
+
+    rows = []
+    updates = []
+    for pid, code, nom, chef_complet, etat, etat_auto in cursor.fetchall():
+        if etat_auto != etat:
+            updates.append((etat_auto, pid))
+        rows.append((pid, str(code), str(nom), str(chef_complet) if chef_complet else "Non assigné", etat_auto))
+    return rows, updates
+
+
+def refresh_project_states() -> List[ProjectRow]:
+    """
+    Recalcule l'état de tous les projets, enregistre les changements en une
+    seule requête (executemany) et retourne les lignes à afficher.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        rows, updates = fetch_projects(cursor)
+        if updates:
+            cursor.executemany('UPDATE projets SET etat = ? WHERE id = ?', updates)
+            conn.commit()
+    finally:
+        conn.close()
+    return rows
+
+
+class ProjectTableModel(QAbstractTableModel):
+    """
+    Modèle de la liste des projets de la fenêtre principale.
+    set_rows() ne notifie la vue que des lignes modifiées lorsque la liste
+    des projets (et leur ordre) n'a pas changé.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[ProjectRow] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row[index.column() + 1]
+        if role == Qt.ItemDataRole.UserRole:
+            return row[0]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def set_rows(self, rows: List[ProjectRow]) -> bool:
+        """Met à jour les données. Retourne True si le modèle a été réinitialisé."""
+        if [r[0] for r in rows] != [r[0] for r in self._rows]:
+            self.beginResetModel()
+            self._rows = list(rows)
+            self.endResetModel()
+            return True
+
+        last_column = len(HEADERS) - 1
+        for i, (old, new) in enumerate(zip(self._rows, rows)):
+            if old != new:
+                self._rows[i] = new
+                self.dataChanged.emit(self.index(i, 0), self.index(i, last_column))
+        return False
+
+    def project_at(self, row: int) -> Optional[ProjectRow]:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+
+class ProjectSortFilterProxyModel(QSortFilterProxyModel):
+    """
+    Tri et filtrage (sur toutes les colonnes, insensible à la casse) de la liste
+    des projets. set_project_ids() restreint en plus l'affichage à un ensemble
+    d'identifiants (résultats de la recherche plein texte).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._project_ids: Optional[Set[int]] = None
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setFilterKeyColumn(-1)
+        self.setSortCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+    def set_project_ids(self, project_ids: Optional[Iterable[int]]) -> None:
+        """Restreint la liste aux projets donnés (None : tous les projets)."""
+        self._project_ids = None if project_ids is None else set(project_ids)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._project_ids is not None:
+            project = self.sourceModel().project_at(source_row)
+            if project is None or project[0] not in self._project_ids:
+                return False
+        return super().filterAcceptsRow(source_row, source_parent)
@@ -0,0 +1,257 @@
+"""
+Pack de rapports : comptes de résultat de plusieurs projets et compte
+consolidé, calculés à partir d'un seul chargement des données.
+
+Les données de tous les projets sont lues une fois (SimulationSnapshot,
+puis les recettes et les projets sans dates en une requête chacun). Chaque
+ligne est ensuite calculée en mémoire, période par période, avec les règles
+de CompteResultatDisplay partagées par cir_calculation : un compte du pack
+est celui que l'écran affiche pour la même sélection de projets.
+
+Comme à l'écran, les mois actifs d'une année dépendent de la sélection
+(union des mois des projets, ou toute l'année si un projet n'a pas de
+dates) : ils bornent les colonnes mensuelles et la répartition des recettes
+et des subventions sans dates propres. Le CIR est recalculé par période sur
+l'assiette cumulée des projets CIR (calculate_distributed_cir).
+
+Les projets sans dates valides n'entrent que dans le compte consolidé
+(recettes et subventions datées) ; le compte d'un projet est limité aux
+années de ses dates. benchmarks.consistency vérifie l'égalité avec l'écran.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from cir_calculation import (
+    amortissement_periode, cir_periode, load_subventions, montant_periode,
+    project_amounts, subventions_datees, subventions_periode, temps_travail_mensuel
+)
+from compte_resultat_report import CompteResultatReport
+from database import get_connection
+from month_utils import month_name
+from scenario_simulation import BASELINE, SimulationSnapshot
+import profiling
+
+CONSOLIDATED_LABEL = "Consolidé"
+
+# Postes mensuels propres à chaque projet, indépendants de la sélection
+CUBE_KEYS = ("achats_sous_traitance", "autres_achats", "cout_direct", "nb_jours_total")
+
+
+class ProjectCube(NamedTuple):
+    projet_id: int
+    code: str
+    nom: str
+    cir: bool
+    # Données de load_cir_inputs, None si les dates du projet sont absentes ou invalides
+    inputs: Optional[dict]
+    # Dates absentes : tous les mois de l'année sont actifs pour la sélection
+    sans_dates: bool
+    # année -> mois actifs du projet
+    mois_actifs: Dict[int, List[int]]
+    # cir_calculation.project_amounts au coût chargé (subventions, assiette CIR)
+    montants: dict
+    # poste de CUBE_KEYS -> {(année, mois): montant}
+    mensuel: Dict[str, Dict[Tuple[int, int], float]]
+    # année -> {mois saisi: montant}
+    recettes: Dict[int, Dict[str, float]]
+
+    @property
+    def label(self) -> str:
+        return f"{self.code} - {self.nom}"
+
+    def amount(self, key: str, annee: int, mois: Optional[int] = None) -> float:
+        return montant_periode(self.mensuel[key], annee, mois)
+
+
+class PackReport(NamedTuple):
+    # Libellé du projet, ou CONSOLIDATED_LABEL
+    label: str
+    project_ids: Tuple[int, ...]
+    years: Tuple[int, ...]
+    report: CompteResultatReport
+
+
+def mois_selection(projects: Sequence[ProjectCube], annee: int) -> List[int]:
+    """Mois actifs de l'année pour une sélection, comme get_active_months_for_year."""
+    if any(projet.sans_dates for projet in projects):
+        return list(range(1, 13))
+    return sorted({mois for projet in projects for mois in projet.mois_actifs.get(annee, ())})
+
+
+def _recettes_periode(recettes: Dict[str, float], mois: Optional[int], mois_actifs: Sequence[int]) -> float:
+    """
+    Recettes d'un projet pour l'année ou un mois, comme
+    calculate_redistributed_recettes : une seule saisie dans l'année est
+    répartie sur les mois actifs de la sélection.
+    """
+    if not mois_actifs:
+        return 0.0
+    if len(recettes) == 1 and len(mois_actifs) > 1:
+        total = sum(recettes.values())
+        if total <= 0:
+            return 0.0
+        if mois is None:
+            return total
+        return total / len(mois_actifs) if mois in mois_actifs else 0.0
+    if mois is None:
+        return sum(recettes.values())
+    return recettes.get(month_name(mois), 0.0)
+
+
+class ReportPackData:
+    """
+    Montants des projets sélectionnés, chargés une fois pour un type de
+    coût. reports() en tire les comptes de résultat par projet et consolidé.
+    """
+
+    @profiling.profiled("Pack de rapports (chargement)")
+    def __init__(self, project_ids: Sequence[int], cost_type: str = "cout_production") -> None:
+        self.cost_type = cost_type
+        snapshot = SimulationSnapshot(project_ids)
+        self.coeffs_rows = snapshot.coeffs_rows
+        cost_rate = snapshot.rate_function(BASELINE, cost_type)
+        charge_rate = (cost_rate if cost_type == "montant_charge"
+                       else snapshot.rate_function(BASELINE, "montant_charge"))
+        recettes = self._load_recettes(project_ids)
+
+        self.projects: List[ProjectCube] = []
+        for projet in snapshot.projects:
+            inputs = projet.inputs
+            montants = project_amounts(inputs, charge_rate)
+            mois_actifs = montants['mois_actifs']
+            mensuel = {
+                "achats_sous_traitance": montants['depenses'],
+                "autres_achats": montants['autres_depenses'],
+                "cout_direct": temps_travail_mensuel(inputs['temps_travail'], mois_actifs, cost_rate),
+                "nb_jours_total": temps_travail_mensuel(inputs['temps_travail'], mois_actifs, lambda annee, code: 1.0),
+            }
+            self.projects.append(ProjectCube(
+                projet.projet_id, projet.code, projet.nom, projet.cir, inputs, False, mois_actifs,
+                montants, mensuel, recettes.get(projet.projet_id, {}),
+            ))
+        self.projects.extend(self._load_projects_without_dates(
+            project_ids, {projet.projet_id for projet in self.projects}, recettes))
+        self.projects.sort(key=lambda projet: projet.projet_id)
+
+    @staticmethod
+    def _load_projects_without_dates(project_ids: Sequence[int], loaded, recettes) -> List[ProjectCube]:
+        """
+        Projets non chargés par SimulationSnapshot (dates absentes ou invalides) :
+        à l'écran, seules leurs recettes et leurs subventions datées en mode
+        simplifié comptent, leurs dépenses éligibles étant nulles.
+        """
+        ids = [projet_id for projet_id in project_ids if projet_id not in loaded]
+        if not ids:
+            return []
+        projects = []
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT id, code, nom, cir, date_debut, date_fin FROM projets "
+                f"WHERE id IN ({', '.join('?' for _ in ids)}) ORDER BY id",
+                ids,
+            )
+            for projet_id, code, nom, cir, date_debut, date_fin in cursor.fetchall():
+                montants = {
+                    'subventions_datees': subventions_datees(
+                        load_subventions(cursor, projet_id), lambda data, annee, mois: 0),
+                    'subventions_non_datees': {},
+                }
+                projects.append(ProjectCube(
+                    projet_id, str(code), str(nom), cir == 1, None, not date_debut or not date_fin, {},
+                    montants, {key: {} for key in CUBE_KEYS}, recettes.get(projet_id, {}),
+                ))
+        finally:
+            conn.close()
+        return projects
+
+    @staticmethod
+    def _load_recettes(project_ids: Sequence[int]) -> Dict[int, Dict[int, Dict[str, float]]]:
+        """Recettes de tous les projets en une requête : projet -> {année: {mois: montant}}"""
+        recettes = defaultdict(lambda: defaultdict(dict))
+        if not project_ids:
+            return recettes
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"""SELECT projet_id, annee, mois, SUM(montant) FROM recettes
+                    WHERE projet_id IN ({', '.join('?' for _ in project_ids)})
+                    GROUP BY projet_id, annee, mois""",
+                list(project_ids),
+            )
+            for projet_id, annee, mois, montant in cursor.fetchall():
+                recettes[projet_id][annee][mois] = montant or 0
+        finally:
+            conn.close()
+        return recettes
+
+    # ------------------------------------------------------------------
+    # Agrégation
+    # ------------------------------------------------------------------
+    def _period(self, projects: Sequence[ProjectCube], annee: int, mois: Optional[int],
+                mois_actifs: Sequence[int]) -> Dict[str, float]:
+        """Lignes de collect_period_data pour une période, `mois_actifs` étant ceux de la sélection."""
+        data = {key: sum(projet.amount(key, annee, mois) for projet in projects) for key in CUBE_KEYS}
+        data['dotation_amortissements'] = sum(
+            amortissement_periode(projet.inputs, annee, mois) for projet in projects if projet.inputs)
+        data['subventions'] = sum(
+            subventions_periode(projet.montants, annee, mois, mois_actifs) for projet in projects)
+        data['recettes'] = sum(
+            _recettes_periode(projet.recettes.get(annee, {}), mois, mois_actifs) for projet in projects)
+        data['credit_impot'] = cir_periode(
+            [(projet.inputs, projet.montants) for projet in projects if projet.cir and projet.inputs],
+            self.coeffs_rows, annee, mois, mois_actifs)
+        return data
+
+    def period_data(self, projects: Sequence[ProjectCube], years: Sequence[int],
+                    granularity: str = "yearly") -> Dict[str, Dict[str, float]]:
+        """
+        Données par période au format de CompteResultatDisplay.collect_financial_data
+        ('MM/AAAA' sur les mois actifs de la sélection, ou 'AAAA').
+        """
+        data = {}
+        for annee in years:
+            mois_actifs = mois_selection(projects, annee)
+            if granularity == 'monthly':
+                for mois in mois_actifs:
+                    data[f"{mois:02d}/{annee}"] = self._period(projects, annee, mois, mois_actifs)
+            else:
+                data[str(annee)] = self._period(projects, annee, None, mois_actifs)
+        return data
+
+    def report(self, projects: Sequence[ProjectCube], years: Sequence[int],
+               granularity: str = "yearly") -> CompteResultatReport:
+        has_cir = any(projet.cir for projet in projects)
+        return CompteResultatReport.from_period_data(
+            self.period_data(projects, years, granularity), has_cir, self.cost_type)
+
+    @profiling.profiled("Pack de rapports (calcul)")
+    def reports(self, years: Sequence[int], granularity: str = "yearly") -> List[PackReport]:
+        """
+        Compte consolidé de tous les projets chargés s'il y en a plusieurs,
+        puis le compte de chaque projet sur les années demandées où il est
+        actif (projets hors période omis).
+        """
+        years = sorted(years)
+        reports = []
+        if len(self.projects) > 1:
+            reports.append(PackReport(CONSOLIDATED_LABEL, tuple(projet.projet_id for projet in self.projects),
+                                      tuple(years), self.report(self.projects, years, granularity)))
+        for projet in self.projects:
+            project_years = tuple(annee for annee in years if annee in projet.mois_actifs)
+            if project_years:
+                reports.append(PackReport(projet.label, (projet.projet_id,), project_years,
+                                          self.report([projet], project_years, granularity)))
+        return reports
+
+
+__all__ = [
+    "CONSOLIDATED_LABEL",
+    "PackReport",
+    "ProjectCube",
+    "ReportPackData",
+    "mois_selection",
+]
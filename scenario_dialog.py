@@ -0,0 +1,153 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton,
+    QComboBox, QMessageBox, QHeaderView
+)
+from PyQt6.QtCore import Qt
+
+from scenario_simulation import BASELINE, Scenario, SimulationSnapshot
+
+COST_TYPE_LABELS = (
+    ('Coût de production', 'cout_production'),
+    ('Coût complet', 'cout_complet'),
+    ('Montant chargé', 'montant_charge'),
+)
+
+SCENARIO_HEADERS = ['Nom', 'Variation des taux (%)', 'Année (vide : toutes)', 'K1', 'K2', 'K3',
+                    'Taux subventions (%)']
+RESULT_HEADERS = ['Scénario', 'Charges', 'Recettes', 'Subventions', 'CIR', 'Résultat', 'Écart / référence']
+
+
+def format_amount(value):
+    return f"{value:,.0f} €".replace(',', ' ')
+
+
+class ScenarioDialog(QDialog):
+    """
+    Simulations « et si » : chaque ligne du premier tableau décrit un scénario
+    (variation des taux journaliers, coefficients CIR, taux des subventions).
+    Les données sont chargées une fois à l'ouverture ; le calcul ne modifie
+    pas la base.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Simulations (taux, CIR, subventions)')
+        self.resize(1000, 650)
+        self.snapshot = None
+
+        layout = QVBoxLayout()
+
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel('Valorisation du temps :'))
+        self.cost_type_combo = QComboBox()
+        for label, cost_type in COST_TYPE_LABELS:
+            self.cost_type_combo.addItem(label, cost_type)
+        options_layout.addWidget(self.cost_type_combo)
+        options_layout.addStretch()
+        self.snapshot_label = QLabel()
+        options_layout.addWidget(self.snapshot_label)
+        btn_reload = QPushButton('Recharger les données')
+        btn_reload.clicked.connect(self.load_snapshot)
+        options_layout.addWidget(btn_reload)
+        layout.addLayout(options_layout)
+
+        layout.addWidget(QLabel('Scénarios (cellules vides : valeurs de la base)'))
+        self.scenario_table = QTableWidget(0, len(SCENARIO_HEADERS))
+        self.scenario_table.setHorizontalHeaderLabels(SCENARIO_HEADERS)
+        self.scenario_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.scenario_table)
+
+        btn_layout = QHBoxLayout()
+        btn_add = QPushButton('Ajouter un scénario')
+        btn_add.clicked.connect(lambda: self.add_scenario_row())
+        btn_del = QPushButton('Supprimer')
+        btn_del.clicked.connect(self.delete_scenario_rows)
+        btn_run = QPushButton('Calculer')
+        btn_run.clicked.connect(self.run_simulations)
+        btn_layout.addWidget(btn_add)
+        btn_layout.addWidget(btn_del)
+        btn_layout.addStretch()
+        btn_layout.addWidget(btn_run)
+        layout.addLayout(btn_layout)
+
+        self.result_table = QTableWidget(0, len(RESULT_HEADERS))
+        self.result_table.setHorizontalHeaderLabels(RESULT_HEADERS)
+        self.result_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.result_table)
+
+        btn_close = QPushButton('Fermer')
+        btn_close.clicked.connect(self.close)
+        close_layout = QHBoxLayout()
+        close_layout.addStretch()
+        close_layout.addWidget(btn_close)
+        layout.addLayout(close_layout)
+        self.setLayout(layout)
+
+        for nom, variation in (('Taux -5 %', '-5'), ('Taux +5 %', '5')):
+            self.add_scenario_row(nom, variation)
+        self.load_snapshot()
+
+    def load_snapshot(self):
+        self.snapshot = SimulationSnapshot()
+        self.snapshot_label.setText(f'{len(self.snapshot.projects)} projets chargés')
+
+    def add_scenario_row(self, nom='', variation=''):
+        row = self.scenario_table.rowCount()
+        self.scenario_table.insertRow(row)
+        values = [nom or f'Scénario {row + 1}', variation] + [''] * (len(SCENARIO_HEADERS) - 2)
+        for col, value in enumerate(values):
+            self.scenario_table.setItem(row, col, QTableWidgetItem(value))
+
+    def delete_scenario_rows(self):
+        rows = sorted({index.row() for index in self.scenario_table.selectedIndexes()}, reverse=True)
+        for row in rows:
+            self.scenario_table.removeRow(row)
+
+    def _cell(self, row, col, conversion=float):
+        item = self.scenario_table.item(row, col)
+        text = item.text().strip().replace(',', '.') if item else ''
+        if not text:
+            return None
+        try:
+            return conversion(text)
+        except ValueError:
+            raise ValueError(f"Ligne {row + 1}, colonne « {SCENARIO_HEADERS[col]} » : valeur invalide « {text} »")
+
+    def read_scenarios(self):
+        """Scénarios décrits dans le tableau, précédés de la référence."""
+        scenarios = [BASELINE]
+        for row in range(self.scenario_table.rowCount()):
+            item = self.scenario_table.item(row, 0)
+            nom = item.text().strip() if item and item.text().strip() else f'Scénario {row + 1}'
+            variation = self._cell(row, 1)
+            annee = self._cell(row, 2, int)
+            coeffs = (self._cell(row, 3), self._cell(row, 4), self._cell(row, 5))
+            taux_subvention = self._cell(row, 6)
+            scenarios.append(Scenario(
+                nom,
+                rate_factors={annee: 1 + variation / 100} if variation is not None else None,
+                cir_coeffs={annee: coeffs} if any(k is not None for k in coeffs) else None,
+                subvention_taux={None: taux_subvention} if taux_subvention is not None else None,
+            ))
+        return scenarios
+
+    def run_simulations(self):
+        try:
+            scenarios = self.read_scenarios()
+        except ValueError as e:
+            QMessageBox.warning(self, 'Simulations', str(e))
+            return
+        results = self.snapshot.simulate_many(scenarios, self.cost_type_combo.currentData())
+
+        reference = results[0].totals()['resultat']
+        self.result_table.setRowCount(len(results))
+        for row, result in enumerate(results):
+            totals = result.totals()
+            values = [totals['charges'], totals['recettes'], totals['subventions'], totals['cir'],
+                      totals['resultat'], totals['resultat'] - reference]
+            self.result_table.setItem(row, 0, QTableWidgetItem(result.scenario.nom))
+            for col, value in enumerate(values, start=1):
+                item = QTableWidgetItem(format_amount(value))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.result_table.setItem(row, col, item)
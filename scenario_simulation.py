@@ -0,0 +1,260 @@
+"""
+Simulations « et si » sur les taux journaliers, les coefficients CIR et les
+taux de subvention, sans écrire dans la base.
+
+Les données des projets sont chargées une fois dans un SimulationSnapshot ;
+chaque Scenario décrit des modifications appliquées en mémoire par-dessus
+ce chargement. simulate_many() recalcule le compte de résultat annuel et le
+CIR de chaque projet pour une liste de scénarios en réutilisant le même
+chargement, ce qui permet d'en comparer des dizaines en quelques instants.
+
+Les subventions sans dates propres gardent les montants annuels calculés
+au chargement (voir cir_calculation.load_cir_inputs) : un taux de
+subvention simulé s'y applique proportionnellement, les taux journaliers
+simulés ne les modifient pas.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from category_utils import COST_TYPES, get_cost_rates, resolve_category_code
+from cir_calculation import compute_cir_breakdown, load_cir_coeffs, load_cir_inputs
+from database import get_connection
+import profiling
+
+
+class Scenario(NamedTuple):
+    """
+    Modifications d'un scénario. Dans chaque dictionnaire, la clé None
+    s'applique à toutes les années (ou à toutes les subventions).
+    """
+    nom: str
+    # année -> multiplicateur des taux journaliers (1.05 : +5 %)
+    rate_factors: Optional[Dict[Optional[int], float]] = None
+    # (année, code de catégorie, type de coût) -> taux journalier remplaçant celui de la base
+    rates: Optional[Dict[Tuple[int, str, str], float]] = None
+    # année -> (k1, k2, k3), None pour conserver un coefficient
+    cir_coeffs: Optional[Dict[Optional[int], Tuple[Optional[float], Optional[float], Optional[float]]]] = None
+    # id de subvention -> taux (%) remplaçant celui de la base
+    subvention_taux: Optional[Dict[Optional[int], float]] = None
+
+
+BASELINE = Scenario("Référence")
+
+
+class ProjectData(NamedTuple):
+    projet_id: int
+    code: str
+    nom: str
+    cir: bool
+    # Données de cir_calculation.load_cir_inputs (catégories résolues en codes)
+    inputs: dict
+    # année -> montant
+    recettes: Dict[int, float]
+
+
+class ProjectResult(NamedTuple):
+    projet_id: int
+    code: str
+    nom: str
+    annees: List[int]
+    # Montants par année, dans l'ordre de annees
+    temps_travail: List[float]
+    depenses_externes: List[float]
+    autres_achats: List[float]
+    amortissements: List[float]
+    recettes: List[float]
+    subventions: List[float]
+    cir: List[float]
+
+    @property
+    def charges(self) -> float:
+        return sum(self.temps_travail) + sum(self.depenses_externes) + sum(self.autres_achats) + sum(self.amortissements)
+
+    @property
+    def produits(self) -> float:
+        return sum(self.recettes) + sum(self.subventions) + sum(self.cir)
+
+    @property
+    def resultat(self) -> float:
+        return self.produits - self.charges
+
+
+class ScenarioResult(NamedTuple):
+    scenario: Scenario
+    projets: List[ProjectResult]
+
+    def totals(self) -> Dict[str, float]:
+        """Totaux du scénario sur tous les projets."""
+        totals = {
+            "temps_travail": 0.0, "depenses_externes": 0.0, "autres_achats": 0.0,
+            "amortissements": 0.0, "recettes": 0.0, "subventions": 0.0, "cir": 0.0,
+        }
+        for projet in self.projets:
+            for key in totals:
+                totals[key] += sum(getattr(projet, key))
+        totals["charges"] = (totals["temps_travail"] + totals["depenses_externes"]
+                             + totals["autres_achats"] + totals["amortissements"])
+        totals["produits"] = totals["recettes"] + totals["subventions"] + totals["cir"]
+        totals["resultat"] = totals["produits"] - totals["charges"]
+        return totals
+
+
+class SimulationSnapshot:
+    """
+    Données des projets (temps, dépenses, dotations, subventions, recettes),
+    taux journaliers et coefficients CIR chargés une fois depuis la base.
+    """
+
+    def __init__(self, project_ids: Optional[Sequence[int]] = None) -> None:
+        self.rates: Dict[Tuple[int, str], Tuple[Optional[float], ...]] = dict(get_cost_rates())
+        self.projects: List[ProjectData] = []
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            self.coeffs_rows = load_cir_coeffs(cursor)
+            if project_ids is None:
+                cursor.execute("SELECT id, code, nom, cir FROM projets ORDER BY id")
+            else:
+                ids = list(project_ids)
+                cursor.execute(
+                    f"SELECT id, code, nom, cir FROM projets WHERE id IN ({', '.join('?' for _ in ids)}) ORDER BY id",
+                    ids,
+                )
+            for projet_id, code, nom, cir in cursor.fetchall():
+                inputs = load_cir_inputs(cursor, projet_id)
+                if inputs is None:
+                    continue
+                self._prepare_inputs(inputs)
+                cursor.execute(
+                    "SELECT annee, SUM(montant) FROM recettes WHERE projet_id = ? GROUP BY annee",
+                    (projet_id,),
+                )
+                recettes = {annee: float(total or 0) for annee, total in cursor.fetchall()}
+                self.projects.append(ProjectData(projet_id, str(code), str(nom), cir == 1, inputs, recettes))
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _prepare_inputs(inputs: dict) -> None:
+        # Catégories résolues une fois pour toutes les simulations
+        inputs['temps_travail'] = [
+            (annee, mois, membre_id, resolve_category_code(categorie), jours)
+            for annee, mois, membre_id, categorie, jours in inputs['temps_travail']
+        ]
+
+    # ------------------------------------------------------------------
+    # Application d'un scénario
+    # ------------------------------------------------------------------
+    def rate_function(self, scenario: Scenario, cost_type: str):
+        """Fonction (année, code) -> taux journalier du type de coût avec les modifications du scénario."""
+        index = COST_TYPES.index(cost_type)
+        overrides = scenario.rates or {}
+        factors = scenario.rate_factors or {}
+        factor_all = factors.get(None, 1.0)
+        cache = {}
+
+        def rate(annee, code):
+            key = (annee, code)
+            if key in cache:
+                return cache[key]
+            value = overrides.get((annee, code, cost_type))
+            if value is None:
+                base = self.rates.get(key)
+                value = base[index] if base else None
+            if value is not None:
+                value = value * factor_all * factors.get(annee, 1.0)
+            cache[key] = value
+            return value
+
+        return rate
+
+    def coeffs_for(self, scenario: Scenario) -> List[Tuple[int, float, float, float]]:
+        """Coefficients CIR par année avec les modifications du scénario."""
+        if not scenario.cir_coeffs:
+            return self.coeffs_rows
+        overrides = scenario.cir_coeffs
+
+        def apply(annee, coeffs):
+            for key in (None, annee):
+                if key in overrides:
+                    coeffs = tuple(base if new is None else new for base, new in zip(coeffs, overrides[key]))
+            return coeffs
+
+        rows = [(annee, *apply(annee, (k1, k2, k3))) for annee, k1, k2, k3 in self.coeffs_rows]
+        defaut = tuple(self.coeffs_rows[0][1:]) if self.coeffs_rows else (None, None, None)
+        annees = {row[0] for row in rows}
+        for annee, coeffs in overrides.items():
+            if annee is not None and annee not in annees:
+                rows.append((annee, *apply(annee, defaut)))
+        return rows
+
+    @staticmethod
+    def _subventions_for(scenario: Scenario, subventions: List[dict]) -> List[dict]:
+        overrides = scenario.subvention_taux
+        if not overrides:
+            return subventions
+        result = []
+        for data in subventions:
+            taux = overrides.get(data['id'], overrides.get(None))
+            result.append(data if taux is None else dict(data, taux=taux))
+        return result
+
+    def simulate(self, scenario: Scenario, cost_type: str = "cout_production") -> ScenarioResult:
+        """Compte de résultat annuel et CIR de chaque projet pour un scénario."""
+        cost_rate = self.rate_function(scenario, cost_type)
+        charge_rate = cost_rate if cost_type == "montant_charge" else self.rate_function(scenario, "montant_charge")
+        coeffs_rows = self.coeffs_for(scenario)
+
+        projets = []
+        for projet in self.projects:
+            inputs = projet.inputs
+            if scenario.subvention_taux:
+                inputs = dict(inputs, subventions=self._subventions_for(scenario, inputs['subventions']))
+            breakdown = compute_cir_breakdown(inputs, coeffs_rows, charge_rate)
+            annees = breakdown['annees']
+            position = {annee: i for i, annee in enumerate(annees)}
+
+            temps = [0.0] * len(annees)
+            for annee, _, _, code, jours in inputs['temps_travail']:
+                if annee in position:
+                    temps[position[annee]] += (jours or 0) * (cost_rate(annee, code) or 0)
+
+            def par_annee(rows):
+                totaux = [0.0] * len(annees)
+                for annee, _, montant in rows:
+                    if annee in position:
+                        totaux[position[annee]] += montant or 0
+                return totaux
+
+            projets.append(ProjectResult(
+                projet.projet_id, projet.code, projet.nom, annees,
+                temps,
+                par_annee(inputs['depenses']),
+                par_annee(inputs['autres_depenses']),
+                list(breakdown['amortissements_annuels']),
+                [projet.recettes.get(annee, 0.0) for annee in annees],
+                list(breakdown['subventions_annuelles']),
+                list(breakdown['cir_annuel']) if projet.cir else [0.0] * len(annees),
+            ))
+        return ScenarioResult(scenario, projets)
+
+    @profiling.profiled("Simulations")
+    def simulate_many(self, scenarios: Sequence[Scenario], cost_type: str = "cout_production") -> List[ScenarioResult]:
+        """Simule une liste de scénarios sur les mêmes données chargées."""
+        return [self.simulate(scenario, cost_type) for scenario in scenarios]
+
+
+def rate_sweep(nom: str, factors: Sequence[float], annee: Optional[int] = None) -> List[Scenario]:
+    """Scénarios faisant varier les taux journaliers (ex. 0.95, 1.0, 1.05) d'une année ou de toutes."""
+    return [Scenario(f"{nom} {factor * 100 - 100:+.0f} %", rate_factors={annee: factor}) for factor in factors]
+
+
+__all__ = [
+    "BASELINE",
+    "ProjectResult",
+    "Scenario",
+    "ScenarioResult",
+    "SimulationSnapshot",
+    "rate_sweep",
+]
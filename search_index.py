@@ -0,0 +1,134 @@
+import html
+import re
+import sqlite3
+from typing import List, NamedTuple
+
+from database import (
+    SEARCH_KIND_ACTUALITE, SEARCH_KIND_PROJET, SEARCH_KIND_TACHE, SEARCH_TABLE,
+    get_connection,
+)
+
+KIND_LABELS = {
+    SEARCH_KIND_PROJET: "Projet",
+    SEARCH_KIND_ACTUALITE: "Actualité",
+    SEARCH_KIND_TACHE: "Tâche",
+}
+
+# Marqueurs de surbrillance remplacés par des balises HTML après échappement
+_MARK_START, _MARK_END = "\x02", "\x03"
+
+# Pondération bm25 des colonnes (kind, projet_id, titre, contenu)
+_BM25_WEIGHTS = "0.0, 0.0, 10.0, 1.0"
+
+
+class SearchResult(NamedTuple):
+    kind: int
+    projet_id: int
+    code: str
+    nom: str
+    titre_html: str
+    extrait_html: str
+
+
+def build_match_query(text: str) -> str:
+    """
+    Convertit la saisie de l'utilisateur en requête FTS5 : chaque mot devient
+    un préfixe entre guillemets, tous les mots doivent être présents.
+    """
+    mots = re.findall(r"\w+", text or "")
+    return " ".join(f'"{mot}"*' for mot in mots)
+
+
+def _to_html(value: str) -> str:
+    texte = html.escape(value or "")
+    return texte.replace(_MARK_START, "<b>").replace(_MARK_END, "</b>")
+
+
+def search(text: str, limit: int = 50) -> List[SearchResult]:
+    """
+    Recherche plein texte dans les projets, actualités et tâches.
+    Les résultats sont classés par pertinence (bm25), titres et extraits
+    sont renvoyés en HTML avec les termes trouvés en gras.
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT f.kind, f.projet_id, p.code, p.nom,
+                       highlight({SEARCH_TABLE}, 2, ?, ?),
+                       snippet({SEARCH_TABLE}, 3, ?, ?, '…', 16)
+                FROM {SEARCH_TABLE} f
+                JOIN projets p ON p.id = f.projet_id
+                WHERE {SEARCH_TABLE} MATCH ?
+                ORDER BY bm25({SEARCH_TABLE}, {_BM25_WEIGHTS})
+                LIMIT ?
+            """, (_MARK_START, _MARK_END, _MARK_START, _MARK_END, match, limit))
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            # FTS5 indisponible : recherche simple sur les projets
+            motif = f"%{text.strip()}%"
+            cursor.execute("""
+                SELECT ?, id, code, nom, code || ' ' || nom, ''
+                FROM projets
+                WHERE code LIKE ? OR nom LIKE ? OR details LIKE ? OR livrables LIKE ?
+                ORDER BY id DESC
+                LIMIT ?
+            """, (SEARCH_KIND_PROJET, motif, motif, motif, motif, limit))
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    return [
+        SearchResult(kind, projet_id, code, nom, _to_html(titre), _to_html(extrait))
+        for kind, projet_id, code, nom, titre, extrait in rows
+    ]
+
+
+def search_project_ids(text: str) -> set:
+    """
+    Identifiants de tous les projets correspondant à la recherche, sans
+    limite : sert à filtrer la liste des projets, indépendamment du nombre
+    de résultats affichés par search().
+    """
+    match = build_match_query(text)
+    if not match:
+        return set()
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT DISTINCT projet_id FROM {SEARCH_TABLE}
+                WHERE {SEARCH_TABLE} MATCH ?
+            """, (match,))
+        except sqlite3.OperationalError:
+            motif = f"%{text.strip()}%"
+            cursor.execute("""
+                SELECT id FROM projets
+                WHERE code LIKE ? OR nom LIKE ? OR details LIKE ? OR livrables LIKE ?
+            """, (motif, motif, motif, motif))
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+
+def format_result_html(result: SearchResult) -> str:
+    """Libellé HTML d'un résultat pour la liste de recherche."""
+    label = KIND_LABELS.get(result.kind, "")
+    if result.kind == SEARCH_KIND_PROJET:
+        titre = result.titre_html
+    else:
+        titre = f"{html.escape(result.code)} – {result.titre_html or html.escape(result.nom)}"
+    ligne = f"<span style='color:#7f8c8d'>[{label}]</span> {titre}"
+    if result.extrait_html.strip():
+        ligne += f"<br><span style='color:#555'>{result.extrait_html}</span>"
+    return ligne
+
+
+__all__ = ["KIND_LABELS", "SearchResult", "build_match_query", "format_result_html", "search"]
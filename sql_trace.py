@@ -0,0 +1,263 @@
+"""
+Trace des requêtes SQL pour repérer les requêtes répétées (N+1) et lentes.
+
+Désactivé par défaut. Activé par l'option `--sql-trace` ou la variable
+d'environnement GESTION_BUDGET_SQL_TRACE=1, database.get_connection()
+ouvre alors des connexions instrumentées qui enregistrent pour chaque
+requête :
+- son texte normalisé (espaces réduits, littéraux remplacés par ?) ;
+- le nombre d'exécutions et le temps total/maximal (exécution + lecture
+  des lignes) ;
+- la fonction Python qui l'a émise (fichier, ligne, fonction).
+Les instructions imbriquées (triggers, tables internes de l'index de
+recherche), que SQLite signale à set_trace_callback préfixées par « -- »,
+sont comptées sans temps propre : il est inclus dans la requête qui les
+déclenche.
+
+Les statistiques sont consultables dans le panneau développeur
+(Ctrl+Maj+D dans la fenêtre principale) et écrites dans `sql_trace.log`
+à côté de la base de données à la fermeture de l'application.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+ENV_VAR = "GESTION_BUDGET_SQL_TRACE"
+CLI_FLAG = "--sql-trace"
+LOG_FILENAME = "sql_trace.log"
+# Nombre de requêtes listées dans le rapport texte
+TOP_QUERIES = 50
+
+# Fichier ignoré pour déterminer l'appelant d'une requête
+_THIS_FILE = os.path.abspath(__file__)
+
+_enabled = False
+# (requête normalisée, appelant) -> [nombre, temps total, temps max]
+_stats: Dict[Tuple[str, str], List[float]] = {}
+_started = time.perf_counter()
+
+
+class QueryStat(NamedTuple):
+    sql: str
+    caller: str
+    count: int
+    total_s: float
+    max_s: float
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def install(argv=None) -> bool:
+    """
+    Active la trace si elle est demandée (option de ligne de commande ou
+    variable d'environnement). Retourne True si la trace est active.
+    """
+    global _enabled
+    argv = sys.argv if argv is None else argv
+    if CLI_FLAG in argv:
+        argv.remove(CLI_FLAG)
+        _enabled = True
+    elif os.environ.get(ENV_VAR, "").strip() not in ("", "0"):
+        _enabled = True
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    """Active ou désactive la trace pour les connexions ouvertes ensuite."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def reset() -> None:
+    """Efface les statistiques (par exemple avant de rejouer une action)."""
+    global _started
+    _stats.clear()
+    _started = time.perf_counter()
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Ramène une requête à une forme canonique pour regrouper ses exécutions :
+    littéraux remplacés par ?, listes IN (?, ?, ...) réduites à (?...).
+    """
+    texte = _STRING_LITERAL.sub("?", sql)
+    texte = _NUMBER_LITERAL.sub("?", texte)
+    texte = _PLACEHOLDER_LIST.sub("(?...)", texte)
+    return _WHITESPACE.sub(" ", texte).strip()
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.abspath(code.co_filename)
+        if filename != _THIS_FILE and not filename.endswith("contextlib.py"):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _record(sql: str, duree: float, caller: str = None, normalize: bool = True) -> Tuple[str, str]:
+    texte = normalize_sql(sql) if normalize else _WHITESPACE.sub(" ", sql).strip()
+    key = (texte, caller or _caller())
+    stat = _stats.get(key)
+    if stat is None:
+        _stats[key] = [1, duree, duree]
+    else:
+        stat[0] += 1
+        stat[1] += duree
+        if duree > stat[2]:
+            stat[2] = duree
+    return key
+
+
+def _add_time(key, duree: float) -> None:
+    stat = _stats.get(key)
+    if stat is not None:
+        stat[1] += duree
+        if duree > stat[2]:
+            stat[2] = duree
+
+
+def _trace_callback(statement: str) -> None:
+    # Seules les instructions imbriquées sont comptées ici, les autres sont
+    # chronométrées par TracedCursor
+    if statement.startswith("--"):
+        # Déjà paramétrées : les noms de tables entre apostrophes sont conservés
+        _record(statement[2:], 0.0, "(imbriquée)", normalize=False)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Curseur qui chronomètre l'exécution et la lecture des résultats."""
+
+    _trace_key = None
+
+    def execute(self, sql, parameters=()):
+        debut = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._trace_key = _record(sql, time.perf_counter() - debut)
+
+    def executemany(self, sql, seq_of_parameters):
+        debut = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._trace_key = _record(sql, time.perf_counter() - debut)
+
+    def executescript(self, sql_script):
+        debut = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._trace_key = _record(sql_script, time.perf_counter() - debut)
+
+    def fetchone(self):
+        debut = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _add_time(self._trace_key, time.perf_counter() - debut)
+
+    def fetchmany(self, size=None):
+        debut = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            _add_time(self._trace_key, time.perf_counter() - debut)
+
+    def fetchall(self):
+        debut = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _add_time(self._trace_key, time.perf_counter() - debut)
+
+    def __next__(self):
+        debut = time.perf_counter()
+        try:
+            return super().__next__()
+        finally:
+            _add_time(self._trace_key, time.perf_counter() - debut)
+
+
+class TracedConnection(sqlite3.Connection):
+    """
+    Connexion dont tous les curseurs sont des TracedCursor, y compris ceux
+    créés implicitement par conn.execute().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_trace_callback)
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def connect(database: str) -> sqlite3.Connection:
+    """Ouvre une connexion instrumentée."""
+    return sqlite3.connect(database, factory=TracedConnection)
+
+
+def snapshot() -> List[QueryStat]:
+    """Statistiques courantes, triées par temps total décroissant."""
+    stats = [QueryStat(sql, caller, int(count), total, maximum)
+             for (sql, caller), (count, total, maximum) in _stats.items()]
+    stats.sort(key=lambda s: (s.total_s, s.count), reverse=True)
+    return stats
+
+
+def format_report(limit: int = TOP_QUERIES) -> str:
+    stats = snapshot()
+    total_count = sum(s.count for s in stats)
+    total_time = sum(s.total_s for s in stats)
+    lignes = [
+        "Trace SQL",
+        "=========",
+        f"{total_count} exécutions, {len(stats)} requêtes distinctes, "
+        f"{total_time * 1000:.1f} ms en SQL sur {(time.perf_counter() - _started):.1f} s",
+        "",
+        f"{'nombre':>8} {'total ms':>10} {'max ms':>8}  appelant / requête",
+    ]
+    for s in stats[:limit]:
+        lignes.append(f"{s.count:>8} {s.total_s * 1000:>10.1f} {s.max_s * 1000:>8.1f}  {s.caller}")
+        lignes.append(f"{'':>29}{s.sql}")
+    return "\n".join(lignes)
+
+
+def report(path=None) -> None:
+    """Écrit le rapport dans `path` (défaut : sql_trace.log à côté de la base)."""
+    if not _stats:
+        return
+    try:
+        if path is None:
+            from database import DB_FILE
+            path = DB_FILE.parent / LOG_FILENAME
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(format_report(limit=len(_stats)) + "\n")
+    except OSError as e:
+        if sys.stderr is not None:
+            print(f"Erreur lors de l'écriture de la trace SQL: {e}", file=sys.stderr)
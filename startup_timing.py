@@ -0,0 +1,136 @@
+"""
+Mesure du temps de démarrage de l'application.
+
+Désactivé par défaut. Activé par l'option `--startup-timing` ou la variable
+d'environnement GESTION_BUDGET_STARTUP_TIMING=1, il enregistre :
+- la durée des étapes du démarrage (imports, init_db, fenêtre principale,
+  premier affichage) ;
+- la durée d'import de chaque module (temps propre, hors sous-imports),
+  à la manière de `python -X importtime`, y compris dans l'exécutable
+  PyInstaller où cette option n'est pas disponible.
+
+Le rapport est écrit dans `startup_timing.log` à côté de la base de données
+(l'exécutable n'a pas de console) et signale un démarrage trop lent.
+"""
+
+import os
+import sys
+import time
+from importlib.abc import MetaPathFinder
+
+ENV_VAR = "GESTION_BUDGET_STARTUP_TIMING"
+CLI_FLAG = "--startup-timing"
+LOG_FILENAME = "startup_timing.log"
+# Objectif : fenêtre principale affichée en moins d'une seconde
+TARGET_SECONDS = 1.0
+# Nombre de modules les plus lents listés dans le rapport
+TOP_IMPORTS = 25
+
+_start = time.perf_counter()
+_enabled = False
+_steps = []      # [(libellé, secondes depuis le démarrage)]
+_imports = {}    # nom du module -> [temps propre, temps cumulé]
+_import_stack = []
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class _TimingLoader:
+    """Enveloppe un loader pour chronométrer l'exécution du module."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        name = module.__name__
+        _import_stack.append(0.0)
+        debut = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            cumul = time.perf_counter() - debut
+            enfants = _import_stack.pop()
+            if _import_stack:
+                _import_stack[-1] += cumul
+            _imports[name] = [cumul - enfants, cumul]
+
+
+class _TimingFinder(MetaPathFinder):
+    """Délègue la recherche aux autres finders et chronomètre le chargement."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader)
+                return spec
+        return None
+
+
+def install(argv=None) -> bool:
+    """
+    Active la mesure si elle est demandée. À appeler avant tout autre import
+    dans main.py. Retourne True si la mesure est active.
+    """
+    global _enabled
+    argv = sys.argv if argv is None else argv
+    if CLI_FLAG in argv:
+        argv.remove(CLI_FLAG)
+        _enabled = True
+    elif os.environ.get(ENV_VAR, "").strip() not in ("", "0"):
+        _enabled = True
+
+    if _enabled and not any(isinstance(f, _TimingFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _TimingFinder())
+    return _enabled
+
+
+def mark(label: str) -> None:
+    """Enregistre la fin d'une étape du démarrage."""
+    if _enabled:
+        _steps.append((label, time.perf_counter() - _start))
+
+
+def format_report() -> str:
+    lignes = ["Temps de démarrage", "=================="]
+    precedent = 0.0
+    for label, instant in _steps:
+        lignes.append(f"{instant * 1000:8.1f} ms  (+{(instant - precedent) * 1000:7.1f} ms)  {label}")
+        precedent = instant
+
+    total = _steps[-1][1] if _steps else 0.0
+    if total > TARGET_SECONDS:
+        lignes.append(f"ATTENTION : démarrage en {total:.2f} s (objectif < {TARGET_SECONDS:.1f} s)")
+
+    if _imports:
+        lignes += ["", f"Imports les plus lents (temps propre / cumulé, {len(_imports)} modules)"]
+        plus_lents = sorted(_imports.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (propre, cumul) in plus_lents[:TOP_IMPORTS]:
+            lignes.append(f"{propre * 1000:8.1f} ms  {cumul * 1000:8.1f} ms  {name}")
+    return "\n".join(lignes)
+
+
+def report() -> None:
+    """Écrit le rapport sur stderr (si disponible) et dans startup_timing.log."""
+    if not _enabled:
+        return
+    texte = format_report()
+    if sys.stderr is not None:
+        print(texte, file=sys.stderr)
+    try:
+        from database import DB_FILE
+        (DB_FILE.parent / LOG_FILENAME).write_text(texte + "\n", encoding="utf-8")
+    except OSError as e:
+        if sys.stderr is not None:
+            print(f"Erreur lors de l'écriture du rapport de démarrage: {e}", file=sys.stderr)
@@ -0,0 +1,508 @@
+"""
+Calcul des subventions d'un projet, sans dépendance à l'interface.
+
+Règle de SubventionDialog (qui expose calculate_distributed_subvention) :
+le montant d'une subvention est réparti sur la période demandée au prorata
+des dépenses éligibles, ou du nombre de mois en mode simplifié ; sans dates
+propres, la subvention couvre la période du projet.
+"""
+
+import datetime
+
+from category_utils import value_days
+from database import get_connection
+from month_utils import month_key
+import profiling
+
+
+@profiling.profiled("calculate_distributed_subvention")
+def calculate_distributed_subvention(project_id, subvention_data, target_year, target_month=None):
+    """
+    Calcule la subvention répartie proportionnellement aux dépenses éligibles de la période.
+    
+    Args:
+        project_id: ID du projet
+        subvention_data: Dictionnaire contenant toutes les données de la subvention
+        target_year: Année cible
+        target_month: Mois cible (optionnel, si None = toute l'année)
+        
+    Returns:
+        Montant de la subvention pour la période demandée
+    """
+    if not project_id or not subvention_data:
+        return 0
+        
+    conn = get_connection()
+    try:
+        return distributed_subvention(conn.cursor(), project_id, subvention_data, target_year, target_month)
+    finally:
+        conn.close()
+
+
+def distributed_subvention(cursor, project_id, subvention_data, target_year, target_month=None):
+    """Calcul de calculate_distributed_subvention sur un curseur déjà ouvert."""
+    try:
+        # 1. Récupérer les dates de début et fin de la subvention
+        date_debut_subv = subvention_data.get('date_debut_subvention')
+        date_fin_subv = subvention_data.get('date_fin_subvention')
+        
+        if not date_debut_subv or not date_fin_subv:
+            # Si pas de dates de subvention, utiliser les dates du projet
+            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id=?", (project_id,))
+            projet_dates = cursor.fetchone()
+            if not projet_dates or not projet_dates[0] or not projet_dates[1]:
+                return 0
+            date_debut_subv, date_fin_subv = projet_dates[0], projet_dates[1]
+        
+        # 2. Vérifier si la période cible est dans la période de subvention
+        try:
+            debut_subv = datetime.datetime.strptime(date_debut_subv, '%m/%Y')
+            fin_subv = datetime.datetime.strptime(date_fin_subv, '%m/%Y')
+            
+            if target_month:
+                # Vérification pour un mois spécifique
+                target_date = datetime.datetime(target_year, target_month, 1)
+                if target_date < debut_subv or target_date > fin_subv:
+                    return 0
+            else:
+                # Vérification pour une année
+                year_start = datetime.datetime(target_year, 1, 1)
+                year_end = datetime.datetime(target_year, 12, 1)
+                if year_end < debut_subv or year_start > fin_subv:
+                    return 0
+                    
+        except ValueError:
+            return 0
+        
+        # 3. Calculer le montant total de la subvention selon le mode
+        if subvention_data.get('mode_simplifie', 0):
+            # MODE SIMPLIFIÉ : Répartir temporellement le montant forfaitaire
+            montant_total_subvention = float(subvention_data.get('montant_forfaitaire', 0))
+            
+            if montant_total_subvention <= 0:
+                return 0
+            
+            # Calculer le nombre total de mois de la période de subvention
+            try:
+                debut_subv = datetime.datetime.strptime(date_debut_subv, '%m/%Y')
+                fin_subv = datetime.datetime.strptime(date_fin_subv, '%m/%Y')
+                
+                total_mois_subvention = (fin_subv.year - debut_subv.year) * 12 + (fin_subv.month - debut_subv.month) + 1
+                
+                # Déterminer combien de mois de la période cible sont dans la période de subvention
+                if target_month:
+                    # Un seul mois demandé
+                    target_date = datetime.datetime(target_year, target_month, 1)
+                    if debut_subv <= target_date <= fin_subv:
+                        mois_couverts = 1
+                    else:
+                        return 0
+                else:
+                    # Toute l'année demandée : compter les mois couverts
+                    mois_couverts = 0
+                    for mois in range(1, 13):
+                        mois_date = datetime.datetime(target_year, mois, 1)
+                        if debut_subv <= mois_date <= fin_subv:
+                            mois_couverts += 1
+                    
+                    if mois_couverts == 0:
+                        return 0
+                
+                # Répartir proportionnellement au nombre de mois
+                proportion = mois_couverts / total_mois_subvention
+                montant_reparti = montant_total_subvention * proportion
+                
+                return montant_reparti
+                
+            except (ValueError, ZeroDivisionError):
+                return 0
+            
+        else:
+            # MODE DÉTAILLÉ : Répartir proportionnellement aux dépenses éligibles
+            montant_total_subvention = _calculate_detailed_subvention_amount(
+                cursor, project_id, subvention_data
+            )
+            
+            if montant_total_subvention <= 0:
+                return 0
+            
+            # 4. Calculer les dépenses éligibles totales de la subvention
+            depenses_eligibles_totales = _calculate_total_eligible_expenses(
+                cursor, project_id, subvention_data, date_debut_subv, date_fin_subv
+            )
+            
+            if depenses_eligibles_totales <= 0:
+                return 0
+            
+            # 5. Calculer les dépenses éligibles de la période cible
+            depenses_eligibles_periode = _calculate_period_eligible_expenses(
+                cursor, project_id, subvention_data, target_year, target_month
+            )
+            
+            # 6. Calculer la proportion et retourner le montant réparti
+            proportion = depenses_eligibles_periode / depenses_eligibles_totales
+            montant_reparti = montant_total_subvention * proportion
+            
+            return montant_reparti
+        
+    except Exception as e:
+        return 0
+
+
+def _calculate_detailed_subvention_amount(cursor, project_id, subvention_data):
+    """Calcule le montant total de subvention en mode détaillé sur la période de subvention uniquement"""
+    
+    # Récupérer les dates de début et fin de la subvention
+    date_debut_subv = subvention_data.get('date_debut_subvention')
+    date_fin_subv = subvention_data.get('date_fin_subvention')
+    
+    if not date_debut_subv or not date_fin_subv:
+        # Si pas de dates de subvention, utiliser les dates du projet
+        cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id=?", (project_id,))
+        projet_dates = cursor.fetchone()
+        if not projet_dates or not projet_dates[0] or not projet_dates[1]:
+            return 0
+        date_debut_subv, date_fin_subv = projet_dates[0], projet_dates[1]
+    
+    try:
+        debut_subv = datetime.datetime.strptime(date_debut_subv, '%m/%Y')
+        fin_subv = datetime.datetime.strptime(date_fin_subv, '%m/%Y')
+    except ValueError:
+        return 0
+    
+    # Calculer les dépenses éligibles sur la période de subvention seulement
+    depenses_eligibles_totales = _calculate_period_eligible_expenses_range(
+        cursor, project_id, subvention_data, date_debut_subv, date_fin_subv
+    )
+    
+    # Appliquer le taux de subvention
+    montant = depenses_eligibles_totales * (subvention_data.get('taux', 100) / 100)
+    
+    return montant
+
+
+def _calculate_total_eligible_expenses(cursor, project_id, subvention_data, debut_subv, fin_subv):
+    """Calcule les dépenses éligibles totales sur la période de subvention uniquement"""
+    
+    # Calculer les dépenses éligibles sur la période de subvention
+    return _calculate_period_eligible_expenses_range(
+        cursor, project_id, subvention_data, debut_subv, fin_subv
+    )
+
+
+def _calculate_period_eligible_expenses(cursor, project_id, subvention_data, target_year, target_month):
+    """Calcule les dépenses éligibles pour une période spécifique, limitée à la période de subvention"""
+    depenses_periode = 0
+    
+    # Récupérer les dates de début et fin de la subvention
+    date_debut_subv = subvention_data.get('date_debut_subvention')
+    date_fin_subv = subvention_data.get('date_fin_subvention')
+    
+    if not date_debut_subv or not date_fin_subv:
+        # Si pas de dates de subvention, utiliser les dates du projet
+        cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id=?", (project_id,))
+        projet_dates = cursor.fetchone()
+        if not projet_dates or not projet_dates[0] or not projet_dates[1]:
+            return 0
+        date_debut_subv, date_fin_subv = projet_dates[0], projet_dates[1]
+    
+    try:
+        debut_subv = datetime.datetime.strptime(date_debut_subv, '%m/%Y')
+        fin_subv = datetime.datetime.strptime(date_fin_subv, '%m/%Y')
+    except ValueError:
+        return 0
+    
+    # Déterminer si on est dans la période de subvention
+    if target_month:
+        # Cas d'un mois spécifique
+        target_date = datetime.datetime(target_year, target_month, 1)
+        if target_date < debut_subv or target_date > fin_subv:
+            return 0  # Le mois n'est pas dans la période de subvention
+    else:
+        # Cas d'une année complète : vérifier qu'au moins un mois est couvert
+        mois_couverts = []
+        for mois in range(1, 13):
+            mois_date = datetime.datetime(target_year, mois, 1)
+            if debut_subv <= mois_date <= fin_subv:
+                mois_couverts.append(mois)
+        
+        if not mois_couverts:
+            return 0  # Aucun mois de l'année n'est couvert par la subvention
+    
+    # CALCUL MENSUEL (un seul mois)
+    if target_month:
+        periode = month_key(target_year, target_month)
+        
+        # 1. Temps de travail pour ce mois
+        if subvention_data.get('depenses_temps_travail', 0):
+            cursor.execute("""
+                SELECT tt.annee, tt.categorie, SUM(tt.jours)
+                FROM temps_travail tt
+                WHERE tt.projet_id = ? AND tt.periode = ?
+                GROUP BY tt.annee, tt.categorie
+            """, (project_id, periode))
+            
+            montant_brut = value_days(cursor.fetchall())
+            if montant_brut:
+                montant_avec_cd = montant_brut * subvention_data.get('cd', 1)
+                montant_final = montant_avec_cd * subvention_data.get('coef_temps_travail', 1)
+                depenses_periode += montant_final
+        
+        # 2. Dépenses externes pour ce mois (avec redistribution automatique)
+        if subvention_data.get('depenses_externes', 0):
+            montant_reparti = _get_redistributed_monthly_amount(
+                cursor, project_id, target_year, target_month, 'depenses', debut_subv, fin_subv
+            )
+            if montant_reparti > 0:
+                # Utiliser le montant réparti
+                montant_final = montant_reparti * subvention_data.get('coef_externes', 1)
+                depenses_periode += montant_final
+            else:
+                # Calcul normal pour ce mois
+                cursor.execute("""
+                    SELECT SUM(montant)
+                    FROM depenses 
+                    WHERE projet_id = ? AND periode = ?
+                """, (project_id, periode))
+                
+                result = cursor.fetchone()
+                if result and result[0]:
+                    montant_brut = float(result[0])
+                    montant_final = montant_brut * subvention_data.get('coef_externes', 1)
+                    depenses_periode += montant_final
+        
+        # 3. Autres achats pour ce mois (avec redistribution automatique)
+        if subvention_data.get('depenses_autres_achats', 0):
+            montant_reparti = _get_redistributed_monthly_amount(
+                cursor, project_id, target_year, target_month, 'autres_depenses', debut_subv, fin_subv
+            )
+            if montant_reparti > 0:
+                # Utiliser le montant réparti
+                montant_final = montant_reparti * subvention_data.get('coef_autres_achats', 1)
+                depenses_periode += montant_final
+            else:
+                # Calcul normal pour ce mois
+                cursor.execute("""
+                    SELECT SUM(montant)
+                    FROM autres_depenses 
+                    WHERE projet_id = ? AND periode = ?
+                """, (project_id, periode))
+                
+                result = cursor.fetchone()
+                if result and result[0]:
+                    montant_brut = float(result[0])
+                    montant_final = montant_brut * subvention_data.get('coef_autres_achats', 1)
+                    depenses_periode += montant_final
+    
+    # CALCUL ANNUEL (tous les mois de l'année dans la période de subvention)
+    else:
+        # 1. Temps de travail pour tous les mois couverts (mois contigus : une seule plage)
+        if subvention_data.get('depenses_temps_travail', 0):
+            cursor.execute("""
+                SELECT tt.annee, tt.categorie, SUM(tt.jours)
+                FROM temps_travail tt
+                WHERE tt.projet_id = ? AND tt.periode BETWEEN ? AND ?
+                GROUP BY tt.annee, tt.categorie
+            """, (project_id, month_key(target_year, mois_couverts[0]),
+                  month_key(target_year, mois_couverts[-1])))
+            
+            montant_brut = value_days(cursor.fetchall())
+            if montant_brut:
+                montant_avec_cd = montant_brut * subvention_data.get('cd', 1)
+                montant_final = montant_avec_cd * subvention_data.get('coef_temps_travail', 1)
+                depenses_periode += montant_final
+        
+        # 2. Dépenses externes pour toute l'année (avec redistribution automatique)
+        if subvention_data.get('depenses_externes', 0):
+            montant_redistribue = _check_and_redistribute_single_expense(
+                cursor, project_id, target_year, 'depenses', debut_subv, fin_subv, 
+                subvention_data.get('coef_externes', 1)
+            )
+            depenses_periode += montant_redistribue
+        
+        # 3. Autres achats pour toute l'année (avec redistribution automatique)
+        if subvention_data.get('depenses_autres_achats', 0):
+            montant_redistribue = _check_and_redistribute_single_expense(
+                cursor, project_id, target_year, 'autres_depenses', debut_subv, fin_subv, 
+                subvention_data.get('coef_autres_achats', 1)
+            )
+            depenses_periode += montant_redistribue
+    
+    # Amortissements si cochés (calcul au prorata de la période de subvention)
+    if subvention_data.get('depenses_dotation_amortissements', 0):
+        # Récupérer le total des amortissements pour le projet
+        cursor.execute("""
+            SELECT SUM(montant) FROM investissements WHERE projet_id = ?
+        """, (project_id,))
+        
+        result = cursor.fetchone()
+        if result and result[0]:
+            amort_brut = float(result[0])
+            # Appliquer le coefficient
+            amort_total = amort_brut * subvention_data.get('coef_dotation_amortissements', 1)
+            
+            # Calculer la part d'amortissement pour les mois couverts par la subvention
+            # Récupérer les dates du projet pour calculer le nombre total de mois
+            cursor.execute("SELECT date_debut, date_fin FROM projets WHERE id=?", (project_id,))
+            projet_dates = cursor.fetchone()
+            if projet_dates and projet_dates[0] and projet_dates[1]:
+                try:
+                    debut_projet = datetime.datetime.strptime(projet_dates[0], '%m/%Y')
+                    fin_projet = datetime.datetime.strptime(projet_dates[1], '%m/%Y')
+                    nb_mois_total_projet = (fin_projet.year - debut_projet.year) * 12 + (fin_projet.month - debut_projet.month) + 1
+                    
+                    if nb_mois_total_projet > 0:
+                        # Part mensuelle des amortissements
+                        amort_mensuel = amort_total / nb_mois_total_projet
+                        if target_month:
+                            # Cas mensuel : ajouter l'amortissement pour 1 mois
+                            depenses_periode += amort_mensuel
+                        else:
+                            # Cas annuel : ajouter l'amortissement pour tous les mois couverts
+                            depenses_periode += amort_mensuel * len(mois_couverts)
+                except ValueError:
+                    pass
+    
+    return depenses_periode
+
+
+def _calculate_period_eligible_expenses_range(cursor, project_id, subvention_data, debut_date_str, fin_date_str):
+    """Calcule les dépenses éligibles sur une plage de dates"""
+    import datetime
+    
+    try:
+        # Convertir les chaînes de dates en objets datetime
+        debut_date = datetime.datetime.strptime(debut_date_str, '%m/%Y')
+        fin_date = datetime.datetime.strptime(fin_date_str, '%m/%Y')
+    except (ValueError, TypeError):
+        return 0
+    
+    # Pour simplifier, on fait la somme des mois dans la plage
+    total = 0
+    current_date = debut_date.replace(day=1)
+    
+    while current_date <= fin_date:
+        montant_mois = _calculate_period_eligible_expenses(
+            cursor, project_id, subvention_data, current_date.year, current_date.month
+        )
+        total += montant_mois
+        
+        # Passer au mois suivant
+        if current_date.month == 12:
+            current_date = current_date.replace(year=current_date.year + 1, month=1)
+        else:
+            current_date = current_date.replace(month=current_date.month + 1)
+    
+    return total
+
+
+def _check_and_redistribute_single_expense(cursor, project_id, target_year, table_name, debut_subv, fin_subv, coefficient):
+    """
+    Vérifie s'il n'y a qu'une seule dépense dans l'année pour le projet.
+    Si c'est le cas, la répartit sur tous les mois actifs du projet dans cette année.
+    
+    Args:
+        cursor: Curseur de base de données
+        project_id: ID du projet
+        target_year: Année cible
+        table_name: Nom de la table ('depenses' ou 'autres_depenses')
+        debut_subv: Date de début de subvention
+        fin_subv: Date de fin de subvention
+        coefficient: Coefficient à appliquer
+        
+    Returns:
+        Montant réparti sur la période, ou 0 si pas de répartition
+    """
+    # Récupérer toutes les dépenses de l'année pour ce projet
+    cursor.execute(f"""
+        SELECT mois, SUM(montant) as total_montant
+        FROM {table_name}
+        WHERE projet_id = ? AND annee = ?
+        GROUP BY mois
+    """, (project_id, target_year))
+    
+    depenses_par_mois = cursor.fetchall()
+    
+    # Si pas de dépenses ou plus d'une entrée par mois, pas de répartition automatique
+    if len(depenses_par_mois) != 1:
+        return 0
+    
+    # Il y a exactement une dépense dans l'année
+    mois_unique, montant_total = depenses_par_mois[0]
+    
+    # Calculer les mois actifs du projet dans cette année (limités par la période de subvention)
+    mois_actifs = []
+    for mois in range(1, 13):
+        mois_date = datetime.datetime(target_year, mois, 1)
+        if debut_subv <= mois_date <= fin_subv:
+            mois_actifs.append(mois)
+    
+    if not mois_actifs:
+        return 0
+    
+    # Répartir le montant sur tous les mois actifs
+    montant_par_mois = montant_total / len(mois_actifs)
+    montant_total_reparti = montant_par_mois * len(mois_actifs)
+    
+    # Appliquer le coefficient
+    return montant_total_reparti * coefficient
+
+
+def _get_redistributed_monthly_amount(cursor, project_id, target_year, target_month, table_name, debut_subv, fin_subv):
+    """
+    Retourne le montant mensuel réparti si une dépense unique est détectée dans l'année.
+    Sinon retourne 0 (calcul normal).
+    
+    Args:
+        cursor: Curseur de base de données
+        project_id: ID du projet
+        target_year: Année cible
+        target_month: Mois cible (1-12)
+        table_name: Nom de la table ('depenses' ou 'autres_depenses')
+        debut_subv: Date de début de subvention
+        fin_subv: Date de fin de subvention
+        
+    Returns:
+        Montant mensuel réparti, ou 0 si pas de répartition
+    """
+    # Récupérer toutes les dépenses de l'année pour ce projet
+    cursor.execute(f"""
+        SELECT mois, SUM(montant) as total_montant
+        FROM {table_name}
+        WHERE projet_id = ? AND annee = ?
+        GROUP BY mois
+    """, (project_id, target_year))
+    
+    depenses_par_mois = cursor.fetchall()
+    
+    # Si pas de dépenses ou plus d'une entrée par mois, pas de répartition automatique
+    if len(depenses_par_mois) != 1:
+        return 0
+    
+    # Il y a exactement une dépense dans l'année
+    mois_unique, montant_total = depenses_par_mois[0]
+    
+    # Calculer les mois actifs du projet dans cette année (limités par la période de subvention)
+    mois_actifs = []
+    for mois in range(1, 13):
+        mois_date = datetime.datetime(target_year, mois, 1)
+        if debut_subv <= mois_date <= fin_subv:
+            mois_actifs.append(mois)
+    
+    if not mois_actifs or target_month not in mois_actifs:
+        return 0
+    
+    # Vérifier que le mois cible est dans la période active
+    target_date = datetime.datetime(target_year, target_month, 1)
+    if not (debut_subv <= target_date <= fin_subv):
+        return 0
+    
+    # Répartir le montant sur tous les mois actifs et retourner la part du mois demandé
+    montant_par_mois = montant_total / len(mois_actifs)
+    return montant_par_mois
+
+
+__all__ = [
+    "calculate_distributed_subvention",
+    "distributed_subvention",
+]
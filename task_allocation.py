@@ -0,0 +1,199 @@
+"""
+Répartition du budget d'un projet entre ses tâches, mois par mois, sans
+dépendance à l'interface.
+
+Le budget d'une tâche (pourcentage_budget du coût total du projet) est
+réparti sur les mois de la tâche au prorata des coûts mensuels du projet
+(temps de travail au coût chargé, dépenses externes et autres achats, avec
+les règles de redistribution de cir_calculation), ou à parts égales si le
+projet n'a aucun coût sur ces mois. La matrice tâches × mois est stockée
+ligne par ligne dans un seul vecteur de flottants (array 'd').
+
+get_task_allocation() garde la dernière matrice de chaque projet : elle
+n'est recalculée que si les tâches ou la version des données chiffrées du
+projet (voir database.projet_versions) ont changé.
+"""
+
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from category_utils import get_cost_rate
+from cir_calculation import (
+    depenses_mensuelles, load_cir_inputs, mois_actifs_par_annee, mois_entre, temps_travail_mensuel
+)
+from database import GLOBAL_VERSION_ID, get_connection
+import profiling
+
+
+class Task(NamedTuple):
+    id: int
+    nom: str
+    date_debut: str
+    date_fin: str
+    pourcentage_budget: float
+
+
+def load_tasks(cursor, projet_id) -> List[Task]:
+    cursor.execute(
+        'SELECT id, nom, date_debut, date_fin, pourcentage_budget FROM taches WHERE projet_id=? ORDER BY id',
+        (projet_id,),
+    )
+    return [Task(id_, nom or '', date_debut or '', date_fin or '', float(pourcentage or 0))
+            for id_, nom, date_debut, date_fin, pourcentage in cursor.fetchall()]
+
+
+def repartition_automatique(rows: Sequence[Tuple[int, float]]) -> List[Tuple[float, int]]:
+    """
+    Complète la répartition des tâches à 0 % : le reste jusqu'à 100 % est
+    partagé entre elles, la dernière absorbant l'arrondi.
+    `rows` : (id, pourcentage) ; retourne les (pourcentage, id) à écrire.
+    """
+    total = sum(pourcentage for _, pourcentage in rows if pourcentage > 0)
+    zeros = [task_id for task_id, pourcentage in rows if pourcentage == 0]
+    reste = 100 - total
+    if not zeros or reste <= 0:
+        return []
+    if len(zeros) == 1:
+        return [(reste, zeros[0])]
+    part = round(reste / len(zeros), 2)
+    # Pour la dernière tâche, ajuste pour arriver à 100 % pile
+    part_finale = round(100 - (total + part * (len(zeros) - 1)), 2)
+    return [(part, task_id) for task_id in zeros[:-1]] + [(part_finale, zeros[-1])]
+
+
+def _index_mois(date_str: str) -> Optional[int]:
+    """Index annee * 12 + mois - 1 d'une date MM/AAAA, None si invalide."""
+    try:
+        mois, annee = date_str.split('/')
+        return int(annee) * 12 + int(mois) - 1
+    except (AttributeError, ValueError):
+        return None
+
+
+class TaskAllocation:
+    """
+    Budget des tâches d'un projet par mois : mois du projet (colonnes),
+    tâches (lignes), coûts mensuels du projet et matrice des montants.
+    """
+
+    __slots__ = ("months", "tasks", "costs", "spans", "_values")
+
+    def __init__(self, months: Sequence[Tuple[int, int]], tasks: Sequence[Task], costs: array) -> None:
+        self.months = tuple(months)
+        self.tasks = tuple(tasks)
+        self.costs = memoryview(costs).toreadonly()
+        width = len(self.months)
+        total = sum(costs)
+        premier = self.months[0][0] * 12 + self.months[0][1] - 1 if self.months else 0
+
+        # Colonnes (début, fin) de chaque tâche dans le projet, None hors projet
+        spans = []
+        values = array('d', bytes(8 * width * len(self.tasks)))
+        for row, task in enumerate(self.tasks):
+            debut, fin = _index_mois(task.date_debut), _index_mois(task.date_fin)
+            if debut is None or fin is None:
+                spans.append(None)
+                continue
+            debut, fin = max(debut - premier, 0), min(fin - premier, width - 1)
+            if debut > fin:
+                spans.append(None)
+                continue
+            spans.append((debut, fin))
+            budget = total * task.pourcentage_budget / 100
+            poids = sum(costs[debut:fin + 1])
+            offset = row * width
+            for col in range(debut, fin + 1):
+                values[offset + col] = (budget * costs[col] / poids if poids > 0
+                                        else budget / (fin - debut + 1))
+        self.spans = tuple(spans)
+        self._values = memoryview(values).toreadonly()
+
+    def is_active(self, row: int, column: int) -> bool:
+        """Vrai si la tâche couvre le mois."""
+        span = self.spans[row]
+        return span is not None and span[0] <= column <= span[1]
+
+    def amount(self, row: int, column: int) -> float:
+        return self._values[row * len(self.months) + column]
+
+    def share(self, row: int, column: int) -> float:
+        """Part (%) du coût du mois affectée à la tâche."""
+        cost = self.costs[column]
+        return self.amount(row, column) * 100 / cost if cost > 0 else 0.0
+
+    def task_total(self, row: int) -> float:
+        width = len(self.months)
+        return sum(self._values[row * width:(row + 1) * width])
+
+    @property
+    def total_cost(self) -> float:
+        return sum(self.costs)
+
+
+def _data_versions(cursor, projet_id) -> Tuple[int, int]:
+    """Versions des données chiffrées du projet et des paramètres communs."""
+    cursor.execute(
+        'SELECT projet_id, version FROM projet_versions WHERE projet_id IN (?, ?)',
+        (projet_id, GLOBAL_VERSION_ID),
+    )
+    versions = dict(cursor.fetchall())
+    return versions.get(projet_id, 0), versions.get(GLOBAL_VERSION_ID, 0)
+
+
+def compute_task_allocation(cursor, projet_id, tasks: Sequence[Task]) -> Optional[TaskAllocation]:
+    """Répartition du budget des tâches ; None si les dates du projet sont invalides."""
+    inputs = load_cir_inputs(cursor, projet_id)
+    if inputs is None:
+        return None
+    months = mois_entre(inputs['debut'], inputs['fin'])
+    mois_actifs = mois_actifs_par_annee(months)
+    temps = temps_travail_mensuel(
+        inputs['temps_travail'], mois_actifs, lambda annee, categorie: get_cost_rate(annee, categorie))
+    depenses = depenses_mensuelles(inputs['depenses'], mois_actifs)
+    autres = depenses_mensuelles(inputs['autres_depenses'], mois_actifs)
+    costs = array('d', (temps.get(cle, 0.0) + depenses.get(cle, 0.0) + autres.get(cle, 0.0) for cle in months))
+    return TaskAllocation(months, tasks, costs)
+
+
+# projet_id -> (clé de validité, répartition)
+_cache: Dict[int, Tuple[tuple, Optional[TaskAllocation]]] = {}
+
+
+@profiling.profiled("Répartition des tâches")
+def get_task_allocation(projet_id) -> Optional[TaskAllocation]:
+    """
+    Répartition du budget des tâches du projet, recalculée seulement si les
+    tâches ou les données chiffrées ont changé depuis le dernier appel.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        tasks = load_tasks(cursor, projet_id)
+        key = (_data_versions(cursor, projet_id), tuple(tasks))
+        cached = _cache.get(projet_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        allocation = compute_task_allocation(cursor, projet_id, tasks)
+    finally:
+        conn.close()
+    _cache[projet_id] = (key, allocation)
+    return allocation
+
+
+def invalidate_task_allocation(projet_id=None) -> None:
+    """Oublie la répartition d'un projet (ou de tous), par exemple après un changement de base."""
+    if projet_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(projet_id, None)
+
+
+__all__ = [
+    "Task",
+    "TaskAllocation",
+    "compute_task_allocation",
+    "get_task_allocation",
+    "invalidate_task_allocation",
+    "load_tasks",
+    "repartition_automatique",
+]
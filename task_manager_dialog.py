@@ -1,29 +1,87 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QHBoxLayout, QMessageBox, QInputDialog, QDateEdit, QTextEdit, QDialogButtonBox, QLabel, QLineEdit, QDoubleSpinBox
-from PyQt6.QtCore import QDate
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QHBoxLayout, QMessageBox, QInputDialog, QDateEdit, QTextEdit, QDialogButtonBox, QLabel, QLineEdit, QDoubleSpinBox, QTabWidget, QTableView, QHeaderView
+from PyQt6.QtCore import QAbstractTableModel, QDate, QModelIndex, Qt
+from PyQt6.QtGui import QColor, QFont
 
+from bilan_jours_report import MONTH_ABBREVIATIONS
+from compte_resultat_report import format_currency
 from database import get_connection
+from task_allocation import get_task_allocation, repartition_automatique
+
+
+class TaskTimelineModel(QAbstractTableModel):
+    """
+    Planning des tâches (TaskAllocation) : une ligne par tâche puis la ligne
+    du coût mensuel du projet, une colonne par mois du projet. Les mois
+    couverts par une tâche sont colorés et affichent son budget du mois.
+    """
+
+    BAR_COLOR = QColor("#aed6f1")
+    COST_ROW_COLOR = QColor("#ecf0f1")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._allocation = None
+        self._bold_font = QFont("Arial", 9, QFont.Weight.Bold)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._allocation is None:
+            return 0
+        return len(self._allocation.tasks) + 1
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._allocation is None:
+            return 0
+        return len(self._allocation.months)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self._allocation is None:
+            return None
+        allocation = self._allocation
+        row, col = index.row(), index.column()
+        cost_row = row == len(allocation.tasks)
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if cost_row:
+                return format_currency(allocation.costs[col])
+            return format_currency(allocation.amount(row, col)) if allocation.is_active(row, col) else ""
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if cost_row:
+                return self.COST_ROW_COLOR
+            return self.BAR_COLOR if allocation.is_active(row, col) else None
+        if role == Qt.ItemDataRole.ToolTipRole and not cost_row and allocation.is_active(row, col):
+            return f"{allocation.share(row, col):.1f} % du coût du mois"
+        if role == Qt.ItemDataRole.FontRole and cost_row:
+            return self._bold_font
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or self._allocation is None:
+            return None
+        allocation = self._allocation
+        if orientation == Qt.Orientation.Horizontal:
+            annee, mois = allocation.months[section]
+            return f"{MONTH_ABBREVIATIONS[mois - 1]} {annee}"
+        if section == len(allocation.tasks):
+            return "Coût du projet"
+        task = allocation.tasks[section]
+        return f"{task.nom} ({format_currency(allocation.task_total(section))} €)"
+
+    def set_allocation(self, allocation):
+        self.beginResetModel()
+        self._allocation = allocation
+        self.endResetModel()
+
 
 class TaskManagerDialog(QDialog):
     def repartir_budget_automatiquement(self):
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute('SELECT id, pourcentage_budget FROM taches WHERE projet_id=?', (self.projet_id,))
-        rows = cursor.fetchall()
-        total = sum([row[1] for row in rows if row[1] > 0])
-        zeros = [row[0] for row in rows if row[1] == 0]
-        reste = 100 - total
-        if zeros and reste > 0:
-            if len(zeros) == 1:
-                cursor.execute('UPDATE taches SET pourcentage_budget=? WHERE id=?', (reste, zeros[0]))
-            else:
-                part = round(reste / len(zeros), 2)
-                for i, task_id in enumerate(zeros):
-                    # Pour la dernière tâche, ajuste pour arriver à 100% pile
-                    if i == len(zeros) - 1:
-                        part_finale = round(100 - (total + part * (len(zeros) - 1)), 2)
-                        cursor.execute('UPDATE taches SET pourcentage_budget=? WHERE id=?', (part_finale, task_id))
-                    else:
-                        cursor.execute('UPDATE taches SET pourcentage_budget=? WHERE id=?', (part, task_id))
+        updates = repartition_automatique(cursor.fetchall())
+        if updates:
+            cursor.executemany('UPDATE taches SET pourcentage_budget=? WHERE id=?', updates)
             conn.commit()
         conn.close()
         self.load_tasks()
@@ -38,7 +96,16 @@ class TaskManagerDialog(QDialog):
         self.table.setHorizontalHeaderLabels([
             "Nom de la tâche", "Date de début", "Date de fin", "Détails", "% du budget"])
         self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)  # Tableau non éditable
-        layout.addWidget(self.table)
+        # Planning : budget des tâches mois par mois, au prorata des coûts du projet
+        self.timeline_model = TaskTimelineModel(self)
+        self.timeline = QTableView()
+        self.timeline.setModel(self.timeline_model)
+        self.timeline.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.table, "Tâches")
+        self.tabs.addTab(self.timeline, "Planning")
+        self.tabs.currentChanged.connect(self.refresh_timeline)
+        layout.addWidget(self.tabs)
         btn_hbox = QHBoxLayout()
         add_btn = QPushButton('Ajouter une tâche')
         edit_btn = QPushButton('Modifier')
@@ -58,55 +125,7 @@ class TaskManagerDialog(QDialog):
         conn = get_connection()
         cursor = conn.cursor()
         
-        # Vérifier la structure actuelle de la table taches
-        cursor.execute("PRAGMA table_info(taches)")
-        columns = cursor.fetchall()
-        column_names = [col[1] for col in columns]
-        
-        # Migration nécessaire si on a l'ancienne structure
-        needs_migration = False
-        if 'description' in column_names and 'details' not in column_names:
-            needs_migration = True
-        elif 'pourcentage_budget' not in column_names:
-            needs_migration = True
-            
-        if needs_migration:
-            print("Migration de la base de données en cours...")
-            # Créer la nouvelle table avec la structure correcte
-            cursor.execute('''CREATE TABLE IF NOT EXISTS taches_new (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                projet_id INTEGER,
-                nom TEXT,
-                date_debut TEXT,
-                date_fin TEXT,
-                details TEXT,
-                pourcentage_budget REAL DEFAULT 0
-            )''')
-            
-            # Copier les données existantes
-            if 'description' in column_names:
-                # Migration depuis l'ancienne structure avec description
-                cursor.execute("""
-                    INSERT INTO taches_new (id, projet_id, nom, date_debut, date_fin, details, pourcentage_budget)
-                    SELECT id, projet_id, nom, date_debut, date_fin, 
-                           COALESCE(description, '') as details, 0 as pourcentage_budget
-                    FROM taches
-                """)
-            else:
-                # Migration pour ajouter seulement pourcentage_budget
-                cursor.execute("""
-                    INSERT INTO taches_new (id, projet_id, nom, date_debut, date_fin, details, pourcentage_budget)
-                    SELECT id, projet_id, nom, date_debut, date_fin, 
-                           COALESCE(details, '') as details, 0 as pourcentage_budget
-                    FROM taches
-                """)
-            
-            # Supprimer l'ancienne table et renommer la nouvelle
-            cursor.execute("DROP TABLE taches")
-            cursor.execute("ALTER TABLE taches_new RENAME TO taches")
-            conn.commit()
-            print("Migration terminée avec succès.")
-        
+        # La structure de la table taches est migrée par init_db()
         cursor.execute('SELECT id, nom, date_debut, date_fin, details, pourcentage_budget FROM taches WHERE projet_id=?', (self.projet_id,))
         self.task_ids = []
         for row_idx, (id_, nom, date_debut, date_fin, details, pourcentage_budget) in enumerate(cursor.fetchall()):
@@ -119,6 +138,18 @@ class TaskManagerDialog(QDialog):
             self.table.setItem(row_idx, 4, QTableWidgetItem(str(pourcentage_budget) if pourcentage_budget is not None else ""))
             self.task_ids.append(id_)
         conn.close()
+        self.refresh_timeline()
+
+    def refresh_timeline(self, _index=None):
+        """Met à jour le planning s'il est affiché (répartition recalculée seulement si tâches ou coûts ont changé)"""
+        if self.tabs.currentWidget() is not self.timeline:
+            return
+        allocation = get_task_allocation(self.projet_id)
+        self.timeline_model.set_allocation(allocation)
+        if allocation is None:
+            self.timeline.setToolTip("Dates du projet absentes ou invalides : planning indisponible.")
+        else:
+            self.timeline.setToolTip("")
     def get_total_pourcentage_budget(self):
         conn = get_connection()
         cursor = conn.cursor()